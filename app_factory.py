@@ -3,12 +3,29 @@ Dependency Injection Factory
 کارخانه تزریق وابستگی
 """
 
+import os
+from functools import partial
+
 from src.application import VoiceToTextApplication
+from src.services.audio_chunker import AudioChunker
 from src.services.audio_file_service import AudioFileService
+from src.services.audio_preprocessor import AudioPreprocessor
 from src.services.configuration_service import ConfigurationService
-from src.services.gemini_analyzer import GeminiAnalyzer
+from src.services.gemini_analyzer import MAX_CHUNK_WORKERS, GeminiAnalyzer
+from src.services.persistent_queue import PersistentJobQueue
 from src.services.prompt_provider import PersianPromptProvider
+from src.services.rate_limiter import RateLimiter
 from src.services.report_generator import MarkdownReportGenerator
+from src.services.result_cache import ResultCache
+from src.services.result_store import SQLiteResultStore
+from src.services.retry_policy import RetryPolicy
+from src.services.run_journal import RunJournal
+from src.services.scan_index import ScanIndex
+from src.services.scheduling_policy import create_scheduling_policy
+from src.services.sharding import ShardSelector
+from src.services.silence_trimmer import SilenceTrimmer
+from src.services.upload_registry import UploadRegistry
+from src.services.worker_pool import WorkerPool
 
 
 class ApplicationFactory:
@@ -16,7 +33,28 @@ class ApplicationFactory:
 
     @staticmethod
     def create_application(
-        api_key: str = None, model_name: str = None, language: str = "persian"
+        api_key: str = None,
+        model_name: str = None,
+        language: str = "persian",
+        max_workers: int = 1,
+        pipelined: bool = False,
+        cache_dir: str = None,
+        incremental: bool = False,
+        requests_per_minute: float = None,
+        tokens_per_minute: float = None,
+        max_attempts: int = 3,
+        resume: bool = False,
+        preprocess_audio: bool = False,
+        trim_silence: bool = False,
+        compress_pauses: bool = False,
+        chunk_minutes: float = 0,
+        scheduling: str = "fifo",
+        stream_output: bool = False,
+        shard: str = None,
+        prompt_cache_minutes: float = 0,
+        structured_output: bool = False,
+        results_db: str = None,
+        max_concurrency: int = 0,
     ) -> VoiceToTextApplication:
         """
         Create a fully configured VoiceToTextApplication instance
@@ -25,6 +63,34 @@ class ApplicationFactory:
             api_key: Gemini API key (optional, will use default if not provided)
             model_name: Gemini model name (optional, will use default if not provided)
             language: Language for prompts ("persian" or "english")
+            max_workers: Number of files analyzed concurrently (1 = sequential)
+            pipelined: Overlap uploads of upcoming files with generation
+            cache_dir: Folder for persistent caches (optional, disabled if None)
+            incremental: Only process files added or changed since the last run
+            requests_per_minute: Gemini request quota to stay under (optional)
+            tokens_per_minute: Gemini token quota to stay under (optional)
+            max_attempts: Tries per API call on transient errors (1 = no retries)
+            resume: Journal progress so an interrupted run continues where it stopped
+            preprocess_audio: Convert audio to 16 kHz mono Opus before uploading
+            trim_silence: Cut leading and trailing silence before uploading
+            compress_pauses: Also shorten long pauses inside trimmed recordings
+            chunk_minutes: Split longer recordings into segments of about this
+                many minutes and analyze them concurrently (0 = off)
+            scheduling: Order of processing: "fifo", "longest-first" (shortest
+                batch with several workers) or "shortest-first" (earliest results)
+            stream_output: Write each report while the model is still generating
+                it (not used in pipelined mode)
+            shard: This node's share of a folder shared by several nodes, as
+                "i/N" (optional, all files if not provided)
+            prompt_cache_minutes: Keep the analysis prompt in a Gemini context
+                cache for this many minutes, extended while in use (0 = off)
+            structured_output: Request JSON following the prompt's response
+                schema and parse it into typed fields of each result
+            results_db: SQLite file that every result is also recorded in,
+                for queries across runs (optional, reports only if None)
+            max_concurrency: Ceiling of concurrent API requests that adaptive
+                concurrency ramps up to while requests succeed (0 = as many
+                as the worker and segment threads can issue)
 
         Returns:
             VoiceToTextApplication: Configured application instance
@@ -41,9 +107,70 @@ class ApplicationFactory:
             prompt_provider = PersianPromptProvider()
 
         # Create services with dependency injection
-        audio_service = AudioFileService(config_service)
-        ai_analyzer = GeminiAnalyzer(config_service, prompt_provider)
+        scan_index = None
+        if incremental:
+            scan_index = ScanIndex(
+                os.path.join(cache_dir or ".cache", "scan_index.json")
+            )
+        audio_service = AudioFileService(config_service, scan_index=scan_index)
+        result_cache = None
+        upload_registry = None
+        if cache_dir:
+            result_cache = ResultCache(os.path.join(cache_dir, "results"))
+            upload_registry = UploadRegistry(os.path.join(cache_dir, "uploads.sqlite"))
+        run_journal = None
+        if resume:
+            run_journal = RunJournal(
+                os.path.join(cache_dir or ".cache", "run_journal.jsonl")
+            )
+        preprocessor = None
+        if preprocess_audio:
+            preprocessor = AudioPreprocessor(
+                os.path.join(cache_dir or ".cache", "preprocessed"),
+                max_workers=max_workers,
+            )
+        silence_trimmer = None
+        if trim_silence:
+            silence_trimmer = SilenceTrimmer(
+                os.path.join(cache_dir or ".cache", "trimmed"),
+                compress_pauses=compress_pauses,
+            )
+        chunker = None
+        if chunk_minutes:
+            chunker = AudioChunker(
+                os.path.join(cache_dir or ".cache", "chunks"),
+                chunk_seconds=chunk_minutes * 60,
+            )
+        # Adaptive concurrency starts at the worker count, ramps up to the
+        # ceiling while requests succeed and backs off on 429s
+        concurrency_ceiling = max_concurrency or max_workers * (
+            MAX_CHUNK_WORKERS if chunk_minutes else 1
+        )
+        rate_limiter = None
+        if requests_per_minute or tokens_per_minute or concurrency_ceiling > 1:
+            rate_limiter = RateLimiter(
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute,
+                max_concurrency=concurrency_ceiling,
+                initial_concurrency=max_workers,
+            )
+        ai_analyzer = GeminiAnalyzer(
+            config_service,
+            prompt_provider,
+            result_cache=result_cache,
+            upload_registry=upload_registry,
+            rate_limiter=rate_limiter,
+            retry_policy=RetryPolicy(max_attempts) if max_attempts > 1 else None,
+            run_journal=run_journal,
+            preprocessor=preprocessor,
+            silence_trimmer=silence_trimmer,
+            chunker=chunker,
+            prompt_cache_ttl=prompt_cache_minutes * 60,
+            structured_output=structured_output,
+        )
         report_generator = MarkdownReportGenerator()
+        if results_db:
+            report_generator = SQLiteResultStore(results_db, report_generator)
 
         # Create and return the application
         return VoiceToTextApplication(
@@ -51,6 +178,48 @@ class ApplicationFactory:
             ai_analyzer=ai_analyzer,
             report_generator=report_generator,
             config_service=config_service,
+            max_workers=max_workers,
+            pipelined=pipelined,
+            incremental=incremental,
+            run_journal=run_journal,
+            scheduling_policy=create_scheduling_policy(scheduling),
+            stream_reports=stream_output,
+            shard_selector=ShardSelector.from_spec(shard) if shard else None,
+        )
+
+    @staticmethod
+    def create_worker_pool(
+        processes: int, lease_seconds: float = 120, **application_options
+    ) -> WorkerPool:
+        """
+        Create a pool of worker processes, each with its own application
+
+        Args:
+            processes: Number of worker processes
+            lease_seconds: How long a job stays invisible to other workers
+                without a heartbeat before it is retried
+            **application_options: Arguments for ``create_application``
+
+        Returns:
+            WorkerPool: Pool for ``process_audio_files_in_workers``
+        """
+        options = dict(application_options)
+        # Request quotas are per API key, so split them between the processes
+        for quota in ("requests_per_minute", "tokens_per_minute"):
+            if options.get(quota):
+                options[quota] = options[quota] / processes
+        # The run journal and scan index belong to the coordinating process
+        options.update(resume=False, incremental=False, shard=None)
+
+        cache_dir = options.get("cache_dir") or ".cache"
+        job_queue = PersistentJobQueue(
+            os.path.join(cache_dir, "job_queue.sqlite3"),
+            visibility_timeout=lease_seconds,
+        )
+        return WorkerPool(
+            job_queue,
+            partial(ApplicationFactory.create_application, **options),
+            processes=processes,
         )
 
     @staticmethod
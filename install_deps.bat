@@ -5,6 +5,8 @@ pip install --trusted-host pypi.org --trusted-host pypi.python.org --trusted-hos
 
 pip install --trusted-host pypi.org --trusted-host pypi.python.org --trusted-host files.pythonhosted.org google-generativeai
 
+pip install --trusted-host pypi.org --trusted-host pypi.python.org --trusted-host files.pythonhosted.org numpy
+
 pip install --trusted-host pypi.org --trusted-host pypi.python.org --trusted-host files.pythonhosted.org pytest
 
 echo Dependencies installation completed.
@@ -23,6 +23,32 @@ def main():
     API_KEY = os.getenv("GEMINI_API_KEY")
     ASSETS_FOLDER = "assets"
     LANGUAGE = "persian"  # or "english"
+    MAX_WORKERS = int(os.getenv("MAX_WORKERS", "1"))
+    PIPELINED = os.getenv("PIPELINED", "false").lower() == "true"
+    CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+    INCREMENTAL = os.getenv("INCREMENTAL", "false").lower() == "true"
+    WATCH = os.getenv("WATCH", "false").lower() == "true"
+    RESUME = os.getenv("RESUME", "true").lower() == "true"
+    PREPROCESS_AUDIO = os.getenv("PREPROCESS_AUDIO", "false").lower() == "true"
+    TRIM_SILENCE = os.getenv("TRIM_SILENCE", "false").lower() == "true"
+    COMPRESS_PAUSES = os.getenv("COMPRESS_PAUSES", "false").lower() == "true"
+    CHUNK_MINUTES = float(os.getenv("CHUNK_MINUTES", "0"))
+    SCHEDULING = os.getenv("SCHEDULING", "fifo")
+    STREAM_OUTPUT = os.getenv("STREAM_OUTPUT", "false").lower() == "true"
+    SERVE = os.getenv("SERVE", "false").lower() == "true"
+    SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+    SERVER_QUEUE_SIZE = int(os.getenv("SERVER_QUEUE_SIZE", "16"))
+    SHARD = os.getenv("SHARD", "")
+    PROMPT_CACHE_MINUTES = float(os.getenv("PROMPT_CACHE_MINUTES", "0"))
+    STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "false").lower() == "true"
+    RESULTS_DB = os.getenv("RESULTS_DB", "")
+    WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "0"))
+    LEASE_SECONDS = float(os.getenv("LEASE_SECONDS", "120"))
+    REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "0"))
+    TOKENS_PER_MINUTE = float(os.getenv("GEMINI_TOKENS_PER_MINUTE", "0"))
+    MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "3"))
+    MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "0"))
 
     if not API_KEY:
         print("❌ خطا: متغیر محیطی GEMINI_API_KEY تنظیم نشده است")
@@ -38,7 +64,30 @@ def main():
     try:
         # Create application using dependency injection
         print("🔧 در حال راه‌اندازی سرویس‌ها...")
-        app = ApplicationFactory.create_application(api_key=API_KEY, language=LANGUAGE)
+        options = dict(
+            api_key=API_KEY,
+            language=LANGUAGE,
+            max_workers=MAX_WORKERS,
+            pipelined=PIPELINED,
+            cache_dir=CACHE_DIR,
+            incremental=INCREMENTAL,
+            requests_per_minute=REQUESTS_PER_MINUTE,
+            tokens_per_minute=TOKENS_PER_MINUTE,
+            max_attempts=MAX_ATTEMPTS,
+            max_concurrency=MAX_CONCURRENCY,
+            resume=RESUME and not SERVE,
+            preprocess_audio=PREPROCESS_AUDIO,
+            trim_silence=TRIM_SILENCE,
+            compress_pauses=COMPRESS_PAUSES,
+            chunk_minutes=CHUNK_MINUTES,
+            scheduling=SCHEDULING,
+            stream_output=STREAM_OUTPUT,
+            shard=SHARD or None,
+            prompt_cache_minutes=PROMPT_CACHE_MINUTES,
+            structured_output=STRUCTURED_OUTPUT,
+            results_db=RESULTS_DB or None,
+        )
+        app = ApplicationFactory.create_application(**options)
 
         # Validate configuration
         print("🔍 بررسی پیکربندی...")
@@ -48,9 +97,33 @@ def main():
 
         print("✅ پیکربندی معتبر است")
 
+        if SERVE:
+            # Accept recordings over HTTP instead of processing the folder
+            from src.services.job_server import JobServer
+
+            JobServer(
+                app,
+                host=SERVER_HOST,
+                port=SERVER_PORT,
+                workers=MAX_WORKERS,
+                max_queued=SERVER_QUEUE_SIZE,
+                allowed_folder=ASSETS_FOLDER,
+            ).serve_forever()
+            return
+
         # Process audio files
         print(f"\n🎯 شروع پردازش فایل‌ها از پوشه: {ASSETS_FOLDER}")
-        results = app.process_audio_files(ASSETS_FOLDER)
+        if WATCH:
+            # Keep running and analyze new recordings as they arrive
+            results = app.watch_audio_files(ASSETS_FOLDER)
+        elif WORKER_PROCESSES > 0:
+            # Analyze in separate processes fed by a persistent job queue
+            worker_pool = ApplicationFactory.create_worker_pool(
+                WORKER_PROCESSES, lease_seconds=LEASE_SECONDS, **options
+            )
+            results = app.process_audio_files_in_workers(ASSETS_FOLDER, worker_pool)
+        else:
+            results = app.process_audio_files(ASSETS_FOLDER)
 
         # Display final summary
         app.print_final_summary(results)
@@ -4,14 +4,46 @@ Voice to Text Analyzer Package
 """
 
 from .application import VoiceToTextApplication
-from .models import AnalysisResult, AudioFile
+from .models import (
+    AnalysisResult,
+    AudioChunk,
+    AudioFile,
+    AudioMetadata,
+    Job,
+    ScanDelta,
+    StructuredAnalysis,
+    TimelineDataset,
+    TimelineMap,
+)
 from .services import (
+    AudioChunker,
     AudioFileService,
+    AudioMetadataProber,
+    AudioPreprocessor,
     ConfigurationService,
     EnglishPromptProvider,
+    FifoPolicy,
     GeminiAnalyzer,
+    JobQueue,
+    JobServer,
+    LongestFirstPolicy,
     MarkdownReportGenerator,
     PersianPromptProvider,
+    PersistentJobQueue,
+    PromptCache,
+    RateLimiter,
+    ResultCache,
+    RetryPolicy,
+    RunJournal,
+    ScanIndex,
+    ShardResultStore,
+    ShardSelector,
+    ShortestFirstPolicy,
+    SilenceTrimmer,
+    SQLiteResultStore,
+    TranscriptParser,
+    UploadRegistry,
+    WorkerPool,
 )
 
 __version__ = "2.0.0"
@@ -21,11 +53,40 @@ __description__ = "A modular voice to text analyzer using Gemini AI"
 __all__ = [
     "VoiceToTextApplication",
     "AudioFile",
+    "AudioChunk",
+    "AudioMetadata",
     "AnalysisResult",
+    "Job",
+    "ScanDelta",
+    "StructuredAnalysis",
+    "TimelineDataset",
+    "TimelineMap",
     "ConfigurationService",
     "PersianPromptProvider",
     "EnglishPromptProvider",
+    "AudioChunker",
     "AudioFileService",
+    "AudioMetadataProber",
+    "AudioPreprocessor",
     "GeminiAnalyzer",
+    "JobQueue",
+    "JobServer",
     "MarkdownReportGenerator",
+    "PersistentJobQueue",
+    "PromptCache",
+    "RateLimiter",
+    "ResultCache",
+    "RetryPolicy",
+    "RunJournal",
+    "ScanIndex",
+    "SQLiteResultStore",
+    "FifoPolicy",
+    "LongestFirstPolicy",
+    "ShortestFirstPolicy",
+    "ShardResultStore",
+    "ShardSelector",
+    "SilenceTrimmer",
+    "TranscriptParser",
+    "UploadRegistry",
+    "WorkerPool",
 ]
@@ -3,16 +3,22 @@ Voice to Text Application
 اپلیکیشن تبدیل صدا به متن
 """
 
+import asyncio
 import os
-from typing import List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from src.interfaces import (
     IAIAnalyzer,
     IAudioFileService,
     IConfigurationService,
     IReportGenerator,
+    ISchedulingPolicy,
 )
 from src.models import AnalysisResult, AudioFile
+from src.services.sharding import ShardResultStore, ShardSelector
+from src.utils.async_helpers import run_blocking
 
 
 class VoiceToTextApplication:
@@ -24,25 +30,152 @@ class VoiceToTextApplication:
         ai_analyzer: IAIAnalyzer,
         report_generator: IReportGenerator,
         config_service: IConfigurationService,
+        max_workers: int = 1,
+        pipelined: bool = False,
+        incremental: bool = False,
+        run_journal=None,
+        scheduling_policy: Optional[ISchedulingPolicy] = None,
+        stream_reports: bool = False,
+        shard_selector: Optional[ShardSelector] = None,
     ):
         self._audio_service = audio_service
         self._ai_analyzer = ai_analyzer
         self._report_generator = report_generator
         self._config_service = config_service
+        self._max_workers = max(1, int(max_workers or 1))
+        self._pipelined = pipelined
+        self._incremental = incremental
+        self._run_journal = run_journal
+        self._scheduling_policy = scheduling_policy
+        self._stream_reports = stream_reports
+        self._shard_selector = shard_selector
+        self._print_lock = threading.Lock()
 
     def process_audio_files(
         self, assets_folder: str, output_folder: str = "results"
     ) -> List[AnalysisResult]:
         """Process all audio files in the assets folder"""
+        audio_files = self._collect_audio_files(assets_folder)
+        if not audio_files:
+            return []
+
+        results = self._process_batch(audio_files, output_folder)
+        self._finish_run(results, output_folder)
+        return results
+
+    async def process_audio_files_async(
+        self,
+        assets_folder: str,
+        output_folder: str = "results",
+        max_concurrency: Optional[int] = None,
+    ) -> List[AnalysisResult]:
+        """Process all audio files in the assets folder from a coroutine
+
+        Files are analyzed with ``analyze_audio_async`` as tasks on the running
+        event loop instead of worker threads, so ``max_concurrency`` (default:
+        ``max_workers``) can be far larger than a thread pool would allow.
+        Folder scanning, duration probing, report writing and the run
+        journal run on the default executor. Reports are not streamed in this
+        mode. With a rate limiter, requests in flight are also capped by its
+        concurrency ceiling (``max_concurrency`` of ``create_application``).
+        """
+        audio_files = await run_blocking(self._collect_audio_files, assets_folder)
+        if not audio_files:
+            return []
+
+        limit = max(1, int(max_concurrency or self._max_workers))
+        if self._run_journal is None:
+            results = await self._analyze_batch_async(audio_files, output_folder, limit)
+        else:
+            restored, remaining = await run_blocking(
+                self._restore_journaled, audio_files, output_folder
+            )
+            processed = await self._analyze_batch_async(remaining, output_folder, limit)
+            results = await run_blocking(
+                self._merge_journaled, audio_files, restored, processed
+            )
+
+        await run_blocking(self._finish_run, results, output_folder)
+        return results
+
+    def process_audio_files_in_workers(
+        self, assets_folder: str, worker_pool, output_folder: str = "results"
+    ) -> List[AnalysisResult]:
+        """Process all audio files in the assets folder with worker processes
 
+        ``worker_pool`` (a WorkerPool) analyzes the files in separate
+        processes; this process only scans the folder, queues the files in
+        scheduled order and writes the summary report.
+        """
+        audio_files = self._collect_audio_files(assets_folder)
+        if not audio_files:
+            return []
+
+        scheduled = self._schedule(audio_files)
+        processed = worker_pool.process(scheduled, output_folder)
+        by_file = {id(audio_file): r for audio_file, r in zip(scheduled, processed)}
+        results = [by_file[id(audio_file)] for audio_file in audio_files]
+
+        self._finish_run(results, output_folder)
+        return results
+
+    def process_audio_file(
+        self, file_path: str, output_folder: str = "results"
+    ) -> AnalysisResult:
+        """Analyze a single recording and save its report; never raises"""
+        audio_file = self._audio_service.create_audio_file(file_path)
+        return self._process_single_file(audio_file, 1, 1, output_folder)
+
+    def close(self) -> None:
+        """Write results the report generator still buffers
+
+        Call when a long-running process (folder watch, job server, worker)
+        stops; batch runs write everything with the summary report.
+        """
+        self._report_generator.close()
+
+    def is_supported_file(self, file_path: str) -> bool:
+        """Check if a path has a supported audio extension"""
+        return self._audio_service.is_supported_file(file_path)
+
+    def get_service_stats(self) -> dict:
+        """Get the analyzer's rate limit, cache and pre-processing counters"""
+        stats = {}
+        for name in ("rate_limit", "cache", "prompt_cache", "preprocessing"):
+            getter = getattr(self._ai_analyzer, f"get_{name}_stats", None)
+            stats[name] = getter() if getter is not None else None
+        return stats
+
+    def _collect_audio_files(self, assets_folder: str) -> List[AudioFile]:
+        """Find the files to process: all of them, or the changes since last run"""
         voice_folder = os.path.join(assets_folder, "voice")
 
         if not os.path.exists(voice_folder):
             print(f"❌ پوشه صدا پیدا نشد: {voice_folder}")
             return []
 
-        # Find audio files
-        audio_files = self._audio_service.find_audio_files(voice_folder)
+        # Find audio files, or only those changed since the last run
+        if self._incremental:
+            delta = self._audio_service.scan_changes(voice_folder)
+            print(
+                f"🔁 تغییرات از اجرای قبل: {len(delta.added)} جدید، "
+                f"{len(delta.modified)} تغییر یافته، {len(delta.deleted)} حذف شده، "
+                f"{len(delta.unchanged)} بدون تغییر"
+            )
+            audio_files = delta.changed
+            if not audio_files:
+                self._audio_service.commit_scan()
+                print("✅ فایل جدید یا تغییر یافته‌ای برای پردازش وجود ندارد")
+                return []
+        else:
+            audio_files = self._audio_service.find_audio_files(voice_folder)
+
+        if self._shard_selector is not None and audio_files:
+            audio_files = self._select_shard(audio_files, voice_folder)
+            if not audio_files:
+                if self._incremental:
+                    self._audio_service.commit_scan()
+                return []
 
         if not audio_files:
             print("❌ هیچ فایل صوتی در پوشه پیدا نشد!")
@@ -53,46 +186,367 @@ class VoiceToTextApplication:
             print(f"  📄 {audio_file.file_name}")
 
         print(f"\n🚀 شروع پردازش فایل‌ها...")
+        return audio_files
+
+    def _finish_run(self, results: List[AnalysisResult], output_folder: str) -> None:
+        """Commit the incremental scan and write the summary report"""
+        # Remember processed files; failed ones are picked up again next run
+        if self._incremental:
+            self._audio_service.commit_scan(
+                [r.audio_file.file_path for r in results if not r.is_successful]
+            )
+
+        # Create summary report
+        if results:
+            self._write_summary(results, output_folder)
+
+    def _select_shard(
+        self, audio_files: List[AudioFile], voice_folder: str
+    ) -> List[AudioFile]:
+        """Keep the files assigned to this node"""
+        selector = self._shard_selector
+        selected = selector.select(audio_files, voice_folder)
+        print(
+            f"🧩 شارد {selector.index}/{selector.count}: "
+            f"{len(selected)} از {len(audio_files)} فایل به این گره تعلق دارد"
+        )
+        return selected
+
+    def _write_summary(self, results: List[AnalysisResult], output_folder: str) -> None:
+        """Write the summary report, merged with the other nodes' when sharded"""
+        if self._shard_selector is not None:
+            store = ShardResultStore(os.path.join(output_folder, "shards"))
+            store.save(self._shard_selector, results)
+            results, missing = store.load(self._shard_selector.count)
+            if missing:
+                shards = ", ".join(str(shard) for shard in missing)
+                print(f"⏳ نتایج شاردهای {shards} هنوز در خلاصه نیامده است")
+        self._report_generator.create_summary_report(results, output_folder)
+
+    def watch_audio_files(
+        self,
+        assets_folder: str,
+        output_folder: str = "results",
+        poll_interval: float = 2.0,
+        settle_seconds: float = 3.0,
+        stop_event: Optional[threading.Event] = None,
+    ) -> List[AnalysisResult]:
+        """Process existing files, then keep analyzing new recordings as they land
+
+        Runs until ``stop_event`` is set or the process is interrupted. The
+        summary report is refreshed after every batch of new files.
+        """
+        from src.services.folder_watcher import FolderWatcher
+
+        voice_folder = os.path.join(assets_folder, "voice")
+        os.makedirs(voice_folder, exist_ok=True)
+
+        # Start watching before the catch-up run so nothing lands unseen
+        watcher = FolderWatcher(
+            self._audio_service,
+            voice_folder,
+            poll_interval=poll_interval,
+            settle_seconds=settle_seconds,
+        )
+        watcher.mark_existing()
+
+        results = self.process_audio_files(assets_folder, output_folder)
+
+        mode = "inotify" if watcher.uses_inotify else "polling"
+        print(f"\n👀 در حال پایش پوشه {voice_folder} ({mode})...")
+
+        def on_ready(audio_files: List[AudioFile]) -> None:
+            if self._shard_selector is not None:
+                audio_files = self._select_shard(audio_files, voice_folder)
+                if not audio_files:
+                    return
+            names = ", ".join(audio_file.file_name for audio_file in audio_files)
+            self._log(f"\n📥 فایل‌های جدید: {names}")
+            results.extend(self._process_batch(audio_files, output_folder))
+            self._write_summary(results, output_folder)
+
+        try:
+            watcher.watch(on_ready, stop_event)
+        except KeyboardInterrupt:
+            print("\n⏹️  پایش پوشه متوقف شد")
+        finally:
+            self.close()
+
+        return results
+
+    def _process_batch(
+        self, audio_files: List[AudioFile], output_folder: str
+    ) -> List[AnalysisResult]:
+        """Process a batch of files, resuming an interrupted run if journaled"""
+        if self._run_journal is None:
+            return self._analyze_batch(audio_files, output_folder)
+        return self._process_journaled(audio_files, output_folder)
+
+    def _process_journaled(
+        self, audio_files: List[AudioFile], output_folder: str
+    ) -> List[AnalysisResult]:
+        """Skip files finished by an interrupted run and checkpoint the rest"""
+        restored, remaining = self._restore_journaled(audio_files, output_folder)
+        processed = self._analyze_batch(remaining, output_folder)
+        return self._merge_journaled(audio_files, restored, processed)
+
+    def _restore_journaled(
+        self, audio_files: List[AudioFile], output_folder: str
+    ) -> Tuple[Dict[str, AnalysisResult], List[AudioFile]]:
+        """Start a journaled run; returns (restored results, files to process)"""
+        from src.services.run_journal import REPORTED
+
+        journal = self._run_journal
+        resuming = journal.has_unfinished_run
+        journal.start_run(audio_files)
+
+        restored = {}
+        remaining = []
+        for audio_file in audio_files:
+            result = journal.restore_result(audio_file)
+            if result is None:
+                remaining.append(audio_file)
+            elif journal.get_state(audio_file) == REPORTED:
+                restored[audio_file.file_path] = result
+            else:
+                # Analyzed before the interruption; only the report is missing
+                restored[audio_file.file_path] = self._handle_result(
+                    result, output_folder
+                )
+
+        if resuming:
+            self._log(
+                f"⏩ ادامه اجرای قطع شده: {len(restored)} فایل قبلاً تحلیل شده، "
+                f"{len(remaining)} فایل باقی مانده"
+            )
+        return restored, remaining
+
+    def _merge_journaled(
+        self,
+        audio_files: List[AudioFile],
+        restored: Dict[str, AnalysisResult],
+        processed: List[AnalysisResult],
+    ) -> List[AnalysisResult]:
+        """Combine restored and new results in input order and close the run"""
+        processed = iter(processed)
+        results = [
+            (
+                restored[audio_file.file_path]
+                if audio_file.file_path in restored
+                else next(processed)
+            )
+            for audio_file in audio_files
+        ]
 
-        # Process each file
-        results = []
-        for i, audio_file in enumerate(audio_files, 1):
-            print(f"\n📊 پردازش فایل {i}/{len(audio_files)}")
+        self._run_journal.finish_run()
+        return results
 
+    def _analyze_batch(
+        self, audio_files: List[AudioFile], output_folder: str
+    ) -> List[AnalysisResult]:
+        """Process files in scheduled order, returning results in input order"""
+        if not audio_files:
+            return []
+        if self._scheduling_policy is None:
+            return self._run_batch(audio_files, output_folder)
+
+        scheduled = self._schedule(audio_files)
+        results = self._run_batch(scheduled, output_folder)
+        by_file = {id(audio_file): r for audio_file, r in zip(scheduled, results)}
+        return [by_file[id(audio_file)] for audio_file in audio_files]
+
+    def _schedule(self, audio_files: List[AudioFile]) -> List[AudioFile]:
+        """Order files by the scheduling policy, probing durations it needs"""
+        if self._scheduling_policy is None:
+            return audio_files
+        if self._scheduling_policy.needs_durations:
+            self._audio_service.probe_metadata(audio_files)
+        return self._scheduling_policy.order(audio_files)
+
+    async def _analyze_batch_async(
+        self, audio_files: List[AudioFile], output_folder: str, limit: int
+    ) -> List[AnalysisResult]:
+        """Analyze files as event loop tasks, at most ``limit`` at a time"""
+        if not audio_files:
+            return []
+
+        # Probing durations reads every file's header
+        scheduled = await run_blocking(self._schedule, audio_files)
+        total = len(scheduled)
+        self._log(f"⚙️  پردازش ناهمگام با حداکثر {min(limit, total)} تحلیل همزمان")
+
+        semaphore = asyncio.Semaphore(limit)
+
+        async def process(audio_file: AudioFile, index: int) -> AnalysisResult:
+            async with semaphore:
+                return await self._process_single_file_async(
+                    audio_file, index, total, output_folder
+                )
+
+        results = await asyncio.gather(
+            *(process(audio_file, i) for i, audio_file in enumerate(scheduled, 1))
+        )
+        by_file = {id(audio_file): r for audio_file, r in zip(scheduled, results)}
+        return [by_file[id(audio_file)] for audio_file in audio_files]
+
+    async def _process_single_file_async(
+        self, audio_file: AudioFile, index: int, total: int, output_folder: str
+    ) -> AnalysisResult:
+        """Analyze one file and save its report; never raises"""
+        self._log(f"\n📊 پردازش فایل {index}/{total}")
+
+        try:
+            result = await self._ai_analyzer.analyze_audio_async(audio_file)
+        except Exception as e:
+            return self._unexpected_error_result(audio_file, e)
+
+        return await run_blocking(self._handle_result, result, output_folder)
+
+    def _run_batch(
+        self, audio_files: List[AudioFile], output_folder: str
+    ) -> List[AnalysisResult]:
+        """Process files sequentially, pipelined or with a bounded worker pool"""
+        if self._pipelined:
+            return self._process_pipelined(audio_files, output_folder)
+        if self._max_workers > 1 and len(audio_files) > 1:
+            return self._process_concurrently(audio_files, output_folder)
+        return [
+            self._process_single_file(audio_file, i, len(audio_files), output_folder)
+            for i, audio_file in enumerate(audio_files, 1)
+        ]
+
+    def _process_concurrently(
+        self, audio_files: List[AudioFile], output_folder: str
+    ) -> List[AnalysisResult]:
+        """Analyze files with a thread pool, keeping results in input order"""
+        total = len(audio_files)
+        workers = min(self._max_workers, total)
+        self._log(f"⚙️  پردازش همزمان با {workers} کارگر")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    self._process_single_file, audio_file, i, total, output_folder
+                )
+                for i, audio_file in enumerate(audio_files, 1)
+            ]
             try:
-                # Analyze the audio file
+                return [future.result() for future in futures]
+            except KeyboardInterrupt:
+                # Drop queued work so the pool only waits for in-flight files
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _process_pipelined(
+        self, audio_files: List[AudioFile], output_folder: str
+    ) -> List[AnalysisResult]:
+        """Analyze files with uploads running ahead of generation"""
+        total = len(audio_files)
+        workers = min(self._max_workers, total)
+        self._log(f"⚙️  پردازش خط لوله‌ای (آپلود و تحلیل همپوشان) با {workers} کارگر")
+
+        handled = {}
+
+        def on_result(index: int, result: AnalysisResult) -> None:
+            self._log(f"\n📊 فایل {index + 1}/{total} تحلیل شد")
+            handled[index] = self._handle_result(result, output_folder)
+
+        results = self._ai_analyzer.analyze_audio_batch(
+            audio_files,
+            on_result=on_result,
+            upload_workers=workers,
+            generate_workers=workers,
+            queue_size=workers,
+        )
+        return [handled.get(i, result) for i, result in enumerate(results)]
+
+    def _process_single_file(
+        self, audio_file: AudioFile, index: int, total: int, output_folder: str
+    ) -> AnalysisResult:
+        """Analyze one file and save its report; never raises"""
+        self._log(f"\n📊 پردازش فایل {index}/{total}")
+
+        stream = None
+        if self._stream_reports:
+            stream = self._report_generator.open_analysis_stream(
+                audio_file, output_folder
+            )
+
+        try:
+            # Analyze the audio file
+            if stream is None:
                 result = self._ai_analyzer.analyze_audio(audio_file)
+            else:
+                result = self._ai_analyzer.analyze_audio(audio_file, stream=stream)
+        except Exception as e:
+            if stream is not None:
+                stream.discard()
+            return self._unexpected_error_result(audio_file, e)
+        finally:
+            if stream is not None:
+                stream.close()
+
+        if stream is not None and not result.is_successful:
+            # Do not leave a half-written report behind
+            stream.discard()
+        return self._handle_result(result, output_folder)
 
-                if result.is_successful:
-                    # Save the result
-                    self._report_generator.save_analysis_result(result, output_folder)
-                    print(f"✅ {audio_file.file_name} با موفقیت پردازش شد")
-                else:
-                    print(f"❌ خطا در پردازش {audio_file.file_name}")
-                    print(f"   {result.error_message}")
-
-                results.append(result)
-
-            except Exception as e:
-                error_result = AnalysisResult(
-                    audio_file=audio_file,
-                    analysis_text="",
-                    success=False,
-                    error_message=f"خطای غیرمنتظره: {str(e)}",
+    def _handle_result(
+        self, result: AnalysisResult, output_folder: str
+    ) -> AnalysisResult:
+        """Save the report of a finished analysis; never raises"""
+        audio_file = result.audio_file
+
+        try:
+            if self._run_journal is not None:
+                self._run_journal.record_result(result)
+
+            if result.is_successful:
+                # Save the result
+                output_file = self._report_generator.save_analysis_result(
+                    result, output_folder
                 )
-                results.append(error_result)
-                print(f"❌ خطای غیرمنتظره در پردازش {audio_file.file_name}: {str(e)}")
+                if self._run_journal is not None:
+                    from src.services.run_journal import REPORTED
 
-        # Create summary report
-        if results:
-            self._report_generator.create_summary_report(results, output_folder)
+                    self._run_journal.record(
+                        audio_file, REPORTED, output_file_path=output_file
+                    )
+                self._log(f"✅ {audio_file.file_name} با موفقیت پردازش شد")
+            else:
+                self._log(
+                    f"❌ خطا در پردازش {audio_file.file_name}\n"
+                    f"   {result.error_message}"
+                )
 
-        return results
+            return result
+
+        except Exception as e:
+            return self._unexpected_error_result(audio_file, e)
+
+    def _unexpected_error_result(
+        self, audio_file: AudioFile, error: Exception
+    ) -> AnalysisResult:
+        """Report an unexpected exception as a failed result"""
+        self._log(f"❌ خطای غیرمنتظره در پردازش {audio_file.file_name}: {str(error)}")
+        return AnalysisResult(
+            audio_file=audio_file,
+            analysis_text="",
+            success=False,
+            error_message=f"خطای غیرمنتظره: {str(error)}",
+        )
+
+    def _log(self, message: str) -> None:
+        """Print a progress message without interleaving worker output"""
+        with self._print_lock:
+            print(message)
 
     def get_processing_summary(self, results: List[AnalysisResult]) -> dict:
         """Get a summary of processing results"""
         successful = [r for r in results if r.is_successful]
         failed = [r for r in results if not r.is_successful]
+        cached = [r for r in results if getattr(r, "from_cache", False)]
 
         total_time = sum(r.processing_time for r in results if r.processing_time)
         avg_time = total_time / len(results) if results else 0
@@ -101,6 +555,7 @@ class VoiceToTextApplication:
             "total_files": len(results),
             "successful": len(successful),
             "failed": len(failed),
+            "cached": len(cached),
             "success_rate": len(successful) / len(results) * 100 if results else 0,
             "total_processing_time": total_time,
             "average_processing_time": avg_time,
@@ -118,6 +573,8 @@ class VoiceToTextApplication:
         print(f"   📁 تعداد کل فایل‌ها: {summary['total_files']}")
         print(f"   ✅ فایل‌های موفق: {summary['successful']}")
         print(f"   ❌ فایل‌های ناموفق: {summary['failed']}")
+        if summary["cached"]:
+            print(f"   ♻️  بازیابی از حافظه نهان: {summary['cached']}")
         print(f"   📊 نرخ موفقیت: {summary['success_rate']:.1f}%")
         print(f"   ⏱️  زمان کل پردازش: {summary['total_processing_time']:.2f} ثانیه")
         print(
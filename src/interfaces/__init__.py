@@ -4,10 +4,11 @@ Interfaces for the Voice to Text Analyzer
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 from src.models.analysis_result import AnalysisResult
 from src.models.audio_file import AudioFile
+from src.models.structured_analysis import ReportLabels
 
 
 class IAudioFileService(ABC):
@@ -27,6 +28,35 @@ class IAIAnalyzer(ABC):
         """Analyze an audio file and return the result"""
         pass
 
+    async def analyze_audio_async(self, audio_file: AudioFile) -> AnalysisResult:
+        """Analyze an audio file from a coroutine
+
+        The default implementation runs ``analyze_audio`` on the event loop's
+        default executor; analyzers with an async client override it.
+        """
+        from src.utils.async_helpers import run_blocking
+
+        return await run_blocking(self.analyze_audio, audio_file)
+
+    def analyze_audio_batch(
+        self,
+        audio_files: List[AudioFile],
+        on_result: Optional[Callable[[int, AnalysisResult], None]] = None,
+        **options,
+    ) -> List[AnalysisResult]:
+        """Analyze several files, calling on_result(index, result) for each one
+
+        The default implementation analyzes files one after another; analyzers
+        that can overlap work (e.g. upload and generation) override it.
+        """
+        results = []
+        for index, audio_file in enumerate(audio_files):
+            result = self.analyze_audio(audio_file)
+            if on_result is not None:
+                on_result(index, result)
+            results.append(result)
+        return results
+
 
 class IReportGenerator(ABC):
     """Interface for report generation"""
@@ -36,6 +66,16 @@ class IReportGenerator(ABC):
         """Save analysis result to a file"""
         pass
 
+    def open_analysis_stream(self, audio_file: AudioFile, output_folder: str):
+        """Open a live report that streamed analysis text is written to
+
+        Once the stream's ``end`` is called its text is the complete analysis,
+        from which ``save_analysis_result`` may finish the report. Returns
+        None when the generator cannot stream; the report is then only
+        written by ``save_analysis_result``.
+        """
+        return None
+
     @abstractmethod
     def create_summary_report(
         self, results: List[AnalysisResult], output_folder: str
@@ -43,6 +83,10 @@ class IReportGenerator(ABC):
         """Create a summary report of all results"""
         pass
 
+    def close(self) -> None:
+        """Write anything still buffered; called when the application stops"""
+        pass
+
 
 class IPromptProvider(ABC):
     """Interface for prompt provision"""
@@ -52,6 +96,27 @@ class IPromptProvider(ABC):
         """Get the prompt for audio analysis"""
         pass
 
+    def get_structured_prompt(self) -> str:
+        """Get the prompt for analysis returned as JSON
+
+        Only used together with ``get_response_schema``.
+        """
+        return self.get_analysis_prompt()
+
+    def get_response_schema(self) -> Optional[dict]:
+        """Get the JSON schema of structured analysis replies
+
+        Returns None if the provider has no structured output mode.
+        """
+        return None
+
+    def get_report_labels(self) -> Optional[ReportLabels]:
+        """Get the headings used to render structured analyses as Markdown
+
+        Returns None to use the default (Persian) headings.
+        """
+        return None
+
 
 class IConfigurationService(ABC):
     """Interface for configuration management"""
@@ -70,3 +135,15 @@ class IConfigurationService(ABC):
     def get_supported_extensions(self) -> List[str]:
         """Get supported file extensions"""
         pass
+
+
+class ISchedulingPolicy(ABC):
+    """Interface for choosing the order in which files are processed"""
+
+    # Whether ``order`` looks at durations, so they are probed beforehand
+    needs_durations = True
+
+    @abstractmethod
+    def order(self, audio_files: List[AudioFile]) -> List[AudioFile]:
+        """Get the files in the order they should be processed"""
+        pass
@@ -3,6 +3,35 @@ Models package initialization
 """
 
 from .analysis_result import AnalysisResult
+from .audio_chunk import AudioChunk
 from .audio_file import AudioFile
+from .audio_metadata import AudioMetadata
+from .job import Job
+from .scan_delta import ScanDelta
+from .structured_analysis import (
+    QualityRatings,
+    ReportLabels,
+    SentimentScores,
+    StructuredAnalysis,
+    TopicRange,
+    TranscriptSegment,
+)
+from .timeline_dataset import TimelineDataset
+from .timeline_map import TimelineMap
 
-__all__ = ["AudioFile", "AnalysisResult"]
+__all__ = [
+    "AudioFile",
+    "AudioChunk",
+    "AudioMetadata",
+    "AnalysisResult",
+    "Job",
+    "ScanDelta",
+    "StructuredAnalysis",
+    "TranscriptSegment",
+    "TopicRange",
+    "SentimentScores",
+    "QualityRatings",
+    "ReportLabels",
+    "TimelineDataset",
+    "TimelineMap",
+]
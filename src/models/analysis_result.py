@@ -7,6 +7,8 @@ from datetime import datetime
 from typing import Optional
 
 from .audio_file import AudioFile
+from .structured_analysis import StructuredAnalysis
+from .timeline_map import TimelineMap
 
 
 class AnalysisResult:
@@ -19,6 +21,13 @@ class AnalysisResult:
     processing_time: Optional[float] = None
     timestamp: Optional[datetime] = None
     output_file_path: Optional[str] = None
+    from_cache: bool = False
+    attempts: int = 1
+    retry_time: float = 0.0
+    timeline: Optional[TimelineMap] = None
+    structured: Optional[StructuredAnalysis] = None
+    prompt_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
 
     def __init__(
         self,
@@ -32,6 +41,13 @@ class AnalysisResult:
         transcription=None,
         language=None,
         confidence_score=None,
+        from_cache=False,
+        attempts=1,
+        retry_time=0.0,
+        timeline=None,
+        structured=None,
+        prompt_tokens=None,
+        output_tokens=None,
         **kwargs,
     ):
         """Initialize AnalysisResult with backward compatibility"""
@@ -52,6 +68,17 @@ class AnalysisResult:
         self.processing_time = processing_time
         self.timestamp = timestamp
         self.output_file_path = output_file_path
+        self.from_cache = from_cache
+        # Tries needed for this file and seconds spent backing off between them
+        self.attempts = attempts
+        self.retry_time = retry_time
+        # Kept ranges of the original audio when silence was trimmed
+        self.timeline = timeline
+        # Typed fields of a structured (JSON) analysis
+        self.structured = structured
+        # Tokens billed for the file's requests, None if not reported
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
         # Store compatibility values
         self._language = language or "persian"
         self._confidence_score = confidence_score or 0.95
@@ -90,6 +117,20 @@ class AnalysisResult:
         """Get the audio file name"""
         return self.audio_file.file_name
 
+    def to_dict(self) -> dict:
+        """Serialize the analysis outcome to JSON-compatible values"""
+        return {
+            "analysis_text": self.analysis_text,
+            "success": self.success,
+            "error_message": self.error_message,
+            "processing_time": self.processing_time,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "timeline": self.timeline.to_dict() if self.timeline else None,
+            "structured": self.structured.to_dict() if self.structured else None,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
     def __str__(self) -> str:
         status = "موفق" if self.is_successful else "ناموفق"
         return f"AnalysisResult(file={self.file_name}, status={status})"
@@ -0,0 +1,37 @@
+"""
+Audio Chunk Model
+مدل بخش صوتی
+"""
+
+from dataclasses import dataclass
+
+from .audio_file import AudioFile
+from .timeline_map import TimelineMap
+
+
+@dataclass
+class AudioChunk:
+    """A segment of a long recording that is analyzed on its own"""
+
+    audio_file: AudioFile
+    index: int
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        """Length of the segment in seconds"""
+        return self.end - self.start
+
+    @property
+    def timeline(self) -> TimelineMap:
+        """Map from times inside the segment to the whole recording"""
+        return TimelineMap(
+            segments=[(self.start, self.end)], original_duration=self.end
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"AudioChunk(index={self.index}, "
+            f"start={self.start:.1f}, end={self.end:.1f})"
+        )
@@ -17,6 +17,9 @@ class AudioFile:
     file_size: Optional[int] = None
     duration: Optional[float] = None
     format: Optional[str] = None
+    content_hash: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
 
     @property
     def file_extension(self) -> str:
@@ -36,6 +39,14 @@ class AudioFile:
         """Get the file name without extension"""
         return Path(self.file_path).stem
 
+    def get_content_hash(self) -> str:
+        """Get the SHA-256 hash of the file bytes, computing it on first use"""
+        if self.content_hash is None:
+            from src.utils.hashing import hash_file
+
+            self.content_hash = hash_file(self.file_path)
+        return self.content_hash
+
     @property
     def exists(self) -> bool:
         """Check if the file exists"""
@@ -0,0 +1,29 @@
+"""
+Audio Metadata Model
+مدل فراداده صوتی
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+
+@dataclass
+class AudioMetadata:
+    """Stream properties read from an audio container header"""
+
+    duration: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        """Serialize to JSON-compatible values"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AudioMetadata":
+        """Rebuild metadata serialized with ``to_dict``"""
+        return cls(
+            duration=data.get("duration"),
+            sample_rate=data.get("sample_rate"),
+            channels=data.get("channels"),
+        )
@@ -0,0 +1,53 @@
+"""
+Analysis Job Model
+مدل کار تحلیل
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .analysis_result import AnalysisResult
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A recording submitted for analysis and what became of it"""
+
+    id: str
+    file_path: str
+    file_name: str
+    status: str = QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[AnalysisResult] = None
+    # Uploaded to the server: delete the audio and its own folder once analyzed
+    remove_file: bool = False
+
+    @property
+    def is_finished(self) -> bool:
+        """Check if the job succeeded or failed"""
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> dict:
+        """Serialize the job status to JSON-compatible values"""
+        data = {
+            "id": self.id,
+            "file_name": self.file_name,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error_message": None,
+        }
+        if self.result is not None:
+            data["error_message"] = self.result.error_message
+            data["processing_time"] = self.result.processing_time
+        return data
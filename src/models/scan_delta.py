@@ -0,0 +1,35 @@
+"""
+Scan Delta Model
+مدل تغییرات پیمایش
+"""
+
+from dataclasses import dataclass, field
+from typing import List
+
+from .audio_file import AudioFile
+
+
+@dataclass
+class ScanDelta:
+    """Differences between the current folder tree and the last scan"""
+
+    added: List[AudioFile] = field(default_factory=list)
+    modified: List[AudioFile] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: List[AudioFile] = field(default_factory=list)
+
+    @property
+    def changed(self) -> List[AudioFile]:
+        """Files that need processing (added or modified)"""
+        return self.added + self.modified
+
+    @property
+    def has_changes(self) -> bool:
+        """Check if anything was added, modified or deleted"""
+        return bool(self.added or self.modified or self.deleted)
+
+    def __str__(self) -> str:
+        return (
+            f"ScanDelta(added={len(self.added)}, modified={len(self.modified)}, "
+            f"deleted={len(self.deleted)}, unchanged={len(self.unchanged)})"
+        )
@@ -0,0 +1,307 @@
+"""
+Structured Analysis Model
+مدل تحلیل ساختاریافته
+"""
+
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from .timeline_map import TimelineMap, format_timestamp, parse_timestamp
+
+_CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+
+@dataclass
+class TranscriptSegment:
+    """One speaker turn of the transcript, times in seconds"""
+
+    start: float
+    end: float
+    speaker: str
+    text: str
+
+
+@dataclass
+class TopicRange:
+    """A time range in which a topic was discussed, times in seconds"""
+
+    topic: str
+    start: float
+    end: float
+    category: str = ""
+
+    @property
+    def duration(self) -> float:
+        """Length of the discussion in seconds"""
+        return max(0.0, self.end - self.start)
+
+
+@dataclass
+class SentimentScores:
+    """Emotion and satisfaction ratings from 1 to 5 (None when not rated)"""
+
+    primary_emotion: str = ""
+    emotion_intensity: Optional[int] = None
+    conversation_satisfaction: Optional[int] = None
+    outcome_satisfaction: Optional[int] = None
+    stress_level: Optional[int] = None
+
+
+@dataclass
+class QualityRatings:
+    """Recording quality ratings from 1 to 5 (None when not rated)"""
+
+    audio_quality: Optional[int] = None
+    speech_clarity: Optional[int] = None
+    comprehensibility: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ReportLabels:
+    """Headings and field labels of a structured analysis rendered as Markdown"""
+
+    transcript: str = "۱. رونوشت کامل مکالمه با تایم‌کد"
+    summary: str = "۲. خلاصه"
+    topics: str = "۳. موضوعات با بازه زمانی"
+    sentiment: str = "۴. تحلیل احساسات و رضایت"
+    primary_emotion: str = "احساس غالب"
+    emotion_intensity: str = "شدت احساس"
+    conversation_satisfaction: str = "رضایت از مکالمه"
+    outcome_satisfaction: str = "رضایت از نتیجه"
+    stress_level: str = "سطح استرس"
+    quality: str = "۵. ارزیابی کیفیت"
+    audio_quality: str = "کیفیت صدا"
+    speech_clarity: str = "وضوح گفتار"
+    comprehensibility: str = "قابلیت درک"
+    tags: str = "۶. برچسب‌ها"
+    tag_separator: str = "، "
+
+
+PERSIAN_REPORT_LABELS = ReportLabels()
+
+ENGLISH_REPORT_LABELS = ReportLabels(
+    transcript="1. Complete Transcript with Timestamps",
+    summary="2. Summary",
+    topics="3. Topics with Time Ranges",
+    sentiment="4. Sentiment and Satisfaction",
+    primary_emotion="Primary emotion",
+    emotion_intensity="Emotion intensity",
+    conversation_satisfaction="Conversation satisfaction",
+    outcome_satisfaction="Outcome satisfaction",
+    stress_level="Stress level",
+    quality="5. Quality Assessment",
+    audio_quality="Audio quality",
+    speech_clarity="Speech clarity",
+    comprehensibility="Comprehensibility",
+    tags="6. Tags",
+    tag_separator=", ",
+)
+
+
+@dataclass
+class StructuredAnalysis:
+    """Typed analysis parsed from a JSON reply instead of scraped from Markdown"""
+
+    summary: str = ""
+    segments: List[TranscriptSegment] = field(default_factory=list)
+    topics: List[TopicRange] = field(default_factory=list)
+    sentiment: SentimentScores = field(default_factory=SentimentScores)
+    quality: QualityRatings = field(default_factory=QualityRatings)
+    tags: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, text: str) -> "StructuredAnalysis":
+        """Parse a model reply; raises ValueError if it is not a JSON object"""
+        try:
+            data = json.loads(_CODE_FENCE.sub("", text))
+        except ValueError as e:
+            raise ValueError(f"Reply is not valid JSON: {str(e)}") from e
+        if not isinstance(data, dict):
+            raise ValueError("Reply is not a JSON object")
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StructuredAnalysis":
+        """Build from a reply or ``to_dict`` output, skipping malformed entries
+
+        Times may be seconds or ``mm:ss`` strings, and ratings are clamped
+        to 1-5.
+        """
+        segments = []
+        for entry in _objects(data.get("segments")):
+            start, end = _seconds(entry.get("start")), _seconds(entry.get("end"))
+            if start is None or end is None:
+                continue
+            segments.append(
+                TranscriptSegment(
+                    start=start,
+                    end=end,
+                    speaker=str(entry.get("speaker") or ""),
+                    text=str(entry.get("text") or ""),
+                )
+            )
+
+        topics = []
+        for entry in _objects(data.get("topics")):
+            start, end = _seconds(entry.get("start")), _seconds(entry.get("end"))
+            if start is None or end is None:
+                continue
+            topics.append(
+                TopicRange(
+                    topic=str(entry.get("topic") or ""),
+                    start=start,
+                    end=end,
+                    category=str(entry.get("category") or ""),
+                )
+            )
+
+        sentiment = data.get("sentiment")
+        sentiment = sentiment if isinstance(sentiment, dict) else {}
+        quality = data.get("quality")
+        quality = quality if isinstance(quality, dict) else {}
+        tags = data.get("tags")
+
+        return cls(
+            summary=str(data.get("summary") or ""),
+            segments=segments,
+            topics=topics,
+            sentiment=SentimentScores(
+                primary_emotion=str(sentiment.get("primary_emotion") or ""),
+                emotion_intensity=_rating(sentiment.get("emotion_intensity")),
+                conversation_satisfaction=_rating(
+                    sentiment.get("conversation_satisfaction")
+                ),
+                outcome_satisfaction=_rating(sentiment.get("outcome_satisfaction")),
+                stress_level=_rating(sentiment.get("stress_level")),
+            ),
+            quality=QualityRatings(
+                audio_quality=_rating(quality.get("audio_quality")),
+                speech_clarity=_rating(quality.get("speech_clarity")),
+                comprehensibility=_rating(quality.get("comprehensibility")),
+            ),
+            tags=[str(tag) for tag in tags] if isinstance(tags, list) else [],
+        )
+
+    def to_dict(self) -> dict:
+        """Serialize to JSON-compatible values, times in seconds"""
+        return asdict(self)
+
+    def to_json(self) -> str:
+        """Serialize to a JSON string"""
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    def remapped(self, timeline: TimelineMap) -> "StructuredAnalysis":
+        """Copy with all times moved from trimmed audio to the original"""
+        return StructuredAnalysis(
+            summary=self.summary,
+            segments=[
+                TranscriptSegment(
+                    start=timeline.to_original(segment.start),
+                    end=timeline.to_original(segment.end, is_end=True),
+                    speaker=segment.speaker,
+                    text=segment.text,
+                )
+                for segment in self.segments
+            ],
+            topics=[
+                TopicRange(
+                    topic=topic.topic,
+                    start=timeline.to_original(topic.start),
+                    end=timeline.to_original(topic.end, is_end=True),
+                    category=topic.category,
+                )
+                for topic in self.topics
+            ],
+            sentiment=self.sentiment,
+            quality=self.quality,
+            tags=list(self.tags),
+        )
+
+    def to_markdown(self, labels: Optional[ReportLabels] = None) -> str:
+        """Render as the Markdown sections of an analysis report
+
+        ``labels`` default to the Persian headings.
+        """
+        labels = labels or PERSIAN_REPORT_LABELS
+        lines = [f"## {labels.transcript}", ""]
+        for segment in self.segments:
+            start, end = format_timestamp(segment.start), format_timestamp(segment.end)
+            lines.append(f"**[{start}-{end}] {segment.speaker}**: {segment.text}")
+
+        lines += ["", f"## {labels.summary}", "", self.summary or "—", ""]
+
+        lines += [f"## {labels.topics}", ""]
+        for topic in self.topics:
+            start, end = format_timestamp(topic.start), format_timestamp(topic.end)
+            category = f" ({topic.category})" if topic.category else ""
+            lines.append(f"- **[{start}-{end}]** {topic.topic}{category}")
+
+        sentiment = self.sentiment
+        lines += [
+            "",
+            f"## {labels.sentiment}",
+            "",
+            f"- **{labels.primary_emotion}:** {sentiment.primary_emotion or '—'}",
+            f"- **{labels.emotion_intensity}:** {_stars(sentiment.emotion_intensity)}",
+            f"- **{labels.conversation_satisfaction}:** "
+            f"{_stars(sentiment.conversation_satisfaction)}",
+            f"- **{labels.outcome_satisfaction}:** "
+            f"{_stars(sentiment.outcome_satisfaction)}",
+            f"- **{labels.stress_level}:** {_stars(sentiment.stress_level)}",
+        ]
+
+        quality = self.quality
+        lines += [
+            "",
+            f"## {labels.quality}",
+            "",
+            f"- **{labels.audio_quality}:** {_stars(quality.audio_quality)}",
+            f"- **{labels.speech_clarity}:** {_stars(quality.speech_clarity)}",
+            f"- **{labels.comprehensibility}:** {_stars(quality.comprehensibility)}",
+        ]
+
+        if self.tags:
+            lines += ["", f"## {labels.tags}", "", labels.tag_separator.join(self.tags)]
+
+        return "\n".join(lines)
+
+
+def _objects(value) -> List[dict]:
+    """Entries of a JSON array that are objects"""
+    if not isinstance(value, list):
+        return []
+    return [entry for entry in value if isinstance(entry, dict)]
+
+
+def _seconds(value) -> Optional[float]:
+    """Seconds from a number or an ``mm:ss`` / ``h:mm:ss`` string"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = value.strip().strip("[]")
+        try:
+            return parse_timestamp(value) if ":" in value else float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _rating(value) -> Optional[int]:
+    """A 1-5 rating, or None if missing or not a finite number"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    try:
+        return min(5, max(1, int(round(float(value)))))
+    except (ValueError, OverflowError):
+        return None
+
+
+def _stars(rating: Optional[int]) -> str:
+    """Render a rating as stars"""
+    if rating is None:
+        return "—"
+    return f"{'⭐' * rating} ({rating}/5)"
@@ -0,0 +1,195 @@
+"""
+Timeline Dataset Model
+مدل مجموعه داده خط زمانی
+"""
+
+from array import array
+from typing import Dict, List
+
+# Unsigned 32-bit ints: ids, byte offsets and milliseconds (up to ~49 days)
+_TYPECODE = "I" if array("I").itemsize == 4 else "L"
+
+SEGMENT_COLUMNS = (
+    "file_id",
+    "start_ms",
+    "end_ms",
+    "speaker_id",
+    "text_offset",
+    "text_length",
+)
+TOPIC_COLUMNS = ("file_id", "start_ms", "end_ms", "topic_id")
+
+
+class TimelineDataset:
+    """Transcript segments and topic ranges of many reports, stored in columns
+
+    Every column is an ``array.array`` of unsigned 32-bit ints with one
+    entry per row. ``file_id``, ``speaker_id`` and ``topic_id`` index the
+    ``files``, ``speakers`` and ``topics`` lists. A segment's text is not
+    copied: ``text_offset`` and ``text_length`` locate it as UTF-8 bytes in
+    its report, and ``segment_text`` reads it on demand.
+    """
+
+    def __init__(self):
+        self.files: List[str] = []
+        self.speakers: List[str] = []
+        self.topics: List[str] = []
+        self.segments: Dict[str, array] = {
+            name: array(_TYPECODE) for name in SEGMENT_COLUMNS
+        }
+        self.topic_ranges: Dict[str, array] = {
+            name: array(_TYPECODE) for name in TOPIC_COLUMNS
+        }
+        self._speaker_ids: Dict[str, int] = {}
+        self._topic_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Number of transcript segments"""
+        return len(self.segments["file_id"])
+
+    @property
+    def topic_count(self) -> int:
+        """Number of topic ranges"""
+        return len(self.topic_ranges["file_id"])
+
+    def add_file(self, file_path: str) -> int:
+        """Register a report and return its file id"""
+        self.files.append(file_path)
+        return len(self.files) - 1
+
+    def add_segment(
+        self,
+        file_id: int,
+        start_ms: int,
+        end_ms: int,
+        speaker: str,
+        text_offset: int,
+        text_length: int,
+    ) -> None:
+        """Append one transcript segment"""
+        columns = self.segments
+        columns["file_id"].append(file_id)
+        columns["start_ms"].append(start_ms)
+        columns["end_ms"].append(end_ms)
+        columns["speaker_id"].append(_intern(speaker, self.speakers, self._speaker_ids))
+        columns["text_offset"].append(text_offset)
+        columns["text_length"].append(text_length)
+
+    def add_topic(self, file_id: int, start_ms: int, end_ms: int, topic: str) -> None:
+        """Append one topic range"""
+        columns = self.topic_ranges
+        columns["file_id"].append(file_id)
+        columns["start_ms"].append(start_ms)
+        columns["end_ms"].append(end_ms)
+        columns["topic_id"].append(_intern(topic, self.topics, self._topic_ids))
+
+    def extend(self, other: "TimelineDataset") -> None:
+        """Append all rows of ``other``, translating its file, speaker and topic ids"""
+        file_base = len(self.files)
+        self.files.extend(other.files)
+        speaker_ids = [
+            _intern(name, self.speakers, self._speaker_ids) for name in other.speakers
+        ]
+        topic_ids = [
+            _intern(name, self.topics, self._topic_ids) for name in other.topics
+        ]
+
+        for name, column in other.segments.items():
+            if name == "file_id":
+                self.segments[name].extend(
+                    array(_TYPECODE, [i + file_base for i in column])
+                )
+            elif name == "speaker_id":
+                self.segments[name].extend(
+                    array(_TYPECODE, [speaker_ids[i] for i in column])
+                )
+            else:
+                self.segments[name].extend(column)
+
+        for name, column in other.topic_ranges.items():
+            if name == "file_id":
+                self.topic_ranges[name].extend(
+                    array(_TYPECODE, [i + file_base for i in column])
+                )
+            elif name == "topic_id":
+                self.topic_ranges[name].extend(
+                    array(_TYPECODE, [topic_ids[i] for i in column])
+                )
+            else:
+                self.topic_ranges[name].extend(column)
+
+    def segment_text(self, index: int) -> str:
+        """Read the text of segment ``index`` from its report"""
+        columns = self.segments
+        with open(self.files[columns["file_id"][index]], "rb") as f:
+            f.seek(columns["text_offset"][index])
+            data = f.read(columns["text_length"][index])
+        return data.decode("utf-8", errors="replace")
+
+    def speaking_time(self) -> Dict[str, float]:
+        """Total seconds spoken by each speaker across all reports"""
+        totals = [0] * len(self.speakers)
+        columns = self.segments
+        for speaker_id, start, end in zip(
+            columns["speaker_id"], columns["start_ms"], columns["end_ms"]
+        ):
+            totals[speaker_id] += max(0, end - start)
+        return {name: total / 1000 for name, total in zip(self.speakers, totals)}
+
+    def topic_time(self) -> Dict[str, float]:
+        """Total seconds spent on each topic across all reports"""
+        totals = [0] * len(self.topics)
+        columns = self.topic_ranges
+        for topic_id, start, end in zip(
+            columns["topic_id"], columns["start_ms"], columns["end_ms"]
+        ):
+            totals[topic_id] += max(0, end - start)
+        return {name: total / 1000 for name, total in zip(self.topics, totals)}
+
+    def save(self, path: str) -> None:
+        """Write the dataset to a NumPy ``.npz`` file"""
+        import numpy as np
+
+        arrays = {
+            f"segment_{name}": np.frombuffer(column, dtype=np.uint32)
+            for name, column in self.segments.items()
+        }
+        arrays.update(
+            (f"topic_{name}", np.frombuffer(column, dtype=np.uint32))
+            for name, column in self.topic_ranges.items()
+        )
+        for name in ("files", "speakers", "topics"):
+            arrays[name] = np.array(getattr(self, name), dtype=str)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "TimelineDataset":
+        """Read a dataset written with ``save``"""
+        import numpy as np
+
+        dataset = cls()
+        with np.load(path) as data:
+            for name in SEGMENT_COLUMNS:
+                dataset.segments[name].frombytes(
+                    data[f"segment_{name}"].astype(np.uint32).tobytes()
+                )
+            for name in TOPIC_COLUMNS:
+                dataset.topic_ranges[name].frombytes(
+                    data[f"topic_{name}"].astype(np.uint32).tobytes()
+                )
+            dataset.files = [str(name) for name in data["files"]]
+            for name in data["speakers"]:
+                _intern(str(name), dataset.speakers, dataset._speaker_ids)
+            for name in data["topics"]:
+                _intern(str(name), dataset.topics, dataset._topic_ids)
+        return dataset
+
+
+def _intern(name: str, names: List[str], ids: Dict[str, int]) -> int:
+    """Id of ``name`` in ``names``, adding it if new"""
+    index = ids.get(name)
+    if index is None:
+        index = ids[name] = len(names)
+        names.append(name)
+    return index
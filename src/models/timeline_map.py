@@ -0,0 +1,107 @@
+"""
+Timeline Map Model
+مدل نگاشت خط زمانی
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+TIMESTAMP_RANGE = re.compile(
+    r"\[(\d{1,3}:\d{2}(?::\d{2})?)\s*-\s*(\d{1,3}:\d{2}(?::\d{2})?)\]"
+)
+
+
+@dataclass
+class TimelineMap:
+    """Maps times in trimmed audio back to the original recording
+
+    ``segments`` are the (start, end) ranges of the original recording, in
+    seconds, that were kept and concatenated into the trimmed audio.
+    """
+
+    segments: List[Tuple[float, float]] = field(default_factory=list)
+    original_duration: float = 0.0
+
+    @property
+    def trimmed_duration(self) -> float:
+        """Length of the trimmed audio in seconds"""
+        return sum(end - start for start, end in self.segments)
+
+    @property
+    def removed_duration(self) -> float:
+        """Seconds of silence cut from the original recording"""
+        return max(0.0, self.original_duration - self.trimmed_duration)
+
+    def to_original(self, seconds: float, is_end: bool = False) -> float:
+        """Convert a time in the trimmed audio to the original timeline
+
+        At the join between two kept segments an end time maps to the end of
+        the earlier segment and a start time to the start of the later one.
+        """
+        if not self.segments:
+            return seconds
+
+        offsets = self._trimmed_offsets()
+        if is_end:
+            index = max(0, bisect_left(offsets, seconds) - 1)
+        else:
+            index = max(0, bisect_right(offsets, seconds) - 1)
+
+        start, end = self.segments[index]
+        original = start + seconds - offsets[index]
+        # Only clamp inside the audio; times past the end keep extending it
+        if index < len(self.segments) - 1:
+            original = min(original, end)
+        return original
+
+    def remap_timestamps(self, text: str) -> str:
+        """Rewrite ``[mm:ss-mm:ss]`` ranges in ``text`` to the original timeline"""
+        if not self.segments:
+            return text
+
+        def replace(match: "re.Match") -> str:
+            start = self.to_original(parse_timestamp(match.group(1)))
+            end = self.to_original(parse_timestamp(match.group(2)), is_end=True)
+            return f"[{format_timestamp(start)}-{format_timestamp(end)}]"
+
+        return TIMESTAMP_RANGE.sub(replace, text)
+
+    def to_dict(self) -> dict:
+        """Serialize to JSON-compatible values"""
+        return {
+            "segments": [[start, end] for start, end in self.segments],
+            "original_duration": self.original_duration,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TimelineMap":
+        """Rebuild a map serialized with ``to_dict``"""
+        return cls(
+            segments=[(start, end) for start, end in data.get("segments", [])],
+            original_duration=data.get("original_duration", 0.0),
+        )
+
+    def _trimmed_offsets(self) -> List[float]:
+        """Start of each kept segment within the trimmed audio"""
+        offsets = []
+        position = 0.0
+        for start, end in self.segments:
+            offsets.append(position)
+            position += end - start
+        return offsets
+
+
+def parse_timestamp(value: str) -> float:
+    """Convert ``mm:ss`` or ``h:mm:ss`` to seconds"""
+    seconds = 0
+    for part in value.split(":"):
+        seconds = seconds * 60 + int(part)
+    return float(seconds)
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds as ``mm:ss`` (minutes may exceed 59)"""
+    total = int(round(seconds))
+    return f"{total // 60:02d}:{total % 60:02d}"
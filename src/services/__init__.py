@@ -2,17 +2,58 @@
 Services package initialization
 """
 
+from .audio_chunker import AudioChunker
 from .audio_file_service import AudioFileService
+from .audio_preprocessor import AudioPreprocessor
+from .audio_prober import AudioMetadataProber
 from .configuration_service import ConfigurationService
 from .gemini_analyzer import GeminiAnalyzer
+from .job_queue import JobQueue
+from .job_server import JobServer
+from .persistent_queue import PersistentJobQueue
+from .prompt_cache import PromptCache
 from .prompt_provider import EnglishPromptProvider, PersianPromptProvider
+from .rate_limiter import RateLimiter
 from .report_generator import MarkdownReportGenerator
+from .result_cache import ResultCache
+from .result_store import SQLiteResultStore
+from .retry_policy import RetryPolicy
+from .run_journal import RunJournal
+from .scan_index import ScanIndex
+from .scheduling_policy import FifoPolicy, LongestFirstPolicy, ShortestFirstPolicy
+from .sharding import ShardResultStore, ShardSelector
+from .silence_trimmer import SilenceTrimmer
+from .transcript_parser import TranscriptParser
+from .upload_registry import UploadRegistry
+from .worker_pool import WorkerPool
 
 __all__ = [
+    "AudioChunker",
+    "AudioMetadataProber",
+    "AudioPreprocessor",
     "ConfigurationService",
     "PersianPromptProvider",
     "EnglishPromptProvider",
     "AudioFileService",
     "GeminiAnalyzer",
+    "JobQueue",
+    "JobServer",
     "MarkdownReportGenerator",
+    "PersistentJobQueue",
+    "PromptCache",
+    "RateLimiter",
+    "RetryPolicy",
+    "RunJournal",
+    "ResultCache",
+    "ScanIndex",
+    "SQLiteResultStore",
+    "FifoPolicy",
+    "LongestFirstPolicy",
+    "ShortestFirstPolicy",
+    "ShardResultStore",
+    "ShardSelector",
+    "SilenceTrimmer",
+    "TranscriptParser",
+    "UploadRegistry",
+    "WorkerPool",
 ]
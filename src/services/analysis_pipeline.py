@@ -0,0 +1,145 @@
+"""
+Upload/Generate Pipeline
+خط لوله آپلود و تولید تحلیل
+"""
+
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+
+from src.models import AnalysisResult, AudioFile
+
+# Marks the end of the upload stage for generate workers
+_END_OF_STREAM = object()
+
+
+class UploadGeneratePipeline:
+    """Runs upload and generation as two overlapping stages with a bounded queue
+
+    The upload stage works ahead of generation so that network upload of the
+    next files overlaps with model generation of the current ones. The queue
+    between the stages is bounded, so at most ``queue_size`` uploaded files
+    wait for generation at any time.
+    """
+
+    def __init__(
+        self,
+        upload_stage: Callable[[AudioFile], Any],
+        generate_stage: Callable[[AudioFile, Any, float], AnalysisResult],
+        error_stage: Callable[[AudioFile, Exception, float], AnalysisResult],
+        clock: Callable[[], float],
+        upload_workers: int = 1,
+        generate_workers: int = 1,
+        queue_size: int = 2,
+    ):
+        self._upload_stage = upload_stage
+        self._generate_stage = generate_stage
+        self._error_stage = error_stage
+        self._clock = clock
+        self._upload_workers = max(1, upload_workers)
+        self._generate_workers = max(1, generate_workers)
+        self._queue_size = max(1, queue_size)
+
+    def run(
+        self,
+        audio_files: List[AudioFile],
+        on_result: Optional[Callable[[int, AnalysisResult], None]] = None,
+    ) -> List[AnalysisResult]:
+        """Process all files and return results in input order
+
+        Args:
+            audio_files: Files to analyze
+            on_result: Optional callback invoked from a worker thread with the
+                zero-based input index and result as soon as a file completes
+        """
+        results: List[Optional[AnalysisResult]] = [None] * len(audio_files)
+        pending = queue.Queue()
+        for item in enumerate(audio_files):
+            pending.put(item)
+
+        uploaded = queue.Queue(maxsize=self._queue_size)
+        stop = threading.Event()
+
+        uploaders = [
+            threading.Thread(
+                target=self._upload_worker, args=(pending, uploaded, stop), daemon=True
+            )
+            for _ in range(self._upload_workers)
+        ]
+        generators = [
+            threading.Thread(
+                target=self._generate_worker,
+                args=(uploaded, results, on_result, stop),
+                daemon=True,
+            )
+            for _ in range(self._generate_workers)
+        ]
+
+        for thread in uploaders + generators:
+            thread.start()
+
+        try:
+            for thread in uploaders:
+                thread.join()
+            for _ in generators:
+                uploaded.put(_END_OF_STREAM)
+            for thread in generators:
+                thread.join()
+        except KeyboardInterrupt:
+            stop.set()
+            raise
+
+        # A slot is only empty if its worker died; keep it as a failure so
+        # results stay aligned with the input
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = self._error_stage(
+                    audio_files[index],
+                    RuntimeError("Analysis did not complete"),
+                    self._clock(),
+                )
+        return results
+
+    def _upload_worker(self, pending: queue.Queue, uploaded: queue.Queue, stop) -> None:
+        """Upload files ahead of generation until there is nothing left"""
+        while not stop.is_set():
+            try:
+                index, audio_file = pending.get_nowait()
+            except queue.Empty:
+                return
+
+            start_time = self._clock()
+            try:
+                payload = self._upload_stage(audio_file)
+                error = None
+            except Exception as e:
+                payload, error = None, e
+
+            # Blocks while generation is behind, which bounds the prefetch depth
+            uploaded.put((index, audio_file, payload, error, start_time))
+
+    def _generate_worker(self, uploaded: queue.Queue, results, on_result, stop) -> None:
+        """Run generation on files whose upload has already finished"""
+        while True:
+            item = uploaded.get()
+            if item is _END_OF_STREAM or stop.is_set():
+                return
+
+            index, audio_file, payload, error, start_time = item
+            if error is not None:
+                result = self._error_stage(audio_file, error, start_time)
+            else:
+                try:
+                    result = self._generate_stage(audio_file, payload, start_time)
+                except Exception as e:
+                    result = self._error_stage(audio_file, e, start_time)
+
+            results[index] = result
+            if on_result is not None:
+                try:
+                    on_result(index, result)
+                except Exception as e:
+                    # Keep consuming, or uploaders would block on the full queue
+                    print(
+                        f"⚠️  پردازش نتیجه {audio_file.file_name} ناموفق بود: {str(e)}"
+                    )
@@ -0,0 +1,376 @@
+"""
+Audio Chunker
+تقسیم‌کننده فایل‌های صوتی طولانی
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+from collections import Counter
+from typing import List, Optional, Set, Tuple
+
+from src.models import AudioChunk, AudioFile
+from src.models.structured_analysis import (
+    QualityRatings,
+    SentimentScores,
+    StructuredAnalysis,
+)
+from src.models.timeline_map import TIMESTAMP_RANGE, format_timestamp, parse_timestamp
+from src.services.audio_preprocessor import transcode_audio
+from src.services.audio_prober import AudioMetadataProber
+from src.services.silence_trimmer import (
+    DECODE_ERRORS,
+    decode_audio,
+    detect_speech,
+    write_wav,
+)
+
+# Lowest bitrate assumed when guessing the duration of an undecoded file
+# (8 kbit/s), so the guess is an upper bound for real recordings
+_MIN_BYTES_PER_SECOND = 1000
+
+# A transcript line starts with its time range, e.g. "**[01:05-01:12] مشتری**:"
+_TRANSCRIPT_LINE = re.compile(r"^\W*" + TIMESTAMP_RANGE.pattern)
+
+
+def plan_chunks(
+    regions: List[Tuple[float, float]],
+    duration: float,
+    chunk_seconds: float,
+    overlap_seconds: float,
+) -> List[Tuple[float, float]]:
+    """Split a recording into (start, end) segments cut at silences
+
+    Each cut is placed in the widest pause within a quarter chunk of the
+    target length, falling back to a hard cut when there is none. Segments
+    run ``overlap_seconds`` past their cut so no words are lost at the seams.
+    """
+    gaps = [
+        (following[0] - previous[1], (previous[1] + following[0]) / 2)
+        for previous, following in zip(regions, regions[1:])
+    ]
+    window = chunk_seconds / 4
+
+    cuts = [0.0]
+    # Avoid a tiny last chunk by letting the final one grow by up to 25%
+    while duration - cuts[-1] > chunk_seconds * 1.25:
+        target = cuts[-1] + chunk_seconds
+        candidates = [
+            (width, middle) for width, middle in gaps if abs(middle - target) <= window
+        ]
+        cuts.append(max(candidates)[1] if candidates else target)
+    cuts.append(duration)
+
+    return [
+        (start, min(duration, end + overlap_seconds))
+        for start, end in zip(cuts, cuts[1:])
+    ]
+
+
+def merge_chunk_analyses(chunks: List[AudioChunk], texts: List[str]) -> str:
+    """Stitch per-segment analyses into one document on the original timeline
+
+    Timestamps are shifted by each segment's offset, and transcript lines a
+    segment repeats from the overlap with the previous one are dropped.
+    """
+    sections = []
+    covered_until = None
+    previous_end = None
+    previous_lines: Set[str] = set()
+
+    for chunk, text in zip(chunks, texts):
+        text = chunk.timeline.remap_timestamps(text)
+        covered_before = covered_until
+        kept_lines = []
+        transcript_lines: Set[str] = set()
+
+        for line in text.splitlines():
+            match = _TRANSCRIPT_LINE.match(line)
+            if match is not None:
+                start = parse_timestamp(match.group(1))
+                end = parse_timestamp(match.group(2))
+                spoken = _normalize(line[match.end() :])
+                # Only lines inside the overlap can repeat the previous segment
+                if covered_before is not None and (
+                    start < covered_before - 0.5
+                    or (start <= previous_end and spoken in previous_lines)
+                ):
+                    continue
+                transcript_lines.add(spoken)
+                covered_until = max(covered_until or 0.0, end)
+            kept_lines.append(line)
+
+        previous_end = chunk.end
+        previous_lines = transcript_lines
+        heading = (
+            f"## 🧩 بخش {chunk.index + 1} "
+            f"[{format_timestamp(chunk.start)}-{format_timestamp(chunk.end)}]"
+        )
+        sections.append(f"{heading}\n\n" + "\n".join(kept_lines).strip())
+
+    return "\n\n---\n\n".join(sections)
+
+
+def merge_structured_analyses(
+    chunks: List[AudioChunk], analyses: List[StructuredAnalysis]
+) -> StructuredAnalysis:
+    """Combine per-segment structured analyses on the original timeline
+
+    Transcript segments repeated from the overlap with the previous segment
+    are dropped like in ``merge_chunk_analyses``; ratings are averaged.
+    """
+    merged = StructuredAnalysis()
+    summaries = []
+    covered_until = None
+    previous_end = None
+    previous_texts: Set[str] = set()
+
+    for chunk, analysis in zip(chunks, analyses):
+        analysis = analysis.remapped(chunk.timeline)
+        covered_before = covered_until
+        texts: Set[str] = set()
+
+        for segment in analysis.segments:
+            spoken = _normalize(f"{segment.speaker} {segment.text}")
+            if covered_before is not None and (
+                segment.start < covered_before - 0.5
+                or (segment.start <= previous_end and spoken in previous_texts)
+            ):
+                continue
+            texts.add(spoken)
+            covered_until = max(covered_until or 0.0, segment.end)
+            merged.segments.append(segment)
+
+        previous_end = chunk.end
+        previous_texts = texts
+        merged.topics.extend(analysis.topics)
+        merged.tags.extend(tag for tag in analysis.tags if tag not in merged.tags)
+        if analysis.summary:
+            summaries.append(
+                f"[{format_timestamp(chunk.start)}-{format_timestamp(chunk.end)}] "
+                f"{analysis.summary}"
+            )
+
+    merged.summary = "\n\n".join(summaries)
+    emotions = Counter(
+        a.sentiment.primary_emotion for a in analyses if a.sentiment.primary_emotion
+    )
+    merged.sentiment = SentimentScores(
+        primary_emotion=emotions.most_common(1)[0][0] if emotions else "",
+        **{
+            name: _mean_rating([getattr(a.sentiment, name) for a in analyses])
+            for name in (
+                "emotion_intensity",
+                "conversation_satisfaction",
+                "outcome_satisfaction",
+                "stress_level",
+            )
+        },
+    )
+    merged.quality = QualityRatings(
+        **{
+            name: _mean_rating([getattr(a.quality, name) for a in analyses])
+            for name in ("audio_quality", "speech_clarity", "comprehensibility")
+        }
+    )
+    return merged
+
+
+def _mean_rating(ratings: List[Optional[int]]) -> Optional[int]:
+    """Rounded average of the given ratings, ignoring missing ones"""
+    ratings = [rating for rating in ratings if rating is not None]
+    if not ratings:
+        return None
+    return int(round(sum(ratings) / len(ratings)))
+
+
+def _normalize(text: str) -> str:
+    """Speaker and words of a transcript line, ignoring markup and spacing"""
+    return " ".join(re.sub(r"[*:_]", " ", text).split())
+
+
+class AudioChunker:
+    """Splits long recordings into overlapping segments at silence boundaries
+
+    Recordings shorter than ``min_seconds`` (1.5 chunks by default) are not
+    split. Segments are encoded as mono Opus when ffmpeg is available, so
+    together they are about as small as a preprocessed upload of the whole
+    file (16-bit WAV otherwise, when only WAV sources can be decoded). The
+    segment files and the split plan are cached by source hash, and so is a
+    file that cannot be decoded, which is then analyzed whole without another
+    attempt.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        chunk_seconds: float = 600.0,
+        overlap_seconds: float = 5.0,
+        min_seconds: Optional[float] = None,
+        sample_rate: int = 16000,
+        bitrate: str = "24k",
+        ffmpeg_path: Optional[str] = None,
+        metadata_prober: Optional[AudioMetadataProber] = None,
+    ):
+        self._cache_dir = cache_dir
+        self._chunk_seconds = chunk_seconds
+        self._overlap_seconds = overlap_seconds
+        self._min_seconds = min_seconds or chunk_seconds * 1.5
+        self._sample_rate = sample_rate
+        self._bitrate = bitrate
+        self._ffmpeg_path = ffmpeg_path or shutil.which("ffmpeg")
+        self._extension = "wav" if self._ffmpeg_path is None else "ogg"
+        self._metadata_prober = metadata_prober or AudioMetadataProber()
+
+    def split(self, audio_file: AudioFile) -> List[AudioChunk]:
+        """Get the segments of a long recording, or [] if it is short enough"""
+        if not self._may_be_long(audio_file):
+            return []
+
+        try:
+            base_path = self._base_path(audio_file)
+        except OSError:
+            return []
+
+        plan = self._load_plan(base_path)
+        if plan is None:
+            plan = self._split_to(audio_file, base_path)
+
+        return [
+            AudioChunk(
+                audio_file=AudioFile(
+                    file_path=self._chunk_path(base_path, index),
+                    file_name=(
+                        f"{audio_file.stem_name}_part{index + 1}.{self._extension}"
+                    ),
+                    file_size=os.path.getsize(self._chunk_path(base_path, index)),
+                    duration=end - start,
+                ),
+                index=index,
+                start=start,
+                end=end,
+            )
+            for index, (start, end) in enumerate(plan)
+        ]
+
+    def _split_to(
+        self, audio_file: AudioFile, base_path: str
+    ) -> List[Tuple[float, float]]:
+        try:
+            samples, sample_rate = decode_audio(
+                audio_file.file_path, self._sample_rate, self._ffmpeg_path
+            )
+        except DECODE_ERRORS:
+            print(f"⚠️  تقسیم {audio_file.file_name} ممکن نیست؛ فایل کامل تحلیل می‌شود")
+            # An empty plan keeps later runs from decoding the file again
+            self._save_plan(base_path, [])
+            return []
+
+        duration = len(samples) / sample_rate
+        plan: List[Tuple[float, float]] = []
+        if duration >= self._min_seconds:
+            regions = detect_speech(samples, sample_rate)
+            plan = plan_chunks(
+                regions, duration, self._chunk_seconds, self._overlap_seconds
+            )
+
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+        except OSError as e:
+            print(f"⚠️  ذخیره بخش‌های {audio_file.file_name} ناموفق بود: {e}")
+            return []
+        for index, (start, end) in enumerate(plan):
+            try:
+                self._write_chunk(
+                    samples[int(start * sample_rate) : int(end * sample_rate)],
+                    sample_rate,
+                    self._chunk_path(base_path, index),
+                )
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"⚠️  ذخیره بخش‌های {audio_file.file_name} ناموفق بود: {e}")
+                return []
+
+        self._save_plan(base_path, plan)
+        if plan:
+            print(
+                f"🧩 {audio_file.file_name} ({duration / 60:.1f} دقیقه) "
+                f"به {len(plan)} بخش تقسیم شد"
+            )
+        return plan
+
+    def _write_chunk(self, samples, sample_rate: int, chunk_path: str) -> None:
+        """Write one segment, encoded as Opus when ffmpeg is available"""
+        temp_path = f"{chunk_path}.{threading.get_ident()}.tmp.wav"
+        try:
+            write_wav(temp_path, samples, sample_rate)
+            if self._ffmpeg_path is None:
+                os.replace(temp_path, chunk_path)
+            else:
+                transcode_audio(
+                    self._ffmpeg_path,
+                    temp_path,
+                    chunk_path,
+                    sample_rate,
+                    1,
+                    self._bitrate,
+                )
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _may_be_long(self, audio_file: AudioFile) -> bool:
+        """Cheaply rule out recordings that are certainly short
+
+        The duration is read from the file header when it is not known yet;
+        only files whose header cannot be read fall back to a size bound.
+        """
+        if audio_file.duration is None:
+            metadata = self._metadata_prober.probe(audio_file.file_path)
+            if metadata is not None:
+                audio_file.duration = metadata.duration
+        if audio_file.duration is not None:
+            return audio_file.duration >= self._min_seconds
+
+        try:
+            size = audio_file.file_size or os.path.getsize(audio_file.file_path)
+        except OSError:
+            return False
+        return size / _MIN_BYTES_PER_SECOND >= self._min_seconds
+
+    def _save_plan(self, base_path: str, plan: List[Tuple[float, float]]) -> None:
+        """Cache a split plan; an empty plan means the file is analyzed whole"""
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            with open(f"{base_path}.json", "w", encoding="utf-8") as f:
+                json.dump({"chunks": [[start, end] for start, end in plan]}, f)
+        except OSError as e:
+            print(f"⚠️  ذخیره برنامه تقسیم ناموفق بود: {e}")
+
+    def _load_plan(self, base_path: str) -> Optional[List[Tuple[float, float]]]:
+        """Read a split plan cached by an earlier run"""
+        try:
+            with open(f"{base_path}.json", "r", encoding="utf-8") as f:
+                plan = [(start, end) for start, end in json.load(f)["chunks"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        if all(
+            os.path.exists(self._chunk_path(base_path, index))
+            for index in range(len(plan))
+        ):
+            return plan
+        return None
+
+    def _base_path(self, audio_file: AudioFile) -> str:
+        settings = f"chunks{self._chunk_seconds:g}-overlap{self._overlap_seconds:g}"
+        if self._ffmpeg_path is not None:
+            settings += f"-{self._bitrate}"
+        return os.path.join(
+            self._cache_dir, f"{audio_file.get_content_hash()}-{settings}"
+        )
+
+    def _chunk_path(self, base_path: str, index: int) -> str:
+        return f"{base_path}-{index}.{self._extension}"
@@ -3,19 +3,25 @@ Audio File Service
 سرویس فایل صوتی
 """
 
-import glob
 import os
 from pathlib import Path
-from typing import List, Union
+from typing import Iterator, List, Optional, Tuple, Union
 
 from src.interfaces import IAudioFileService, IConfigurationService
-from src.models import AudioFile
+from src.models import AudioFile, AudioMetadata, ScanDelta
+from src.services.audio_prober import AudioMetadataProber
 
 
 class AudioFileService(IAudioFileService):
     """Handles audio file operations following Single Responsibility Principle"""
 
-    def __init__(self, config_service: IConfigurationService = None, **kwargs):
+    def __init__(
+        self,
+        config_service: IConfigurationService = None,
+        scan_index=None,
+        metadata_prober: AudioMetadataProber = None,
+        **kwargs
+    ):
         # Handle backwards compatibility for old-style constructors
         if config_service is None and kwargs:
             # Legacy constructor with api_key, language parameters
@@ -35,45 +41,312 @@ class AudioFileService(IAudioFileService):
             # New constructor with config_service
             self._config_service = config_service
 
+        self._scan_index = scan_index
+        self._metadata_prober = metadata_prober or AudioMetadataProber()
+
     def find_audio_files(self, folder_path: str) -> List[AudioFile]:
         """Find all audio files in the specified folder and subfolders"""
-        if not os.path.exists(folder_path):
-            return []
+        return list(self.iter_audio_files(folder_path))
 
-        audio_files = []
-        supported_extensions = self._config_service.get_supported_extensions()
+    def iter_audio_files(self, folder_path: str) -> Iterator[AudioFile]:
+        """Lazily yield audio files found in a single walk of the folder tree
 
-        for extension in supported_extensions:
-            pattern = os.path.join(folder_path, "**", f"*.{extension}")
-            file_paths = glob.glob(pattern, recursive=True)
+        Extensions are matched case-insensitively, and file sizes come from
+        the directory entries so no extra stat call is made per file. Hidden
+        files and folders are skipped, and symlinked folders are not followed.
+        File headers are not read; durations are only known for files whose
+        scan index record has them (see ``probe_metadata``).
+        """
+        for file_path, stat in self._walk(folder_path):
+            yield self._create_audio_file(
+                file_path,
+                file_size=stat.st_size,
+                record=self._get_current_record(file_path, stat),
+            )
 
-            for file_path in file_paths:
-                audio_file = self._create_audio_file(file_path)
-                if audio_file.exists:
-                    audio_files.append(audio_file)
+    def iter_audio_paths(self, folder_path: str) -> Iterator[str]:
+        """Lazily yield the paths of the audio files in the folder tree
 
-        return audio_files
+        Uses the same walk as ``iter_audio_files`` without creating AudioFile
+        objects, e.g. for a folder watcher that only compares paths.
+        """
+        for file_path, _ in self._walk(folder_path):
+            yield file_path
 
-    def _create_audio_file(self, file_path: str) -> AudioFile:
-        """Create an AudioFile object with metadata"""
-        file_path = os.path.abspath(file_path)
-        file_name = Path(file_path).name
+    def probe_metadata(self, audio_files: List[AudioFile]) -> None:
+        """Read duration, sample rate and channels from the file headers
+
+        Only files without a known duration are probed. The values are
+        stored in the scan index (when configured) so unchanged files are
+        not probed again on the next scan.
+        """
+        for audio_file in audio_files:
+            if audio_file.duration is not None:
+                continue
+            metadata = self._metadata_prober.probe(audio_file.file_path)
+            if metadata is None:
+                metadata = AudioMetadata()
+            audio_file.duration = metadata.duration
+            audio_file.sample_rate = metadata.sample_rate
+            audio_file.channels = metadata.channels
+            if self._scan_index is not None:
+                self._scan_index.set_file_metadata(
+                    audio_file.file_path, metadata.to_dict()
+                )
+
+    def scan_changes(
+        self, folder_path: str, verify_files: bool = False, hash_contents: bool = True
+    ) -> ScanDelta:
+        """Compare the folder tree with the scan index and report the delta
+
+        Only directories whose mtime changed since the last scan are listed
+        again; files in unchanged directories keep their recorded metadata.
+        Call ``commit_scan`` after processing to persist the new state.
+
+        Args:
+            folder_path: Root folder to scan
+            verify_files: Also stat files in unchanged directories, which
+                catches recordings rewritten in place at the cost of one stat
+                per file
+            hash_contents: Hash added and modified files so that a file whose
+                mtime changed but whose bytes did not is reported unchanged
+        """
+        if self._scan_index is None:
+            raise RuntimeError("Scan index is not configured")
+
+        delta = ScanDelta()
+        root = os.path.abspath(folder_path)
+        if not os.path.isdir(root):
+            delta.deleted = self._scan_index.files_under(root)
+            for path in delta.deleted:
+                self._scan_index.forget_file(path)
+            return delta
+
+        extensions = self._get_extension_set()
+        seen_files = set()
+        visited_directories = []
+
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            try:
+                directory_mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            visited_directories.append(directory)
+
+            record = self._scan_index.get_directory(directory)
+            if record is not None and record["mtime_ns"] == directory_mtime:
+                file_names, subdirectories = record["files"], record["subdirs"]
+                listed = {}
+            else:
+                file_names, subdirectories, listed = self._list_directory(
+                    directory, extensions
+                )
+                self._scan_index.set_directory(
+                    directory, directory_mtime, file_names, subdirectories
+                )
+
+            for file_name in file_names:
+                file_path = os.path.join(directory, file_name)
+                stat = listed.get(file_name)
+                if stat is None and (
+                    verify_files or self._scan_index.get_file(file_path) is None
+                ):
+                    try:
+                        stat = os.stat(file_path)
+                    except OSError:
+                        continue
+                seen_files.add(file_path)
+                self._classify_file(file_path, stat, hash_contents, delta)
+
+            pending.extend(
+                os.path.join(directory, name) for name in reversed(subdirectories)
+            )
+
+        for file_path in self._scan_index.files_under(root):
+            if file_path not in seen_files:
+                delta.deleted.append(file_path)
+                self._scan_index.forget_file(file_path)
+        self._scan_index.prune_directories(root, visited_directories)
+
+        return delta
+
+    def commit_scan(self, failed_paths: Optional[List[str]] = None) -> None:
+        """Persist the scan index, forgetting files that failed to process
+
+        Forgotten files are reported as added again on the next scan, so
+        failures are retried instead of being recorded as done.
+        """
+        if self._scan_index is None:
+            return
+        for file_path in failed_paths or []:
+            self._scan_index.forget_file(os.path.abspath(file_path))
+        self._scan_index.save()
+
+    def _walk(self, folder_path: str) -> Iterator[Tuple[str, os.stat_result]]:
+        """Yield (path, stat) of audio files, folder by folder in name order"""
+        if not os.path.isdir(folder_path):
+            return
+
+        extensions = self._get_extension_set()
+        pending = [os.path.abspath(folder_path)]
+        while pending:
+            directory = pending.pop()
+            file_names, subdirectories, stats = self._list_directory(
+                directory, extensions
+            )
+            for file_name in file_names:
+                yield os.path.join(directory, file_name), stats[file_name]
+
+            # Visit subfolders in name order after the files of this folder
+            pending.extend(
+                os.path.join(directory, name) for name in reversed(subdirectories)
+            )
+
+    def _get_extension_set(self) -> set:
+        """Get supported extensions normalized for case-insensitive matching"""
+        return {
+            ext.lower().lstrip(".")
+            for ext in self._config_service.get_supported_extensions()
+        }
 
-        # Get file size
-        file_size = None
+    def _list_directory(self, directory: str, extensions: set):
+        """List audio files (with stat results) and subfolders of a directory"""
+        file_names, subdirectories, stats = [], [], {}
         try:
-            file_size = os.path.getsize(file_path)
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
         except OSError:
-            pass
+            return file_names, subdirectories, stats
+
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.name)
+                    continue
+                extension = os.path.splitext(entry.name)[1].lower().lstrip(".")
+                if extension not in extensions or not entry.is_file():
+                    continue
+                stats[entry.name] = entry.stat()
+            except OSError:
+                continue
+            file_names.append(entry.name)
+
+        return file_names, subdirectories, stats
+
+    def _classify_file(
+        self, file_path: str, stat, hash_contents: bool, delta: ScanDelta
+    ) -> None:
+        """Compare one file with its index record and add it to the delta"""
+        record = self._scan_index.get_file(file_path)
+
+        if stat is None:
+            # Unchanged directory and no verification: trust the index
+            audio_file = self._create_audio_file(
+                file_path, file_size=record["size"], record=record
+            )
+            audio_file.content_hash = record.get("content_hash")
+            delta.unchanged.append(audio_file)
+            return
+
+        metadata_unchanged = record is not None and (
+            record["size"] == stat.st_size
+            and record["mtime_ns"] == stat.st_mtime_ns
+            and record["inode"] == stat.st_ino
+        )
+
+        if metadata_unchanged:
+            audio_file = self._create_audio_file(
+                file_path, file_size=stat.st_size, record=record
+            )
+            audio_file.content_hash = record.get("content_hash")
+            delta.unchanged.append(audio_file)
+            return
+
+        audio_file = self._create_audio_file(file_path, file_size=stat.st_size)
+
+        content_hash = None
+        if hash_contents:
+            try:
+                content_hash = audio_file.get_content_hash()
+            except OSError:
+                pass
+
+        self._scan_index.set_file(
+            file_path, stat.st_size, stat.st_mtime_ns, stat.st_ino, content_hash
+        )
+
+        if record is None:
+            delta.added.append(audio_file)
+        elif content_hash is not None and content_hash == record.get("content_hash"):
+            # Touched or copied over with identical bytes
+            delta.unchanged.append(audio_file)
+        else:
+            delta.modified.append(audio_file)
+
+    def _get_current_record(self, file_path: str, stat) -> Optional[dict]:
+        """Get the index record of a file if it still matches the file"""
+        if self._scan_index is None:
+            return None
+        record = self._scan_index.get_file(file_path)
+        if record is None or (
+            record["size"] != stat.st_size or record["mtime_ns"] != stat.st_mtime_ns
+        ):
+            return None
+        return record
+
+    def create_audio_file(
+        self, file_path: str, file_size: Optional[int] = None
+    ) -> AudioFile:
+        """Create an AudioFile for a path, e.g. one reported by a folder watcher"""
+        return self._create_audio_file(file_path, file_size=file_size)
+
+    def is_supported_file(self, file_path: str) -> bool:
+        """Check if a path has a supported extension and is not hidden"""
+        file_name = os.path.basename(file_path)
+        extension = os.path.splitext(file_name)[1].lower().lstrip(".")
+        return not file_name.startswith(".") and extension in self._get_extension_set()
+
+    def _create_audio_file(
+        self,
+        file_path: str,
+        file_size: Optional[int] = None,
+        record: Optional[dict] = None,
+    ) -> AudioFile:
+        """Create an AudioFile object with metadata
+
+        Duration, sample rate and channel count come from the scan index
+        ``record`` when it has them, and are otherwise left unknown until
+        ``probe_metadata`` reads the file header.
+        """
+        file_path = os.path.abspath(file_path)
+        file_name = Path(file_path).name
+
+        # Get file size unless the caller already knows it
+        if file_size is None:
+            try:
+                file_size = os.path.getsize(file_path)
+            except OSError:
+                pass
 
         # Get file format
         file_format = Path(file_path).suffix.lower().lstrip(".")
 
+        metadata = AudioMetadata()
+        if record is not None and record.get("metadata") is not None:
+            metadata = AudioMetadata.from_dict(record["metadata"])
+
         return AudioFile(
             file_path=file_path,
             file_name=file_name,
             file_size=file_size,
+            duration=metadata.duration,
             format=file_format,
+            sample_rate=metadata.sample_rate,
+            channels=metadata.channels,
         )
 
     def validate_audio_file(self, audio_file: AudioFile) -> bool:
@@ -109,6 +382,7 @@ class AudioFileService(IAudioFileService):
             "size": audio_file.file_size,
             "format": audio_file.format,
             "exists": audio_file.exists,
+            "duration": audio_file.duration,
             "size_mb": (
                 round(audio_file.file_size / (1024 * 1024), 2)
                 if audio_file.file_size
@@ -0,0 +1,189 @@
+"""
+Audio Pre-processor
+پیش‌پردازشگر صدا
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from src.models import AudioFile
+
+
+def transcode_audio(
+    ffmpeg_path: str,
+    source_path: str,
+    target_path: str,
+    sample_rate: int,
+    channels: int,
+    bitrate: str,
+) -> str:
+    """Re-encode ``source_path`` as Opus speech audio at ``target_path``
+
+    Runs in a worker process; writes to a temporary file first so an
+    interrupted conversion never leaves a truncated file in the cache.
+    """
+    temp_path = f"{target_path}.{os.getpid()}.tmp.ogg"
+    command = [
+        ffmpeg_path,
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        source_path,
+        "-vn",
+        "-ac",
+        str(channels),
+        "-ar",
+        str(sample_rate),
+        "-c:a",
+        "libopus",
+        "-b:a",
+        bitrate,
+        "-application",
+        "voip",
+        temp_path,
+    ]
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+        os.replace(temp_path, target_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return target_path
+
+
+class AudioPreprocessor:
+    """Downsamples recordings to 16 kHz mono Opus before they are uploaded
+
+    Converted files are cached by the content hash of the source, so each
+    recording is only converted once. Conversions run in a process pool and
+    can be started ahead of time with ``prefetch``. When ffmpeg is missing, a
+    conversion fails, or the result is not smaller than the source, the
+    original file is used unchanged.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        sample_rate: int = 16000,
+        channels: int = 1,
+        bitrate: str = "24k",
+        max_workers: Optional[int] = None,
+        ffmpeg_path: Optional[str] = None,
+        executor: Optional[Executor] = None,
+    ):
+        self._cache_dir = cache_dir
+        self._sample_rate = sample_rate
+        self._channels = channels
+        self._bitrate = bitrate
+        self._max_workers = max_workers
+        self._ffmpeg_path = ffmpeg_path or shutil.which("ffmpeg")
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._stats = {"converted": 0, "reused": 0, "skipped": 0, "bytes_saved": 0}
+
+        if self._ffmpeg_path is None:
+            print("⚠️  ffmpeg پیدا نشد؛ فایل‌ها بدون پیش‌پردازش آپلود می‌شوند")
+
+    @property
+    def is_available(self) -> bool:
+        """Check if ffmpeg can be used for conversions"""
+        return self._ffmpeg_path is not None
+
+    @property
+    def settings(self) -> str:
+        """Conversion settings, as used in cache file names"""
+        return f"{self._sample_rate}hz-{self._channels}ch-{self._bitrate}"
+
+    def prefetch(self, audio_files: List[AudioFile]) -> None:
+        """Start converting files in the background before they are needed"""
+        for audio_file in audio_files:
+            self._submit(audio_file)
+
+    def prepare(self, audio_file: AudioFile) -> str:
+        """Get the path to upload for a file, converting it if needed"""
+        future = self._submit(audio_file)
+        if future is None:
+            return audio_file.file_path
+
+        try:
+            target_path = future.result()
+        except Exception as e:
+            with self._lock:
+                self._pending.pop(self._target_path(audio_file), None)
+                self._stats["skipped"] += 1
+            print(f"⚠️  پیش‌پردازش {audio_file.file_name} ناموفق بود: {str(e)}")
+            return audio_file.file_path
+
+        source_size = audio_file.file_size or os.path.getsize(audio_file.file_path)
+        target_size = os.path.getsize(target_path)
+        if target_size >= source_size:
+            # Already compact (e.g. low bitrate mono MP3); keep the original
+            with self._lock:
+                self._stats["skipped"] += 1
+            return audio_file.file_path
+
+        with self._lock:
+            self._stats["bytes_saved"] += source_size - target_size
+        return target_path
+
+    def get_stats(self) -> dict:
+        """Get conversion counters"""
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        """Shut down the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _submit(self, audio_file: AudioFile) -> Optional[Future]:
+        """Return the conversion future for a file, starting it if needed"""
+        if self._ffmpeg_path is None:
+            return None
+        try:
+            target_path = self._target_path(audio_file)
+        except OSError:
+            return None
+
+        with self._lock:
+            future = self._pending.get(target_path)
+            if future is not None:
+                return future
+
+            if os.path.exists(target_path):
+                future = Future()
+                future.set_result(target_path)
+                self._stats["reused"] += 1
+            else:
+                os.makedirs(self._cache_dir, exist_ok=True)
+                future = self._get_executor().submit(
+                    transcode_audio,
+                    self._ffmpeg_path,
+                    audio_file.file_path,
+                    target_path,
+                    self._sample_rate,
+                    self._channels,
+                    self._bitrate,
+                )
+                self._stats["converted"] += 1
+            self._pending[target_path] = future
+            return future
+
+    def _target_path(self, audio_file: AudioFile) -> str:
+        """Cache path of the converted audio, keyed by source hash and settings"""
+        file_name = f"{audio_file.get_content_hash()}-{self.settings}.ogg"
+        return os.path.join(self._cache_dir, file_name)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        return self._executor
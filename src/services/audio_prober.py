@@ -0,0 +1,403 @@
+"""
+Audio Metadata Prober
+خواننده فراداده فایل‌های صوتی
+"""
+
+import os
+import struct
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from src.models import AudioMetadata
+
+# Header bytes read up front; enough for ID3-less MP3 frames, FLAC STREAMINFO,
+# the first Ogg page and the chunk tables of WAV/AIFF files
+_HEAD_BYTES = 64 * 1024
+
+# Bytes read from the end of an Ogg file to find the last granule position
+_OGG_TAIL_BYTES = 64 * 1024
+
+# MP4 "moov" boxes are small; refuse anything larger than this
+_MAX_MOOV_BYTES = 16 * 1024 * 1024
+
+# MPEG audio bitrates in kbit/s by (is MPEG-1, layer) and bitrate index
+_MP3_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# MPEG audio sample rates by version bits (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+_MP3_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+# MP4 boxes that only contain other boxes on the way to the sample description
+_MP4_CONTAINERS = {b"mdia", b"minf", b"stbl"}
+
+
+def probe_audio_metadata(file_path: str) -> Optional[AudioMetadata]:
+    """Read duration, sample rate and channel count from container headers
+
+    The format is recognized by its magic bytes, not the file extension, and
+    no audio is decoded. Returns None for unrecognized or damaged files.
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(_HEAD_BYTES)
+        file_size = os.fstat(f.fileno()).st_size
+
+        for magic, parser in _PARSERS:
+            if magic(head):
+                return parser(f, head, file_size)
+
+        # MPEG audio frames have no magic, so try them last
+        return _probe_mp3(f, head, file_size)
+
+
+def _probe_wav(f: BinaryIO, head: bytes, file_size: int) -> Optional[AudioMetadata]:
+    """RIFF/WAVE: ``fmt `` gives the format, ``data`` the length"""
+    fmt = None
+    data_size = None
+    for chunk_id, offset, size in _iff_chunks(f, 12, file_size, "<"):
+        if chunk_id == b"fmt ":
+            f.seek(offset)
+            fmt = f.read(16)
+        elif chunk_id == b"data":
+            # Streams written before their length is known leave it at -1
+            data_size = min(size, file_size - offset)
+        if fmt is not None and data_size is not None:
+            break
+
+    if fmt is None or len(fmt) < 16:
+        return None
+    channels, sample_rate, byte_rate = struct.unpack_from("<HII", fmt, 2)
+    duration = data_size / byte_rate if data_size is not None and byte_rate else None
+    return AudioMetadata(duration, sample_rate or None, channels or None)
+
+
+def _probe_aiff(f: BinaryIO, head: bytes, file_size: int) -> Optional[AudioMetadata]:
+    """FORM/AIFF and AIFF-C: everything is in the ``COMM`` chunk"""
+    for chunk_id, offset, size in _iff_chunks(f, 12, file_size, ">"):
+        if chunk_id == b"COMM" and size >= 18:
+            f.seek(offset)
+            comm = f.read(18)
+            channels, frames = struct.unpack_from(">hI", comm)
+            sample_rate = _extended_to_float(comm[8:18])
+            duration = frames / sample_rate if sample_rate else None
+            return AudioMetadata(duration, int(sample_rate) or None, channels or None)
+    return None
+
+
+def _probe_flac(f: BinaryIO, head: bytes, file_size: int) -> Optional[AudioMetadata]:
+    """Native FLAC: STREAMINFO is always the first metadata block"""
+    if len(head) < 8 + 18 or head[4] & 0x7F != 0:
+        return None
+    return _parse_streaminfo(head[8:26])
+
+
+def _probe_ogg(f: BinaryIO, head: bytes, file_size: int) -> Optional[AudioMetadata]:
+    """Ogg Vorbis/Opus/FLAC: codec header on page one, length on the last page"""
+    if len(head) < 27 or len(head) < 27 + head[26]:
+        return None
+    packet = head[27 + head[26] :]
+
+    granule_rate = None
+    pre_skip = 0
+    if packet.startswith(b"\x01vorbis") and len(packet) >= 16:
+        channels, sample_rate = struct.unpack_from("<BI", packet, 11)
+        granule_rate = sample_rate
+    elif packet.startswith(b"OpusHead") and len(packet) >= 16:
+        channels, pre_skip, sample_rate = struct.unpack_from("<BHI", packet, 9)
+        # Opus granule positions always count 48 kHz samples
+        granule_rate = 48000
+    elif packet.startswith(b"\x7fFLAC") and packet[9:13] == b"fLaC":
+        metadata = _parse_streaminfo(packet[17:35])
+        if metadata is None:
+            return None
+        channels, sample_rate = metadata.channels, metadata.sample_rate
+        granule_rate = sample_rate
+    else:
+        return None
+
+    duration = None
+    granule = _last_ogg_granule(f, file_size)
+    if granule is not None and granule_rate:
+        duration = max(0, granule - pre_skip) / granule_rate
+    return AudioMetadata(duration, sample_rate or None, channels or None)
+
+
+def _probe_mp4(f: BinaryIO, head: bytes, file_size: int) -> Optional[AudioMetadata]:
+    """MP4/M4A: ``mvhd`` gives the length, the audio sample entry the format"""
+    for box_type, offset, size in _mp4_boxes(f, 0, file_size):
+        if box_type == b"moov":
+            if size > _MAX_MOOV_BYTES:
+                return None
+            f.seek(offset)
+            return _parse_moov(f.read(size))
+    return None
+
+
+def _probe_mp3(f: BinaryIO, head: bytes, file_size: int) -> Optional[AudioMetadata]:
+    """MPEG audio: Xing/Info or VBRI frame count, else a constant bitrate"""
+    start = 0
+    if head.startswith(b"ID3") and len(head) >= 10:
+        # Tag size is a 28-bit "synchsafe" integer; the footer flag adds 10
+        size = 0
+        for byte in head[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        start = 10 + size + (10 if head[5] & 0x10 else 0)
+        f.seek(start)
+        head = f.read(_HEAD_BYTES)
+
+    position = head.find(b"\xff")
+    while 0 <= position <= len(head) - 4:
+        frame = _parse_mp3_header(head[position : position + 4])
+        if frame is None:
+            position = head.find(b"\xff", position + 1)
+            continue
+        sample_rate, channels, bitrate, samples_per_frame, frame_length = frame
+
+        frames = _mp3_vbr_frame_count(head[position:], channels, sample_rate)
+        if frames is not None:
+            duration = frames * samples_per_frame / sample_rate
+        else:
+            # Require a second frame right after this one to rule out noise
+            following = head[position + frame_length : position + frame_length + 4]
+            if len(following) == 4 and _parse_mp3_header(following) is None:
+                position = head.find(b"\xff", position + 1)
+                continue
+            audio_bytes = file_size - start - position
+            duration = audio_bytes * 8 / (bitrate * 1000)
+        return AudioMetadata(duration, sample_rate, channels)
+
+    return None
+
+
+def _parse_mp3_header(header: bytes) -> Optional[Tuple[int, int, int, int, int]]:
+    """Decode an MPEG audio frame header
+
+    Returns (sample rate, channels, bitrate in kbit/s, samples per frame,
+    frame length in bytes), or None if the bytes are not a valid header.
+    """
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    is_mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(is_mpeg1, layer)][bitrate_index]
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    channels = 1 if header[3] >> 6 == 3 else 2
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 1152 if is_mpeg1 or layer == 2 else 576
+        frame_length = samples_per_frame // 8 * bitrate * 1000 // sample_rate + padding
+    return sample_rate, channels, bitrate, samples_per_frame, frame_length
+
+
+def _mp3_vbr_frame_count(
+    frame: bytes, channels: int, sample_rate: int
+) -> Optional[int]:
+    """Frame count from a Xing/Info or VBRI header in the first frame"""
+    is_mpeg1 = sample_rate >= 32000
+    if is_mpeg1:
+        side_info = 17 if channels == 1 else 32
+    else:
+        side_info = 9 if channels == 1 else 17
+
+    xing = 4 + side_info
+    if frame[xing : xing + 4] in (b"Xing", b"Info") and len(frame) >= xing + 12:
+        flags, frames = struct.unpack_from(">II", frame, xing + 4)
+        if flags & 0x01 and frames:
+            return frames
+
+    vbri = 4 + 32
+    if frame[vbri : vbri + 4] == b"VBRI" and len(frame) >= vbri + 18:
+        (frames,) = struct.unpack_from(">I", frame, vbri + 14)
+        if frames:
+            return frames
+    return None
+
+
+def _parse_streaminfo(block: bytes) -> Optional[AudioMetadata]:
+    """Decode the packed fields of a FLAC STREAMINFO block body"""
+    if len(block) < 18:
+        return None
+    # 20 bits sample rate, 3 bits channels - 1, 5 bits depth, 36 bits samples
+    packed = int.from_bytes(block[10:18], "big")
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x07) + 1
+    total_samples = packed & ((1 << 36) - 1)
+    duration = total_samples / sample_rate if total_samples and sample_rate else None
+    return AudioMetadata(duration, sample_rate or None, channels)
+
+
+def _last_ogg_granule(f: BinaryIO, file_size: int) -> Optional[int]:
+    """Granule position of the last complete page in an Ogg stream"""
+    offset = max(0, file_size - _OGG_TAIL_BYTES)
+    f.seek(offset)
+    tail = f.read()
+
+    position = tail.rfind(b"OggS")
+    while position >= 0:
+        if position + 14 <= len(tail):
+            (granule,) = struct.unpack_from("<q", tail, position + 6)
+            # Pages that finish no packet carry -1
+            if granule >= 0:
+                return granule
+        position = tail.rfind(b"OggS", 0, position)
+    return None
+
+
+def _parse_moov(moov: bytes) -> Optional[AudioMetadata]:
+    """Read ``mvhd`` and the first audio track's sample entry from ``moov``"""
+    metadata = AudioMetadata()
+    for box_type, offset, size in _mp4_boxes_in(moov, 0, len(moov)):
+        if box_type == b"mvhd":
+            metadata.duration = _parse_mvhd(moov[offset : offset + size])
+        elif box_type == b"trak" and metadata.sample_rate is None:
+            entry = _find_audio_sample_entry(moov, offset, offset + size)
+            if entry is not None:
+                metadata.channels, metadata.sample_rate = entry
+
+    if metadata.duration is None and metadata.sample_rate is None:
+        return None
+    return metadata
+
+
+def _parse_mvhd(mvhd: bytes) -> Optional[float]:
+    """Movie duration in seconds from a ``mvhd`` box body"""
+    if not mvhd:
+        return None
+    if mvhd[0] == 1 and len(mvhd) >= 32:
+        timescale, duration = struct.unpack_from(">IQ", mvhd, 20)
+    elif len(mvhd) >= 20:
+        timescale, duration = struct.unpack_from(">II", mvhd, 12)
+    else:
+        return None
+    return duration / timescale if timescale else None
+
+
+def _find_audio_sample_entry(
+    data: bytes, start: int, end: int, is_sound: bool = False
+) -> Optional[Tuple[int, int]]:
+    """Find (channels, sample rate) in a sound track's ``stsd`` box"""
+    for box_type, offset, size in _mp4_boxes_in(data, start, end):
+        if box_type == b"hdlr" and data[offset + 8 : offset + 12] == b"soun":
+            is_sound = True
+        elif box_type in _MP4_CONTAINERS:
+            # hdlr comes before minf inside mdia, so is_sound is known by then
+            found = _find_audio_sample_entry(data, offset, offset + size, is_sound)
+            if found is not None:
+                return found
+        elif box_type == b"stsd" and is_sound and size >= 8 + 8 + 28:
+            # Version/flags and entry count, then the first entry's box header,
+            # 8 reserved bytes and 8 bytes of version/revision/vendor
+            channels, _, _, rate = struct.unpack_from(">HHII", data, offset + 32)
+            return channels, rate >> 16
+    return None
+
+
+def _mp4_boxes(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (type, body offset, body size) of MP4 boxes by seeking in a file"""
+    position = start
+    while position + 8 <= end:
+        f.seek(position)
+        header = f.read(16)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack_from(">I4s", header)
+        header_size = 8
+        if size == 1 and len(header) == 16:
+            (size,) = struct.unpack_from(">Q", header, 8)
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size:
+            return
+        yield box_type, position + header_size, size - header_size
+        position += size
+
+
+def _mp4_boxes_in(
+    data: bytes, start: int, end: int
+) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (type, body offset, body size) of MP4 boxes inside a buffer"""
+    position = start
+    while position + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, position)
+        header_size = 8
+        if size == 1 and position + 16 <= end:
+            (size,) = struct.unpack_from(">Q", data, position + 8)
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size or position + size > end:
+            return
+        yield box_type, position + header_size, size - header_size
+        position += size
+
+
+def _iff_chunks(
+    f: BinaryIO, start: int, file_size: int, byte_order: str
+) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (id, body offset, body size) of RIFF or IFF chunks"""
+    position = start
+    while position + 8 <= file_size:
+        f.seek(position)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        chunk_id, size = struct.unpack(byte_order + "4sI", header)
+        yield chunk_id, position + 8, size
+        # Chunks are padded to an even length
+        position += 8 + size + (size & 1)
+
+
+def _extended_to_float(data: bytes) -> float:
+    """Convert an 80-bit IEEE 754 extended float (AIFF sample rate)"""
+    exponent, mantissa = struct.unpack(">HQ", data)
+    sign = -1 if exponent & 0x8000 else 1
+    exponent &= 0x7FFF
+    if exponent == 0 and mantissa == 0:
+        return 0.0
+    return sign * mantissa * 2.0 ** (exponent - 16383 - 63)
+
+
+_PARSERS = [
+    (lambda head: head[:4] == b"RIFF" and head[8:12] == b"WAVE", _probe_wav),
+    (
+        lambda head: head[:4] == b"FORM" and head[8:12] in (b"AIFF", b"AIFC"),
+        _probe_aiff,
+    ),
+    (lambda head: head[:4] == b"fLaC", _probe_flac),
+    (lambda head: head[:4] == b"OggS", _probe_ogg),
+    (lambda head: head[4:8] == b"ftyp", _probe_mp4),
+]
+
+
+class AudioMetadataProber:
+    """Reads audio stream properties from container headers without decoding
+
+    Supports WAV, AIFF, FLAC, Ogg (Vorbis, Opus, FLAC), MP4/M4A and MPEG
+    audio. Unreadable or unrecognized files yield None instead of raising.
+    """
+
+    def probe(self, file_path: str) -> Optional[AudioMetadata]:
+        """Get the metadata of an audio file, or None if it cannot be read"""
+        try:
+            return probe_audio_metadata(file_path)
+        except (OSError, struct.error, ValueError, IndexError, ZeroDivisionError):
+            return None
@@ -0,0 +1,253 @@
+"""
+Folder Watcher Service
+سرویس پایش پوشه
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.models import AudioFile
+
+# inotify event flags (see <sys/inotify.h>)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_REMOVED = _IN_MOVED_FROM | _IN_DELETE
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_REMOVED
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifySource:
+    """Reports paths touched inside a folder tree using Linux inotify"""
+
+    def __init__(self, root: str):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: Dict[int, str] = {}
+        self._add_tree(root)
+
+    def collect(self, timeout: float) -> Tuple[Set[str], Set[str], bool]:
+        """Wait up to ``timeout`` seconds for events
+
+        Returns the paths touched, the paths (files or folders) deleted or
+        moved away, and whether the event queue overflowed.
+        """
+        touched: Set[str] = set()
+        removed: Set[str] = set()
+        overflow = False
+
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return touched, removed, overflow
+
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not buffer:
+                break
+
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset : offset + length].split(b"\0", 1)[0]
+                offset += length
+
+                if mask & _IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                if mask & _IN_IGNORED:
+                    self._directories.pop(wd, None)
+                    continue
+
+                directory = self._directories.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+
+                if mask & _IN_REMOVED:
+                    removed.add(path)
+                    touched.discard(path)
+                elif mask & _IN_ISDIR:
+                    # Files may land in a new folder before its watch exists
+                    self._add_tree(path)
+                    touched.update(_list_files(path))
+                else:
+                    touched.add(path)
+
+        return touched, removed, overflow
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _add_tree(self, root: str) -> None:
+        for directory, subdirectories, _ in os.walk(root):
+            subdirectories[:] = [d for d in subdirectories if not d.startswith(".")]
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), _WATCH_MASK
+            )
+            if wd >= 0:
+                self._directories[wd] = directory
+
+
+def _list_files(root: str) -> List[str]:
+    """List every file below ``root``"""
+    return [
+        os.path.join(directory, name)
+        for directory, _, names in os.walk(root)
+        for name in names
+    ]
+
+
+class FolderWatcher:
+    """Detects new recordings in a folder and reports them once fully written
+
+    Uses inotify on Linux and falls back to periodic rescans elsewhere. A new
+    file is only reported after its size and mtime have stayed the same for
+    ``settle_seconds``, so recordings that are still being copied or written
+    are not picked up half-finished.
+    """
+
+    def __init__(
+        self,
+        audio_service,
+        folder_path: str,
+        poll_interval: float = 2.0,
+        settle_seconds: float = 3.0,
+        use_inotify: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._audio_service = audio_service
+        self._folder_path = os.path.abspath(folder_path)
+        self._poll_interval = poll_interval
+        self._settle_seconds = settle_seconds
+        self._clock = clock
+        self._known: Set[str] = set()
+        # path -> ((size, mtime_ns), time the signature was first seen)
+        self._pending: Dict[str, Tuple[Optional[Tuple[int, int]], float]] = {}
+
+        self._inotify: Optional[_InotifySource] = None
+        if use_inotify:
+            try:
+                self._inotify = _InotifySource(self._folder_path)
+            except (OSError, AttributeError):
+                self._inotify = None
+
+    @property
+    def uses_inotify(self) -> bool:
+        """Check if change notifications come from inotify"""
+        return self._inotify is not None
+
+    def mark_existing(self) -> List[AudioFile]:
+        """Treat files already in the folder as seen and return them"""
+        existing = list(self._audio_service.iter_audio_files(self._folder_path))
+        self._known.update(audio_file.file_path for audio_file in existing)
+        return existing
+
+    def poll(self, timeout: Optional[float] = None) -> List[AudioFile]:
+        """Wait for changes (up to ``timeout``) and return newly settled files"""
+        timeout = self._poll_interval if timeout is None else timeout
+
+        if self._inotify is not None:
+            wait = timeout if not self._pending else min(timeout, self._settle_seconds)
+            touched, removed, overflow = self._inotify.collect(wait)
+            # Forget removed files so a new recording at the same path is seen
+            self._forget(removed)
+            if overflow:
+                touched.update(self._scan_paths())
+                self._known &= touched
+        else:
+            touched = self._scan_paths()
+            # Forget deleted files so a new recording at the same path is seen
+            self._known &= touched
+
+        now = self._clock()
+        for path in touched:
+            if (
+                path not in self._known
+                and path not in self._pending
+                and self._audio_service.is_supported_file(path)
+            ):
+                self._pending[path] = (None, now)
+
+        return self._collect_settled(now)
+
+    def watch(
+        self,
+        on_ready: Callable[[List[AudioFile]], None],
+        stop_event: Optional[threading.Event] = None,
+    ) -> None:
+        """Call ``on_ready`` with each batch of new files until stopped"""
+        stop_event = stop_event or threading.Event()
+        try:
+            while not stop_event.is_set():
+                ready = self.poll()
+                if ready:
+                    on_ready(ready)
+                elif self._inotify is None:
+                    stop_event.wait(self._poll_interval)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Release the inotify handle"""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _forget(self, removed: Set[str]) -> None:
+        """Drop removed files, and files inside removed folders, from known"""
+        if not removed:
+            return
+        prefixes = tuple(path + os.sep for path in removed)
+        self._known = {
+            path
+            for path in self._known
+            if path not in removed and not path.startswith(prefixes)
+        }
+
+    def _scan_paths(self) -> Set[str]:
+        return set(self._audio_service.iter_audio_paths(self._folder_path))
+
+    def _collect_settled(self, now: float) -> List[AudioFile]:
+        """Move files whose size and mtime stopped changing out of pending"""
+        ready = []
+        for path, (signature, since) in list(self._pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Removed or renamed before it settled
+                del self._pending[path]
+                continue
+
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != signature:
+                self._pending[path] = (current, now)
+            elif stat.st_size > 0 and now - since >= self._settle_seconds:
+                del self._pending[path]
+                self._known.add(path)
+                ready.append(
+                    self._audio_service.create_audio_file(path, file_size=stat.st_size)
+                )
+
+        ready.sort(key=lambda audio_file: audio_file.file_path)
+        return ready
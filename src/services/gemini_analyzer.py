@@ -3,18 +3,46 @@ Gemini AI Analyzer Service
 سرویس تحلیلگر هوش مصنوعی جمینی
 """
 
+import asyncio
+import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
 
 import google.generativeai as genai
 
 from src.interfaces import IAIAnalyzer, IConfigurationService, IPromptProvider
-from src.models import AnalysisResult, AudioFile
+from src.models import AnalysisResult, AudioChunk, AudioFile, StructuredAnalysis
+from src.services.prompt_cache import PromptCache, is_cache_error
+from src.services.retry_policy import RetryStats
+from src.utils.async_helpers import run_blocking
+
+# Gemini represents each second of audio as 32 tokens
+AUDIO_TOKENS_PER_SECOND = 32
+
+# Upper bound on segments of one long recording analyzed at the same time
+MAX_CHUNK_WORKERS = 16
 
 
 class GeminiAnalyzer(IAIAnalyzer):
     """Analyzes audio files using Google's Gemini AI following Dependency Inversion Principle"""
 
-    def __init__(self, config_service, prompt_provider=None):
+    def __init__(
+        self,
+        config_service,
+        prompt_provider=None,
+        result_cache=None,
+        upload_registry=None,
+        rate_limiter=None,
+        retry_policy=None,
+        run_journal=None,
+        preprocessor=None,
+        silence_trimmer=None,
+        chunker=None,
+        prompt_cache_ttl: Optional[float] = None,
+        structured_output: bool = False,
+    ):
         # Handle backward compatibility - if first arg is string, it's api_key
         if isinstance(config_service, str):
             # Legacy constructor: GeminiAnalyzer(api_key, model_name)
@@ -30,9 +58,41 @@ class GeminiAnalyzer(IAIAnalyzer):
             self._config_service = config_service
             self._prompt_provider = prompt_provider
 
+        self._result_cache = result_cache
+        self._upload_registry = upload_registry
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+        self._run_journal = run_journal
+        self._preprocessor = preprocessor
+        self._silence_trimmer = silence_trimmer
+        self._chunker = chunker
         self._client = None
         self._initialize_client()
 
+        # Model objects shared by all requests, see _get_model
+        self._models: Dict[tuple, object] = {}
+        self._models_lock = threading.Lock()
+        self._analysis_prompt: Optional[str] = None
+
+        # Ask for JSON following the prompt provider's schema instead of Markdown
+        self._response_schema = None
+        if structured_output:
+            self._response_schema = self._prompt_provider.get_response_schema()
+            if self._response_schema is None:
+                print(
+                    "⚠️  ارائه‌دهنده پرامت خروجی ساختاریافته ندارد؛ "
+                    "از Markdown استفاده می‌شود"
+                )
+
+        # Keep the analysis prompt in a server-side context cache
+        self._prompt_cache = None
+        if prompt_cache_ttl:
+            self._prompt_cache = PromptCache(
+                self._client,
+                ttl=prompt_cache_ttl,
+                generation_config=self._generation_config(),
+            )
+
     def _initialize_client(self) -> None:
         """Initialize the Gemini client"""
         try:
@@ -43,15 +103,21 @@ class GeminiAnalyzer(IAIAnalyzer):
             raise ConnectionError(f"Failed to initialize Gemini client: {str(e)}")
 
     def analyze_audio(
-        self, audio_file: AudioFile, language: str = None
+        self, audio_file: AudioFile, language: str = None, stream=None
     ) -> AnalysisResult:
         """Analyze an audio file and return the result
 
         Args:
             audio_file (AudioFile): The audio file to analyze
             language (str, optional): The language of the audio. Defaults to None.
+            stream (optional): Live report (e.g. ``MarkdownReportStream``) that
+                receives the analysis text as the model generates it; the text
+                is read back from it rather than collected in memory. Long
+                recordings split into segments and structured (JSON) replies
+                are not streamed.
         """
         start_time = time.time()
+        retry_stats = RetryStats()
 
         try:
             if not self._client:
@@ -59,54 +125,676 @@ class GeminiAnalyzer(IAIAnalyzer):
 
             print(f"در حال پردازش فایل: {audio_file.file_name}")
 
+            # Reuse an earlier analysis of identical audio, prompt and model
+            cached_result = self._get_cached_result(audio_file, start_time)
+            if cached_result is not None:
+                return cached_result
+
+            # A JSON reply only becomes the report once rendered as Markdown
+            if self._response_schema is not None:
+                stream = None
+
+            # Long recordings are analyzed as concurrent segments
+            chunks = self._split_long_recording(audio_file)
+            if chunks:
+                return self._analyze_chunks(audio_file, chunks, start_time, retry_stats)
+
             # Upload the audio file
-            uploaded_file = self._upload_file(audio_file)
+            uploaded_file = self._call_with_retry(
+                self._upload_file, retry_stats, audio_file
+            )
 
             # Generate content with the prompt
-            analysis_text = self._generate_analysis(uploaded_file)
+            return self._complete_analysis(
+                audio_file, uploaded_file, start_time, retry_stats, stream
+            )
+
+        except Exception as e:
+            return self._failed_result(audio_file, e, start_time, retry_stats)
+
+    def analyze_audio_batch(
+        self,
+        audio_files: List[AudioFile],
+        on_result: Optional[Callable[[int, AnalysisResult], None]] = None,
+        upload_workers: int = 1,
+        generate_workers: int = 1,
+        queue_size: int = 2,
+    ) -> List[AnalysisResult]:
+        """Analyze several files with overlapping upload and generation stages
+
+        Uploads run ahead of generation through a bounded queue, so the next
+        file is already on the server when a generate worker becomes free.
+
+        Args:
+            audio_files: Files to analyze
+            on_result: Callback receiving (index, result) as each file completes
+            upload_workers: Number of concurrent uploads
+            generate_workers: Number of concurrent generation requests
+            queue_size: Maximum number of uploaded files waiting for generation
+        """
+        from src.services.analysis_pipeline import UploadGeneratePipeline
 
-            processing_time = time.time() - start_time
+        if not self._client:
+            error = RuntimeError("Gemini client not initialized")
+            return [self._failed_result(f, error, time.time()) for f in audio_files]
 
-            return AnalysisResult(
-                audio_file=audio_file,
-                analysis_text=analysis_text,
-                success=True,
-                processing_time=processing_time,
+        # Convert upcoming files in the background while earlier ones upload
+        if self._preprocessor is not None and self._silence_trimmer is None:
+            self._preprocessor.prefetch(audio_files)
+
+        # Retry counters per file, shared by its upload and generate stages
+        retry_stats = {}
+
+        def upload_stage(audio_file: AudioFile):
+            cached_result = self._get_cached_result(audio_file, time.time())
+            if cached_result is not None:
+                return cached_result
+
+            stats = retry_stats.setdefault(id(audio_file), RetryStats())
+            chunks = self._split_long_recording(audio_file)
+            if chunks:
+                return self._analyze_chunks(audio_file, chunks, time.time(), stats)
+
+            print(f"در حال آپلود فایل: {audio_file.file_name}")
+            return self._call_with_retry(self._upload_file, stats, audio_file)
+
+        def generate_stage(audio_file: AudioFile, payload, start_time: float):
+            if isinstance(payload, AnalysisResult):
+                return payload
+            stats = retry_stats.setdefault(id(audio_file), RetryStats())
+            return self._complete_analysis(audio_file, payload, start_time, stats)
+
+        def error_stage(audio_file: AudioFile, error: Exception, start_time: float):
+            stats = retry_stats.get(id(audio_file))
+            return self._failed_result(audio_file, error, start_time, stats)
+
+        pipeline = UploadGeneratePipeline(
+            upload_stage=upload_stage,
+            generate_stage=generate_stage,
+            error_stage=error_stage,
+            clock=time.time,
+            upload_workers=upload_workers,
+            generate_workers=generate_workers,
+            queue_size=queue_size,
+        )
+        return pipeline.run(audio_files, on_result)
+
+    async def analyze_audio_async(self, audio_file: AudioFile) -> AnalysisResult:
+        """Analyze an audio file from a coroutine
+
+        Generation uses the SDK's async client, and rate-limit waits and retry
+        backoff suspend the coroutine, so many analyses can be in flight on
+        one event loop. Steps without an async API (hashing and cache files,
+        audio trimming and splitting, file upload) run on the loop's default
+        executor, which bounds how many of them run at once.
+        """
+        start_time = time.time()
+        retry_stats = RetryStats()
+
+        try:
+            if not self._client:
+                raise RuntimeError("Gemini client not initialized")
+
+            print(f"در حال پردازش فایل: {audio_file.file_name}")
+
+            cached_result = await run_blocking(
+                self._get_cached_result, audio_file, start_time
+            )
+            if cached_result is not None:
+                return cached_result
+
+            chunks = await run_blocking(self._split_long_recording, audio_file)
+            if chunks:
+                return await self._analyze_chunks_async(
+                    audio_file, chunks, start_time, retry_stats
+                )
+
+            analysis_text, timeline = await self._analyze_uploaded_async(
+                audio_file, retry_stats
+            )
+            return await run_blocking(
+                self._build_result,
+                audio_file,
+                analysis_text,
+                start_time,
+                retry_stats,
+                timeline,
             )
 
         except Exception as e:
-            processing_time = time.time() - start_time
-            error_message = f"خطا در پردازش فایل {audio_file.file_name}: {str(e)}"
-
-            return AnalysisResult(
-                audio_file=audio_file,
-                analysis_text="",
-                success=False,
-                error_message=error_message,
-                processing_time=processing_time,
+            return self._failed_result(audio_file, e, start_time, retry_stats)
+
+    async def _analyze_uploaded_async(self, audio_file: AudioFile, retry_stats):
+        """Upload and analyze one file; returns (text, timeline)"""
+        uploaded_file = await self._call_with_retry_async(
+            self._upload_file_async, retry_stats, audio_file
+        )
+        analysis_text = await self._call_with_retry_async(
+            self._generate_analysis_async,
+            retry_stats,
+            uploaded_file,
+            audio_file,
+            retry_stats,
+        )
+
+        timeline = None
+        if self._silence_trimmer is not None:
+            timeline = self._silence_trimmer.get_timeline(audio_file)
+            if timeline is not None:
+                analysis_text = self._remap_timestamps(analysis_text, timeline)
+        return analysis_text, timeline
+
+    async def _analyze_chunks_async(
+        self,
+        audio_file: AudioFile,
+        chunks: List[AudioChunk],
+        start_time: float,
+        retry_stats: RetryStats,
+    ) -> AnalysisResult:
+        """Analyze the segments of a long recording concurrently and stitch them"""
+        print(f"🧩 تحلیل همزمان {len(chunks)} بخش از {audio_file.file_name}")
+        chunk_stats = [RetryStats() for _ in chunks]
+        try:
+            analyses = await asyncio.gather(
+                *(
+                    self._analyze_uploaded_async(chunk.audio_file, stats)
+                    for chunk, stats in zip(chunks, chunk_stats)
+                )
+            )
+        finally:
+            for stats in chunk_stats:
+                retry_stats.add(stats)
+
+        analysis_text = self._merge_chunk_analyses(
+            chunks, [text for text, _ in analyses]
+        )
+        return await run_blocking(
+            self._build_result, audio_file, analysis_text, start_time, retry_stats
+        )
+
+    def _complete_analysis(
+        self,
+        audio_file: AudioFile,
+        uploaded_file,
+        start_time: float,
+        retry_stats: Optional[RetryStats] = None,
+        stream=None,
+    ) -> AnalysisResult:
+        """Run generation on an uploaded file and build a successful result"""
+        retry_stats = retry_stats or RetryStats()
+
+        # The model saw trimmed audio; move its timestamps back to the original
+        timeline = None
+        if self._silence_trimmer is not None:
+            timeline = self._silence_trimmer.get_timeline(audio_file)
+        if stream is not None and timeline is not None:
+            stream = _RemappedStream(stream, timeline)
+
+        analysis_text = self._call_with_retry(
+            self._generate_analysis,
+            retry_stats,
+            uploaded_file,
+            audio_file,
+            stream,
+            retry_stats,
+        )
+        if timeline is not None and stream is None:
+            # Streamed text was remapped line by line as it was written
+            analysis_text = self._remap_timestamps(analysis_text, timeline)
+
+        return self._build_result(
+            audio_file, analysis_text, start_time, retry_stats, timeline
+        )
+
+    def _split_long_recording(self, audio_file: AudioFile) -> List[AudioChunk]:
+        """Get the segments of a recording too long for one request, if any"""
+        if self._chunker is None:
+            return []
+        return self._chunker.split(audio_file)
+
+    def _analyze_chunks(
+        self,
+        audio_file: AudioFile,
+        chunks: List[AudioChunk],
+        start_time: float,
+        retry_stats: RetryStats,
+    ) -> AnalysisResult:
+        """Analyze the segments of a long recording concurrently and stitch them"""
+        print(f"🧩 تحلیل همزمان {len(chunks)} بخش از {audio_file.file_name}")
+        chunk_stats = [RetryStats() for _ in chunks]
+        workers = min(len(chunks), MAX_CHUNK_WORKERS)
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                texts = list(executor.map(self._analyze_chunk, chunks, chunk_stats))
+        finally:
+            for stats in chunk_stats:
+                retry_stats.add(stats)
+
+        analysis_text = self._merge_chunk_analyses(chunks, texts)
+        return self._build_result(audio_file, analysis_text, start_time, retry_stats)
+
+    def _analyze_chunk(self, chunk: AudioChunk, retry_stats: RetryStats) -> str:
+        """Upload and analyze one segment; timestamps stay relative to it"""
+        uploaded_file = self._call_with_retry(
+            self._upload_file, retry_stats, chunk.audio_file
+        )
+        analysis_text = self._call_with_retry(
+            self._generate_analysis,
+            retry_stats,
+            uploaded_file,
+            chunk.audio_file,
+            None,
+            retry_stats,
+        )
+        if self._silence_trimmer is not None:
+            timeline = self._silence_trimmer.get_timeline(chunk.audio_file)
+            if timeline is not None:
+                analysis_text = self._remap_timestamps(analysis_text, timeline)
+        return analysis_text
+
+    def _remap_timestamps(self, analysis_text: str, timeline) -> str:
+        """Move the times of an analysis from trimmed audio to the original"""
+        if self._response_schema is None:
+            return timeline.remap_timestamps(analysis_text)
+        return StructuredAnalysis.from_json(analysis_text).remapped(timeline).to_json()
+
+    def _merge_chunk_analyses(self, chunks: List[AudioChunk], texts: List[str]) -> str:
+        """Stitch the analyses of a long recording's segments into one"""
+        from src.services.audio_chunker import (
+            merge_chunk_analyses,
+            merge_structured_analyses,
+        )
+
+        if self._response_schema is None:
+            return merge_chunk_analyses(chunks, texts)
+        analyses = [StructuredAnalysis.from_json(text) for text in texts]
+        return merge_structured_analyses(chunks, analyses).to_json()
+
+    def _build_result(
+        self,
+        audio_file: AudioFile,
+        analysis_text: str,
+        start_time: float,
+        retry_stats: RetryStats,
+        timeline=None,
+    ) -> AnalysisResult:
+        """Build a successful result and store it in the result cache
+
+        A structured (JSON) reply is parsed into typed fields and rendered
+        as Markdown for the report.
+        """
+        structured = None
+        if self._response_schema is not None:
+            structured = StructuredAnalysis.from_json(analysis_text)
+            analysis_text = structured.to_markdown(
+                self._prompt_provider.get_report_labels()
             )
 
+        processing_time = time.time() - start_time
+
+        result = AnalysisResult(
+            audio_file=audio_file,
+            analysis_text=analysis_text,
+            success=True,
+            processing_time=processing_time,
+            attempts=1 + retry_stats.retries,
+            retry_time=retry_stats.retry_time,
+            timeline=timeline,
+            structured=structured,
+            prompt_tokens=retry_stats.prompt_tokens,
+            output_tokens=retry_stats.output_tokens,
+        )
+
+        if self._result_cache is not None:
+            cache_key = self._get_cache_key(audio_file)
+            if cache_key is not None:
+                self._result_cache.put(cache_key, result)
+
+        return result
+
+    def _get_cached_result(
+        self, audio_file: AudioFile, start_time: float
+    ) -> Optional[AnalysisResult]:
+        """Return a cached result for the file, or None on a miss"""
+        if self._result_cache is None:
+            return None
+
+        cache_key = self._get_cache_key(audio_file)
+        if cache_key is None:
+            return None
+
+        result = self._result_cache.get(cache_key, audio_file)
+        if result is not None:
+            result.processing_time = time.time() - start_time
+            print(f"♻️  نتیجه از حافظه نهان بازیابی شد: {audio_file.file_name}")
+        return result
+
+    def _get_cache_key(self, audio_file: AudioFile) -> Optional[str]:
+        """Build the result cache key, or None if the file cannot be hashed"""
+        from src.services.result_cache import ResultCache
+
+        try:
+            audio_hash = audio_file.get_content_hash()
+        except OSError:
+            return None
+
+        prompt = self._get_analysis_prompt()
+        if self._response_schema is not None:
+            prompt += _config_key(self._response_schema)
+        return ResultCache.make_key(
+            audio_hash, prompt, self._config_service.get_model_name()
+        )
+
+    def get_rate_limit_stats(self) -> Optional[dict]:
+        """Get rate limiter counters, or None when rate limiting is disabled"""
+        if self._rate_limiter is None:
+            return None
+        return self._rate_limiter.get_stats()
+
+    def get_preprocessing_stats(self) -> Optional[dict]:
+        """Get audio conversion counters, or None when pre-processing is disabled"""
+        if self._preprocessor is None:
+            return None
+        return self._preprocessor.get_stats()
+
+    def get_prompt_cache_stats(self) -> Optional[dict]:
+        """Get prompt cache counters, or None when prompt caching is disabled"""
+        if self._prompt_cache is None:
+            return None
+        return self._prompt_cache.get_stats()
+
+    def get_cache_stats(self) -> Optional[dict]:
+        """Get result cache counters, or None when caching is disabled"""
+        if self._result_cache is None:
+            return None
+        return self._result_cache.get_stats()
+
+    def _failed_result(
+        self,
+        audio_file: AudioFile,
+        error: Exception,
+        start_time: float,
+        retry_stats: Optional[RetryStats] = None,
+    ) -> AnalysisResult:
+        """Build a failed result for an exception raised while analyzing"""
+        retry_stats = retry_stats or RetryStats()
+        processing_time = time.time() - start_time
+        error_message = f"خطا در پردازش فایل {audio_file.file_name}: {str(error)}"
+
+        return AnalysisResult(
+            audio_file=audio_file,
+            analysis_text="",
+            success=False,
+            error_message=error_message,
+            processing_time=processing_time,
+            attempts=1 + retry_stats.retries,
+            retry_time=retry_stats.retry_time,
+            prompt_tokens=retry_stats.prompt_tokens,
+            output_tokens=retry_stats.output_tokens,
+        )
+
+    def _call_with_retry(self, operation: Callable, retry_stats: RetryStats, *args):
+        """Run an API operation under the retry policy, if one is configured"""
+        if self._retry_policy is None:
+            return operation(*args)
+        return self._retry_policy.call(operation, retry_stats, *args)
+
+    async def _call_with_retry_async(
+        self, operation: Callable, retry_stats: RetryStats, *args
+    ):
+        """Await an API coroutine under the retry policy, if one is configured"""
+        if self._retry_policy is None:
+            return await operation(*args)
+        return await self._retry_policy.call_async(operation, retry_stats, *args)
+
+    async def _upload_file_async(self, audio_file: AudioFile):
+        """Upload on the default executor; the SDK has no async upload"""
+        return await run_blocking(self._upload_file, audio_file)
+
     def _upload_file(self, audio_file: AudioFile):
-        """Upload audio file to Gemini"""
+        """Upload audio file to Gemini, reusing a still-valid earlier upload"""
+        upload_audio = audio_file
+        if self._silence_trimmer is not None:
+            upload_audio, _ = self._silence_trimmer.trim(audio_file)
+
+        reused_file = self._reuse_uploaded_file(audio_file, upload_audio)
+        if reused_file is not None:
+            return reused_file
+
+        upload_path = upload_audio.file_path
+        if self._preprocessor is not None:
+            upload_path = self._preprocessor.prepare(upload_audio)
+
         try:
-            return self._client.upload_file(audio_file.file_path)
+            uploaded_file = self._client.upload_file(upload_path)
         except Exception as e:
             raise RuntimeError(
                 f"Failed to upload file {audio_file.file_name}: {str(e)}"
+            ) from e
+
+        if self._upload_registry is not None:
+            try:
+                self._upload_registry.register(
+                    self._upload_key(upload_audio), uploaded_file
+                )
+            except OSError:
+                pass
+
+        if self._run_journal is not None:
+            from src.services.run_journal import UPLOADED
+
+            self._run_journal.record(
+                audio_file, UPLOADED, remote_name=getattr(uploaded_file, "name", None)
             )
 
-    def _generate_analysis(self, uploaded_file) -> str:
-        """Generate analysis using Gemini"""
+        return uploaded_file
+
+    def _upload_key(self, upload_audio: AudioFile) -> str:
+        """Registry key of an upload: content hash plus the settings shaping it"""
+        parts = [upload_audio.get_content_hash()]
+        if self._silence_trimmer is not None:
+            parts.append(self._silence_trimmer.settings)
+        if self._preprocessor is not None:
+            parts.append(self._preprocessor.settings)
+        return "-".join(parts)
+
+    def _reuse_uploaded_file(
+        self, audio_file: AudioFile, upload_audio: Optional[AudioFile] = None
+    ):
+        """Return the server-side handle of identical audio uploaded earlier"""
+        upload_key = None
+        remote_name = None
+
+        if self._upload_registry is not None:
+            try:
+                upload_key = self._upload_key(upload_audio or audio_file)
+            except OSError:
+                upload_key = None
+            if upload_key is not None:
+                remote_name = self._upload_registry.get(upload_key)
+
+        # An interrupted run may have uploaded the file before it was killed
+        if remote_name is None and self._run_journal is not None:
+            from src.services.run_journal import UPLOADED
+
+            entry = self._run_journal.get_entry(audio_file)
+            if entry is not None and entry["state"] == UPLOADED:
+                remote_name = entry.get("remote_name")
+
+        if not isinstance(remote_name, str):
+            return None
+
         try:
-            model_name = self._config_service.get_model_name()
-            prompt = self._prompt_provider.get_analysis_prompt()
+            uploaded_file = self._client.get_file(remote_name)
+        except Exception:
+            # Deleted or expired on the server; fall back to a fresh upload
+            if upload_key is not None:
+                self._upload_registry.forget(upload_key)
+            return None
 
-            model = self._client.GenerativeModel(model_name)
-            response = model.generate_content([prompt, uploaded_file])
+        print(f"♻️  استفاده مجدد از فایل آپلود شده: {audio_file.file_name}")
+        return uploaded_file
+
+    def _generate_analysis(
+        self,
+        uploaded_file,
+        audio_file: Optional[AudioFile] = None,
+        stream=None,
+        usage_stats: Optional[RetryStats] = None,
+    ) -> str:
+        """Generate analysis using Gemini, streaming it to ``stream`` if given
+
+        The reported token counts are added to ``usage_stats``.
+        """
+        try:
+            prompt = self._get_analysis_prompt()
+            model, contents = self._prepare_request(prompt, uploaded_file)
 
+            if self._rate_limiter is None:
+                text, usage = self._generate(model, contents, stream)
+            else:
+                estimated_tokens = self._estimate_tokens(prompt, audio_file)
+                with self._rate_limiter.request(estimated_tokens) as ticket:
+                    text, usage = self._generate(model, contents, stream)
+                    ticket.record_usage(getattr(usage, "total_token_count", None))
+
+            _record_tokens(usage_stats, usage)
+            return text
+        except Exception as e:
+            self._forget_stale_prompt_cache(e)
+            raise RuntimeError(f"Failed to generate analysis: {str(e)}") from e
+
+    async def _generate_analysis_async(
+        self,
+        uploaded_file,
+        audio_file: Optional[AudioFile] = None,
+        usage_stats: Optional[RetryStats] = None,
+    ) -> str:
+        """Generate analysis with the SDK's async client"""
+        try:
+            prompt = self._get_analysis_prompt()
+            # Creating or refreshing the prompt cache is a blocking call
+            model, contents = await run_blocking(
+                self._prepare_request, prompt, uploaded_file
+            )
+
+            if self._rate_limiter is None:
+                response = await model.generate_content_async(contents)
+            else:
+                estimated_tokens = self._estimate_tokens(prompt, audio_file)
+                async with self._rate_limiter.request(estimated_tokens) as ticket:
+                    response = await model.generate_content_async(contents)
+                    usage = getattr(response, "usage_metadata", None)
+                    ticket.record_usage(getattr(usage, "total_token_count", None))
+
+            _record_tokens(usage_stats, getattr(response, "usage_metadata", None))
             return response.text
         except Exception as e:
-            raise RuntimeError(f"Failed to generate analysis: {str(e)}")
+            self._forget_stale_prompt_cache(e)
+            raise RuntimeError(f"Failed to generate analysis: {str(e)}") from e
+
+    def _prepare_request(self, prompt: str, uploaded_file) -> tuple:
+        """Get the model and contents of an analysis request
+
+        The prompt is the model's system instruction, so only the audio is
+        sent as content. With a prompt cache the model references the cached
+        prompt instead of carrying it in every request.
+        """
+        model_name = self._config_service.get_model_name()
+        if self._prompt_cache is not None:
+            model = self._prompt_cache.get_model(model_name, prompt)
+            if model is not None:
+                return model, [uploaded_file]
+        model = self._get_model(
+            model_name,
+            system_instruction=prompt,
+            generation_config=self._generation_config(),
+        )
+        return model, [uploaded_file]
+
+    def _get_model(
+        self,
+        model_name: str,
+        system_instruction: Optional[str] = None,
+        generation_config=None,
+    ):
+        """Get the shared model object for a configuration, building it once
+
+        Model objects hold no per-request state and all of them send through
+        the SDK's process-wide API client, so its connections stay open
+        between requests; one instance per model name, system instruction
+        and generation config is reused by every thread.
+        """
+        key = (model_name, system_instruction, _config_key(generation_config))
+        with self._models_lock:
+            model = self._models.get(key)
+            if model is None:
+                options = {}
+                if system_instruction:
+                    options["system_instruction"] = system_instruction
+                if generation_config is not None:
+                    options["generation_config"] = generation_config
+                model = self._client.GenerativeModel(model_name, **options)
+                self._models[key] = model
+            return model
+
+    def _get_analysis_prompt(self) -> str:
+        """Get the analysis prompt, built by the prompt provider once"""
+        if self._analysis_prompt is None:
+            if self._response_schema is not None:
+                self._analysis_prompt = self._prompt_provider.get_structured_prompt()
+            else:
+                self._analysis_prompt = self._prompt_provider.get_analysis_prompt()
+        return self._analysis_prompt
+
+    def _generation_config(self) -> Optional[dict]:
+        """Generation settings of analysis requests, or None for the defaults"""
+        if self._response_schema is None:
+            return None
+        return {
+            "response_mime_type": "application/json",
+            "response_schema": self._response_schema,
+        }
+
+    def _forget_stale_prompt_cache(self, error: Exception) -> None:
+        """Drop a prompt cache the server no longer has, so a retry recreates it"""
+        if self._prompt_cache is not None and is_cache_error(error):
+            self._prompt_cache.invalidate(
+                self._config_service.get_model_name(), self._get_analysis_prompt()
+            )
+
+    @staticmethod
+    def _generate(model, contents: list, stream=None):
+        """Send one request and return (text, usage metadata)
+
+        With a ``stream``, the response is requested in chunks that are
+        written to it as they arrive and the text is read back from the
+        stream once complete; every attempt restarts the stream.
+        """
+        if stream is None:
+            response = model.generate_content(contents)
+            return response.text, getattr(response, "usage_metadata", None)
+
+        response = model.generate_content(contents, stream=True)
+        stream.begin()
+        for chunk in response:
+            stream.write(chunk.text)
+        stream.end()
+        return stream.read_text(), getattr(response, "usage_metadata", None)
+
+    @staticmethod
+    def _estimate_tokens(prompt: str, audio_file: Optional[AudioFile]) -> int:
+        """Roughly estimate the tokens of a request before sending it"""
+        # About 4 characters per text token
+        tokens = len(prompt) // 4
+        if audio_file is None:
+            return tokens
+        if audio_file.duration:
+            tokens += int(audio_file.duration * AUDIO_TOKENS_PER_SECOND)
+        elif audio_file.file_size:
+            # Assume ~128 kbit/s (16 KB per second of audio) when duration is unknown
+            tokens += int(audio_file.file_size / 16000 * AUDIO_TOKENS_PER_SECOND)
+        return tokens
 
     def test_connection(self) -> bool:
         """Test the connection to Gemini API"""
@@ -116,8 +804,57 @@ class GeminiAnalyzer(IAIAnalyzer):
 
             # Try a simple request to test the connection
             model_name = self._config_service.get_model_name()
-            model = self._client.GenerativeModel(model_name)
+            model = self._get_model(model_name)
             response = model.generate_content("Test connection")
             return response is not None
         except:
             return False
+
+
+def _config_key(generation_config) -> Optional[str]:
+    """Hashable form of a generation config for the model cache"""
+    if generation_config is None:
+        return None
+    return json.dumps(generation_config, sort_keys=True, default=repr)
+
+
+def _record_tokens(usage_stats: Optional[RetryStats], usage) -> None:
+    """Add the token counts of a response's usage metadata to ``usage_stats``"""
+    if usage_stats is not None and usage is not None:
+        usage_stats.add_tokens(
+            getattr(usage, "prompt_token_count", None),
+            getattr(usage, "candidates_token_count", None),
+        )
+
+
+class _RemappedStream:
+    """Forwards streamed text line by line with timestamps moved by a timeline
+
+    Whole lines are held back until complete so a timestamp split across two
+    response chunks is still rewritten.
+    """
+
+    def __init__(self, stream, timeline):
+        self._stream = stream
+        self._timeline = timeline
+        self._pending = ""
+
+    def begin(self) -> None:
+        self._pending = ""
+        self._stream.begin()
+
+    def write(self, text: str) -> None:
+        self._pending += text
+        complete = self._pending.rfind("\n") + 1
+        if complete:
+            lines, self._pending = self._pending[:complete], self._pending[complete:]
+            self._stream.write(self._timeline.remap_timestamps(lines))
+
+    def end(self) -> None:
+        if self._pending:
+            self._stream.write(self._timeline.remap_timestamps(self._pending))
+            self._pending = ""
+        self._stream.end()
+
+    def read_text(self) -> str:
+        return self._stream.read_text()
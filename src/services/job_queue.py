@@ -0,0 +1,150 @@
+"""
+Analysis Job Queue
+صف کارهای تحلیل
+"""
+
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from src.models import AnalysisResult
+from src.models.job import FAILED, QUEUED, RUNNING, SUCCEEDED, Job
+
+
+class JobQueue:
+    """Bounded queue of analysis jobs served by a pool of worker threads
+
+    ``submit`` raises ``queue.Full`` instead of blocking when ``max_queued``
+    jobs are already waiting, so callers get immediate back-pressure. Only
+    the ``max_retained`` most recent finished jobs are kept for lookup.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Job], AnalysisResult],
+        workers: int = 1,
+        max_queued: int = 16,
+        max_retained: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._process = process
+        self._worker_count = max(1, workers)
+        self._max_retained = max_retained
+        self._clock = clock
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(max(1, max_queued))
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        self._started_at = clock()
+        self._stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "running": 0,
+            "processing_time": 0.0,
+        }
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        while len(self._workers) < self._worker_count:
+            worker = threading.Thread(
+                target=self._work, name=f"job-worker-{len(self._workers)}"
+            )
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Let the workers finish queued jobs, then stop them"""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def submit(self, job: Job) -> Job:
+        """Queue a job; raises ``queue.Full`` when the queue is at capacity"""
+        job.status = QUEUED
+        with self._lock:
+            self._jobs[job.id] = job
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                del self._jobs[job.id]
+                self._stats["rejected"] += 1
+                raise
+            self._stats["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_stats(self) -> dict:
+        """Get queue depth, worker and job outcome counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        finished = stats["succeeded"] + stats["failed"]
+        stats["queued"] = self._queue.qsize()
+        stats["workers"] = self._worker_count
+        stats["capacity"] = self._queue.maxsize
+        stats["average_processing_time"] = (
+            stats.pop("processing_time") / finished if finished else 0.0
+        )
+        stats["uptime"] = self._clock() - self._started_at
+        return stats
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        with self._lock:
+            job.status = RUNNING
+            job.started_at = self._clock()
+            self._stats["running"] += 1
+
+        try:
+            result = self._process(job)
+        except Exception as e:
+            result = AnalysisResult(
+                audio_file=None,
+                analysis_text="",
+                success=False,
+                error_message=f"خطای غیرمنتظره: {str(e)}",
+            )
+        finally:
+            if job.remove_file:
+                _remove_upload(job.file_path)
+
+        with self._lock:
+            job.result = result
+            job.finished_at = self._clock()
+            job.status = SUCCEEDED if result.is_successful else FAILED
+            self._stats["running"] -= 1
+            self._stats["succeeded" if result.is_successful else "failed"] += 1
+            self._stats["processing_time"] += job.finished_at - job.started_at
+            self._evict_finished()
+
+    def _evict_finished(self) -> None:
+        """Forget the oldest finished jobs beyond ``max_retained``"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        for job_id in finished[: max(0, len(finished) - self._max_retained)]:
+            del self._jobs[job_id]
+
+
+def _remove_upload(file_path: str) -> None:
+    """Delete an uploaded recording and the per-job folder it was stored in"""
+    try:
+        shutil.rmtree(os.path.dirname(file_path))
+    except OSError:
+        pass
@@ -0,0 +1,289 @@
+"""
+HTTP Job Server
+سرور HTTP برای ارسال فایل‌های صوتی و دریافت نتایج
+
+Endpoints::
+
+    POST /jobs                 submit a recording (raw body + ?filename=, or
+                               JSON {"path": ...} for a file on the server)
+    GET  /jobs/<id>            job status
+    GET  /jobs/<id>/result     analysis as JSON (?format=md for the report)
+    GET  /health               liveness check
+    GET  /metrics              queue, job and analyzer counters
+"""
+
+import json
+import os
+import queue
+import shutil
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from src.models.job import Job
+from src.services.job_queue import JobQueue
+
+_COPY_CHUNK_SIZE = 64 * 1024
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class JobServer:
+    """Lightweight HTTP API in front of a VoiceToTextApplication
+
+    Submitted recordings go into a bounded ``JobQueue``; when it is full the
+    server answers ``503`` with ``Retry-After`` instead of accepting more
+    work than the workers can keep up with. Uploaded audio is written to
+    ``upload_folder`` while the job runs and deleted afterwards. Reports are
+    saved under ``output_folder/<job id>``.
+
+    The API has no authentication, so it only listens on the loopback
+    interface unless another ``host`` is given explicitly.
+    """
+
+    def __init__(
+        self,
+        application,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        workers: int = 1,
+        max_queued: int = 16,
+        upload_folder: str = os.path.join(".cache", "uploads"),
+        output_folder: str = os.path.join("results", "api"),
+        allowed_folder: Optional[str] = "assets",
+        max_upload_mb: float = 200,
+    ):
+        self._application = application
+        self._upload_folder = upload_folder
+        self._output_folder = output_folder
+        # Submitting by path is only allowed for files inside this folder
+        self._allowed_folder = (
+            os.path.realpath(allowed_folder) if allowed_folder else None
+        )
+        self._max_upload_bytes = int(max_upload_mb * 1024 * 1024)
+        self.job_queue = JobQueue(self._process, workers, max_queued)
+
+        self._httpd = _ThreadingHTTPServer((host, port), _JobRequestHandler)
+        self._httpd.job_server = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def server_address(self) -> Tuple[str, int]:
+        """Address the server is listening on (the port is set if 0 was given)"""
+        return self._httpd.server_address[:2]
+
+    def serve_forever(self) -> None:
+        """Serve requests until interrupted"""
+        self.job_queue.start()
+        host, port = self.server_address
+        print(f"🌐 سرور API در حال اجرا: http://{host}:{port}")
+        if host not in ("127.0.0.1", "::1", "localhost"):
+            print("⚠️  سرور API بدون احراز هویت از شبکه در دسترس است")
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\n⏹️  سرور API متوقف شد")
+        finally:
+            self._close()
+
+    def start(self) -> None:
+        """Serve requests from a background thread"""
+        self.job_queue.start()
+        self._thread = threading.Thread(target=self._httpd.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        """Stop a server started with ``start``"""
+        self._httpd.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._close()
+
+    def _close(self) -> None:
+        self._httpd.server_close()
+        self.job_queue.stop()
+        self._application.close()
+
+    def _process(self, job: Job):
+        return self._application.process_audio_file(
+            job.file_path, os.path.join(self._output_folder, job.id)
+        )
+
+    def submit_path(self, file_path: str) -> Tuple[int, dict]:
+        """Queue a file that is already on the server"""
+        real_path = os.path.realpath(file_path)
+        if self._allowed_folder is not None and not real_path.startswith(
+            self._allowed_folder + os.sep
+        ):
+            return 403, {"error": "path is outside the allowed folder"}
+        if not os.path.isfile(real_path):
+            return 404, {"error": f"file not found: {file_path}"}
+        if not self._application.is_supported_file(real_path):
+            return 400, {"error": "unsupported audio format"}
+
+        job = Job(
+            id=uuid.uuid4().hex,
+            file_path=real_path,
+            file_name=os.path.basename(real_path),
+        )
+        return self._submit(job)
+
+    def submit_upload(self, file_name: str, body, length: int) -> Tuple[int, dict]:
+        """Store an uploaded recording of ``length`` bytes and queue it"""
+        file_name = os.path.basename(file_name or "")
+        if not file_name or not self._application.is_supported_file(file_name):
+            return 400, {"error": "a filename with a supported extension is required"}
+        if length > self._max_upload_bytes:
+            return 413, {"error": "upload too large"}
+
+        job_id = uuid.uuid4().hex
+        job_folder = os.path.join(self._upload_folder, job_id)
+        os.makedirs(job_folder)
+        file_path = os.path.abspath(os.path.join(job_folder, file_name))
+
+        with open(file_path, "wb") as f:
+            remaining = length
+            while remaining > 0:
+                data = body.read(min(_COPY_CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                f.write(data)
+                remaining -= len(data)
+
+        if remaining:
+            shutil.rmtree(job_folder, ignore_errors=True)
+            return 400, {"error": "upload ended early"}
+
+        job = Job(id=job_id, file_path=file_path, file_name=file_name, remove_file=True)
+        status, payload = self._submit(job)
+        if status != 202:
+            shutil.rmtree(job_folder, ignore_errors=True)
+        return status, payload
+
+    def _submit(self, job: Job) -> Tuple[int, dict]:
+        try:
+            self.job_queue.submit(job)
+        except queue.Full:
+            return 503, {"error": "job queue is full, retry later"}
+        return 202, job.to_dict()
+
+    def get_result(self, job_id: str, fmt: str) -> Tuple[int, object]:
+        """Get a finished job's analysis as a dict (json) or text (md)"""
+        job = self.job_queue.get(job_id)
+        if job is None:
+            return 404, {"error": "unknown job"}
+        if not job.is_finished:
+            return 409, {"error": f"job is {job.status}", "status": job.status}
+
+        if fmt == "md":
+            report = job.result.output_file_path
+            if not job.result.is_successful or not report:
+                return 409, {"error": job.result.error_message or "no report"}
+            try:
+                with open(report, "r", encoding="utf-8") as f:
+                    return 200, f.read()
+            except OSError:
+                return 404, {"error": "report not found"}
+
+        data = job.to_dict()
+        data["result"] = job.result.to_dict()
+        return 200, data
+
+    def get_metrics(self) -> dict:
+        """Get queue, job and analyzer counters"""
+        metrics = {"jobs": self.job_queue.get_stats()}
+        metrics.update(self._application.get_service_stats())
+        return metrics
+
+
+class _JobRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to the JobServer stored on the HTTP server"""
+
+    server_version = "VoiceToText/2.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        job_server = self.server.job_server
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts == ["health"]:
+            self._send_json(200, {"status": "ok"})
+        elif parts == ["metrics"]:
+            self._send_json(200, job_server.get_metrics())
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = job_server.job_queue.get(parts[1])
+            if job is None:
+                self._send_json(404, {"error": "unknown job"})
+            else:
+                self._send_json(200, job.to_dict())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result":
+            fmt = parse_qs(url.query).get("format", ["json"])[0].lower()
+            status, payload = job_server.get_result(parts[1], fmt)
+            if isinstance(payload, str):
+                self._send(status, payload.encode("utf-8"), "text/markdown")
+            else:
+                self._send_json(status, payload)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        job_server = self.server.job_server
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers["Content-Length"])
+        except (TypeError, ValueError):
+            self.close_connection = True
+            self._send_json(411, {"error": "Content-Length is required"})
+            return
+
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("application/json"):
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+                file_path = request["path"]
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {"error": 'expected {"path": ...}'})
+                return
+            status, payload = job_server.submit_path(file_path)
+        else:
+            file_name = parse_qs(url.query).get("filename", [None])[0]
+            file_name = file_name or self.headers.get("X-Filename")
+            status, payload = job_server.submit_upload(file_name, self.rfile, length)
+
+        headers = {}
+        if status >= 400:
+            # A rejected upload may not have been read; drop the connection
+            self.close_connection = True
+        if status == 202:
+            headers["Location"] = f"/jobs/{payload['id']}"
+        elif status == 503:
+            headers["Retry-After"] = "5"
+        self._send_json(status, payload, headers)
+
+    def _send_json(self, status: int, payload: dict, headers=None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json", headers)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        print(f"🌐 {self.address_string()} - {format % args}")
@@ -0,0 +1,269 @@
+"""
+Persistent Job Queue
+صف ماندگار کارها برای پردازش چندفرآیندی
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from src.models import AnalysisResult
+from src.models.job import FAILED, QUEUED, RUNNING, SUCCEEDED
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_path TEXT NOT NULL,
+    fingerprint TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_token TEXT,
+    lease_expires REAL,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL,
+    result TEXT
+)
+"""
+
+
+class Lease(NamedTuple):
+    """A job handed to one worker until ``expires``"""
+
+    job_id: int
+    file_path: str
+    token: str
+    attempt: int
+    expires: float
+
+
+class PersistentJobQueue:
+    """SQLite-backed job queue shared by worker processes on one host
+
+    A worker leases a job for ``visibility_timeout`` seconds and extends the
+    lease while it works. If the worker crashes or hangs, the lease expires
+    and the job becomes visible to the other workers again. A job is given
+    up as failed after ``max_attempts`` leases. Completing a job requires the
+    lease token, so a worker that lost its lease cannot overwrite the result
+    of the worker that took over.
+
+    Only paths and settings are stored on the object, so it can be passed to
+    worker processes; every operation opens its own connection.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        visibility_timeout: float = 120.0,
+        max_attempts: int = 3,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._db_path = db_path
+        self._visibility_timeout = visibility_timeout
+        self._max_attempts = max(1, max_attempts)
+        self._clock = clock
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as db:
+            db.execute(_SCHEMA)
+            columns = {row[1] for row in db.execute("PRAGMA table_info(jobs)")}
+            if "fingerprint" not in columns:
+                # Queues created before jobs were tied to a file version
+                db.execute("ALTER TABLE jobs ADD COLUMN fingerprint TEXT")
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+
+    @property
+    def visibility_timeout(self) -> float:
+        """Seconds a lease lasts unless extended"""
+        return self._visibility_timeout
+
+    def enqueue(self, file_paths: List[str]) -> List[int]:
+        """Add files to the queue and return their job ids
+
+        A file that is still queued, running or whose result has not been
+        collected yet (e.g. after the coordinating process was killed) keeps
+        its existing job instead of being queued twice, as long as its size
+        and mtime are unchanged. Jobs for an older version of the file are
+        dropped unless a worker is running them.
+        """
+        now = self._clock()
+        job_ids = []
+        with self._transaction() as db:
+            for file_path in file_paths:
+                fingerprint = _fingerprint(file_path)
+                db.execute(
+                    "DELETE FROM jobs WHERE file_path = ? AND status != ? "
+                    "AND fingerprint IS NOT ?",
+                    (file_path, RUNNING, fingerprint),
+                )
+                row = None
+                if fingerprint is not None:
+                    row = db.execute(
+                        "SELECT id FROM jobs WHERE file_path = ? "
+                        "AND fingerprint = ? AND status != ? "
+                        "ORDER BY id DESC LIMIT 1",
+                        (file_path, fingerprint, FAILED),
+                    ).fetchone()
+                if row is None:
+                    cursor = db.execute(
+                        "INSERT INTO jobs (file_path, fingerprint, status, "
+                        "enqueued_at) VALUES (?, ?, ?, ?)",
+                        (file_path, fingerprint, QUEUED, now),
+                    )
+                    job_ids.append(cursor.lastrowid)
+                else:
+                    job_ids.append(row[0])
+        return job_ids
+
+    def lease(self) -> Optional[Lease]:
+        """Take the oldest visible job, or None if there is none right now"""
+        now = self._clock()
+        with self._transaction() as db:
+            # Jobs whose final lease ran out are not retried again
+            db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ? "
+                "WHERE status = ? AND lease_expires <= ? AND attempts >= ?",
+                (
+                    FAILED,
+                    now,
+                    json.dumps(
+                        {
+                            "success": False,
+                            "error_message": "پردازشگر در حین کار از دست رفت "
+                            f"({self._max_attempts} تلاش)",
+                        },
+                        ensure_ascii=False,
+                    ),
+                    RUNNING,
+                    now,
+                    self._max_attempts,
+                ),
+            )
+            row = db.execute(
+                "SELECT id, file_path, attempts FROM jobs "
+                "WHERE status = ? OR (status = ? AND lease_expires <= ?) "
+                "ORDER BY id LIMIT 1",
+                (QUEUED, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+
+            job_id, file_path, attempts = row
+            lease = Lease(
+                job_id=job_id,
+                file_path=file_path,
+                token=uuid.uuid4().hex,
+                attempt=attempts + 1,
+                expires=now + self._visibility_timeout,
+            )
+            db.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, lease_token = ?, "
+                "lease_expires = ? WHERE id = ?",
+                (RUNNING, lease.attempt, lease.token, lease.expires, job_id),
+            )
+        return lease
+
+    def extend(self, lease: Lease) -> bool:
+        """Push back the expiry of a lease; False if it was lost"""
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET lease_expires = ? "
+                "WHERE id = ? AND lease_token = ? AND status = ?",
+                (
+                    self._clock() + self._visibility_timeout,
+                    lease.job_id,
+                    lease.token,
+                    RUNNING,
+                ),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, lease: Lease, result: AnalysisResult) -> bool:
+        """Store the result of a leased job; False if the lease was lost"""
+        data = result.to_dict()
+        data["output_file_path"] = result.output_file_path
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ? "
+                "WHERE id = ? AND lease_token = ? AND status = ?",
+                (
+                    SUCCEEDED if result.is_successful else FAILED,
+                    self._clock(),
+                    json.dumps(data, ensure_ascii=False),
+                    lease.job_id,
+                    lease.token,
+                    RUNNING,
+                ),
+            )
+            return cursor.rowcount == 1
+
+    def has_pending(self) -> bool:
+        """Check if any job is queued or running"""
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT 1 FROM jobs WHERE status IN (?, ?) LIMIT 1", (QUEUED, RUNNING)
+            ).fetchone()
+        return row is not None
+
+    def get_results(self, job_ids: List[int]) -> Dict[int, dict]:
+        """Get status, attempts and stored result of finished jobs by id"""
+        results = {}
+        with self._transaction() as db:
+            for job_id in job_ids:
+                row = db.execute(
+                    "SELECT status, attempts, result FROM jobs WHERE id = ?",
+                    (job_id,),
+                ).fetchone()
+                if row is None or row[0] not in (SUCCEEDED, FAILED):
+                    continue
+                results[job_id] = {
+                    "status": row[0],
+                    "attempts": row[1],
+                    "result": json.loads(row[2]) if row[2] else {},
+                }
+        return results
+
+    def remove(self, job_ids: List[int]) -> None:
+        """Forget jobs whose results were collected"""
+        with self._transaction() as db:
+            db.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in job_ids])
+
+    def get_stats(self) -> dict:
+        """Count jobs by status"""
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        stats = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        stats.update(dict(rows))
+        return stats
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection and run one write-locked transaction on it"""
+        db = sqlite3.connect(self._db_path, timeout=30, isolation_level=None)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+
+def _fingerprint(file_path: str) -> Optional[str]:
+    """Size and mtime identifying the version of a file a job refers to"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
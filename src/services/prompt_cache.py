@@ -0,0 +1,129 @@
+"""
+Gemini Prompt Cache
+حافظه نهان سمت سرور برای پرامت تحلیل
+"""
+
+import datetime
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from src.services.retry_policy import RETRYABLE, classify_error
+
+
+class PromptCache:
+    """Keeps the analysis prompt in a Gemini explicit context cache
+
+    The prompt is stored once on the server as the system instruction of a
+    ``CachedContent``; requests then reference the cache and only send the
+    audio, so the prompt's tokens are not re-sent and re-processed for
+    every file. The cache's TTL is extended once it is within
+    ``refresh_margin`` seconds of expiring, and it is recreated if it was
+    deleted on the server. When a cache cannot be created (for example the
+    prompt is below the model's minimum cacheable size, or the model does
+    not support caching), ``get_model`` returns None and callers send the
+    prompt inline as before.
+    """
+
+    def __init__(
+        self,
+        client,
+        ttl: float = 3600,
+        refresh_margin: float = 300,
+        clock: Callable[[], float] = time.time,
+        generation_config=None,
+    ):
+        self._client = client
+        self._generation_config = generation_config
+        self._ttl = ttl
+        self._refresh_margin = min(refresh_margin, ttl / 2)
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (model name, prompt) -> (cached content, model, expiry time)
+        self._entries: Dict[Tuple[str, str], Tuple[object, object, float]] = {}
+        self._unsupported = set()
+        self._stats = {"created": 0, "refreshed": 0, "hits": 0, "fallbacks": 0}
+
+    def get_model(self, model_name: str, prompt: str):
+        """Get a model bound to the cached prompt, or None to send it inline"""
+        key = (model_name, prompt)
+        with self._lock:
+            if key in self._unsupported:
+                self._stats["fallbacks"] += 1
+                return None
+            model = self._get_cached_model(key)
+            if model is None:
+                self._stats["fallbacks"] += 1
+                return None
+            self._stats["hits"] += 1
+            return model
+
+    def get_stats(self) -> dict:
+        """Get cache creation, refresh, hit and fallback counters"""
+        with self._lock:
+            return dict(self._stats)
+
+    def invalidate(self, model_name: str, prompt: str) -> None:
+        """Forget the cache of a prompt, e.g. after the server rejected it"""
+        with self._lock:
+            self._entries.pop((model_name, prompt), None)
+
+    def close(self) -> None:
+        """Delete the server-side caches instead of waiting for them to expire"""
+        with self._lock:
+            entries, self._entries = self._entries, {}
+        for cached, _, _ in entries.values():
+            try:
+                cached.delete()
+            except Exception:
+                pass
+
+    def _get_cached_model(self, key: Tuple[str, str]):
+        """Return the model of a live cache for ``key``, creating or extending it"""
+        now = self._clock()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            cached, model, expires_at = entry
+            if expires_at - now > self._refresh_margin:
+                return model
+            if expires_at > now:
+                try:
+                    cached.update(ttl=datetime.timedelta(seconds=self._ttl))
+                    self._entries[key] = (cached, model, now + self._ttl)
+                    self._stats["refreshed"] += 1
+                    return model
+                except Exception:
+                    # Deleted on the server; create a new one below
+                    pass
+            del self._entries[key]
+
+        model_name, prompt = key
+        try:
+            cached = self._client.caching.CachedContent.create(
+                model=model_name,
+                display_name="voice-to-text-analysis-prompt",
+                system_instruction=prompt,
+                ttl=datetime.timedelta(seconds=self._ttl),
+            )
+        except Exception as e:
+            # Only give up on caching for errors that will not go away
+            if classify_error(e) != RETRYABLE:
+                self._unsupported.add(key)
+            print(f"⚠️  ذخیره پرامت در حافظه نهان جمینی ممکن نشد: {str(e)}")
+            return None
+
+        # The model only refers to the cache by name, so it survives TTL updates
+        model = self._client.GenerativeModel.from_cached_content(
+            cached_content=cached, generation_config=self._generation_config
+        )
+        self._entries[key] = (cached, model, now + self._ttl)
+        self._stats["created"] += 1
+        print(f"🗄️  پرامت تحلیل در حافظه نهان جمینی ذخیره شد ({model_name})")
+        return model
+
+
+def is_cache_error(error: BaseException) -> bool:
+    """Check if a request failed because its cached content no longer exists"""
+    message = str(error).lower()
+    return "cachedcontent" in message.replace(" ", "") or "cached content" in message
@@ -4,6 +4,81 @@ Prompt Provider Service
 """
 
 from src.interfaces import IPromptProvider
+from src.models.structured_analysis import ENGLISH_REPORT_LABELS, ReportLabels
+
+_TIME = {"type": "string", "description": "Time in the audio as mm:ss"}
+_RATING = {"type": "integer", "description": "Rating from 1 (lowest) to 5 (highest)"}
+
+# Schema of structured (JSON) analysis replies, parsed by StructuredAnalysis
+ANALYSIS_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {
+            "type": "string",
+            "description": "Main subject, issues raised, solutions and outcome",
+        },
+        "segments": {
+            "type": "array",
+            "description": "Complete transcript, one entry per speaker turn",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "start": _TIME,
+                    "end": _TIME,
+                    "speaker": {"type": "string"},
+                    "text": {"type": "string"},
+                },
+                "required": ["start", "end", "speaker", "text"],
+            },
+        },
+        "topics": {
+            "type": "array",
+            "description": "Time ranges in which each topic was discussed",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "topic": {"type": "string"},
+                    "category": {"type": "string"},
+                    "start": _TIME,
+                    "end": _TIME,
+                },
+                "required": ["topic", "start", "end"],
+            },
+        },
+        "sentiment": {
+            "type": "object",
+            "properties": {
+                "primary_emotion": {"type": "string"},
+                "emotion_intensity": _RATING,
+                "conversation_satisfaction": _RATING,
+                "outcome_satisfaction": _RATING,
+                "stress_level": _RATING,
+            },
+            "required": [
+                "primary_emotion",
+                "emotion_intensity",
+                "conversation_satisfaction",
+                "outcome_satisfaction",
+                "stress_level",
+            ],
+        },
+        "quality": {
+            "type": "object",
+            "properties": {
+                "audio_quality": _RATING,
+                "speech_clarity": _RATING,
+                "comprehensibility": _RATING,
+            },
+            "required": ["audio_quality", "speech_clarity", "comprehensibility"],
+        },
+        "tags": {
+            "type": "array",
+            "description": "Keywords for archiving and search",
+            "items": {"type": "string"},
+        },
+    },
+    "required": ["summary", "segments", "topics", "sentiment", "quality", "tags"],
+}
 
 
 class PromptProvider(IPromptProvider):
@@ -13,6 +88,14 @@ class PromptProvider(IPromptProvider):
         """Get the analysis prompt"""
         return PersianPromptProvider().get_analysis_prompt()
 
+    def get_structured_prompt(self) -> str:
+        """Get the prompt for analysis returned as JSON"""
+        return PersianPromptProvider().get_structured_prompt()
+
+    def get_response_schema(self) -> dict:
+        """Get the JSON schema of structured analysis replies"""
+        return ANALYSIS_RESPONSE_SCHEMA
+
 
 class PersianPromptProvider(IPromptProvider):
     """Provides Persian prompts for audio analysis"""
@@ -247,6 +330,36 @@ Provide a complete emotional and satisfaction analysis including user feelings,
 🚨 مهم: تمام بخش‌ها الزامی هستند. هر بخش حداقل 2-3 خط توضیح داشته باشد. اعداد دقیق باشند و امتیازات توجیه داشته باشند. اگر اطلاعاتی نداری، بنویس "اطلاعات کافی نیست" اما تخمین معقول بده.
 """
 
+    def get_structured_prompt(self) -> str:
+        """Get the Persian prompt for analysis returned as JSON"""
+        return (
+            "\n"
+            "Transcribe and analyze this audio with maximum accuracy and reply "
+            "with JSON that follows the response schema.\n"
+            "\n"
+            "- segments: the complete transcript, one entry per speaker turn, "
+            "with start and end times as mm:ss; tell the customer and the "
+            "operator apart\n"
+            "- topics: every topic discussed with the exact mm:ss range in which "
+            "it was discussed and a short category\n"
+            "- sentiment and quality: ratings from 1 to 5 based on the whole "
+            "conversation\n"
+            "- summary: main subject, issues raised, proposed solutions and final"
+            " outcome\n"
+            "- tags: keywords for archiving and search\n"
+            "\n"
+            "ویس را با حداکثر دقت به متن تبدیل و تحلیل کن و پاسخ را فقط به صورت "
+            "JSON مطابق طرح پاسخ بده.\n"
+            "متن گفته‌ها، خلاصه، نام موضوعات و برچسب‌ها را به زبان فارسی بنویس و "
+            "گوینده‌ها را با «مشتری» و «اپراتور» مشخص کن.\n"
+            "زمان‌ها را به صورت mm:ss بنویس و هیچ بخشی از گفت‌وگو را حذف یا خلاصه"
+            " نکن.\n"
+        )
+
+    def get_response_schema(self) -> dict:
+        """Get the JSON schema of structured analysis replies"""
+        return ANALYSIS_RESPONSE_SCHEMA
+
 
 class EnglishPromptProvider(IPromptProvider):
     """Provides English prompts for audio analysis"""
@@ -489,3 +602,33 @@ Important Note:
 
 If information is not available to complete a section, explicitly write "Insufficient information available" but try to provide reasonable estimates based on available content.
 """
+
+    def get_structured_prompt(self) -> str:
+        """Get the English prompt for analysis returned as JSON"""
+        return (
+            "\n"
+            "Transcribe and analyze this audio with maximum accuracy and reply "
+            "with JSON that follows the response schema.\n"
+            "\n"
+            "- segments: the complete transcript, one entry per speaker turn, "
+            "with start and end times as mm:ss; label speakers as Customer and "
+            "Operator\n"
+            "- topics: every topic discussed with the exact mm:ss range in which "
+            "it was discussed and a short category\n"
+            "- sentiment and quality: ratings from 1 to 5 based on the whole "
+            "conversation\n"
+            "- summary: main subject, issues raised, proposed solutions and final"
+            " outcome\n"
+            "- tags: keywords for archiving and search\n"
+            "\n"
+            "Do not summarize or omit any part of the conversation in the "
+            "transcript.\n"
+        )
+
+    def get_response_schema(self) -> dict:
+        """Get the JSON schema of structured analysis replies"""
+        return ANALYSIS_RESPONSE_SCHEMA
+
+    def get_report_labels(self) -> ReportLabels:
+        """Get English headings for structured analyses rendered as Markdown"""
+        return ENGLISH_REPORT_LABELS
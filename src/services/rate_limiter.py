@@ -0,0 +1,373 @@
+"""
+Gemini Rate Limiter
+محدودکننده نرخ درخواست‌های جمینی
+"""
+
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+_QUOTA_NAMES = ("ResourceExhausted", "TooManyRequests")
+_QUOTA_MESSAGE = re.compile(r"\b429\b|\bquota\b", re.IGNORECASE)
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """Check if an exception (or one it was raised from) is a quota/429 error
+
+    Decided by exception type or HTTP code along the chain; the message is
+    only searched as a last resort, and only that of the API error itself.
+    """
+    seen = set()
+    current = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if type(current).__name__ in _QUOTA_NAMES:
+            return True
+        if getattr(current, "code", None) == 429:
+            return True
+        current = current.__cause__ or current.__context__
+    return bool(_QUOTA_MESSAGE.search(api_error_message(error)))
+
+
+def api_error_message(error: BaseException) -> str:
+    """Message of the error that started an exception chain
+
+    Wrappers such as "Failed to upload file <name>: ..." and file system
+    errors carry file names (e.g. ``20240429_1530.mp3``), so their text is
+    never matched against status codes; an empty string is returned for
+    a chain that started with an OSError.
+    """
+    seen = set()
+    root = error
+    while root is not None and id(root) not in seen:
+        seen.add(id(root))
+        cause = root.__cause__ or root.__context__
+        if cause is None:
+            break
+        root = cause
+    if isinstance(root, OSError) and not isinstance(
+        root, (TimeoutError, ConnectionError)
+    ):
+        return ""
+    return str(root)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate_per_minute``
+
+    Requests larger than the bucket capacity are let through once the bucket
+    is full and leave it in debt, so oversized calls are delayed rather than
+    blocked forever.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._rate = rate_per_minute / 60.0
+        self._capacity = capacity if capacity is not None else rate_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self._capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> float:
+        """Take ``amount`` tokens, sleeping until available; returns time waited"""
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(amount)
+            if not delay:
+                return waited
+            self._sleep(delay)
+            waited += delay
+
+    async def acquire_async(self, amount: float = 1) -> float:
+        """Like ``acquire``, but waits with ``asyncio.sleep``"""
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(amount)
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """Take ``amount`` tokens if available
+
+        Returns 0 when the tokens were taken, otherwise the seconds until
+        enough tokens will have been refilled.
+        """
+        with self._lock:
+            self._refill()
+            needed = min(amount, self._capacity)
+            if self._tokens >= needed:
+                self._tokens -= amount
+                return 0.0
+            return (needed - self._tokens) / self._rate
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the fact"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._capacity, self._tokens - amount)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on in-flight requests
+
+    The limit starts at ``initial`` and grows by one after ``limit``
+    consecutive successes (additive increase), up to ``maximum`` (the
+    ceiling, ``initial`` if not given), and is halved on a quota error
+    (multiplicative decrease). A
+    decrease is applied at most once per ``cooldown`` seconds so a burst of
+    429s from requests that were already in flight counts as one signal.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: Optional[int] = None,
+        cooldown: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._minimum = max(1, minimum)
+        self._maximum = max(self._minimum, maximum or initial)
+        self._limit = min(self._maximum, max(self._minimum, initial))
+        self._cooldown = cooldown
+        self._clock = clock
+        self._in_flight = 0
+        self._successes = 0
+        self._last_decrease = None
+        self._condition = threading.Condition()
+        # Futures of coroutines waiting in acquire_async, with their loops
+        self._async_waiters = deque()
+
+    @property
+    def limit(self) -> int:
+        """Current number of allowed in-flight requests"""
+        with self._condition:
+            return self._limit
+
+    def acquire(self) -> None:
+        """Block until a request slot is free"""
+        with self._condition:
+            while self._in_flight >= self._limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    async def acquire_async(self) -> None:
+        """Wait for a request slot without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._in_flight < self._limit:
+                    self._in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass a wake-up this waiter may have received to the next one
+                with self._condition:
+                    self._wake_async_waiters()
+                raise
+
+    def release(self, throttled: bool = False) -> None:
+        """Free a slot and feed the outcome into the AIMD controller"""
+        with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                self._decrease()
+            else:
+                self._successes += 1
+                if self._successes >= self._limit and self._limit < self._maximum:
+                    self._limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+            self._wake_async_waiters()
+
+    def _wake_async_waiters(self) -> None:
+        """Wake as many async waiters as there are free slots"""
+        free = self._limit - self._in_flight
+        while free > 0 and self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if waiter.done():
+                continue
+            loop.call_soon_threadsafe(_set_if_pending, waiter)
+            free -= 1
+
+    def _decrease(self) -> None:
+        now = self._clock()
+        self._successes = 0
+        if (
+            self._last_decrease is not None
+            and now - self._last_decrease < self._cooldown
+        ):
+            return
+        self._last_decrease = now
+        self._limit = max(self._minimum, self._limit // 2)
+
+
+def _set_if_pending(future: "asyncio.Future") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _RequestTicket:
+    """Context manager (sync or async) holding one rate-limited request"""
+
+    def __init__(self, limiter: "RateLimiter", estimated_tokens: int):
+        self._limiter = limiter
+        self._estimated_tokens = estimated_tokens
+        self.waited = 0.0
+
+    def record_usage(self, actual_tokens: Optional[int]) -> None:
+        """Correct the token bucket with the usage reported by the API"""
+        bucket = self._limiter._token_bucket
+        if bucket is not None and isinstance(actual_tokens, int):
+            bucket.adjust(actual_tokens - self._estimated_tokens)
+            self._estimated_tokens = actual_tokens
+
+    def __enter__(self) -> "_RequestTicket":
+        self.waited = self._limiter._enter(self._estimated_tokens)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        throttled = exc_value is not None and is_quota_error(exc_value)
+        self._limiter._exit(throttled)
+        return False
+
+    async def __aenter__(self) -> "_RequestTicket":
+        self.waited = await self._limiter._enter_async(self._estimated_tokens)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> bool:
+        return self.__exit__(exc_type, exc_value, traceback)
+
+
+class RateLimiter:
+    """Client-side limits for Gemini requests/min, tokens/min and concurrency
+
+    Usage::
+
+        with rate_limiter.request(estimated_tokens) as ticket:
+            response = model.generate_content(...)
+            ticket.record_usage(response.usage_metadata.total_token_count)
+
+    Coroutines use ``async with`` on the same ticket; waiting for capacity
+    then suspends the coroutine instead of blocking a thread.
+
+    Concurrency starts at ``initial_concurrency`` (``max_concurrency`` if not
+    given) and adapts between ``min_concurrency`` and ``max_concurrency``.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        min_concurrency: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        initial_concurrency: Optional[int] = None,
+    ):
+        self._request_bucket = (
+            TokenBucket(requests_per_minute, clock=clock, sleep=sleep)
+            if requests_per_minute
+            else None
+        )
+        self._token_bucket = (
+            TokenBucket(tokens_per_minute, clock=clock, sleep=sleep)
+            if tokens_per_minute
+            else None
+        )
+        self._concurrency = (
+            AdaptiveConcurrencyLimiter(
+                initial_concurrency or max_concurrency,
+                minimum=min_concurrency,
+                maximum=max_concurrency,
+                clock=clock,
+            )
+            if max_concurrency
+            else None
+        )
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "throttled": 0, "wait_time": 0.0}
+
+    def request(self, estimated_tokens: int = 0) -> _RequestTicket:
+        """Reserve capacity for one request of roughly ``estimated_tokens``"""
+        return _RequestTicket(self, estimated_tokens)
+
+    @property
+    def concurrency_limit(self) -> Optional[int]:
+        """Current adaptive concurrency limit, or None if not limited"""
+        return self._concurrency.limit if self._concurrency else None
+
+    def get_stats(self) -> dict:
+        """Get request, throttle and wait-time counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["concurrency_limit"] = self.concurrency_limit
+        return stats
+
+    def _enter(self, estimated_tokens: int) -> float:
+        if self._concurrency is not None:
+            self._concurrency.acquire()
+        try:
+            waited = 0.0
+            if self._request_bucket is not None:
+                waited += self._request_bucket.acquire(1)
+            if self._token_bucket is not None and estimated_tokens:
+                waited += self._token_bucket.acquire(estimated_tokens)
+        except BaseException:
+            if self._concurrency is not None:
+                self._concurrency.release()
+            raise
+
+        self._record_request(waited)
+        return waited
+
+    async def _enter_async(self, estimated_tokens: int) -> float:
+        if self._concurrency is not None:
+            await self._concurrency.acquire_async()
+        try:
+            waited = 0.0
+            if self._request_bucket is not None:
+                waited += await self._request_bucket.acquire_async(1)
+            if self._token_bucket is not None and estimated_tokens:
+                waited += await self._token_bucket.acquire_async(estimated_tokens)
+        except BaseException:
+            if self._concurrency is not None:
+                self._concurrency.release()
+            raise
+
+        self._record_request(waited)
+        return waited
+
+    def _record_request(self, waited: float) -> None:
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["wait_time"] += waited
+
+    def _exit(self, throttled: bool) -> None:
+        if throttled:
+            with self._lock:
+                self._stats["throttled"] += 1
+        if self._concurrency is not None:
+            self._concurrency.release(throttled)
@@ -3,38 +3,175 @@ Markdown Report Generator
 تولیدکننده گزارش مارک‌داون
 """
 
+import json
 import os
+import shutil
+import threading
+import uuid
+import weakref
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import BinaryIO, List, Optional, TextIO
 
 from src.interfaces import IReportGenerator
-from src.models import AnalysisResult
+from src.models import AnalysisResult, AudioFile
+
+
+class MarkdownReportStream:
+    """Live report that grows as the model streams text
+
+    The text is written to ``live_file`` (``<name>_analysis.md.partial``),
+    which can be followed with ``tail -f``. ``begin`` (re)starts it, so a
+    retried request overwrites the text of a failed attempt. The report of
+    an earlier run at ``output_file`` is left alone until the finished
+    report replaces it in ``save_analysis_result``, which copies the
+    streamed text from the live file instead of writing it from memory.
+    """
+
+    def __init__(self, output_file: str, audio_file: AudioFile):
+        self.output_file = output_file
+        self.live_file = _live_path(output_file)
+        self._audio_file = audio_file
+        self._file: Optional[TextIO] = None
+        self._started = False
+        self._body_start = 0
+        self.completed = False
+
+    def begin(self) -> None:
+        """Start the live report over with its header"""
+        self.close()
+        self._file = open(self.live_file, "w", encoding="utf-8")
+        self._started = True
+        self.completed = False
+        header = _render_analysis_header(
+            self._audio_file, "⏳", "در حال تحلیل...", None
+        )
+        self._file.write(header)
+        self._file.flush()
+        self._body_start = len(header.encode("utf-8"))
+
+    def write(self, text: str) -> None:
+        """Append streamed analysis text and make it visible to readers"""
+        if self._file is None:
+            self.begin()
+        self._file.write(text)
+        self._file.flush()
+
+    def end(self) -> None:
+        """Finish the streamed text, which is then the complete analysis"""
+        if self._file is not None:
+            self.completed = True
+        self.close()
+
+    def read_text(self) -> str:
+        """Read the streamed analysis text back from the live report"""
+        with open(self.live_file, "rb") as f:
+            f.seek(self._body_start)
+            return f.read().decode("utf-8")
+
+    def copy_text(self, target: BinaryIO) -> None:
+        """Copy the streamed analysis text into a binary file in chunks"""
+        with open(self.live_file, "rb") as f:
+            f.seek(self._body_start)
+            shutil.copyfileobj(f, target)
+
+    def close(self) -> None:
+        """Close the file, keeping what was written"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        """Close and delete the live report if this stream started one"""
+        self.close()
+        if not self._started:
+            return
+        self._started = False
+        try:
+            os.remove(self.live_file)
+        except OSError:
+            pass
 
 
 class MarkdownReportGenerator(IReportGenerator):
     """Generates Markdown reports following Single Responsibility Principle"""
 
+    def __init__(self):
+        # Open streams by report path; dropped once the caller lets go
+        self._streams = weakref.WeakValueDictionary()
+        self._streams_lock = threading.Lock()
+
     def save_analysis_result(self, result: AnalysisResult, output_folder: str) -> str:
-        """Save analysis result to a Markdown file"""
+        """Save analysis result to a Markdown file
+
+        The report is written piece by piece to a temporary file that then
+        replaces the output, so the analysis text is never copied into one
+        large string. The text of a completed stream is copied from its live
+        report rather than written again from ``result.analysis_text``.
+        """
         # Ensure output directory exists
         os.makedirs(output_folder, exist_ok=True)
 
         # Create output filename
-        base_name = result.audio_file.stem_name
-        output_file = os.path.join(output_folder, f"{base_name}_analysis.md")
+        output_file = self._analysis_path(result.audio_file, output_folder)
 
-        # Generate Markdown content
-        markdown_content = self._generate_analysis_markdown(result)
+        with self._streams_lock:
+            stream = self._streams.pop(output_file, None)
+        streamed = stream is not None and stream.completed and result.success
 
         # Save the file
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(markdown_content)
+        temp_path = f"{output_file}.tmp"
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(temp_path, "wb") as f:
+            f.write(self._analysis_header(result, now).encode("utf-8"))
+            if streamed:
+                stream.copy_text(f)
+            else:
+                f.write(self._analysis_body(result).encode("utf-8"))
+            f.write(self._analysis_footer(now).encode("utf-8"))
+        os.replace(temp_path, output_file)
+
+        # The live report of a streamed analysis is superseded
+        try:
+            os.remove(_live_path(output_file))
+        except OSError:
+            pass
+
+        # Typed fields of a structured analysis, for tools that consume data
+        if result.structured is not None:
+            self._save_structured(result, output_file)
 
         result.output_file_path = output_file
         print(f"نتیجه ذخیره شد در: {output_file}")
         return output_file
 
+    def open_analysis_stream(
+        self, audio_file: AudioFile, output_folder: str
+    ) -> MarkdownReportStream:
+        """Open the live report of a file whose analysis will be streamed"""
+        os.makedirs(output_folder, exist_ok=True)
+        stream = MarkdownReportStream(
+            self._analysis_path(audio_file, output_folder), audio_file
+        )
+        with self._streams_lock:
+            self._streams[stream.output_file] = stream
+        return stream
+
+    @staticmethod
+    def _save_structured(result: AnalysisResult, output_file: str) -> str:
+        """Write the structured analysis next to its report as ``_analysis.json``"""
+        json_path = f"{os.path.splitext(output_file)[0]}.json"
+        temp_path = f"{json_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(result.structured.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, json_path)
+        return json_path
+
+    @staticmethod
+    def _analysis_path(audio_file: AudioFile, output_folder: str) -> str:
+        """Path of the Markdown report of an audio file"""
+        return os.path.join(output_folder, f"{audio_file.stem_name}_analysis.md")
+
     def create_summary_report(
         self, results: List[AnalysisResult], output_folder: str
     ) -> str:
@@ -51,9 +188,12 @@ class MarkdownReportGenerator(IReportGenerator):
                 "No files found for processing. / هیچ فایلی برای پردازش یافت نشد.",
             )
 
-        # Save the summary file
-        with open(summary_file, "w", encoding="utf-8") as f:
+        # Save the summary file; replaced atomically as several nodes may
+        # write it to a shared folder
+        temp_path = f"{summary_file}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
             f.write(markdown_content)
+        os.replace(temp_path, summary_file)
 
         print(f"گزارش خلاصه ذخیره شد: {summary_file}")
         return summary_file
@@ -80,7 +220,7 @@ class MarkdownReportGenerator(IReportGenerator):
         total_files = len(results)
         successful_files = len([r for r in results if r.success])
         failed_files = total_files - successful_files
-        total_time = sum(r.processing_time for r in results) if results else 0
+        total_time = sum(r.processing_time or 0 for r in results) if results else 0
         avg_time = total_time / total_files if total_files > 0 else 0
         success_rate = (successful_files / total_files *
                         100) if total_files > 0 else 0
@@ -240,40 +380,77 @@ class MarkdownReportGenerator(IReportGenerator):
     def _generate_analysis_markdown(self, result: AnalysisResult) -> str:
         """Generate analysis markdown content using AI-provided analysis"""
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return (
+            self._analysis_header(result, now)
+            + self._analysis_body(result)
+            + self._analysis_footer(now)
+        )
+
+    @staticmethod
+    def _analysis_header(result: AnalysisResult, now: str) -> str:
+        """File details and processing status, up to the analysis heading"""
         success_mark = "✅" if result.success else "❌"
-
+        status = "موفقیت‌آمیز" if result.success else "ناموفق"
+        return _render_analysis_header(
+            result.audio_file, success_mark, status, result.processing_time, now
+        )
+
+    @staticmethod
+    def _analysis_body(result: AnalysisResult) -> str:
+        """The AI analysis, or the error of a failed one"""
         if result.success:
             # Use the complete AI analysis directly
-            ai_analysis = result.analysis_text
-        else:
-            error_msg = getattr(result, "error_message", "خطای نامشخص")
-            ai_analysis = f"خطا در تحلیل فایل:\n{error_msg}"
+            return result.analysis_text
+        error_msg = getattr(result, "error_message", "خطای نامشخص")
+        return f"خطا در تحلیل فایل:\n{error_msg}"
+
+    @staticmethod
+    def _analysis_footer(now: str) -> str:
+        return f"""
+
+---
 
-        markdown = f"""# 📊 گزارش تحلیل فایل صوتی
+*📅 تاریخ تولید گزارش: {now}*
+*🤖 تحلیل شده توسط: Google Gemini AI*"""
+
+
+def _live_path(output_file: str) -> str:
+    """Path of the live report streamed while ``output_file`` is generated"""
+    return f"{output_file}.partial"
+
+
+def _render_analysis_header(
+    audio_file: AudioFile,
+    status_mark: str,
+    status: str,
+    processing_time: Optional[float],
+    now: Optional[str] = None,
+) -> str:
+    """Header of an analysis report, shared by saved and streamed reports"""
+    now = now or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if processing_time is None:
+        processing_line = ""
+    else:
+        processing_line = f"\n- **زمان پردازش:** `{processing_time:.2f} ثانیه`"
+
+    return f"""# 📊 گزارش تحلیل فایل صوتی
 
 ## 🔍 اطلاعات فایل
 | مشخصه | مقدار |
 |--------|--------|
-| **نام فایل** | `{result.audio_file.file_name}` |
-| **مسیر** | `{result.audio_file.file_path}` |
-| **حجم** | {result.audio_file.file_size/1024:.1f} KB |
-| **فرمت** | {result.audio_file.format.upper()} |
+| **نام فایل** | `{audio_file.file_name}` |
+| **مسیر** | `{audio_file.file_path}` |
+| **حجم** | {(audio_file.file_size or 0)/1024:.1f} KB |
+| **فرمت** | {audio_file.format.upper()} |
 | **تاریخ تحلیل** | {now} |
 
 ---
 
 ## ⚡ وضعیت پردازش
-- **وضعیت:** {success_mark} `{"موفقیت‌آمیز" if result.success else "ناموفق"}`
-- **زمان پردازش:** `{result.processing_time:.2f} ثانیه`
+- **وضعیت:** {status_mark} `{status}`{processing_line}
 
 ---
 
 ## 🤖 تحلیل هوش مصنوعی
 
-{ai_analysis}
-
----
-
-*📅 تاریخ تولید گزارش: {now}*
-*🤖 تحلیل شده توسط: Google Gemini AI*"""
-        return markdown
+"""
@@ -0,0 +1,187 @@
+"""
+Analysis Result Cache
+حافظه نهان نتایج تحلیل
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from src.models import AnalysisResult, AudioFile, StructuredAnalysis, TimelineMap
+from src.utils.hashing import hash_text
+
+
+class ResultCache:
+    """Persistent, content-addressed cache of successful analysis results
+
+    Entries are keyed by the audio bytes hash, the prompt text hash and the
+    model name, so changing any of them produces a miss. Each entry is a small
+    JSON file; the least recently used entries are evicted once the cache
+    grows past ``max_bytes`` or ``max_entries``, and entries stored more than
+    ``max_age`` seconds ago are treated as misses and removed.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: Optional[int] = 512 * 1024 * 1024,
+        max_entries: Optional[int] = None,
+        max_age: Optional[float] = 30 * 24 * 3600,
+    ):
+        self._cache_dir = cache_dir
+        self._max_bytes = max_bytes
+        self._max_entries = max_entries
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        # key -> (size in bytes, last access time)
+        self._entries: Dict[str, Tuple[int, float]] = self._load_index()
+        self._total_bytes = sum(size for size, _ in self._entries.values())
+
+    @staticmethod
+    def make_key(audio_hash: str, prompt: str, model_name: str) -> str:
+        """Build the cache key for an audio/prompt/model combination"""
+        return hash_text(f"{audio_hash}:{hash_text(prompt)}:{model_name}")
+
+    def get(self, key: str, audio_file: AudioFile) -> Optional[AnalysisResult]:
+        """Return the cached result for ``key`` bound to ``audio_file``, if any"""
+        path = self._entry_path(key)
+
+        with self._lock:
+            if key not in self._entries:
+                self._stats["misses"] += 1
+                return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+
+        with self._lock:
+            if data is None or self._is_expired(data):
+                self._remove(key)
+                self._stats["misses"] += 1
+                if data is not None:
+                    self._stats["evictions"] += 1
+                return None
+
+            # Touch the entry so eviction order survives across runs
+            self._entries[key] = (self._entries.get(key, (0, 0))[0], time.time())
+            self._stats["hits"] += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        timestamp = data.get("timestamp")
+        timeline = data.get("timeline")
+        structured = data.get("structured")
+        return AnalysisResult(
+            audio_file=audio_file,
+            analysis_text=data.get("analysis_text", ""),
+            success=True,
+            processing_time=data.get("processing_time"),
+            timestamp=datetime.fromisoformat(timestamp) if timestamp else None,
+            from_cache=True,
+            timeline=TimelineMap.from_dict(timeline) if timeline else None,
+            structured=StructuredAnalysis.from_dict(structured) if structured else None,
+        )
+
+    def put(self, key: str, result: AnalysisResult) -> None:
+        """Store a successful result under ``key``"""
+        if not result.is_successful:
+            return
+
+        path = self._entry_path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        data = result.to_dict()
+        data["cached_at"] = time.time()
+        payload = json.dumps(data, ensure_ascii=False)
+
+        # Write to a temporary file first so readers never see partial entries
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            self._entries[key] = (size, time.time())
+            self._total_bytes += size
+            self._stats["stores"] += 1
+            self._evict_over_limits()
+
+    def get_stats(self) -> dict:
+        """Get hit/miss/store/eviction counters and current cache size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["size_bytes"] = self._total_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups * 100 if lookups else 0
+        return stats
+
+    def clear(self) -> None:
+        """Remove every cached entry"""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _load_index(self) -> Dict[str, Tuple[int, float]]:
+        """Index existing entries with a single directory scan"""
+        entries = {}
+        with os.scandir(self._cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries[entry.name[: -len(".json")]] = (
+                        stat.st_size,
+                        stat.st_mtime,
+                    )
+        return entries
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, f"{key}.json")
+
+    def _is_expired(self, data: dict) -> bool:
+        if self._max_age is None:
+            return False
+        return time.time() - data.get("cached_at", 0) > self._max_age
+
+    def _evict_over_limits(self) -> None:
+        """Drop least recently used entries until the limits hold (lock held)"""
+
+        def over_limits() -> bool:
+            too_big = (
+                self._max_bytes is not None and self._total_bytes > self._max_bytes
+            )
+            too_many = (
+                self._max_entries is not None and len(self._entries) > self._max_entries
+            )
+            return too_big or too_many
+
+        if not over_limits():
+            return
+
+        for key in sorted(self._entries, key=lambda k: self._entries[k][1]):
+            if not over_limits():
+                break
+            self._remove(key)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        """Forget an entry and delete its file (lock held)"""
+        size, _ = self._entries.pop(key, (0, 0))
+        self._total_bytes -= size
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
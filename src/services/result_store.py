@@ -0,0 +1,259 @@
+"""
+Results Store
+پایگاه داده نتایج تحلیل در کنار گزارش‌های مارک‌داون
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from src.interfaces import IReportGenerator
+from src.models import AnalysisResult, AudioFile
+
+# Narrow table of per-file facts, so aggregate queries do not read the
+# (large) analysis texts, which live in a table of their own
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        file_path TEXT NOT NULL,
+        file_name TEXT NOT NULL,
+        file_format TEXT,
+        file_size INTEGER,
+        duration REAL,
+        analyzed_at TEXT NOT NULL,
+        success INTEGER NOT NULL,
+        from_cache INTEGER NOT NULL,
+        processing_time REAL,
+        attempts INTEGER,
+        retry_time REAL,
+        prompt_tokens INTEGER,
+        output_tokens INTEGER,
+        report_path TEXT,
+        UNIQUE (file_path, analyzed_at)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS results_analyzed_at ON results (analyzed_at)",
+    """
+    CREATE TABLE IF NOT EXISTS result_texts (
+        result_id INTEGER PRIMARY KEY REFERENCES results (id),
+        analysis_text TEXT,
+        error_message TEXT,
+        structured TEXT
+    )
+    """,
+)
+
+_Row = Tuple[tuple, tuple]
+
+
+class SQLiteResultStore(IReportGenerator):
+    """Records every analysis result in a SQLite database next to the reports
+
+    Reports are still written by the wrapped generator; each result is also
+    queued as a row of file metadata, timings, outcome and token counts
+    (plus its text in a side table) and written in batches of
+    ``batch_size`` rows, or once the oldest queued row is ``max_delay``
+    seconds old; a background timer writes rows that no later result
+    follows. Failed analyses, which get no report, are recorded when the
+    summary is created, which also writes any queued rows. Call ``close``
+    when the application stops to write what is still queued.
+
+    A row is identified by file path and analysis time, so recording the
+    same result again (e.g. in the summary) does not duplicate it.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        report_generator: IReportGenerator,
+        batch_size: int = 50,
+        max_delay: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._db_path = db_path
+        self._report_generator = report_generator
+        self._batch_size = max(1, batch_size)
+        self._max_delay = max_delay
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending: List[_Row] = []
+        self._oldest_pending: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as db:
+            for statement in _SCHEMA:
+                db.execute(statement)
+
+    def save_analysis_result(self, result: AnalysisResult, output_folder: str) -> str:
+        """Save the report with the wrapped generator and queue the result"""
+        output_file = self._report_generator.save_analysis_result(result, output_folder)
+        self.record(result)
+        return output_file
+
+    def open_analysis_stream(self, audio_file: AudioFile, output_folder: str):
+        """Open a live report with the wrapped generator"""
+        return self._report_generator.open_analysis_stream(audio_file, output_folder)
+
+    def create_summary_report(
+        self, results: List[AnalysisResult], output_folder: str
+    ) -> str:
+        """Record all results, write queued rows and create the summary"""
+        for result in results:
+            self._queue(result)
+        self.flush()
+        return self._report_generator.create_summary_report(results, output_folder)
+
+    def record(self, result: AnalysisResult) -> None:
+        """Queue a result, writing the batch once it is full or old enough"""
+        if self._queue(result):
+            self.flush()
+        else:
+            self._start_timer()
+
+    def close(self) -> None:
+        """Write the queued rows and stop the flush timer"""
+        self.flush()
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+
+    def flush(self) -> int:
+        """Write the queued rows in one transaction; returns rows added
+
+        When the database cannot be written the rows stay queued for the
+        next flush, so a locked or full disk never fails an analysis.
+        """
+        with self._lock:
+            rows, self._pending = self._pending, []
+            oldest, self._oldest_pending = self._oldest_pending, None
+        if not rows:
+            return 0
+
+        added = 0
+        try:
+            with self._transaction() as db:
+                for values, texts in rows:
+                    cursor = db.execute(
+                        "INSERT OR IGNORE INTO results (file_path, file_name, "
+                        "file_format, file_size, duration, analyzed_at, success, "
+                        "from_cache, processing_time, attempts, retry_time, "
+                        "prompt_tokens, output_tokens, report_path) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        values,
+                    )
+                    if cursor.rowcount:
+                        db.execute(
+                            "INSERT INTO result_texts (result_id, analysis_text, "
+                            "error_message, structured) VALUES (?, ?, ?, ?)",
+                            (cursor.lastrowid,) + texts,
+                        )
+                        added += 1
+        except sqlite3.Error as e:
+            print(f"⚠️  ذخیره نتایج در پایگاه داده ناموفق بود: {str(e)}")
+            with self._lock:
+                self._pending = rows + self._pending
+                if oldest is not None and (
+                    self._oldest_pending is None or oldest < self._oldest_pending
+                ):
+                    self._oldest_pending = oldest
+            self._start_timer()
+            return 0
+        return added
+
+    def get_totals(self, since: Optional[str] = None) -> dict:
+        """Aggregate the recorded results, optionally from an ISO date on"""
+        query = (
+            "SELECT COUNT(*), COALESCE(SUM(success), 0), "
+            "COALESCE(SUM(processing_time), 0), COALESCE(SUM(duration), 0), "
+            "COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(output_tokens), 0) "
+            "FROM results"
+        )
+        params: tuple = ()
+        if since:
+            query += " WHERE analyzed_at >= ?"
+            params = (since,)
+        with self._transaction() as db:
+            row = db.execute(query, params).fetchone()
+
+        files, succeeded, processing_time, duration, prompt, output = row
+        return {
+            "files": files,
+            "succeeded": succeeded,
+            "failed": files - succeeded,
+            "processing_time": processing_time,
+            "audio_duration": duration,
+            "prompt_tokens": prompt,
+            "output_tokens": output,
+        }
+
+    def _queue(self, result: AnalysisResult) -> bool:
+        """Add the row of a result to the pending batch; True if it is due"""
+        row = _to_row(result)
+        now = self._clock()
+        with self._lock:
+            if self._oldest_pending is None:
+                self._oldest_pending = now
+            self._pending.append(row)
+            return (
+                len(self._pending) >= self._batch_size
+                or now - self._oldest_pending >= self._max_delay
+            )
+
+    def _start_timer(self) -> None:
+        """Flush after ``max_delay`` seconds unless a timer is already due"""
+        with self._lock:
+            if not self._pending or self._timer is not None:
+                return
+            self._timer = threading.Timer(self._max_delay, self._on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection and commit (or roll back) one transaction"""
+        db = sqlite3.connect(self._db_path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+
+def _to_row(result: AnalysisResult) -> _Row:
+    """Column values of the ``results`` and ``result_texts`` tables"""
+    audio_file = result.audio_file
+    values = (
+        audio_file.file_path,
+        audio_file.file_name,
+        audio_file.file_extension or None,
+        audio_file.file_size,
+        audio_file.duration,
+        result.timestamp.isoformat(),
+        int(result.is_successful),
+        int(result.from_cache),
+        result.processing_time,
+        result.attempts,
+        result.retry_time,
+        result.prompt_tokens,
+        result.output_tokens,
+        result.output_file_path,
+    )
+    texts = (
+        result.analysis_text or None,
+        result.error_message,
+        result.structured.to_json() if result.structured else None,
+    )
+    return values, texts
@@ -0,0 +1,199 @@
+"""
+Retry Policy
+سیاست تلاش مجدد
+"""
+
+import asyncio
+import random
+import re
+import time
+from typing import Awaitable, Callable, Optional
+
+from src.services.rate_limiter import api_error_message, is_quota_error
+
+RETRYABLE = "retryable"
+PERMANENT = "permanent"
+
+# google.api_core / HTTP client exception class names
+_RETRYABLE_NAMES = {
+    "DeadlineExceeded",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "BadGateway",
+    "GatewayTimeout",
+    "TooManyRequests",
+    "ResourceExhausted",
+    "Aborted",
+    "ReadTimeout",
+    "ConnectTimeout",
+}
+_PERMANENT_NAMES = {
+    "InvalidArgument",
+    "BadRequest",
+    "PermissionDenied",
+    "Unauthenticated",
+    "Unauthorized",
+    "Forbidden",
+    "NotFound",
+    "FailedPrecondition",
+}
+_RETRYABLE_MESSAGE = re.compile(
+    r"\b(408|429|500|502|503|504)\b|timed? ?out|temporarily unavailable|"
+    r"connection (reset|aborted|refused)",
+    re.IGNORECASE,
+)
+_PERMANENT_MESSAGE = re.compile(
+    r"\b(400|401|403|404)\b|api key|permission|unsupported|invalid",
+    re.IGNORECASE,
+)
+
+
+def classify_error(error: BaseException) -> str:
+    """Classify an exception chain as RETRYABLE or PERMANENT
+
+    Timeouts, connection drops, quota (429) and server (5xx) errors are
+    retryable. Authentication, permission, bad-request and missing-file
+    errors are permanent, as is anything unrecognized. Exception types and
+    status codes along the chain decide first; messages are only searched
+    when they find nothing.
+    """
+    seen = set()
+    current = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        name = type(current).__name__
+        if name in _RETRYABLE_NAMES:
+            return RETRYABLE
+        if name in _PERMANENT_NAMES:
+            return PERMANENT
+
+        code = getattr(current, "code", None)
+        if isinstance(code, int):
+            if code in (408, 429) or 500 <= code < 600:
+                return RETRYABLE
+            if 400 <= code < 500:
+                return PERMANENT
+
+        if isinstance(current, (TimeoutError, ConnectionError)):
+            return RETRYABLE
+        if isinstance(current, (FileNotFoundError, PermissionError, ValueError)):
+            return PERMANENT
+
+        current = current.__cause__ or current.__context__
+
+    if is_quota_error(error):
+        return RETRYABLE
+    message = api_error_message(error)
+    if _PERMANENT_MESSAGE.search(message):
+        return PERMANENT
+    if _RETRYABLE_MESSAGE.search(message):
+        return RETRYABLE
+    return PERMANENT
+
+
+class RetryStats:
+    """Retries, backoff time and tokens accumulated while processing one file"""
+
+    def __init__(self):
+        self.retries = 0
+        self.retry_time = 0.0
+        # None until the API reports usage for a request of this file
+        self.prompt_tokens: Optional[int] = None
+        self.output_tokens: Optional[int] = None
+
+    def add_tokens(
+        self, prompt_tokens: Optional[int], output_tokens: Optional[int]
+    ) -> None:
+        """Add the token counts of a request, skipping unreported ones"""
+        if isinstance(prompt_tokens, int):
+            self.prompt_tokens = (self.prompt_tokens or 0) + prompt_tokens
+        if isinstance(output_tokens, int):
+            self.output_tokens = (self.output_tokens or 0) + output_tokens
+
+    def add(self, other: "RetryStats") -> None:
+        """Add the counters of a part of the file, e.g. one of its segments"""
+        self.retries += other.retries
+        self.retry_time += other.retry_time
+        self.add_tokens(other.prompt_tokens, other.output_tokens)
+
+
+class RetryPolicy:
+    """Retries retryable failures with capped exponential backoff and full jitter
+
+    The delay before retry ``n`` is drawn uniformly from
+    ``[0, min(max_delay, base_delay * 2 ** (n - 1))]`` so that workers hit by
+    the same outage do not retry in lockstep.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        classifier: Callable[[BaseException], str] = classify_error,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None,
+        async_sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self._max_attempts = max(1, max_attempts)
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._classifier = classifier
+        self._sleep = sleep
+        self._async_sleep = async_sleep
+        self._rng = rng or random.Random()
+
+    def call(self, operation: Callable, stats: Optional[RetryStats] = None, *args):
+        """Run ``operation(*args)``, retrying retryable errors
+
+        Raises the last error once attempts are exhausted or a permanent
+        error occurs.
+        """
+        stats = stats if stats is not None else RetryStats()
+
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                return operation(*args)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                self._sleep(delay)
+                stats.retries += 1
+                stats.retry_time += delay
+
+    async def call_async(
+        self, operation: Callable, stats: Optional[RetryStats] = None, *args
+    ):
+        """Await ``operation(*args)``, retrying like ``call``
+
+        Backoff delays suspend the coroutine instead of blocking a thread.
+        """
+        stats = stats if stats is not None else RetryStats()
+
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                return await operation(*args)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                await self._async_sleep(delay)
+                stats.retries += 1
+                stats.retry_time += delay
+
+    def _retry_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        """Get the backoff before retrying ``error``, or None to give up"""
+        if attempt >= self._max_attempts or self._classifier(error) != RETRYABLE:
+            return None
+        delay = self.backoff_delay(attempt)
+        print(
+            f"🔄 تلاش مجدد {attempt + 1}/{self._max_attempts} "
+            f"پس از {delay:.1f} ثانیه: {str(error)}"
+        )
+        return delay
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Get the jittered delay before the retry that follows ``attempt``"""
+        ceiling = min(self._max_delay, self._base_delay * 2 ** (attempt - 1))
+        return self._rng.uniform(0, ceiling)
@@ -0,0 +1,157 @@
+"""
+Run Journal
+دفترچه ثبت اجرای دسته‌ای
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from src.models import AnalysisResult, AudioFile, StructuredAnalysis
+
+PENDING = "pending"
+UPLOADED = "uploaded"
+ANALYZED = "analyzed"
+REPORTED = "reported"
+FAILED = "failed"
+
+
+class RunJournal:
+    """Append-only JSONL checkpoint of a batch run
+
+    Every state change of a file (pending, uploaded, analyzed, reported or
+    failed) is appended as one line and flushed to disk, so a run killed
+    halfway can be resumed: reported files are skipped and analyzed files
+    only need their report written again. The journal is removed once a run
+    finishes, so the next run starts fresh.
+    """
+
+    def __init__(self, journal_path: str):
+        self._journal_path = journal_path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        self._load()
+
+    @property
+    def has_unfinished_run(self) -> bool:
+        """Check if an interrupted run left entries behind"""
+        return bool(self._entries)
+
+    def start_run(self, audio_files: List[AudioFile]) -> None:
+        """Record the files of a run as pending, keeping progress of a resumed run"""
+        for audio_file in audio_files:
+            if self.get_entry(audio_file) is None:
+                self.record(audio_file, PENDING)
+
+    def get_entry(self, audio_file: AudioFile) -> Optional[dict]:
+        """Get the latest journal entry of a file, or None if it changed since"""
+        entry = self._entries.get(audio_file.file_path)
+        if entry is None or entry.get("fingerprint") != _fingerprint(audio_file):
+            return None
+        return entry
+
+    def get_state(self, audio_file: AudioFile) -> Optional[str]:
+        """Get the recorded state of a file"""
+        entry = self.get_entry(audio_file)
+        return entry["state"] if entry else None
+
+    def record(self, audio_file: AudioFile, state: str, **fields) -> None:
+        """Durably append a state change of a file"""
+        entry = {
+            "path": audio_file.file_path,
+            "fingerprint": _fingerprint(audio_file),
+            "state": state,
+            "at": datetime.now().isoformat(),
+        }
+        entry.update(fields)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+
+        with self._lock:
+            directory = os.path.dirname(self._journal_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self._journal_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(entry)
+
+    def record_result(self, result: AnalysisResult) -> None:
+        """Record a finished analysis, including its text so it is not redone"""
+        if result.is_successful:
+            self.record(
+                result.audio_file,
+                ANALYZED,
+                analysis_text=result.analysis_text,
+                processing_time=result.processing_time,
+                structured=result.structured.to_dict() if result.structured else None,
+            )
+        else:
+            self.record(result.audio_file, FAILED, error_message=result.error_message)
+
+    def restore_result(self, audio_file: AudioFile) -> Optional[AnalysisResult]:
+        """Rebuild the result of a file analyzed in an interrupted run"""
+        entry = self.get_entry(audio_file)
+        if entry is None or entry["state"] not in (ANALYZED, REPORTED):
+            return None
+        structured = entry.get("structured")
+        return AnalysisResult(
+            audio_file=audio_file,
+            analysis_text=entry.get("analysis_text", ""),
+            success=True,
+            processing_time=entry.get("processing_time"),
+            output_file_path=entry.get("output_file_path"),
+            structured=StructuredAnalysis.from_dict(structured) if structured else None,
+        )
+
+    def finish_run(self) -> None:
+        """Remove the journal after a run completed"""
+        with self._lock:
+            self._entries.clear()
+            try:
+                os.remove(self._journal_path)
+            except FileNotFoundError:
+                pass
+
+    def _load(self) -> None:
+        try:
+            with open(self._journal_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash
+                continue
+            self._apply(entry)
+
+    def _apply(self, entry: dict) -> None:
+        """Make ``entry`` the latest state of its file"""
+        previous = self._entries.get(entry["path"])
+        if previous is not None and previous.get("fingerprint") == entry.get(
+            "fingerprint"
+        ):
+            # Later states (e.g. reported) do not repeat the analysis text
+            for key in (
+                "analysis_text",
+                "processing_time",
+                "remote_name",
+                "structured",
+            ):
+                if key in previous and key not in entry:
+                    entry[key] = previous[key]
+        self._entries[entry["path"]] = entry
+
+
+def _fingerprint(audio_file: AudioFile) -> List[int]:
+    """Size and mtime identifying the version of a file the journal refers to"""
+    try:
+        stat = os.stat(audio_file.file_path)
+    except OSError:
+        return [audio_file.file_size, 0]
+    return [stat.st_size, stat.st_mtime_ns]
@@ -0,0 +1,119 @@
+"""
+Incremental Scan Index
+فهرست پیمایش افزایشی
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+class ScanIndex:
+    """Persistent manifest of a scanned folder tree
+
+    Stores, per directory, its mtime and the names of its audio files and
+    subfolders, and per file its size, mtime, inode, content hash and probed
+    audio metadata. A rescan can then list only the directories whose mtime
+    changed, since adding, removing or renaming an entry always updates the
+    parent's mtime.
+    """
+
+    VERSION = 1
+
+    def __init__(self, index_path: str):
+        self._index_path = index_path
+        self._lock = threading.Lock()
+        self._directories: Dict[str, dict] = {}
+        self._files: Dict[str, dict] = {}
+        self._load()
+
+    def get_directory(self, path: str) -> Optional[dict]:
+        """Get the recorded mtime, files and subfolders of a directory"""
+        return self._directories.get(path)
+
+    def set_directory(
+        self, path: str, mtime_ns: int, files: List[str], subdirs: List[str]
+    ) -> None:
+        """Record the listing of a directory"""
+        with self._lock:
+            self._directories[path] = {
+                "mtime_ns": mtime_ns,
+                "files": files,
+                "subdirs": subdirs,
+            }
+
+    def get_file(self, path: str) -> Optional[dict]:
+        """Get the recorded size, mtime, inode and content hash of a file"""
+        return self._files.get(path)
+
+    def set_file(
+        self,
+        path: str,
+        size: int,
+        mtime_ns: int,
+        inode: int,
+        content_hash: Optional[str] = None,
+    ) -> None:
+        """Record the metadata of a file"""
+        with self._lock:
+            self._files[path] = {
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "inode": inode,
+                "content_hash": content_hash,
+            }
+
+    def set_file_metadata(self, path: str, metadata: Optional[dict]) -> None:
+        """Record the probed audio metadata of a file (None if unreadable)"""
+        with self._lock:
+            if path in self._files:
+                self._files[path]["metadata"] = metadata
+
+    def forget_file(self, path: str) -> None:
+        """Drop a file so the next scan reports it as added again"""
+        with self._lock:
+            self._files.pop(path, None)
+
+    def files_under(self, root: str) -> List[str]:
+        """Get all recorded file paths inside ``root``"""
+        prefix = root.rstrip(os.sep) + os.sep
+        return [path for path in self._files if path.startswith(prefix)]
+
+    def prune_directories(self, root: str, visited: Iterable[str]) -> None:
+        """Forget directories inside ``root`` that were not seen in a scan"""
+        visited = set(visited)
+        prefix = root.rstrip(os.sep) + os.sep
+        with self._lock:
+            for path in list(self._directories):
+                if (path == root or path.startswith(prefix)) and path not in visited:
+                    del self._directories[path]
+
+    def save(self) -> None:
+        """Atomically write the index to disk"""
+        with self._lock:
+            data = {
+                "version": self.VERSION,
+                "directories": self._directories,
+                "files": self._files,
+            }
+            directory = os.path.dirname(self._index_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            temp_path = f"{self._index_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self._index_path)
+
+    def _load(self) -> None:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") != self.VERSION:
+            return
+        self._directories = data.get("directories", {})
+        self._files = data.get("files", {})
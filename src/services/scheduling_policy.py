@@ -0,0 +1,66 @@
+"""
+Scheduling Policies
+سیاست‌های زمان‌بندی پردازش فایل‌ها
+"""
+
+from typing import Dict, List, Type
+
+from src.interfaces import ISchedulingPolicy
+from src.models import AudioFile
+
+# Bytes per second assumed when a file's duration is unknown (~128 kbit/s)
+_BYTES_PER_SECOND = 16000
+
+
+def estimate_seconds(audio_file: AudioFile) -> float:
+    """Expected processing cost of a file: its duration, else a size estimate"""
+    if audio_file.duration:
+        return audio_file.duration
+    if audio_file.file_size:
+        return audio_file.file_size / _BYTES_PER_SECOND
+    return 0.0
+
+
+class FifoPolicy(ISchedulingPolicy):
+    """Process files in the order they were found"""
+
+    needs_durations = False
+
+    def order(self, audio_files: List[AudioFile]) -> List[AudioFile]:
+        return list(audio_files)
+
+
+class LongestFirstPolicy(ISchedulingPolicy):
+    """Start the longest recordings first to shorten the batch makespan
+
+    With several workers, a long file picked up last would keep one worker
+    busy long after the others finish.
+    """
+
+    def order(self, audio_files: List[AudioFile]) -> List[AudioFile]:
+        return sorted(audio_files, key=estimate_seconds, reverse=True)
+
+
+class ShortestFirstPolicy(ISchedulingPolicy):
+    """Start the shortest recordings first so results arrive sooner"""
+
+    def order(self, audio_files: List[AudioFile]) -> List[AudioFile]:
+        return sorted(audio_files, key=estimate_seconds)
+
+
+SCHEDULING_POLICIES: Dict[str, Type[ISchedulingPolicy]] = {
+    "fifo": FifoPolicy,
+    "longest-first": LongestFirstPolicy,
+    "shortest-first": ShortestFirstPolicy,
+}
+
+
+def create_scheduling_policy(name: str) -> ISchedulingPolicy:
+    """Create a policy by name ("fifo", "longest-first" or "shortest-first")"""
+    key = (name or "fifo").strip().lower().replace("_", "-")
+    if key not in SCHEDULING_POLICIES:
+        raise ValueError(
+            f"Unknown scheduling policy: {name} "
+            f"(expected one of {', '.join(SCHEDULING_POLICIES)})"
+        )
+    return SCHEDULING_POLICIES[key]()
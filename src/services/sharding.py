@@ -0,0 +1,152 @@
+"""
+Multi-Node Sharding
+تقسیم فایل‌ها بین چند گره پردازشی
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import uuid
+from datetime import datetime
+from typing import List, Tuple
+
+from src.models import AnalysisResult, AudioFile, StructuredAnalysis
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse an ``"i/N"`` shard spec (1-based) into (index, count)"""
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", spec or "")
+    if not match:
+        raise ValueError(f"Invalid shard: {spec} (expected i/N, e.g. 1/3)")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard: {spec} (i must be between 1 and N)")
+    return index, count
+
+
+class ShardSelector:
+    """Picks this node's disjoint share of the files in a shared folder
+
+    Files are assigned with rendezvous (highest random weight) hashing of
+    their path relative to the folder, so every node computes the same
+    assignment from the same listing without coordinating, mount points may
+    differ between containers, and changing the node count only moves the
+    files of the nodes that were added or removed.
+    """
+
+    def __init__(self, index: int, count: int):
+        if not 1 <= index <= count:
+            raise ValueError(f"Shard index {index} is not between 1 and {count}")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "ShardSelector":
+        """Create a selector from an ``"i/N"`` spec"""
+        return cls(*parse_shard(spec))
+
+    @property
+    def label(self) -> str:
+        """Name of the shard, e.g. ``2-of-3``"""
+        return f"{self.index}-of-{self.count}"
+
+    def owner(self, key: str) -> int:
+        """Shard (1-based) that owns ``key``"""
+        return max(
+            range(1, self.count + 1),
+            key=lambda shard: hashlib.sha1(f"{shard}:{key}".encode("utf-8")).digest(),
+        )
+
+    def select(self, audio_files: List[AudioFile], root: str) -> List[AudioFile]:
+        """Keep the files under ``root`` that belong to this shard"""
+        return [
+            audio_file
+            for audio_file in audio_files
+            if self.owner(_relative_key(audio_file.file_path, root)) == self.index
+        ]
+
+
+def _relative_key(file_path: str, root: str) -> str:
+    """Path below ``root`` with forward slashes, identical on every node"""
+    relative = os.path.relpath(os.path.abspath(file_path), os.path.abspath(root))
+    return relative.replace(os.sep, "/")
+
+
+class ShardResultStore:
+    """Per-node results of a sharded run, merged into one summary
+
+    Each node saves its results as ``shard-<i>-of-<N>.json`` in a folder on
+    the shared output volume; any node can then load the results of all
+    nodes of the same shard count to write the combined summary.
+    """
+
+    def __init__(self, folder: str):
+        self._folder = folder
+
+    def save(self, selector: ShardSelector, results: List[AnalysisResult]) -> str:
+        """Atomically replace this node's saved results"""
+        os.makedirs(self._folder, exist_ok=True)
+        path = os.path.join(self._folder, f"shard-{selector.label}.json")
+        entries = []
+        for result in results:
+            entry = result.to_dict()
+            entry.pop("timeline", None)
+            entry["file_name"] = result.audio_file.file_name
+            entry["file_path"] = result.audio_file.file_path
+            entry["file_size"] = result.audio_file.file_size
+            entry["output_file_path"] = result.output_file_path
+            entries.append(entry)
+
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"shard": selector.label, "results": entries}, f, ensure_ascii=False
+            )
+        os.replace(temp_path, path)
+        return path
+
+    def load(self, count: int) -> Tuple[List[AnalysisResult], List[int]]:
+        """Load the saved results of all ``count`` shards
+
+        Returns the results ordered by file name and the shards that have
+        not saved any results yet.
+        """
+        results = []
+        found = set()
+        pattern = os.path.join(self._folder, f"shard-*-of-{count}.json")
+        for path in glob.glob(pattern):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            found.add(int(data["shard"].split("-", 1)[0]))
+            results.extend(_restore_result(entry) for entry in data["results"])
+
+        results.sort(key=lambda result: result.audio_file.file_name)
+        missing = [shard for shard in range(1, count + 1) if shard not in found]
+        return results, missing
+
+
+def _restore_result(entry: dict) -> AnalysisResult:
+    timestamp = entry.get("timestamp")
+    structured = entry.get("structured")
+    audio_file = AudioFile(
+        file_path=entry["file_path"],
+        file_name=entry["file_name"],
+        file_size=entry.get("file_size") or 0,
+    )
+    return AnalysisResult(
+        audio_file=audio_file,
+        analysis_text=entry.get("analysis_text", ""),
+        success=entry.get("success", False),
+        error_message=entry.get("error_message"),
+        processing_time=entry.get("processing_time"),
+        timestamp=datetime.fromisoformat(timestamp) if timestamp else None,
+        output_file_path=entry.get("output_file_path"),
+        structured=StructuredAnalysis.from_dict(structured) if structured else None,
+        prompt_tokens=entry.get("prompt_tokens"),
+        output_tokens=entry.get("output_tokens"),
+    )
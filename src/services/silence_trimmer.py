@@ -0,0 +1,401 @@
+"""
+Silence Trimmer and Voice Activity Detection
+حذف سکوت و تشخیص فعالیت صوتی
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.models import AudioFile, TimelineMap
+from src.services.audio_preprocessor import transcode_audio
+
+# Frames are analyzed in blocks to bound memory on multi-hour recordings
+_FRAMES_PER_BLOCK = 8192
+
+
+def detect_speech(
+    samples: np.ndarray,
+    sample_rate: int,
+    frame_ms: int = 30,
+    margin_db: float = 12.0,
+    floor_db: float = -50.0,
+    dynamic_range_db: float = 35.0,
+    max_noise_zcr: float = 0.35,
+    min_speech_ms: int = 150,
+    hangover_ms: int = 300,
+) -> List[Tuple[float, float]]:
+    """Find speech regions in mono PCM samples scaled to [-1, 1]
+
+    A frame counts as speech when its energy is ``margin_db`` above the noise
+    floor (the 10th percentile of frame energies) and it is not a quiet,
+    hiss-like frame with a high zero-crossing rate. Blips shorter than
+    ``min_speech_ms`` are dropped and regions are extended by ``hangover_ms``
+    so word endings and short pauses are kept.
+
+    Returns (start, end) pairs in seconds.
+    """
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return []
+
+    energy_db, zero_crossing_rate = _frame_features(samples, frame_length, frame_count)
+
+    noise_floor = np.percentile(energy_db, 10)
+    peak = energy_db.max()
+    # Recordings with no real silence have a high "noise floor"; cap the
+    # threshold relative to the peak so quiet speech is still detected
+    threshold = max(floor_db, min(noise_floor + margin_db, peak - dynamic_range_db))
+
+    speech = energy_db > threshold
+    hiss = (zero_crossing_rate > max_noise_zcr) & (
+        energy_db < threshold + margin_db / 2
+    )
+    speech &= ~hiss
+
+    # Drop isolated clicks, then bridge short gaps with the hangover
+    min_frames = max(1, int(min_speech_ms / frame_ms))
+    starts, ends = _runs(speech)
+    for start, end in zip(starts, ends):
+        if end - start < min_frames:
+            speech[start:end] = False
+
+    hangover = int(hangover_ms / frame_ms)
+    if hangover:
+        kernel = np.ones(2 * hangover + 1, dtype=np.int32)
+        speech = np.convolve(speech.astype(np.int32), kernel, mode="same") > 0
+
+    frame_seconds = frame_length / sample_rate
+    starts, ends = _runs(speech)
+    return [
+        (float(start * frame_seconds), float(end * frame_seconds))
+        for start, end in zip(starts, ends)
+    ]
+
+
+def plan_segments(
+    regions: List[Tuple[float, float]],
+    duration: float,
+    padding: float = 0.3,
+    max_pause: Optional[float] = None,
+) -> List[Tuple[float, float]]:
+    """Choose the ranges of the original audio to keep
+
+    Leading and trailing silence is cut down to ``padding``. With
+    ``max_pause`` set, internal pauses longer than that are shortened to
+    ``max_pause`` seconds; otherwise everything between the first and last
+    speech is kept.
+    """
+    if not regions:
+        return []
+
+    if max_pause is None:
+        return [
+            (max(0.0, regions[0][0] - padding), min(duration, regions[-1][1] + padding))
+        ]
+
+    merged: List[List[float]] = []
+    for start, end in regions:
+        start, end = max(0.0, start - padding), min(duration, end + padding)
+        if merged and start - merged[-1][1] <= max_pause:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    # Leave max_pause of silence at every cut so the pause is still audible
+    half_pause = max_pause / 2
+    for previous, following in zip(merged, merged[1:]):
+        previous[1] += half_pause
+        following[0] -= half_pause
+
+    return [(start, end) for start, end in merged]
+
+
+def _frame_features(
+    samples: np.ndarray, frame_length: int, frame_count: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-frame energy in dBFS and zero-crossing rate"""
+    energy_db = np.empty(frame_count, dtype=np.float64)
+    zero_crossing_rate = np.empty(frame_count, dtype=np.float64)
+
+    for first in range(0, frame_count, _FRAMES_PER_BLOCK):
+        last = min(frame_count, first + _FRAMES_PER_BLOCK)
+        frames = samples[first * frame_length : last * frame_length].reshape(
+            last - first, frame_length
+        )
+        frames = frames.astype(np.float32, copy=False)
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        energy_db[first:last] = 20 * np.log10(rms + 1e-10)
+        signs = np.signbit(frames)
+        zero_crossing_rate[first:last] = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    return energy_db, zero_crossing_rate
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start (inclusive) and end (exclusive) indices of True runs"""
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    return edges[0::2], edges[1::2]
+
+
+def read_wav(path: str) -> Tuple[np.ndarray, int]:
+    """Decode a PCM WAV file into mono float32 samples"""
+    with wave.open(path, "rb") as wav:
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        sample_rate = wav.getframerate()
+        data = wav.readframes(wav.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768
+    elif sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        padded = np.zeros((len(raw), 4), dtype=np.uint8)
+        padded[:, 1:] = raw
+        samples = padded.view("<i4").ravel().astype(np.float32) / 2147483648
+    elif sample_width == 4:
+        samples = np.frombuffer(data, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width}")
+
+    if channels > 1:
+        samples = samples[: len(samples) // channels * channels]
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, sample_rate
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int) -> None:
+    """Write mono float samples as a 16-bit PCM WAV file"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+
+
+def decode_audio(
+    path: str, sample_rate: int = 16000, ffmpeg_path: Optional[str] = None
+) -> Tuple[np.ndarray, int]:
+    """Decode audio to mono float32 PCM
+
+    Uses ffmpeg (resampling to ``sample_rate``) when available; without it
+    only WAV files can be decoded, at their own sample rate.
+    """
+    if ffmpeg_path is not None:
+        command = [
+            ffmpeg_path,
+            "-nostdin",
+            "-loglevel",
+            "error",
+            "-i",
+            path,
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            str(sample_rate),
+            "-f",
+            "s16le",
+            "-",
+        ]
+        completed = subprocess.run(command, check=True, capture_output=True)
+        samples = np.frombuffer(completed.stdout, dtype="<i2")
+        return samples.astype(np.float32) / 32768, sample_rate
+
+    if path.lower().endswith(".wav"):
+        return read_wav(path)
+    raise ValueError("ffmpeg is required to decode non-WAV audio")
+
+
+# Errors raised by decode_audio for unreadable or unsupported files
+DECODE_ERRORS = (OSError, ValueError, EOFError, wave.Error, subprocess.SubprocessError)
+
+
+class SilenceTrimmer:
+    """Cuts dead air from recordings before upload
+
+    Decodes audio to PCM (WAV directly, other formats through ffmpeg), finds
+    speech with ``detect_speech`` and writes the kept ranges to the cache,
+    encoded as mono Opus when ffmpeg is available (16-bit WAV otherwise).
+    The kept ranges are returned as a ``TimelineMap`` so timestamps in the
+    analysis can be mapped back to the original recording. Files that would
+    lose less than ``min_saving`` seconds, or whose trimmed audio is not
+    smaller than the original file, are left as is.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        compress_pauses: bool = False,
+        max_pause: float = 2.0,
+        padding: float = 0.3,
+        min_saving: float = 2.0,
+        sample_rate: int = 16000,
+        bitrate: str = "24k",
+        ffmpeg_path: Optional[str] = None,
+    ):
+        self._cache_dir = cache_dir
+        self._max_pause = max_pause if compress_pauses else None
+        self._padding = padding
+        self._min_saving = min_saving
+        self._sample_rate = sample_rate
+        self._bitrate = bitrate
+        self._ffmpeg_path = ffmpeg_path or shutil.which("ffmpeg")
+        self._lock = threading.Lock()
+        self._trimmed: Dict[str, Tuple[Optional[str], Optional[TimelineMap]]] = {}
+
+    def trim(self, audio_file: AudioFile) -> Tuple[AudioFile, Optional[TimelineMap]]:
+        """Get the audio to upload and its timeline, or the file itself if untrimmed"""
+        try:
+            target_path = self._target_path(audio_file)
+        except OSError:
+            return audio_file, None
+
+        with self._lock:
+            cached = self._trimmed.get(target_path)
+        if cached is None:
+            cached = self._load(target_path)
+        if cached is None:
+            cached = self._trim_to(audio_file, target_path)
+            with self._lock:
+                self._trimmed[target_path] = cached
+
+        trimmed_path, timeline = cached
+        if trimmed_path is None:
+            return audio_file, None
+
+        trimmed_file = AudioFile(
+            file_path=trimmed_path,
+            file_name=audio_file.file_name,
+            file_size=os.path.getsize(trimmed_path),
+            duration=timeline.trimmed_duration,
+        )
+        return trimmed_file, timeline
+
+    def get_timeline(self, audio_file: AudioFile) -> Optional[TimelineMap]:
+        """Get the timeline of a file trimmed earlier"""
+        return self.trim(audio_file)[1]
+
+    def _trim_to(
+        self, audio_file: AudioFile, target_path: str
+    ) -> Tuple[Optional[str], Optional[TimelineMap]]:
+        try:
+            samples, sample_rate = self._decode(audio_file.file_path)
+        except DECODE_ERRORS:
+            print(
+                f"⚠️  حذف سکوت برای {audio_file.file_name} ممکن نیست؛ "
+                "فایل اصلی آپلود می‌شود"
+            )
+            return None, None
+
+        duration = len(samples) / sample_rate
+        regions = detect_speech(samples, sample_rate)
+        segments = plan_segments(regions, duration, self._padding, self._max_pause)
+        timeline = TimelineMap(segments=segments, original_duration=duration)
+
+        if not segments or timeline.removed_duration < self._min_saving:
+            # Nothing worth cutting (or no speech found): upload the original
+            self._save_metadata(target_path, None)
+            return None, None
+
+        kept = np.concatenate(
+            [
+                samples[int(start * sample_rate) : int(end * sample_rate)]
+                for start, end in segments
+            ]
+        )
+        os.makedirs(self._cache_dir, exist_ok=True)
+        temp_path = f"{target_path}.{threading.get_ident()}.tmp.wav"
+        try:
+            write_wav(temp_path, kept, sample_rate)
+            if self._ffmpeg_path is None:
+                os.replace(temp_path, target_path)
+            else:
+                # Raw PCM is ~32 KB/s, larger than most compressed sources
+                transcode_audio(
+                    self._ffmpeg_path,
+                    temp_path,
+                    target_path,
+                    sample_rate,
+                    1,
+                    self._bitrate,
+                )
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"⚠️  ذخیره صدای کوتاه‌شده {audio_file.file_name} ناموفق بود: {e}")
+            return None, None
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        source_size = audio_file.file_size or os.path.getsize(audio_file.file_path)
+        if os.path.getsize(target_path) >= source_size:
+            # Trimming would send more bytes than the original; upload that
+            os.remove(target_path)
+            self._save_metadata(target_path, None)
+            return None, None
+        self._save_metadata(target_path, timeline)
+
+        print(
+            f"✂️  {timeline.removed_duration:.1f} ثانیه سکوت از "
+            f"{audio_file.file_name} حذف شد"
+        )
+        return target_path, timeline
+
+    def _decode(self, path: str) -> Tuple[np.ndarray, int]:
+        """Decode audio to mono float32 PCM"""
+        return decode_audio(path, self._sample_rate, self._ffmpeg_path)
+
+    @property
+    def settings(self) -> str:
+        """Trimming and encoding settings, as used in cache file names"""
+        pauses = f"p{self._max_pause}" if self._max_pause is not None else "edges"
+        settings = f"vad-{pauses}-pad{self._padding}"
+        if self._ffmpeg_path is not None:
+            settings += f"-{self._bitrate}"
+        return settings
+
+    def _target_path(self, audio_file: AudioFile) -> str:
+        """Cache path of the trimmed audio, keyed by source hash and settings"""
+        extension = "wav" if self._ffmpeg_path is None else "ogg"
+        return os.path.join(
+            self._cache_dir,
+            f"{audio_file.get_content_hash()}-{self.settings}.{extension}",
+        )
+
+    def _load(
+        self, target_path: str
+    ) -> Optional[Tuple[Optional[str], Optional[TimelineMap]]]:
+        """Read the result of an earlier run from the cache"""
+        try:
+            with open(f"{target_path}.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        timeline = data.get("timeline")
+        if timeline is None:
+            cached = (None, None)
+        elif os.path.exists(target_path):
+            cached = (target_path, TimelineMap.from_dict(timeline))
+        else:
+            return None
+
+        with self._lock:
+            self._trimmed[target_path] = cached
+        return cached
+
+    def _save_metadata(self, target_path: str, timeline: Optional[TimelineMap]) -> None:
+        os.makedirs(self._cache_dir, exist_ok=True)
+        with open(f"{target_path}.json", "w", encoding="utf-8") as f:
+            json.dump({"timeline": timeline.to_dict() if timeline else None}, f)
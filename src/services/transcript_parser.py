@@ -0,0 +1,178 @@
+"""
+Transcript Parser
+تجزیه‌گر رونوشت گزارش‌های تحلیل
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional
+
+from src.models.timeline_dataset import TimelineDataset
+
+_TIME = r"(\d{1,3}:\d{2}(?::\d{2})?)"
+_RANGE = _TIME + r"\s*-\s*" + _TIME
+
+# "**[00:05-00:18] مشتری**: text"; pauses ("**[..] [مکث]**") have no colon
+_SEGMENT = re.compile(
+    (
+        r"^[ \t>-]*\*\*\[" + _RANGE + r"\]\s*([^*\n]+?)\s*\*\*\s*:[ \t]*(.*?)[ \t]*\r?$"
+    ).encode("utf-8"),
+    re.MULTILINE,
+)
+
+# Topic time ranges, in the forms the prompts and structured reports use:
+#   "- **Time ranges**: [00:05-00:25], [02:30-03:15]" under a "**💰 Pricing:**" line
+#   "- **💰 Pricing**: [00:05-00:25] - description"
+#   "- **[00:10-00:50]** delivery (logistics)"
+_TOPIC = re.compile(
+    "|".join(
+        [
+            r"^[ \t]*[-*]?[ \t]*\*\*(?:time ranges|"
+            "بازه(?:\u200c| )?های زمانی"
+            r")\*\*[ \t]*:(?P<ranges>[^\n]*)",
+            r"^[ \t]*[-*][ \t]*\*\*\[(?P<s_start>\d{1,3}:\d{2}(?::\d{2})?)\s*-\s*"
+            r"(?P<s_end>\d{1,3}:\d{2}(?::\d{2})?)\]\*\*[ \t]*"
+            r"(?P<s_topic>[^\n(]+?)(?:[ \t]*\([^)\n]*\))?[ \t]*\r?$",
+            r"^[ \t]*[-*][ \t]*\*\*(?P<i_topic>[^*\[\]\n]+?):?\*\*[ \t]*:?[ \t]*"
+            r"\[(?P<i_start>\d{1,3}:\d{2}(?::\d{2})?)\s*-\s*"
+            r"(?P<i_end>\d{1,3}:\d{2}(?::\d{2})?)\]",
+            r"^[ \t]*[-*]?[ \t]*\*\*(?P<header>[^*\[\]\n]+?):?\*\*[ \t]*:?[ \t]*\r?$",
+        ]
+    ).encode("utf-8"),
+    re.MULTILINE | re.IGNORECASE,
+)
+_RANGE_IN_LINE = re.compile(r"\[".encode("utf-8") + _RANGE.encode("utf-8") + rb"\]")
+
+# Below this many reports, starting worker processes costs more than it saves
+MIN_PARALLEL_FILES = 256
+
+
+def parse_report(data: bytes, file_path: str = "") -> TimelineDataset:
+    """Parse the transcript segments and topic ranges of one Markdown report
+
+    ``data`` is the report's UTF-8 content; segment text offsets are byte
+    offsets into it. Topic ranges repeated in several sections of a report
+    are kept once.
+    """
+    dataset = TimelineDataset()
+    file_id = dataset.add_file(file_path)
+
+    for match in _SEGMENT.finditer(data):
+        dataset.add_segment(
+            file_id,
+            _to_ms(match.group(1)),
+            _to_ms(match.group(2)),
+            match.group(3).decode("utf-8", errors="replace"),
+            match.start(4),
+            match.end(4) - match.start(4),
+        )
+
+    seen = set()
+    header = b""
+
+    def add_topic(topic: bytes, start: bytes, end: bytes) -> None:
+        key = (topic, start, end)
+        if topic and key not in seen:
+            seen.add(key)
+            dataset.add_topic(
+                file_id,
+                _to_ms(start),
+                _to_ms(end),
+                topic.decode("utf-8", errors="replace"),
+            )
+
+    for match in _TOPIC.finditer(data):
+        if match.group("header") is not None:
+            header = match.group("header").strip()
+        elif match.group("ranges") is not None:
+            for found in _RANGE_IN_LINE.finditer(match.group("ranges")):
+                add_topic(header, found.group(1), found.group(2))
+        elif match.group("i_topic") is not None:
+            add_topic(
+                match.group("i_topic").strip(),
+                match.group("i_start"),
+                match.group("i_end"),
+            )
+        else:
+            add_topic(
+                match.group("s_topic").strip(),
+                match.group("s_start"),
+                match.group("s_end"),
+            )
+
+    return dataset
+
+
+def parse_report_files(file_paths: List[str]) -> TimelineDataset:
+    """Parse several reports into one dataset, skipping unreadable files"""
+    dataset = TimelineDataset()
+    for file_path in file_paths:
+        try:
+            with open(file_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        dataset.extend(parse_report(data, file_path))
+    return dataset
+
+
+def _to_ms(value: bytes) -> int:
+    """Convert ``mm:ss`` or ``h:mm:ss`` to milliseconds"""
+    seconds = 0
+    for part in value.split(b":"):
+        seconds = seconds * 60 + int(part)
+    return seconds * 1000
+
+
+class TranscriptParser:
+    """Builds a TimelineDataset from the Markdown reports of earlier runs
+
+    Reports are parsed in batches by a pool of worker processes, each
+    returning its batch as compact columns that are then concatenated in
+    input order. Small inputs are parsed in the calling process.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        batch_size: int = 64,
+        min_parallel_files: int = MIN_PARALLEL_FILES,
+    ):
+        self._processes = processes or os.cpu_count() or 1
+        self._batch_size = max(1, batch_size)
+        self._min_parallel_files = min_parallel_files
+
+    def parse_folder(self, folder: str) -> TimelineDataset:
+        """Parse every ``*_analysis.md`` report below ``folder``"""
+        return self.parse_files(sorted(_find_reports(folder)))
+
+    def parse_files(self, file_paths: Iterable[str]) -> TimelineDataset:
+        """Parse the given reports into one dataset, in the given order"""
+        file_paths = list(file_paths)
+        batches = [
+            file_paths[i : i + self._batch_size]
+            for i in range(0, len(file_paths), self._batch_size)
+        ]
+
+        dataset = TimelineDataset()
+        if self._processes == 1 or len(file_paths) < self._min_parallel_files:
+            parts = map(parse_report_files, batches)
+            for part in parts:
+                dataset.extend(part)
+            return dataset
+
+        workers = min(self._processes, len(batches))
+        print(f"🧵 تجزیه {len(file_paths)} گزارش با {workers} فرآیند")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for part in executor.map(parse_report_files, batches):
+                dataset.extend(part)
+        return dataset
+
+
+def _find_reports(folder: str) -> Iterator[str]:
+    """Paths of the analysis reports below ``folder``"""
+    for root, _, names in os.walk(folder):
+        for name in names:
+            if name.endswith("_analysis.md"):
+                yield os.path.join(root, name)
@@ -0,0 +1,124 @@
+"""
+Uploaded File Registry
+دفتر ثبت فایل‌های آپلود شده
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    upload_key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+class UploadRegistry:
+    """Remembers which audio content is already uploaded to Gemini
+
+    Maps a key of the uploaded audio (the SHA-256 of its bytes plus the
+    pre-processing settings that produced it) to the remote file name and
+    its expiry time. Entries are rows of a SQLite database, so worker
+    processes and shard nodes sharing the registry add and drop entries
+    without overwriting each other's. Entries that expire within
+    ``safety_margin`` seconds are treated as gone, so a handle is never
+    reused just before the server deletes it.
+
+    A registry that cannot be read or written only disables reuse; it never
+    fails an analysis. Only paths and settings are stored on the object, so
+    it can be passed to worker processes.
+    """
+
+    # Gemini keeps uploaded files for 48 hours
+    DEFAULT_TTL = 48 * 3600
+
+    def __init__(self, registry_path: str, safety_margin: float = 3600):
+        self._registry_path = registry_path
+        self._safety_margin = safety_margin
+
+        try:
+            directory = os.path.dirname(registry_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._transaction() as db:
+                db.execute(_SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️  دفتر ثبت آپلودها در دسترس نیست: {str(e)}")
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """Get the remote file name for the content, or None if not reusable"""
+        try:
+            with self._transaction() as db:
+                row = db.execute(
+                    "SELECT name, expires_at FROM uploads WHERE upload_key = ?",
+                    (content_hash,),
+                ).fetchone()
+                if row is None:
+                    return None
+                name, expires_at = row
+                if expires_at - self._safety_margin <= time.time():
+                    db.execute(
+                        "DELETE FROM uploads WHERE upload_key = ?", (content_hash,)
+                    )
+                    return None
+                return name
+        except (OSError, sqlite3.Error):
+            return None
+
+    def register(self, content_hash: str, uploaded_file) -> None:
+        """Record an uploaded file handle returned by the Gemini client"""
+        name = getattr(uploaded_file, "name", None)
+        if not isinstance(name, str):
+            return
+
+        expiration = getattr(uploaded_file, "expiration_time", None)
+        if isinstance(expiration, datetime):
+            expires_at = expiration.timestamp()
+        else:
+            expires_at = time.time() + self.DEFAULT_TTL
+
+        try:
+            with self._transaction() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO uploads (upload_key, name, expires_at) "
+                    "VALUES (?, ?, ?)",
+                    (content_hash, name, expires_at),
+                )
+                # Drop entries that can no longer be reused
+                db.execute(
+                    "DELETE FROM uploads WHERE expires_at <= ?",
+                    (time.time() + self._safety_margin,),
+                )
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️  ثبت فایل آپلود شده ناموفق بود: {str(e)}")
+
+    def forget(self, content_hash: str) -> None:
+        """Drop an entry whose remote file turned out to be unusable"""
+        try:
+            with self._transaction() as db:
+                db.execute("DELETE FROM uploads WHERE upload_key = ?", (content_hash,))
+        except (OSError, sqlite3.Error):
+            pass
+
+    def __len__(self) -> int:
+        try:
+            with self._transaction() as db:
+                return db.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+        except (OSError, sqlite3.Error):
+            return 0
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection and commit (or roll back) one transaction"""
+        db = sqlite3.connect(self._registry_path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
@@ -0,0 +1,183 @@
+"""
+Worker Process Pool
+مجموعه فرآیندهای پردازشگر
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from datetime import datetime
+from multiprocessing.connection import wait
+from typing import Callable, List
+
+from src.models import AnalysisResult, AudioFile, StructuredAnalysis
+from src.models.job import SUCCEEDED
+from src.services.persistent_queue import Lease, PersistentJobQueue
+
+
+def run_worker(
+    job_queue: PersistentJobQueue,
+    create_application: Callable,
+    output_folder: str,
+    poll_interval: float = 1.0,
+) -> None:
+    """Entry point of a worker process: analyze leased jobs until none are left
+
+    Each worker builds its own application, and so its own GeminiAnalyzer.
+    While a file is being analyzed a heartbeat thread keeps its lease alive,
+    so only a worker that died or hung lets the job become visible again.
+    """
+    application = create_application()
+    try:
+        _process_leases(application, job_queue, output_folder, poll_interval)
+    finally:
+        # Results still buffered by the worker's report generator
+        application.close()
+
+
+def _process_leases(
+    application,
+    job_queue: PersistentJobQueue,
+    output_folder: str,
+    poll_interval: float,
+) -> None:
+    """Analyze leased jobs until the queue has nothing pending"""
+    worker = os.getpid()
+
+    while True:
+        lease = job_queue.lease()
+        if lease is None:
+            # Jobs leased by a crashed worker reappear once their lease expires
+            if not job_queue.has_pending():
+                return
+            time.sleep(poll_interval)
+            continue
+
+        print(
+            f"👷 پردازشگر {worker}: {os.path.basename(lease.file_path)} "
+            f"(تلاش {lease.attempt})"
+        )
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(
+            target=_keep_lease, args=(job_queue, lease, stop_heartbeat)
+        )
+        heartbeat.daemon = True
+        heartbeat.start()
+        try:
+            result = application.process_audio_file(lease.file_path, output_folder)
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+        job_queue.complete(lease, result)
+
+
+def _keep_lease(
+    job_queue: PersistentJobQueue, lease: Lease, stop_event: threading.Event
+) -> None:
+    """Extend ``lease`` every third of the visibility timeout until stopped"""
+    interval = job_queue.visibility_timeout / 3
+    while not stop_event.wait(interval):
+        if not job_queue.extend(lease):
+            return
+
+
+class WorkerPool:
+    """Analyzes files in separate worker processes fed by a PersistentJobQueue
+
+    Processes sidestep the GIL for CPU-bound steps (audio conversion and
+    trimming, hashing, report rendering). A worker that exits abnormally is
+    replaced while jobs are still pending; its job is retried by whichever
+    worker leases it after the lease expires.
+    """
+
+    def __init__(
+        self,
+        job_queue: PersistentJobQueue,
+        create_application: Callable,
+        processes: int = 2,
+        poll_interval: float = 1.0,
+        start_method: str = "spawn",
+    ):
+        self._job_queue = job_queue
+        self._create_application = create_application
+        self._processes = max(1, processes)
+        self._poll_interval = poll_interval
+        self._context = multiprocessing.get_context(start_method)
+
+    def process(
+        self, audio_files: List[AudioFile], output_folder: str
+    ) -> List[AnalysisResult]:
+        """Queue ``audio_files``, run the workers until done and collect results"""
+        job_ids = self._job_queue.enqueue(
+            [audio_file.file_path for audio_file in audio_files]
+        )
+        workers = min(self._processes, len(audio_files))
+        print(f"⚙️  پردازش با {workers} فرآیند پردازشگر")
+        self._run_workers(workers, output_folder)
+
+        stored = self._job_queue.get_results(job_ids)
+        results = [
+            _restore_result(audio_file, stored.get(job_id))
+            for audio_file, job_id in zip(audio_files, job_ids)
+        ]
+        self._job_queue.remove(list(stored))
+        return results
+
+    def _run_workers(self, count: int, output_folder: str) -> None:
+        """Start ``count`` workers and replace crashed ones while work remains"""
+        restarts_left = count * 3
+        running = [self._start_worker(output_folder) for _ in range(count)]
+
+        while running:
+            wait([process.sentinel for process in running])
+            for process in [p for p in running if not p.is_alive()]:
+                process.join()
+                running.remove(process)
+                if process.exitcode == 0:
+                    continue
+                print(f"⚠️  پردازشگر {process.pid} با کد {process.exitcode} متوقف شد")
+                if restarts_left > 0 and self._job_queue.has_pending():
+                    restarts_left -= 1
+                    running.append(self._start_worker(output_folder))
+
+    def _start_worker(self, output_folder: str):
+        process = self._context.Process(
+            target=run_worker,
+            args=(
+                self._job_queue,
+                self._create_application,
+                output_folder,
+                self._poll_interval,
+            ),
+        )
+        process.start()
+        return process
+
+
+def _restore_result(audio_file: AudioFile, stored) -> AnalysisResult:
+    """Rebuild the result a worker stored for ``audio_file``"""
+    if stored is None:
+        return AnalysisResult(
+            audio_file=audio_file,
+            analysis_text="",
+            success=False,
+            error_message="فایل توسط هیچ پردازشگری تکمیل نشد",
+        )
+
+    data = stored["result"]
+    success = stored["status"] == SUCCEEDED
+    timestamp = data.get("timestamp")
+    structured = data.get("structured")
+    return AnalysisResult(
+        audio_file=audio_file,
+        analysis_text=data.get("analysis_text", ""),
+        success=success,
+        error_message=None if success else data.get("error_message") or "ناموفق",
+        processing_time=data.get("processing_time"),
+        timestamp=datetime.fromisoformat(timestamp) if timestamp else None,
+        output_file_path=data.get("output_file_path"),
+        structured=StructuredAnalysis.from_dict(structured) if structured else None,
+        prompt_tokens=data.get("prompt_tokens"),
+        output_tokens=data.get("output_tokens"),
+    )
@@ -0,0 +1,8 @@
+"""
+Utilities package initialization
+"""
+
+from .async_helpers import run_blocking
+from .hashing import hash_file, hash_text
+
+__all__ = ["hash_file", "hash_text", "run_blocking"]
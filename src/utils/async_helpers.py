@@ -0,0 +1,20 @@
+"""
+Asyncio Helpers
+توابع کمکی asyncio
+"""
+
+import asyncio
+import functools
+from typing import Any, Callable
+
+
+async def run_blocking(function: Callable, *args, **kwargs) -> Any:
+    """Run a blocking call on the event loop's default executor
+
+    Used for work without an async API (file hashing and writing, audio
+    decoding, SDK uploads) so it never stalls the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, functools.partial(function, *args, **kwargs)
+    )
@@ -0,0 +1,23 @@
+"""
+Content Hashing Helpers
+توابع کمکی هش محتوا
+"""
+
+import hashlib
+
+# Read files in 1 MiB blocks so large recordings are never fully in memory
+_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """Return the SHA-256 hex digest of a UTF-8 string"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,141 @@
+"""
+Unit tests for the upload/generate pipeline
+تست‌های واحد برای خط لوله آپلود و تولید تحلیل
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+try:
+    from src.models import AudioFile
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AudioFile
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+
+
+def make_audio_files(count):
+    return [
+        AudioFile(file_path=f"{i}.mp3", file_name=f"{i}.mp3", file_size=1024)
+        for i in range(count)
+    ]
+
+
+class TestGeminiAnalyzerPipeline(unittest.TestCase):
+    """Test cases for GeminiAnalyzer.analyze_audio_batch"""
+
+    @patch("src.services.gemini_analyzer.genai")
+    def setUp(self, mock_genai):
+        config = ConfigurationService(api_key="test_key", model_name="test_model")
+        self.analyzer = GeminiAnalyzer(config, PersianPromptProvider())
+        self.client = MagicMock()
+        self.analyzer._client = self.client
+        self.events = []
+        self.events_lock = threading.Lock()
+
+        def upload_file(path):
+            self._record("upload", path)
+            time.sleep(0.02)
+            return path
+
+        def generate_content(parts):
+            uploaded = parts[-1]
+            self._record("generate-start", uploaded)
+            time.sleep(0.05)
+            self._record("generate-end", uploaded)
+            response = MagicMock()
+            response.text = f"analysis of {uploaded}"
+            return response
+
+        self.client.upload_file.side_effect = upload_file
+        self.client.GenerativeModel.return_value.generate_content.side_effect = (
+            generate_content
+        )
+
+    def _record(self, kind, path):
+        with self.events_lock:
+            self.events.append((kind, path))
+
+    def test_results_follow_input_order(self):
+        """Results are returned in input order"""
+        audio_files = make_audio_files(5)
+
+        results = self.analyzer.analyze_audio_batch(audio_files, generate_workers=2)
+
+        self.assertEqual(
+            [r.file_name for r in results], [f.file_name for f in audio_files]
+        )
+        self.assertTrue(all(r.is_successful for r in results))
+        self.assertEqual(results[3].analysis_text, "analysis of 3.mp3")
+
+    def test_upload_runs_ahead_of_generation(self):
+        """The next file is uploaded before generation of the current one ends"""
+        audio_files = make_audio_files(3)
+
+        self.analyzer.analyze_audio_batch(audio_files, queue_size=1)
+
+        uploads = [path for kind, path in self.events if kind == "upload"]
+        self.assertEqual(uploads, ["0.mp3", "1.mp3", "2.mp3"])
+        # 1.mp3 was uploaded while 0.mp3 was still generating
+        self.assertLess(
+            self.events.index(("upload", "1.mp3")),
+            self.events.index(("generate-end", "0.mp3")),
+        )
+
+    def test_upload_failure_becomes_failed_result(self):
+        """A failed upload only fails that file"""
+        original = self.client.upload_file.side_effect
+
+        def flaky_upload(path):
+            if path == "1.mp3":
+                raise Exception("upload refused")
+            return original(path)
+
+        self.client.upload_file.side_effect = flaky_upload
+
+        results = self.analyzer.analyze_audio_batch(make_audio_files(3))
+
+        self.assertEqual([r.is_successful for r in results], [True, False, True])
+        self.assertIn("upload refused", results[1].error_message)
+
+    def test_on_result_callback_receives_every_file(self):
+        """The callback is invoked once per file with its input index"""
+        seen = []
+
+        self.analyzer.analyze_audio_batch(
+            make_audio_files(4),
+            on_result=lambda index, result: seen.append((index, result.file_name)),
+            generate_workers=2,
+        )
+
+        self.assertEqual(sorted(seen), [(i, f"{i}.mp3") for i in range(4)])
+
+    def test_failing_callback_does_not_stop_the_batch(self):
+        """A callback that raises still leaves a result for every file"""
+        seen = []
+
+        def on_result(index, result):
+            seen.append(index)
+            raise OSError("disk full")
+
+        results = self.analyzer.analyze_audio_batch(
+            make_audio_files(4), on_result=on_result, queue_size=1
+        )
+
+        self.assertEqual(sorted(seen), [0, 1, 2, 3])
+        self.assertEqual([r.file_name for r in results], [f"{i}.mp3" for i in range(4)])
+        self.assertTrue(all(r.is_successful for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
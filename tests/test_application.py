@@ -0,0 +1,307 @@
+"""
+Unit tests for VoiceToTextApplication
+تست‌های واحد برای اپلیکیشن تبدیل صدا به متن
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+try:
+    from src.application import VoiceToTextApplication
+    from src.interfaces import IAIAnalyzer
+    from src.models import AnalysisResult, AudioFile
+    from src.services.audio_file_service import AudioFileService
+    from src.services.configuration_service import ConfigurationService
+    from src.services.run_journal import RunJournal
+    from src.services.scan_index import ScanIndex
+    from src.services.scheduling_policy import FifoPolicy, LongestFirstPolicy
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.application import VoiceToTextApplication
+    from src.interfaces import IAIAnalyzer
+    from src.models import AnalysisResult, AudioFile
+    from src.services.audio_file_service import AudioFileService
+    from src.services.configuration_service import ConfigurationService
+    from src.services.run_journal import RunJournal
+    from src.services.scan_index import ScanIndex
+    from src.services.scheduling_policy import FifoPolicy, LongestFirstPolicy
+
+
+class SlowFakeAnalyzer(IAIAnalyzer):
+    """Analyzer stub that sleeps and records how many calls overlap"""
+
+    def __init__(self, delays=None, fail_names=()):
+        self._delays = delays or {}
+        self._fail_names = set(fail_names)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started = []
+
+    def analyze_audio(self, audio_file: AudioFile) -> AnalysisResult:
+        with self._lock:
+            self.started.append(audio_file.file_name)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self._delays.get(audio_file.file_name, 0.05))
+            if audio_file.file_name in self._fail_names:
+                raise RuntimeError("boom")
+            return AnalysisResult(
+                audio_file=audio_file,
+                analysis_text=f"analysis of {audio_file.file_name}",
+                processing_time=0.05,
+            )
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class TestVoiceToTextApplication(unittest.TestCase):
+    """Test cases for VoiceToTextApplication processing modes"""
+
+    def setUp(self):
+        """Create a temporary assets folder with a few audio files"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.assets = self.temp_dir.name
+        voice = Path(self.assets, "voice")
+        voice.mkdir()
+        self.file_names = [f"{i}.mp3" for i in range(6)]
+        for name in self.file_names:
+            Path(voice, name).write_bytes(b"fake audio")
+
+        self.config = ConfigurationService(api_key="test_key", model_name="test")
+        self.report_generator = MagicMock()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _create_app(
+        self, analyzer, max_workers=1, pipelined=False, scheduling_policy=None
+    ):
+        return VoiceToTextApplication(
+            audio_service=AudioFileService(self.config),
+            ai_analyzer=analyzer,
+            report_generator=self.report_generator,
+            config_service=self.config,
+            max_workers=max_workers,
+            pipelined=pipelined,
+            scheduling_policy=scheduling_policy,
+        )
+
+    def test_sequential_processing(self):
+        """Default mode processes one file at a time"""
+        analyzer = SlowFakeAnalyzer()
+        app = self._create_app(analyzer)
+
+        results = app.process_audio_files(self.assets, self.assets)
+
+        self.assertEqual(len(results), len(self.file_names))
+        self.assertEqual(analyzer.max_in_flight, 1)
+        self.report_generator.create_summary_report.assert_called_once()
+
+    def test_concurrent_processing_overlaps_calls(self):
+        """Several workers analyze files at the same time"""
+        analyzer = SlowFakeAnalyzer()
+        app = self._create_app(analyzer, max_workers=3)
+
+        results = app.process_audio_files(self.assets, self.assets)
+
+        self.assertEqual(len(results), len(self.file_names))
+        self.assertGreater(analyzer.max_in_flight, 1)
+        self.assertLessEqual(analyzer.max_in_flight, 3)
+        self.assertEqual(
+            self.report_generator.save_analysis_result.call_count,
+            len(self.file_names),
+        )
+
+    def test_concurrent_results_keep_discovery_order(self):
+        """Results come back in discovery order regardless of completion order"""
+        # Earlier files finish last
+        delays = {name: 0.02 * (6 - i) for i, name in enumerate(self.file_names)}
+        sequential = self._create_app(SlowFakeAnalyzer(delays))
+        concurrent = self._create_app(SlowFakeAnalyzer(delays), max_workers=4)
+
+        expected = [r.file_name for r in sequential.process_audio_files(self.assets)]
+        actual = [r.file_name for r in concurrent.process_audio_files(self.assets)]
+
+        self.assertEqual(actual, expected)
+
+    def test_scheduling_policy_orders_work_not_results(self):
+        """Longest files start first while results keep discovery order"""
+        for i, name in enumerate(self.file_names):
+            Path(self.assets, "voice", name).write_bytes(b"x" * (100 * (i + 1)))
+        analyzer = SlowFakeAnalyzer()
+        app = self._create_app(analyzer, scheduling_policy=LongestFirstPolicy())
+
+        results = app.process_audio_files(self.assets, self.assets)
+
+        self.assertEqual(analyzer.started, list(reversed(self.file_names)))
+        self.assertEqual([r.file_name for r in results], self.file_names)
+
+    def test_headers_are_probed_only_for_duration_policies(self):
+        """FIFO scheduling never reads file headers"""
+        prober = MagicMock()
+        prober.probe.return_value = None
+        for policy, probed in ((FifoPolicy(), 0), (LongestFirstPolicy(), 6)):
+            prober.probe.reset_mock()
+            app = VoiceToTextApplication(
+                audio_service=AudioFileService(self.config, metadata_prober=prober),
+                ai_analyzer=SlowFakeAnalyzer(),
+                report_generator=self.report_generator,
+                config_service=self.config,
+                scheduling_policy=policy,
+            )
+
+            app.process_audio_files(self.assets, self.assets)
+
+            self.assertEqual(prober.probe.call_count, probed)
+
+    def test_concurrent_failure_is_isolated(self):
+        """An exception in one worker becomes a failed result for that file only"""
+        analyzer = SlowFakeAnalyzer(fail_names={"2.mp3"})
+        app = self._create_app(analyzer, max_workers=4)
+
+        results = app.process_audio_files(self.assets, self.assets)
+
+        failed = [r for r in results if not r.is_successful]
+        self.assertEqual(len(results), len(self.file_names))
+        self.assertEqual([r.file_name for r in failed], ["2.mp3"])
+        self.assertIn("boom", failed[0].error_message)
+
+    def test_invalid_worker_count_falls_back_to_sequential(self):
+        """Zero or negative worker counts behave like sequential mode"""
+        analyzer = SlowFakeAnalyzer()
+        app = self._create_app(analyzer, max_workers=0)
+
+        app.process_audio_files(self.assets, self.assets)
+
+        self.assertEqual(analyzer.max_in_flight, 1)
+
+    def test_pipelined_mode_uses_batch_api(self):
+        """Pipelined mode hands the whole batch to the analyzer"""
+        analyzer = SlowFakeAnalyzer()
+        app = self._create_app(analyzer, max_workers=2, pipelined=True)
+
+        results = app.process_audio_files(self.assets, self.assets)
+
+        self.assertEqual(len(results), len(self.file_names))
+        self.assertEqual(
+            self.report_generator.save_analysis_result.call_count,
+            len(self.file_names),
+        )
+
+    def test_pipelined_report_failure_marks_result_failed(self):
+        """A report that cannot be saved turns into a failed result"""
+        self.report_generator.save_analysis_result.side_effect = OSError("disk full")
+        app = self._create_app(SlowFakeAnalyzer(), pipelined=True)
+
+        results = app.process_audio_files(self.assets, self.assets)
+
+        self.assertTrue(all(not r.is_successful for r in results))
+        self.assertIn("disk full", results[0].error_message)
+
+    def test_incremental_mode_processes_only_the_delta(self):
+        """A second incremental run only analyzes new files"""
+        index_path = os.path.join(self.assets, "scan_index.json")
+
+        def create_incremental_app():
+            return VoiceToTextApplication(
+                audio_service=AudioFileService(
+                    self.config, scan_index=ScanIndex(index_path)
+                ),
+                ai_analyzer=SlowFakeAnalyzer(),
+                report_generator=self.report_generator,
+                config_service=self.config,
+                incremental=True,
+            )
+
+        first = create_incremental_app().process_audio_files(self.assets)
+        Path(self.assets, "voice", "new.mp3").write_bytes(b"new audio")
+        second = create_incremental_app().process_audio_files(self.assets)
+        third = create_incremental_app().process_audio_files(self.assets)
+
+        self.assertEqual(len(first), len(self.file_names))
+        self.assertEqual([r.file_name for r in second], ["new.mp3"])
+        self.assertEqual(third, [])
+
+    def test_interrupted_run_resumes_from_journal(self):
+        """A restarted run skips files finished before the interruption"""
+        journal_path = os.path.join(self.assets, "run_journal.jsonl")
+        self.report_generator.save_analysis_result.return_value = "report.md"
+
+        class InterruptingAnalyzer(SlowFakeAnalyzer):
+            def analyze_audio(self, audio_file):
+                if audio_file.file_name == "3.mp3":
+                    raise KeyboardInterrupt
+                return super().analyze_audio(audio_file)
+
+        def create_resumable_app(analyzer):
+            return VoiceToTextApplication(
+                audio_service=AudioFileService(self.config),
+                ai_analyzer=analyzer,
+                report_generator=self.report_generator,
+                config_service=self.config,
+                run_journal=RunJournal(journal_path),
+            )
+
+        with self.assertRaises(KeyboardInterrupt):
+            create_resumable_app(InterruptingAnalyzer()).process_audio_files(
+                self.assets, self.assets
+            )
+        self.assertTrue(os.path.exists(journal_path))
+
+        analyzer = SlowFakeAnalyzer()
+        analyzer.analyze_audio = MagicMock(wraps=analyzer.analyze_audio)
+        results = create_resumable_app(analyzer).process_audio_files(
+            self.assets, self.assets
+        )
+
+        analyzed = [c.args[0].file_name for c in analyzer.analyze_audio.call_args_list]
+        self.assertEqual(analyzed, ["3.mp3", "4.mp3", "5.mp3"])
+        self.assertEqual([r.file_name for r in results], self.file_names)
+        self.assertTrue(all(r.is_successful for r in results))
+        self.assertEqual(results[0].analysis_text, "analysis of 0.mp3")
+        self.assertFalse(os.path.exists(journal_path))
+
+    def test_process_single_file(self):
+        """A single recording is analyzed and reported without a summary"""
+        app = self._create_app(SlowFakeAnalyzer())
+        path = os.path.join(self.assets, "voice", "2.mp3")
+
+        result = app.process_audio_file(path, self.assets)
+
+        self.assertTrue(result.is_successful)
+        self.assertEqual(result.audio_file.file_path, os.path.abspath(path))
+        self.report_generator.save_analysis_result.assert_called_once()
+        self.report_generator.create_summary_report.assert_not_called()
+
+    def test_worker_pool_results_keep_discovery_order(self):
+        """Files are queued in scheduled order and reported in folder order"""
+        worker_pool = MagicMock()
+        worker_pool.process.side_effect = lambda audio_files, output_folder: [
+            AnalysisResult(audio_file=f, analysis_text="ok", processing_time=1.0)
+            for f in audio_files
+        ]
+        app = self._create_app(
+            SlowFakeAnalyzer(), scheduling_policy=LongestFirstPolicy()
+        )
+
+        results = app.process_audio_files_in_workers(
+            self.assets, worker_pool, self.assets
+        )
+
+        self.assertEqual([r.file_name for r in results], self.file_names)
+        worker_pool.process.assert_called_once()
+        self.report_generator.create_summary_report.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,261 @@
+"""
+Unit tests for the asyncio analyzer and application API
+تست‌های واحد برای رابط ناهمگام تحلیلگر و برنامه
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+try:
+    from src.application import VoiceToTextApplication
+    from src.interfaces import IAIAnalyzer
+    from src.models import AnalysisResult, AudioFile
+    from src.services.audio_file_service import AudioFileService
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.rate_limiter import RateLimiter
+    from src.services.report_generator import MarkdownReportGenerator
+    from src.services.retry_policy import RetryPolicy, RetryStats
+    from src.services.run_journal import RunJournal
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.application import VoiceToTextApplication
+    from src.interfaces import IAIAnalyzer
+    from src.models import AnalysisResult, AudioFile
+    from src.services.audio_file_service import AudioFileService
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.rate_limiter import RateLimiter
+    from src.services.report_generator import MarkdownReportGenerator
+    from src.services.retry_policy import RetryPolicy, RetryStats
+    from src.services.run_journal import RunJournal
+
+
+class ServiceUnavailable(Exception):
+    """Stand-in for google.api_core.exceptions.ServiceUnavailable"""
+
+
+class TestAsyncRetryAndRateLimit(unittest.TestCase):
+    """Test cases for coroutine-native retries and rate limiting"""
+
+    def test_call_async_retries_with_async_sleep(self):
+        """Backoff waits go through the async sleep, not time.sleep"""
+        delays = []
+
+        async def fake_sleep(delay):
+            delays.append(delay)
+
+        blocking_sleep = MagicMock()
+        policy = RetryPolicy(
+            max_attempts=3, sleep=blocking_sleep, async_sleep=fake_sleep
+        )
+        operation = AsyncMock(side_effect=[ServiceUnavailable("down"), "ok"])
+        stats = RetryStats()
+
+        result = asyncio.run(policy.call_async(operation, stats, "arg"))
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(operation.await_count, 2)
+        operation.assert_awaited_with("arg")
+        self.assertEqual((stats.retries, len(delays)), (1, 1))
+        blocking_sleep.assert_not_called()
+
+    def test_concurrency_limit_applies_to_coroutines(self):
+        """No more than max_concurrency requests are in flight at once"""
+        limiter = RateLimiter(max_concurrency=2)
+        state = {"in_flight": 0, "peak": 0}
+
+        async def request():
+            async with limiter.request():
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+                await asyncio.sleep(0.01)
+                state["in_flight"] -= 1
+
+        async def run():
+            await asyncio.gather(*(request() for _ in range(8)))
+
+        asyncio.run(run())
+
+        self.assertEqual(state["peak"], 2)
+        self.assertEqual(limiter.get_stats()["requests"], 8)
+
+
+class TestAnalyzeAudioAsync(unittest.TestCase):
+    """Test cases for GeminiAnalyzer.analyze_audio_async"""
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.model = self.client.GenerativeModel.return_value
+        self.audio_file = AudioFile(
+            file_path="call.mp3", file_name="call.mp3", file_size=1024
+        )
+        with patch("src.services.gemini_analyzer.genai"):
+            self.analyzer = GeminiAnalyzer(
+                ConfigurationService(api_key="test_key", model_name="model"),
+                PersianPromptProvider(),
+                rate_limiter=RateLimiter(max_concurrency=1),
+            )
+        self.analyzer._client = self.client
+
+    def test_generation_uses_the_async_client(self):
+        """The response is awaited instead of requested on a thread"""
+        self.model.generate_content_async = AsyncMock(
+            return_value=MagicMock(text="analysis")
+        )
+
+        result = asyncio.run(self.analyzer.analyze_audio_async(self.audio_file))
+
+        self.assertTrue(result.is_successful)
+        self.assertEqual(result.analysis_text, "analysis")
+        self.client.upload_file.assert_called_once_with("call.mp3")
+        self.model.generate_content_async.assert_awaited_once()
+        self.model.generate_content.assert_not_called()
+
+    def test_errors_become_failed_results(self):
+        """A failing request gives a failed result rather than raising"""
+        self.model.generate_content_async = AsyncMock(
+            side_effect=ValueError("bad request")
+        )
+
+        result = asyncio.run(self.analyzer.analyze_audio_async(self.audio_file))
+
+        self.assertFalse(result.is_successful)
+        self.assertIn("bad request", result.error_message)
+
+
+class SyncOnlyAnalyzer(IAIAnalyzer):
+    """Analyzer implementing only the blocking interface"""
+
+    def analyze_audio(self, audio_file):
+        return AnalysisResult(audio_file, "sync analysis", processing_time=1.0)
+
+    def test_connection(self):
+        return True
+
+
+class TestApplicationAsync(unittest.TestCase):
+    """Test cases for VoiceToTextApplication.process_audio_files_async"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        voice = Path(self.temp_dir.name, "voice")
+        voice.mkdir()
+        for name in ("a.mp3", "b.mp3", "c.mp3", "d.mp3"):
+            Path(voice, name).write_bytes(b"fake audio")
+        self.output = os.path.join(self.temp_dir.name, "results")
+        self.config = ConfigurationService(api_key="test_key", model_name="test")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _app(self, analyzer):
+        return VoiceToTextApplication(
+            audio_service=AudioFileService(self.config),
+            ai_analyzer=analyzer,
+            report_generator=MarkdownReportGenerator(),
+            config_service=self.config,
+        )
+
+    def test_files_are_analyzed_concurrently_up_to_the_limit(self):
+        """Analyses overlap on the loop, capped by max_concurrency"""
+        state = {"in_flight": 0, "peak": 0}
+
+        async def analyze_audio_async(audio_file):
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            await asyncio.sleep(0.01)
+            state["in_flight"] -= 1
+            return AnalysisResult(audio_file, "analysis", processing_time=1.0)
+
+        analyzer = MagicMock()
+        analyzer.analyze_audio_async.side_effect = analyze_audio_async
+        app = self._app(analyzer)
+
+        results = asyncio.run(
+            app.process_audio_files_async(
+                self.temp_dir.name, self.output, max_concurrency=3
+            )
+        )
+
+        self.assertEqual(
+            [r.audio_file.file_name for r in results],
+            ["a.mp3", "b.mp3", "c.mp3", "d.mp3"],
+        )
+        self.assertEqual(state["peak"], 3)
+        self.assertTrue(all(os.path.exists(r.output_file_path) for r in results))
+        self.assertTrue(os.path.exists(os.path.join(self.output, "summary_report.md")))
+        analyzer.analyze_audio.assert_not_called()
+
+    def test_sync_analyzer_runs_through_the_default_executor(self):
+        """Analyzers without an async implementation still work"""
+        app = self._app(SyncOnlyAnalyzer())
+
+        results = asyncio.run(
+            app.process_audio_files_async(self.temp_dir.name, self.output)
+        )
+
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(r.analysis_text == "sync analysis" for r in results))
+
+    def test_probing_and_the_journal_run_off_the_event_loop(self):
+        """Header probing and journal merging do not block the loop thread"""
+        threads = {}
+        app = self._app(SyncOnlyAnalyzer())
+        app._run_journal = RunJournal(os.path.join(self.temp_dir.name, "journal"))
+        schedule, merge = app._schedule, app._merge_journaled
+
+        def recording(name, method):
+            def record(*args):
+                threads[name] = threading.get_ident()
+                return method(*args)
+
+            return record
+
+        app._schedule = recording("schedule", schedule)
+        app._merge_journaled = recording("merge", merge)
+
+        async def run():
+            threads["loop"] = threading.get_ident()
+            return await app.process_audio_files_async(self.temp_dir.name, self.output)
+
+        self.assertEqual(len(asyncio.run(run())), 4)
+        self.assertNotEqual(threads["schedule"], threads["loop"])
+        self.assertNotEqual(threads["merge"], threads["loop"])
+
+    def test_unexpected_errors_do_not_stop_the_batch(self):
+        """An analyzer that raises yields a failed result for that file only"""
+
+        async def analyze_audio_async(audio_file):
+            if audio_file.file_name == "b.mp3":
+                raise RuntimeError("boom")
+            return AnalysisResult(audio_file, "analysis", processing_time=1.0)
+
+        analyzer = MagicMock()
+        analyzer.analyze_audio_async.side_effect = analyze_audio_async
+
+        results = asyncio.run(
+            self._app(analyzer)._analyze_batch_async(
+                [
+                    AudioFile(file_path=name, file_name=name, file_size=1)
+                    for name in ("a.mp3", "b.mp3")
+                ],
+                self.output,
+                2,
+            )
+        )
+
+        self.assertEqual([r.is_successful for r in results], [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,268 @@
+"""
+Unit tests for long-recording chunking
+تست‌های واحد برای تقسیم فایل‌های صوتی طولانی
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+try:
+    from src.models import AudioChunk, AudioFile, AudioMetadata
+    from src.services.audio_chunker import (
+        AudioChunker,
+        merge_chunk_analyses,
+        plan_chunks,
+    )
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.silence_trimmer import write_wav
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AudioChunk, AudioFile, AudioMetadata
+    from src.services.audio_chunker import (
+        AudioChunker,
+        merge_chunk_analyses,
+        plan_chunks,
+    )
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.silence_trimmer import write_wav
+
+SAMPLE_RATE = 16000
+
+
+def speech_with_pauses(talk_seconds, pause_seconds, repeats):
+    """Alternate tone bursts (speech) and near-silence"""
+    rng = np.random.default_rng(0)
+    parts = []
+    for _ in range(repeats):
+        t = np.arange(int(talk_seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        parts.append(0.3 * np.sin(2 * np.pi * 220 * t))
+        parts.append(rng.normal(0, 0.001, int(pause_seconds * SAMPLE_RATE)))
+    return np.concatenate(parts).astype(np.float32)
+
+
+class TestPlanChunks(unittest.TestCase):
+    """Test cases for plan_chunks"""
+
+    def test_cuts_at_the_widest_nearby_pause(self):
+        """Cuts land in pauses near the target length, with overlap"""
+        regions = [(0, 27), (28, 33), (36, 58), (59, 64), (66, 100)]
+
+        chunks = plan_chunks(regions, 100, chunk_seconds=30, overlap_seconds=2)
+
+        self.assertEqual(chunks, [(0.0, 36.5), (34.5, 67.0), (65.0, 100)])
+
+    def test_hard_cut_without_pauses(self):
+        """Continuous speech is cut at the target length"""
+        chunks = plan_chunks([(0, 100)], 100, chunk_seconds=40, overlap_seconds=1)
+
+        self.assertEqual(chunks, [(0.0, 41.0), (40.0, 81.0), (80.0, 100)])
+
+    def test_short_tail_is_merged_into_last_chunk(self):
+        """A remainder under a quarter chunk does not become its own segment"""
+        chunks = plan_chunks([(0, 48)], 48, chunk_seconds=40, overlap_seconds=0)
+
+        self.assertEqual(chunks, [(0.0, 48)])
+
+
+class TestMergeChunkAnalyses(unittest.TestCase):
+    """Test cases for merge_chunk_analyses"""
+
+    def _chunk(self, index, start, end):
+        audio_file = AudioFile(file_path=f"part{index}.wav", file_name="", file_size=1)
+        return AudioChunk(audio_file=audio_file, index=index, start=start, end=end)
+
+    def test_offsets_timestamps_and_drops_overlap_duplicates(self):
+        """Segment timestamps move to the full timeline and repeats are removed"""
+        chunks = [self._chunk(0, 0, 65), self._chunk(1, 60, 120)]
+        texts = [
+            "**[00:00-00:30] مشتری**: سلام\n**[00:58-01:04] اپراتور**: بفرمایید",
+            "**[00:00-00:04] اپراتور**: بفرمایید\n**[00:05-00:20] مشتری**: سوال دارم",
+        ]
+
+        merged = merge_chunk_analyses(chunks, texts)
+
+        self.assertEqual(merged.count("بفرمایید"), 1)
+        self.assertIn("**[00:58-01:04] اپراتور**", merged)
+        self.assertIn("**[01:05-01:20] مشتری**: سوال دارم", merged)
+        self.assertIn("بخش 1 [00:00-01:05]", merged)
+        self.assertIn("بخش 2 [01:00-02:00]", merged)
+
+    def test_repeated_phrase_after_overlap_is_kept(self):
+        """Only lines inside the overlap are compared with the previous segment"""
+        chunks = [self._chunk(0, 0, 65), self._chunk(1, 60, 120)]
+        texts = ["**[00:10-00:12] مشتری**: بله", "**[00:30-00:32] مشتری**: بله"]
+
+        merged = merge_chunk_analyses(chunks, texts)
+
+        self.assertEqual(merged.count("بله"), 2)
+
+
+class TestAudioChunker(unittest.TestCase):
+    """Test cases for AudioChunker"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "chunks")
+        path = os.path.join(self.temp_dir.name, "long.wav")
+        # 30 seconds: 3 s of speech followed by 2 s pauses
+        write_wav(path, speech_with_pauses(3, 2, 6), SAMPLE_RATE)
+        self.audio_file = AudioFile(
+            file_path=path, file_name="long.wav", file_size=os.path.getsize(path)
+        )
+        self.which = patch("src.services.audio_chunker.shutil.which", return_value=None)
+        self.which.start()
+
+    def tearDown(self):
+        self.which.stop()
+        self.temp_dir.cleanup()
+
+    def _chunker(self, **options):
+        options.setdefault("chunk_seconds", 10)
+        options.setdefault("overlap_seconds", 0.5)
+        return AudioChunker(self.cache_dir, **options)
+
+    def test_splits_long_recording_into_segment_files(self):
+        """Segments cover the whole recording and are written as WAV files"""
+        chunks = self._chunker().split(self.audio_file)
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(chunks[0].start, 0)
+        self.assertAlmostEqual(chunks[-1].end, 30, delta=0.1)
+        for previous, following in zip(chunks, chunks[1:]):
+            self.assertAlmostEqual(previous.end - following.start, 0.5)
+        for chunk in chunks:
+            self.assertTrue(os.path.exists(chunk.audio_file.file_path))
+            self.assertEqual(
+                chunk.audio_file.file_name, f"long_part{chunk.index + 1}.wav"
+            )
+
+    def test_segments_do_not_multiply_the_upload_size(self):
+        """Together the segments are no larger than the source plus overlaps"""
+        chunks = self._chunker().split(self.audio_file)
+
+        overlap_bytes = (len(chunks) - 1) * 0.5 * SAMPLE_RATE * 2
+        total = sum(chunk.audio_file.file_size for chunk in chunks)
+        self.assertLessEqual(total, self.audio_file.file_size + overlap_bytes + 1000)
+
+    def test_segments_are_encoded_with_ffmpeg(self):
+        """With ffmpeg each segment is uploaded as compact Opus"""
+        commands = []
+
+        def fake_run(command, check=True, capture_output=True):
+            commands.append(command)
+            with open(command[-1], "wb") as f:
+                f.write(b"o" * 100)
+
+        chunker = self._chunker(ffmpeg_path="ffmpeg")
+        samples = speech_with_pauses(3, 2, 6)
+        with patch(
+            "src.services.audio_chunker.decode_audio",
+            return_value=(samples, SAMPLE_RATE),
+        ), patch("src.services.audio_preprocessor.subprocess.run", fake_run):
+            chunks = chunker.split(self.audio_file)
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(len(commands), 3)
+        for chunk in chunks:
+            self.assertTrue(chunk.audio_file.file_path.endswith(".ogg"))
+            self.assertEqual(chunk.audio_file.file_size, 100)
+        self.assertLess(
+            sum(chunk.audio_file.file_size for chunk in chunks),
+            self.audio_file.file_size,
+        )
+        self.assertFalse(
+            any(name.endswith(".tmp.wav") for name in os.listdir(self.cache_dir))
+        )
+
+    def test_short_recording_is_not_split(self):
+        """Recordings under 1.5 chunks are analyzed whole"""
+        self.assertEqual(self._chunker(chunk_seconds=25).split(self.audio_file), [])
+
+    def test_known_short_duration_skips_decoding(self):
+        """A known duration rules a file out without reading it"""
+        audio_file = AudioFile(file_path="missing.mp3", file_name="", duration=5)
+
+        with patch("src.services.audio_chunker.decode_audio") as decode:
+            self.assertEqual(self._chunker().split(audio_file), [])
+
+        decode.assert_not_called()
+
+    def test_header_duration_rules_out_short_compressed_files(self):
+        """A large file the header shows to be short is never decoded"""
+        path = os.path.join(self.temp_dir.name, "short.mp3")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 100_000)
+        audio_file = AudioFile(file_path=path, file_name="short.mp3", file_size=100_000)
+        prober = MagicMock()
+        prober.probe.return_value = AudioMetadata(duration=5)
+
+        with patch("src.services.audio_chunker.decode_audio") as decode:
+            chunks = self._chunker(metadata_prober=prober).split(audio_file)
+
+        self.assertEqual(chunks, [])
+        decode.assert_not_called()
+        prober.probe.assert_called_once_with(path)
+
+    def test_unsplittable_file_is_not_decoded_again(self):
+        """A file that cannot be decoded is remembered under its hash"""
+        with patch(
+            "src.services.audio_chunker.decode_audio", side_effect=OSError("no ffmpeg")
+        ), patch("builtins.print") as first_print:
+            self.assertEqual(self._chunker().split(self.audio_file), [])
+
+        with patch("src.services.audio_chunker.decode_audio") as decode, patch(
+            "builtins.print"
+        ) as second_print:
+            self.assertEqual(self._chunker().split(self.audio_file), [])
+
+        first_print.assert_called_once()
+        decode.assert_not_called()
+        second_print.assert_not_called()
+
+    def test_split_plan_is_cached(self):
+        """A second chunker reuses the segment files"""
+        first = self._chunker().split(self.audio_file)
+
+        with patch("src.services.audio_chunker.decode_audio") as decode:
+            second = self._chunker().split(self.audio_file)
+
+        decode.assert_not_called()
+        self.assertEqual(
+            [c.audio_file.file_path for c in first],
+            [c.audio_file.file_path for c in second],
+        )
+
+    @patch("src.services.gemini_analyzer.genai")
+    def test_analyzer_analyzes_segments_and_stitches_them(self, mock_genai):
+        """Each segment is uploaded and analyzed, then merged into one result"""
+        analyzer = GeminiAnalyzer(
+            ConfigurationService(api_key="test_key", model_name="model"),
+            PersianPromptProvider(),
+            chunker=self._chunker(),
+        )
+        analyzer._client = MagicMock()
+        model = analyzer._client.GenerativeModel.return_value
+        model.generate_content.return_value = MagicMock(
+            text="**[00:01-00:02] مشتری**: سلام"
+        )
+
+        result = analyzer.analyze_audio(self.audio_file)
+
+        self.assertTrue(result.is_successful)
+        self.assertEqual(analyzer._client.upload_file.call_count, 3)
+        self.assertEqual(result.analysis_text.count("🧩 بخش"), 3)
+        self.assertIn("**[00:01-00:02] مشتری**", result.analysis_text)
+
+
+if __name__ == "__main__":
+    unittest.main()
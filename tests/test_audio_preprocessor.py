@@ -0,0 +1,152 @@
+"""
+Unit tests for the audio pre-processor
+تست‌های واحد برای پیش‌پردازشگر صدا
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+try:
+    from src.models import AudioFile
+    from src.services.audio_preprocessor import AudioPreprocessor
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AudioFile
+    from src.services.audio_preprocessor import AudioPreprocessor
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+
+
+class FakeFfmpeg:
+    """Replacement for subprocess.run that writes a converted file"""
+
+    def __init__(self, output_size=10, fail=False):
+        self.output_size = output_size
+        self.fail = fail
+        self.commands = []
+
+    def __call__(self, command, check=True, capture_output=True):
+        self.commands.append(command)
+        if self.fail:
+            raise subprocess.CalledProcessError(1, command)
+        Path(command[-1]).write_bytes(b"o" * self.output_size)
+
+
+class TestAudioPreprocessor(unittest.TestCase):
+    """Test cases for AudioPreprocessor"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "preprocessed")
+        source = Path(self.temp_dir.name, "meeting.wav")
+        source.write_bytes(b"w" * 1000)
+        self.audio_file = AudioFile(
+            file_path=str(source), file_name="meeting.wav", file_size=1000
+        )
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        self.temp_dir.cleanup()
+
+    def _preprocessor(self, ffmpeg_path="ffmpeg"):
+        return AudioPreprocessor(
+            self.cache_dir, ffmpeg_path=ffmpeg_path, executor=self.executor
+        )
+
+    def test_converts_to_16khz_mono_opus(self):
+        """The upload path points at a smaller converted file"""
+        fake = FakeFfmpeg(output_size=50)
+        with patch("src.services.audio_preprocessor.subprocess.run", fake):
+            path = self._preprocessor().prepare(self.audio_file)
+
+        self.assertTrue(path.startswith(self.cache_dir))
+        self.assertTrue(path.endswith(".ogg"))
+        self.assertEqual(os.path.getsize(path), 50)
+        command = fake.commands[0]
+        self.assertEqual(command[command.index("-ar") + 1], "16000")
+        self.assertEqual(command[command.index("-ac") + 1], "1")
+        self.assertEqual(command[command.index("-c:a") + 1], "libopus")
+
+    def test_conversion_is_cached_by_source_hash(self):
+        """A second preprocessor reuses the converted file"""
+        fake = FakeFfmpeg()
+        with patch("src.services.audio_preprocessor.subprocess.run", fake):
+            first = self._preprocessor().prepare(self.audio_file)
+            preprocessor = self._preprocessor()
+            second = preprocessor.prepare(self.audio_file)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(fake.commands), 1)
+        self.assertEqual(preprocessor.get_stats()["reused"], 1)
+
+    def test_prefetch_starts_conversion_once(self):
+        """Prefetched files are not converted again when prepared"""
+        fake = FakeFfmpeg()
+        with patch("src.services.audio_preprocessor.subprocess.run", fake):
+            preprocessor = self._preprocessor()
+            preprocessor.prefetch([self.audio_file])
+            preprocessor.prepare(self.audio_file)
+
+        self.assertEqual(len(fake.commands), 1)
+
+    def test_larger_output_keeps_the_original(self):
+        """An already compact file is uploaded unchanged"""
+        with patch(
+            "src.services.audio_preprocessor.subprocess.run",
+            FakeFfmpeg(output_size=5000),
+        ):
+            path = self._preprocessor().prepare(self.audio_file)
+
+        self.assertEqual(path, self.audio_file.file_path)
+
+    def test_failed_conversion_falls_back_to_original(self):
+        """A conversion error does not fail the analysis"""
+        with patch(
+            "src.services.audio_preprocessor.subprocess.run", FakeFfmpeg(fail=True)
+        ):
+            path = self._preprocessor().prepare(self.audio_file)
+
+        self.assertEqual(path, self.audio_file.file_path)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_missing_ffmpeg_disables_conversion(self):
+        """Without ffmpeg the original file is used"""
+        with patch("src.services.audio_preprocessor.shutil.which", return_value=None):
+            preprocessor = AudioPreprocessor(self.cache_dir, executor=self.executor)
+
+        self.assertFalse(preprocessor.is_available)
+        self.assertEqual(
+            preprocessor.prepare(self.audio_file), self.audio_file.file_path
+        )
+
+    @patch("src.services.gemini_analyzer.genai")
+    def test_analyzer_uploads_converted_file(self, mock_genai):
+        """GeminiAnalyzer uploads the pre-processed audio"""
+        analyzer = GeminiAnalyzer(
+            ConfigurationService(api_key="test_key", model_name="model"),
+            PersianPromptProvider(),
+            preprocessor=self._preprocessor(),
+        )
+        analyzer._client = MagicMock()
+
+        with patch("src.services.audio_preprocessor.subprocess.run", FakeFfmpeg()):
+            analyzer._upload_file(self.audio_file)
+
+        uploaded_path = analyzer._client.upload_file.call_args[0][0]
+        self.assertTrue(uploaded_path.endswith(".ogg"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+"""
+Unit tests for header-only audio metadata probing
+تست‌های واحد برای خواندن فراداده صوتی از سرآیند فایل
+"""
+
+import os
+import struct
+import sys
+import tempfile
+import unittest
+import wave
+
+try:
+    from src.services.audio_file_service import AudioFileService
+    from src.services.audio_prober import AudioMetadataProber
+    from src.services.configuration_service import ConfigurationService
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.services.audio_file_service import AudioFileService
+    from src.services.audio_prober import AudioMetadataProber
+    from src.services.configuration_service import ConfigurationService
+
+# 44100 as an 80-bit IEEE 754 extended float
+AIFF_RATE_44100 = b"\x40\x0e\xac\x44\x00\x00\x00\x00\x00\x00"
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, joint stereo: 417-byte frames
+MP3_FRAME_HEADER = b"\xff\xfb\x90\x64"
+MP3_FRAME_LENGTH = 417
+
+
+def box(box_type, body):
+    """Build an MP4 box"""
+    return struct.pack(">I4s", 8 + len(body), box_type) + body
+
+
+def iff_chunk(chunk_id, body):
+    """Build a big-endian IFF chunk"""
+    return struct.pack(">4sI", chunk_id, len(body)) + body
+
+
+def ogg_page(granule, packet, header_type=0):
+    """Build a single-segment Ogg page"""
+    return (
+        b"OggS"
+        + struct.pack("<BBqIII", 0, header_type, granule, 1, 0, 0)
+        + bytes([1, len(packet)])
+        + packet
+    )
+
+
+class TestAudioMetadataProber(unittest.TestCase):
+    """Test cases for AudioMetadataProber"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.prober = AudioMetadataProber()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _probe(self, name, data):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return self.prober.probe(path)
+
+    def test_wav(self):
+        """WAV duration comes from the data chunk size and byte rate"""
+        path = os.path.join(self.temp_dir.name, "call.wav")
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(8000)
+            wav.writeframes(b"\x00" * 8000 * 4 * 3)
+
+        metadata = self.prober.probe(path)
+
+        self.assertAlmostEqual(metadata.duration, 3.0)
+        self.assertEqual((metadata.sample_rate, metadata.channels), (8000, 2))
+
+    def test_aiff(self):
+        """AIFF duration comes from the COMM frame count and sample rate"""
+        comm = struct.pack(">hIh", 1, 88200, 16) + AIFF_RATE_44100
+        data = iff_chunk(b"COMM", comm) + iff_chunk(b"SSND", b"\x00" * 8)
+        header = b"FORM" + struct.pack(">I", 4 + len(data)) + b"AIFF"
+
+        metadata = self._probe("call.aiff", header + data)
+
+        self.assertAlmostEqual(metadata.duration, 2.0)
+        self.assertEqual((metadata.sample_rate, metadata.channels), (44100, 1))
+
+    def test_flac(self):
+        """FLAC duration comes from the STREAMINFO sample count"""
+        packed = (48000 << 44) | (1 << 41) | (15 << 36) | (48000 * 5)
+        streaminfo = b"\x10\x00\x10\x00" + b"\x00" * 6 + packed.to_bytes(8, "big")
+        block = bytes([0x80]) + len(streaminfo + b"\x00" * 16).to_bytes(3, "big")
+
+        metadata = self._probe("call.flac", b"fLaC" + block + streaminfo + b"\x00" * 16)
+
+        self.assertAlmostEqual(metadata.duration, 5.0)
+        self.assertEqual((metadata.sample_rate, metadata.channels), (48000, 2))
+
+    def test_ogg_opus(self):
+        """Opus duration is the last granule position at 48 kHz minus pre-skip"""
+        head = b"OpusHead" + struct.pack("<BBHIhB", 1, 1, 312, 16000, 0, 0)
+        data = (
+            ogg_page(0, head, header_type=2)
+            + ogg_page(-1, b"\x00" * 50)
+            + ogg_page(48000 * 4 + 312, b"\x00" * 50, header_type=4)
+        )
+
+        metadata = self._probe("call.ogg", data)
+
+        self.assertAlmostEqual(metadata.duration, 4.0)
+        self.assertEqual((metadata.sample_rate, metadata.channels), (16000, 1))
+
+    def test_ogg_vorbis(self):
+        """Vorbis granule positions count samples at the stream rate"""
+        head = b"\x01vorbis" + struct.pack("<IBIiii", 0, 2, 22050, 0, 0, 0) + b"\x01"
+        data = ogg_page(0, head, header_type=2) + ogg_page(22050 * 7, b"\x00" * 50)
+
+        metadata = self._probe("call.ogg", data)
+
+        self.assertAlmostEqual(metadata.duration, 7.0)
+        self.assertEqual((metadata.sample_rate, metadata.channels), (22050, 2))
+
+    def test_mp4(self):
+        """M4A duration comes from mvhd and the format from the mp4a entry"""
+        mvhd = box(b"mvhd", struct.pack(">B3xIIII", 0, 0, 0, 1000, 4500) + b"\0" * 80)
+        hdlr = box(b"hdlr", struct.pack(">I4s4s", 0, b"\0\0\0\0", b"soun") + b"\0" * 13)
+        mp4a = box(
+            b"mp4a",
+            b"\0" * 6
+            + b"\0\x01"
+            + b"\0" * 8
+            + struct.pack(">HHII", 1, 16, 0, 44100 << 16),
+        )
+        stsd = box(b"stsd", struct.pack(">II", 0, 1) + mp4a)
+        trak = box(b"trak", box(b"mdia", hdlr + box(b"minf", box(b"stbl", stsd))))
+        data = (
+            box(b"ftyp", b"M4A \0\0\0\0")
+            + box(b"mdat", b"\0" * 100)
+            + box(b"moov", mvhd + trak)
+        )
+
+        metadata = self._probe("call.m4a", data)
+
+        self.assertAlmostEqual(metadata.duration, 4.5)
+        self.assertEqual((metadata.sample_rate, metadata.channels), (44100, 1))
+
+    def test_constant_bitrate_mp3(self):
+        """CBR MP3 duration is the audio size over the bitrate, after the ID3 tag"""
+        frame = MP3_FRAME_HEADER + b"\x00" * (MP3_FRAME_LENGTH - 4)
+        id3 = b"ID3\x04\x00\x00" + bytes([0, 0, 1, 0]) + b"\x00" * 128
+
+        metadata = self._probe("call.mp3", id3 + frame * 100)
+
+        self.assertAlmostEqual(metadata.duration, 100 * MP3_FRAME_LENGTH * 8 / 128000)
+        self.assertEqual((metadata.sample_rate, metadata.channels), (44100, 2))
+
+    def test_xing_mp3(self):
+        """VBR MP3 duration comes from the Xing frame count"""
+        xing = b"Xing" + struct.pack(">II", 1, 200)
+        first = MP3_FRAME_HEADER + b"\x00" * 32 + xing
+        first += b"\x00" * (MP3_FRAME_LENGTH - len(first))
+
+        metadata = self._probe("call.mp3", first + b"\x00" * 1000)
+
+        self.assertAlmostEqual(metadata.duration, 200 * 1152 / 44100)
+
+    def test_unrecognized_and_missing_files(self):
+        """Files that are not audio, or do not exist, give None"""
+        self.assertIsNone(self._probe("notes.mp3", b"just some text"))
+        self.assertIsNone(self.prober.probe(os.path.join(self.temp_dir.name, "no")))
+
+    def test_audio_file_service_probes_on_demand(self):
+        """Listings skip file headers; probe_metadata fills them in"""
+        path = os.path.join(self.temp_dir.name, "call.wav")
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes(b"\x00" * 16000 * 2 * 2)
+        service = AudioFileService(ConfigurationService(api_key="test_key"))
+
+        (audio_file,) = service.find_audio_files(self.temp_dir.name)
+        self.assertIsNone(audio_file.duration)
+
+        service.probe_metadata([audio_file])
+
+        self.assertAlmostEqual(audio_file.duration, 2.0)
+        self.assertEqual((audio_file.sample_rate, audio_file.channels), (16000, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
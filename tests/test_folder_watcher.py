@@ -0,0 +1,247 @@
+"""
+Unit tests for the folder watcher
+تست‌های واحد برای سرویس پایش پوشه
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+try:
+    from src.application import VoiceToTextApplication
+    from src.models import AnalysisResult
+    from src.services.audio_file_service import AudioFileService
+    from src.services.configuration_service import ConfigurationService
+    from src.services.folder_watcher import FolderWatcher
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.application import VoiceToTextApplication
+    from src.models import AnalysisResult
+    from src.services.audio_file_service import AudioFileService
+    from src.services.configuration_service import ConfigurationService
+    from src.services.folder_watcher import FolderWatcher
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestFolderWatcherPolling(unittest.TestCase):
+    """Test cases for FolderWatcher in polling mode"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.folder = Path(self.temp_dir.name)
+        Path(self.folder, "old.mp3").write_bytes(b"old")
+        self.service = AudioFileService(ConfigurationService(api_key="k"))
+        self.clock = FakeClock()
+        self.watcher = FolderWatcher(
+            self.service,
+            str(self.folder),
+            settle_seconds=3,
+            use_inotify=False,
+            clock=self.clock,
+        )
+
+    def tearDown(self):
+        self.watcher.close()
+        self.temp_dir.cleanup()
+
+    def test_existing_files_are_not_reported(self):
+        """Files present before watching started are ignored"""
+        existing = self.watcher.mark_existing()
+        self.clock.now = 10
+
+        self.assertEqual([af.file_name for af in existing], ["old.mp3"])
+        self.assertEqual(self.watcher.poll(timeout=0), [])
+
+    def test_new_file_is_reported_once_settled(self):
+        """A new file is reported after it stops changing for settle_seconds"""
+        self.watcher.mark_existing()
+        Path(self.folder, "new.mp3").write_bytes(b"audio")
+
+        self.assertEqual(self.watcher.poll(timeout=0), [])
+        self.clock.now = 1
+        self.assertEqual(self.watcher.poll(timeout=0), [])
+        self.clock.now = 4
+        ready = self.watcher.poll(timeout=0)
+        self.clock.now = 10
+
+        self.assertEqual([af.file_name for af in ready], ["new.mp3"])
+        self.assertEqual(ready[0].file_size, 5)
+        self.assertEqual(self.watcher.poll(timeout=0), [])
+
+    def test_growing_file_is_debounced(self):
+        """A file that is still being written is held back"""
+        self.watcher.mark_existing()
+        path = Path(self.folder, "recording.wav")
+        path.write_bytes(b"a")
+        self.watcher.poll(timeout=0)
+
+        for step in range(1, 5):
+            self.clock.now = step * 2
+            path.write_bytes(b"a" * (step + 1))
+            self.assertEqual(self.watcher.poll(timeout=0), [])
+
+        self.clock.now = 20
+        ready = self.watcher.poll(timeout=0)
+        self.assertEqual([af.file_name for af in ready], ["recording.wav"])
+
+    def test_unsupported_and_empty_files_are_ignored(self):
+        """Text files and zero-byte placeholders are never reported"""
+        self.watcher.mark_existing()
+        Path(self.folder, "notes.txt").write_bytes(b"text")
+        Path(self.folder, "placeholder.mp3").touch()
+
+        self.watcher.poll(timeout=0)
+        self.clock.now = 10
+
+        self.assertEqual(self.watcher.poll(timeout=0), [])
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+class TestFolderWatcherInotify(unittest.TestCase):
+    """Test cases for FolderWatcher with inotify"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.folder = Path(self.temp_dir.name)
+        self.service = AudioFileService(ConfigurationService(api_key="k"))
+        self.watcher = FolderWatcher(self.service, str(self.folder), settle_seconds=0)
+        if not self.watcher.uses_inotify:
+            self.skipTest("inotify is not available")
+
+    def tearDown(self):
+        self.watcher.close()
+        self.temp_dir.cleanup()
+
+    def _poll_until_ready(self):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            ready = self.watcher.poll(timeout=0.1)
+            if ready:
+                return ready
+        return []
+
+    def test_new_file_is_reported(self):
+        """A file written into the folder is picked up from inotify events"""
+        Path(self.folder, "call.mp3").write_bytes(b"audio")
+
+        ready = self._poll_until_ready()
+
+        self.assertEqual([af.file_name for af in ready], ["call.mp3"])
+
+    def test_recreated_file_is_reported_again(self):
+        """A file deleted and written again at the same path is new"""
+        path = Path(self.folder, "call.mp3")
+        path.write_bytes(b"audio")
+        self.assertEqual(len(self._poll_until_ready()), 1)
+
+        path.unlink()
+        self.watcher.poll(timeout=0.1)
+        path.write_bytes(b"new audio")
+
+        ready = self._poll_until_ready()
+
+        self.assertEqual([af.file_name for af in ready], ["call.mp3"])
+        self.assertEqual(ready[0].file_size, len(b"new audio"))
+
+    def test_file_moved_back_into_the_folder_is_reported(self):
+        """Moving a known file out and back in reports it again"""
+        path = Path(self.folder, "call.mp3")
+        path.write_bytes(b"audio")
+        self.assertEqual(len(self._poll_until_ready()), 1)
+        outside = tempfile.TemporaryDirectory()
+        self.addCleanup(outside.cleanup)
+
+        os.replace(path, Path(outside.name, "call.mp3"))
+        self.watcher.poll(timeout=0.1)
+        os.replace(Path(outside.name, "call.mp3"), path)
+
+        ready = self._poll_until_ready()
+
+        self.assertEqual([af.file_name for af in ready], ["call.mp3"])
+
+    def test_file_in_new_subfolder_is_reported(self):
+        """Folders created after watching started are watched too"""
+        nested = Path(self.folder, "2024", "05")
+        nested.mkdir(parents=True)
+        Path(nested, "call.ogg").write_bytes(b"audio")
+
+        ready = self._poll_until_ready()
+
+        self.assertEqual([af.file_name for af in ready], ["call.ogg"])
+
+
+class TestWatchAudioFiles(unittest.TestCase):
+    """Test cases for VoiceToTextApplication.watch_audio_files"""
+
+    def test_new_recordings_are_analyzed_while_watching(self):
+        """Existing files are processed first, then new arrivals"""
+        with tempfile.TemporaryDirectory() as assets:
+            voice = Path(assets, "voice")
+            voice.mkdir()
+            Path(voice, "existing.mp3").write_bytes(b"audio")
+
+            config = ConfigurationService(api_key="k")
+            analyzer = MagicMock()
+            analyzer.analyze_audio.side_effect = lambda audio_file: AnalysisResult(
+                audio_file=audio_file, analysis_text="ok", processing_time=0.1
+            )
+            report_generator = MagicMock()
+            app = VoiceToTextApplication(
+                audio_service=AudioFileService(config),
+                ai_analyzer=analyzer,
+                report_generator=report_generator,
+                config_service=config,
+            )
+            stop_event = threading.Event()
+            watched = []
+
+            def run():
+                watched.extend(
+                    app.watch_audio_files(
+                        assets,
+                        assets,
+                        poll_interval=0.05,
+                        settle_seconds=0.1,
+                        stop_event=stop_event,
+                    )
+                )
+
+            thread = threading.Thread(target=run)
+            thread.start()
+            try:
+                deadline = time.monotonic() + 5
+                while analyzer.analyze_audio.call_count < 1:
+                    self.assertLess(time.monotonic(), deadline)
+                    time.sleep(0.02)
+                Path(voice, "arrived.mp3").write_bytes(b"audio")
+                while analyzer.analyze_audio.call_count < 2:
+                    self.assertLess(time.monotonic(), deadline)
+                    time.sleep(0.02)
+            finally:
+                stop_event.set()
+                thread.join(5)
+
+            self.assertEqual(
+                [r.file_name for r in watched], ["existing.mp3", "arrived.mp3"]
+            )
+            # Results still buffered by the report generator are written
+            report_generator.close.assert_called_once_with()
+
+
+if __name__ == "__main__":
+    unittest.main()
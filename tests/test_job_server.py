@@ -0,0 +1,338 @@
+"""
+Unit tests for the job queue and HTTP job server
+تست‌های واحد برای صف کارها و سرور HTTP
+"""
+
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+try:
+    from src.models import AnalysisResult, AudioFile, Job
+    from src.services.job_queue import JobQueue
+    from src.services.job_server import JobServer
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AnalysisResult, AudioFile, Job
+    from src.services.job_queue import JobQueue
+    from src.services.job_server import JobServer
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll ``condition`` until it is true or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test cases for JobQueue"""
+
+    def _job(self, job_id, path="call.mp3"):
+        return Job(id=job_id, file_path=path, file_name=os.path.basename(path))
+
+    def _result(self, job, success=True):
+        audio_file = AudioFile(file_path=job.file_path, file_name=job.file_name)
+        return AnalysisResult(
+            audio_file,
+            "analysis" if success else "",
+            success=success,
+            error_message=None if success else "bad audio",
+            processing_time=1.0,
+        )
+
+    def test_jobs_are_processed_by_workers(self):
+        """Submitted jobs run on the pool and record their outcome"""
+        job_queue = JobQueue(
+            lambda job: self._result(job, success=job.id == "ok"), workers=2
+        )
+        job_queue.start()
+        ok = job_queue.submit(self._job("ok"))
+        bad = job_queue.submit(self._job("bad"))
+
+        self.assertTrue(wait_for(lambda: ok.is_finished and bad.is_finished))
+        job_queue.stop()
+
+        self.assertEqual((ok.status, bad.status), ("succeeded", "failed"))
+        stats = job_queue.get_stats()
+        self.assertEqual((stats["succeeded"], stats["failed"]), (1, 1))
+        self.assertEqual(stats["running"], 0)
+
+    def test_full_queue_rejects_submissions(self):
+        """Submissions beyond max_queued raise queue.Full without blocking"""
+        job_queue = JobQueue(self._result, max_queued=2)
+
+        job_queue.submit(self._job("a"))
+        job_queue.submit(self._job("b"))
+        with self.assertRaises(queue.Full):
+            job_queue.submit(self._job("c"))
+
+        self.assertIsNone(job_queue.get("c"))
+        self.assertEqual(job_queue.get_stats()["rejected"], 1)
+
+    def test_exceptions_fail_the_job(self):
+        """A processing error marks the job failed instead of killing a worker"""
+
+        def process(job):
+            if job.id == "boom":
+                raise RuntimeError("boom")
+            return self._result(job)
+
+        job_queue = JobQueue(process)
+        job_queue.start()
+        failed = job_queue.submit(self._job("boom"))
+        after = job_queue.submit(self._job("after"))
+
+        self.assertTrue(wait_for(lambda: after.is_finished))
+        job_queue.stop()
+
+        self.assertEqual(failed.status, "failed")
+        self.assertIn("boom", failed.result.error_message)
+        self.assertEqual(after.status, "succeeded")
+
+    def test_old_finished_jobs_are_forgotten(self):
+        """Only max_retained finished jobs are kept for lookup"""
+        job_queue = JobQueue(self._result, max_retained=2)
+        job_queue.start()
+        jobs = [job_queue.submit(self._job(str(i))) for i in range(4)]
+
+        self.assertTrue(wait_for(lambda: all(job.is_finished for job in jobs)))
+        job_queue.stop()
+
+        self.assertEqual(
+            [job_queue.get(job.id) is not None for job in jobs],
+            [False, False, True, True],
+        )
+
+    def test_uploaded_files_are_removed(self):
+        """Audio uploaded for a job is deleted with its folder afterwards"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            folder = os.path.join(temp_dir, "job")
+            os.mkdir(folder)
+            path = os.path.join(folder, "call.mp3")
+            Path(path).write_bytes(b"audio")
+            job_queue = JobQueue(self._result)
+            job_queue.start()
+            job = self._job("upload", path)
+            job.remove_file = True
+            job_queue.submit(job)
+
+            self.assertTrue(wait_for(lambda: job.is_finished))
+            job_queue.stop()
+
+            self.assertFalse(os.path.exists(folder))
+
+
+class FakeApplication:
+    """Application stand-in that writes a report per analyzed file"""
+
+    def __init__(self):
+        # Cleared by tests that need jobs to stay running
+        self.release = threading.Event()
+        self.release.set()
+        self.analyzed = []
+        self.closed = False
+
+    def is_supported_file(self, file_path):
+        return file_path.endswith(".mp3")
+
+    def process_audio_file(self, file_path, output_folder):
+        self.release.wait(5)
+        self.analyzed.append((file_path, Path(file_path).read_bytes()))
+        audio_file = AudioFile(file_path=file_path, file_name=Path(file_path).name)
+        os.makedirs(output_folder, exist_ok=True)
+        report = os.path.join(output_folder, "report.md")
+        Path(report).write_text("# تحلیل", encoding="utf-8")
+        return AnalysisResult(
+            audio_file, "analysis", processing_time=1.0, output_file_path=report
+        )
+
+    def get_service_stats(self):
+        return {"rate_limit": None, "cache": None, "preprocessing": None}
+
+    def close(self):
+        self.closed = True
+
+
+class TestJobServer(unittest.TestCase):
+    """Test cases for the HTTP endpoints of JobServer"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.assets = os.path.join(self.temp_dir.name, "assets")
+        os.makedirs(os.path.join(self.assets, "voice"))
+        self.application = FakeApplication()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.temp_dir.cleanup()
+
+    def _start(self, **options):
+        self.server = JobServer(
+            self.application,
+            host="127.0.0.1",
+            port=0,
+            upload_folder=os.path.join(self.temp_dir.name, "uploads"),
+            output_folder=os.path.join(self.temp_dir.name, "results"),
+            allowed_folder=self.assets,
+            **options,
+        )
+        self.server.start()
+        host, port = self.server.server_address
+        self.base_url = f"http://{host}:{port}"
+
+    def _request(self, path, data=None, headers=None):
+        request = urllib.request.Request(
+            self.base_url + path, data=data, headers=headers or {}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+    def _json(self, path, data=None, headers=None):
+        status, headers, body = self._request(path, data, headers)
+        return status, json.loads(body)
+
+    def _wait_finished(self, job_id):
+        return wait_for(
+            lambda: self._json(f"/jobs/{job_id}")[1]["status"]
+            in ("succeeded", "failed")
+        )
+
+    def test_upload_and_fetch_results(self):
+        """An uploaded recording is analyzed and its report can be fetched"""
+        self._start()
+
+        status, job = self._json("/jobs?filename=call.mp3", data=b"fake audio")
+
+        self.assertEqual(status, 202)
+        self.assertTrue(self._wait_finished(job["id"]))
+        self.assertEqual(self.application.analyzed[0][1], b"fake audio")
+
+        status, data = self._json(f"/jobs/{job['id']}/result")
+        self.assertEqual(status, 200)
+        self.assertEqual(data["result"]["analysis_text"], "analysis")
+
+        status, headers, body = self._request(f"/jobs/{job['id']}/result?format=md")
+        self.assertEqual(status, 200)
+        self.assertTrue(headers["Content-Type"].startswith("text/markdown"))
+        self.assertEqual(body.decode("utf-8"), "# تحلیل")
+        self.assertEqual(os.listdir(os.path.join(self.temp_dir.name, "uploads")), [])
+
+    def test_deleted_report_returns_404(self):
+        """A report removed from disk is reported as missing, not a crash"""
+        self._start()
+        status, job = self._json("/jobs?filename=call.mp3", data=b"fake audio")
+        self.assertTrue(self._wait_finished(job["id"]))
+        os.remove(self.server.job_queue.get(job["id"]).result.output_file_path)
+
+        status, data = self._json(f"/jobs/{job['id']}/result?format=md")
+
+        self.assertEqual(status, 404)
+        self.assertEqual(data, {"error": "report not found"})
+
+    def test_listens_on_loopback_by_default(self):
+        """Without an explicit host the API is not exposed to the network"""
+        self.server = JobServer(
+            self.application,
+            port=0,
+            upload_folder=os.path.join(self.temp_dir.name, "uploads"),
+            output_folder=os.path.join(self.temp_dir.name, "results"),
+        )
+        self.server.start()
+
+        self.assertEqual(self.server.server_address[0], "127.0.0.1")
+
+    def test_submit_by_path(self):
+        """Files inside the allowed folder can be submitted by path"""
+        path = os.path.join(self.assets, "voice", "call.mp3")
+        Path(path).write_bytes(b"audio")
+        self._start()
+
+        status, job = self._json(
+            "/jobs",
+            data=json.dumps({"path": path}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+
+        self.assertEqual(status, 202)
+        self.assertTrue(self._wait_finished(job["id"]))
+        self.assertTrue(os.path.exists(path))
+
+    def test_paths_outside_the_allowed_folder_are_refused(self):
+        """Submitting by path cannot reach arbitrary files on the server"""
+        outside = os.path.join(self.temp_dir.name, "secret.mp3")
+        Path(outside).write_bytes(b"audio")
+        self._start()
+
+        status, _ = self._json(
+            "/jobs",
+            data=json.dumps({"path": outside}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+
+        self.assertEqual(status, 403)
+
+    def test_invalid_submissions(self):
+        """Unsupported formats and oversized uploads are rejected"""
+        self._start(max_upload_mb=0.001)
+
+        self.assertEqual(self._json("/jobs?filename=notes.txt", b"x")[0], 400)
+        self.assertEqual(self._json("/jobs?filename=a.mp3", b"x" * 2048)[0], 413)
+        self.assertEqual(self._json("/jobs/unknown")[0], 404)
+
+    def test_full_queue_returns_503(self):
+        """Back-pressure is reported with 503 and Retry-After"""
+        self.application.release.clear()
+        self._start(workers=1, max_queued=1)
+
+        first = self._json("/jobs?filename=a.mp3", b"a")[1]
+        self.assertTrue(
+            wait_for(
+                lambda: self._json(f"/jobs/{first['id']}")[1]["status"] == "running"
+            )
+        )
+        self.assertEqual(self._json("/jobs?filename=b.mp3", b"b")[0], 202)
+        status, headers, _ = self._request("/jobs?filename=c.mp3", b"c")
+        self.assertEqual(status, 503)
+        self.assertEqual(headers["Retry-After"], "5")
+
+        result_status, _ = self._json(f"/jobs/{first['id']}/result")
+        self.assertEqual(result_status, 409)
+        self.application.release.set()
+
+    def test_health_and_metrics(self):
+        """Health and metrics endpoints report the server state"""
+        self._start(workers=3)
+
+        self.assertEqual(self._json("/health"), (200, {"status": "ok"}))
+        status, metrics = self._json("/metrics")
+        self.assertEqual(status, 200)
+        self.assertEqual(metrics["jobs"]["workers"], 3)
+        self.assertIn("rate_limit", metrics)
+
+    def test_shutdown_closes_the_application(self):
+        """Buffered results are written when the server stops"""
+        self._start()
+
+        self.server.shutdown()
+
+        self.assertTrue(self.application.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,239 @@
+"""
+Unit tests for the persistent job queue and worker processes
+تست‌های واحد برای صف ماندگار کارها و فرآیندهای پردازشگر
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from functools import partial
+from pathlib import Path
+
+try:
+    from src.models import AnalysisResult, AudioFile
+    from src.services.persistent_queue import PersistentJobQueue
+    from src.services.worker_pool import WorkerPool, run_worker
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AnalysisResult, AudioFile
+    from src.services.persistent_queue import PersistentJobQueue
+    from src.services.worker_pool import WorkerPool, run_worker
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_result(file_path, success=True):
+    audio_file = AudioFile(file_path=file_path, file_name=os.path.basename(file_path))
+    return AnalysisResult(
+        audio_file,
+        f"analysis of {audio_file.file_name}" if success else "",
+        success=success,
+        error_message=None if success else "bad audio",
+        processing_time=1.0,
+    )
+
+
+class TestPersistentJobQueue(unittest.TestCase):
+    """Test cases for PersistentJobQueue"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        self.queue = self._queue()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _queue(self):
+        return PersistentJobQueue(
+            os.path.join(self.temp_dir.name, "queue.sqlite3"),
+            visibility_timeout=60,
+            max_attempts=2,
+            clock=self.clock,
+        )
+
+    def test_jobs_are_leased_once_in_order(self):
+        """Each job goes to one worker at a time, oldest first"""
+        self.queue.enqueue(["a.mp3", "b.mp3"])
+
+        first = self.queue.lease()
+        second = self.queue.lease()
+
+        self.assertEqual((first.file_path, second.file_path), ("a.mp3", "b.mp3"))
+        self.assertIsNone(self.queue.lease())
+        self.assertTrue(self.queue.has_pending())
+
+    def test_expired_lease_is_retried(self):
+        """A job whose worker stopped extending its lease is handed out again"""
+        (job_id,) = self.queue.enqueue(["a.mp3"])
+        lost = self.queue.lease()
+
+        self.clock.now += 61
+        retried = self.queue.lease()
+
+        self.assertEqual((retried.job_id, retried.attempt), (job_id, 2))
+        # The worker that lost the lease can no longer report a result
+        self.assertFalse(self.queue.complete(lost, make_result("a.mp3")))
+        self.assertFalse(self.queue.extend(lost))
+        self.assertTrue(self.queue.complete(retried, make_result("a.mp3")))
+        stored = self.queue.get_results([job_id])[job_id]
+        self.assertEqual(stored["status"], "succeeded")
+        self.assertEqual(stored["result"]["analysis_text"], "analysis of a.mp3")
+
+    def test_extended_lease_stays_invisible(self):
+        """Heartbeats keep a long-running job from being retried"""
+        self.queue.enqueue(["a.mp3"])
+        lease = self.queue.lease()
+
+        self.clock.now += 50
+        self.assertTrue(self.queue.extend(lease))
+        self.clock.now += 50
+
+        self.assertIsNone(self.queue.lease())
+
+    def test_job_fails_after_max_attempts(self):
+        """A job that keeps losing its worker is given up"""
+        (job_id,) = self.queue.enqueue(["a.mp3"])
+        self.queue.lease()
+        self.clock.now += 61
+        self.queue.lease()
+        self.clock.now += 61
+
+        self.assertIsNone(self.queue.lease())
+        self.assertFalse(self.queue.has_pending())
+        self.assertEqual(self.queue.get_results([job_id])[job_id]["status"], "failed")
+
+    def _audio(self, name, content=b"audio"):
+        path = os.path.join(self.temp_dir.name, name)
+        Path(path).write_bytes(content)
+        return path
+
+    def test_queue_survives_restarts(self):
+        """Queued jobs are kept on disk and not queued twice"""
+        path = self._audio("a.mp3")
+        (job_id,) = self.queue.enqueue([path])
+
+        reopened = self._queue()
+
+        self.assertEqual(reopened.enqueue([path]), [job_id])
+        self.assertEqual(reopened.get_stats()["queued"], 1)
+        reopened.remove([job_id])
+        self.assertFalse(reopened.has_pending())
+
+    def test_changed_file_is_not_served_a_stale_result(self):
+        """A result left for an older version of the file is not reused"""
+        path = self._audio("a.mp3")
+        (old_id,) = self.queue.enqueue([path])
+        self.queue.complete(self.queue.lease(), make_result(path))
+
+        self._audio("a.mp3", b"re-recorded audio")
+        os.utime(path, ns=(0, 2_000_000_000))
+        (new_id,) = self.queue.enqueue([path])
+
+        self.assertNotEqual(new_id, old_id)
+        self.assertEqual(self.queue.get_results([old_id]), {})
+        self.assertEqual(self.queue.lease().job_id, new_id)
+
+
+class FakeApplication:
+    """Application stand-in run inside worker processes"""
+
+    def __init__(self, crash_marker=None):
+        self._crash_marker = crash_marker
+        self.analyzed = []
+        self.closed = False
+
+    def process_audio_file(self, file_path, output_folder):
+        if self._crash_marker and not os.path.exists(self._crash_marker):
+            # Crash once, in the middle of a job
+            Path(self._crash_marker).write_text(str(os.getpid()))
+            os._exit(3)
+        self.analyzed.append(file_path)
+        return make_result(file_path, success=not file_path.endswith("bad.mp3"))
+
+    def close(self):
+        self.closed = True
+
+
+def create_fake_application(crash_marker=None):
+    return FakeApplication(crash_marker)
+
+
+class TestWorkerPool(unittest.TestCase):
+    """Test cases for WorkerPool with real worker processes"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.audio_files = [
+            AudioFile(file_path=name, file_name=name)
+            for name in ("a.mp3", "bad.mp3", "c.mp3", "d.mp3")
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _pool(self, crash_marker=None, visibility_timeout=60):
+        job_queue = PersistentJobQueue(
+            os.path.join(self.temp_dir.name, "queue.sqlite3"),
+            visibility_timeout=visibility_timeout,
+        )
+        return (
+            WorkerPool(
+                job_queue,
+                partial(create_fake_application, crash_marker),
+                processes=2,
+                poll_interval=0.1,
+            ),
+            job_queue,
+        )
+
+    def test_results_are_collected_in_order(self):
+        """Worker results come back in input order and the queue is emptied"""
+        pool, job_queue = self._pool()
+
+        results = pool.process(self.audio_files, self.temp_dir.name)
+
+        self.assertEqual(
+            [r.analysis_text for r in results],
+            ["analysis of a.mp3", "", "analysis of c.mp3", "analysis of d.mp3"],
+        )
+        self.assertEqual([r.is_successful for r in results], [True, False, True, True])
+        self.assertIs(results[0].audio_file, self.audio_files[0])
+        self.assertEqual(sum(job_queue.get_stats().values()), 0)
+
+    def test_worker_closes_its_application_when_done(self):
+        """Results the worker's application still buffers are written on exit"""
+        job_queue = PersistentJobQueue(
+            os.path.join(self.temp_dir.name, "queue.sqlite3")
+        )
+        job_queue.enqueue(["a.mp3", "c.mp3"])
+        application = FakeApplication()
+
+        run_worker(job_queue, lambda: application, self.temp_dir.name)
+
+        self.assertEqual(application.analyzed, ["a.mp3", "c.mp3"])
+        self.assertTrue(application.closed)
+
+    def test_crashed_worker_job_is_retried(self):
+        """A job lost with a crashed worker is finished by another worker"""
+        marker = os.path.join(self.temp_dir.name, "crashed")
+        pool, _ = self._pool(crash_marker=marker, visibility_timeout=0.5)
+
+        results = pool.process(self.audio_files, self.temp_dir.name)
+
+        self.assertTrue(os.path.exists(marker))
+        self.assertEqual([r.is_successful for r in results], [True, False, True, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
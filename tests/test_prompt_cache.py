@@ -0,0 +1,205 @@
+"""
+Unit tests for the Gemini prompt cache
+تست‌های واحد برای حافظه نهان پرامت جمینی
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+try:
+    from src.models import AudioFile
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_cache import PromptCache
+    from src.services.prompt_provider import PersianPromptProvider
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AudioFile
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_cache import PromptCache
+    from src.services.prompt_provider import PersianPromptProvider
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPromptCache(unittest.TestCase):
+    """Test cases for PromptCache"""
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.clock = FakeClock()
+        self.cache = PromptCache(
+            self.client, ttl=600, refresh_margin=60, clock=self.clock
+        )
+        self.create = self.client.caching.CachedContent.create
+
+    def test_prompt_is_cached_once(self):
+        """The cache is created on first use and reused afterwards"""
+        first = self.cache.get_model("model-a", "prompt")
+        second = self.cache.get_model("model-a", "prompt")
+
+        self.assertIsNotNone(first)
+        self.assertIsNotNone(second)
+        self.assertEqual(self.create.call_count, 1)
+        self.assertEqual(self.create.call_args.kwargs["system_instruction"], "prompt")
+        self.assertEqual(self.create.call_args.kwargs["ttl"].total_seconds(), 600)
+        self.client.GenerativeModel.from_cached_content.assert_called_with(
+            cached_content=self.create.return_value, generation_config=None
+        )
+        self.assertEqual(self.cache.get_stats()["hits"], 2)
+
+    def test_each_model_and_prompt_has_its_own_cache(self):
+        """Changing the model or prompt creates a new cache"""
+        self.cache.get_model("model-a", "prompt")
+        self.cache.get_model("model-b", "prompt")
+        self.cache.get_model("model-a", "prompt 2")
+
+        self.assertEqual(self.create.call_count, 3)
+
+    def test_ttl_is_extended_near_expiry(self):
+        """A cache about to expire is extended instead of recreated"""
+        self.cache.get_model("model-a", "prompt")
+        cached = self.create.return_value
+
+        self.clock.now += 500
+        self.cache.get_model("model-a", "prompt")
+        cached.update.assert_not_called()
+
+        self.clock.now += 50
+        self.cache.get_model("model-a", "prompt")
+
+        cached.update.assert_called_once()
+        self.assertEqual(self.create.call_count, 1)
+        self.assertEqual(self.cache.get_stats()["refreshed"], 1)
+
+    def test_expired_or_deleted_cache_is_recreated(self):
+        """A cache that expired, or that the server lost, is created again"""
+        self.cache.get_model("model-a", "prompt")
+        self.clock.now += 700
+        self.cache.get_model("model-a", "prompt")
+
+        self.assertEqual(self.create.call_count, 2)
+
+        self.clock.now += 580
+        self.create.return_value.update.side_effect = Exception("404 not found")
+        self.cache.get_model("model-a", "prompt")
+
+        self.assertEqual(self.create.call_count, 3)
+
+    def test_unsupported_prompt_falls_back_to_inline(self):
+        """A prompt the model cannot cache is sent inline and not retried"""
+        self.create.side_effect = Exception(
+            "400 Cached content is too small. min_total_token_count=4096"
+        )
+
+        self.assertIsNone(self.cache.get_model("model-a", "prompt"))
+        self.assertIsNone(self.cache.get_model("model-a", "prompt"))
+
+        self.assertEqual(self.create.call_count, 1)
+        self.assertEqual(self.cache.get_stats()["fallbacks"], 2)
+
+    def test_transient_failure_is_retried_later(self):
+        """A quota or server error only skips the cache for that request"""
+        self.create.side_effect = [Exception("503 service unavailable"), MagicMock()]
+
+        self.assertIsNone(self.cache.get_model("model-a", "prompt"))
+        self.assertIsNotNone(self.cache.get_model("model-a", "prompt"))
+
+    def test_close_deletes_server_caches(self):
+        """Closing deletes the caches instead of waiting for their TTL"""
+        self.cache.get_model("model-a", "prompt")
+
+        self.cache.close()
+
+        self.create.return_value.delete.assert_called_once()
+
+
+class TestGeminiAnalyzerPromptCache(unittest.TestCase):
+    """Test cases for GeminiAnalyzer with a prompt cache"""
+
+    @patch("src.services.gemini_analyzer.genai")
+    def setUp(self, mock_genai):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        audio_path = Path(self.temp_dir.name, "call.mp3")
+        audio_path.write_bytes(b"fake audio bytes")
+        self.audio_file = AudioFile(file_path=str(audio_path), file_name="call.mp3")
+
+        self.prompt_provider = PersianPromptProvider()
+        self.analyzer = GeminiAnalyzer(
+            ConfigurationService(api_key="test_key", model_name="model-a"),
+            self.prompt_provider,
+            prompt_cache_ttl=600,
+        )
+        self.client = MagicMock()
+        self.cached_model = self.client.GenerativeModel.from_cached_content.return_value
+        self.cached_model.generate_content.return_value = MagicMock(text="analysis")
+        self.analyzer._client = self.client
+        self.analyzer._prompt_cache = PromptCache(self.client, ttl=600)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_only_the_audio_is_sent_with_a_cached_prompt(self):
+        """Requests reference the cached prompt instead of repeating it"""
+        result = self.analyzer.analyze_audio(self.audio_file)
+
+        self.assertTrue(result.is_successful)
+        contents = self.cached_model.generate_content.call_args.args[0]
+        self.assertEqual(contents, [self.client.upload_file.return_value])
+        self.client.GenerativeModel.assert_not_called()
+        self.assertEqual(self.analyzer.get_prompt_cache_stats()["hits"], 1)
+
+    def test_prompt_is_sent_inline_when_caching_fails(self):
+        """Without a usable cache the prompt is sent as the system instruction"""
+        self.client.caching.CachedContent.create.side_effect = Exception(
+            "400 model does not support caching"
+        )
+        inline_model = self.client.GenerativeModel.return_value
+        inline_model.generate_content.return_value = MagicMock(text="analysis")
+
+        result = self.analyzer.analyze_audio(self.audio_file)
+
+        self.assertTrue(result.is_successful)
+        contents = inline_model.generate_content.call_args.args[0]
+        self.assertEqual(contents, [self.client.upload_file.return_value])
+        self.client.GenerativeModel.assert_called_once_with(
+            "model-a", system_instruction=self.prompt_provider.get_analysis_prompt()
+        )
+
+    def test_stale_cache_is_dropped_after_a_failed_request(self):
+        """A request rejected for a missing cache makes the next one recreate it"""
+        self.cached_model.generate_content.side_effect = Exception(
+            "403 CachedContent not found (or permission denied)"
+        )
+
+        self.analyzer.analyze_audio(self.audio_file)
+        self.analyzer.analyze_audio(self.audio_file)
+
+        self.assertEqual(self.client.caching.CachedContent.create.call_count, 2)
+
+    def test_prompt_caching_is_off_by_default(self):
+        """Without a TTL the analyzer has no prompt cache"""
+        with patch("src.services.gemini_analyzer.genai"):
+            analyzer = GeminiAnalyzer(
+                ConfigurationService(api_key="test_key"), self.prompt_provider
+            )
+
+        self.assertIsNone(analyzer.get_prompt_cache_stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
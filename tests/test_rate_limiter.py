@@ -0,0 +1,260 @@
+"""
+Unit tests for the Gemini rate limiter
+تست‌های واحد برای محدودکننده نرخ درخواست‌ها
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+try:
+    from src.models import AudioFile
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.rate_limiter import (
+        AdaptiveConcurrencyLimiter,
+        RateLimiter,
+        TokenBucket,
+        is_quota_error,
+    )
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AudioFile
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.rate_limiter import (
+        AdaptiveConcurrencyLimiter,
+        RateLimiter,
+        TokenBucket,
+        is_quota_error,
+    )
+
+
+class FakeTime:
+    """Clock and sleep pair where sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for TokenBucket"""
+
+    def setUp(self):
+        self.time = FakeTime()
+
+    def _bucket(self, rate, capacity=None):
+        return TokenBucket(
+            rate, capacity=capacity, clock=self.time.clock, sleep=self.time.sleep
+        )
+
+    def test_burst_up_to_capacity_does_not_wait(self):
+        """A full bucket serves its capacity immediately"""
+        bucket = self._bucket(60)
+
+        waits = [bucket.acquire() for _ in range(60)]
+
+        self.assertEqual(sum(waits), 0)
+
+    def test_empty_bucket_waits_for_refill(self):
+        """Requests beyond the rate are delayed by the refill time"""
+        bucket = self._bucket(60, capacity=1)
+        bucket.acquire()
+
+        waited = bucket.acquire()
+
+        self.assertAlmostEqual(waited, 1.0)
+
+    def test_oversized_request_goes_into_debt(self):
+        """A request larger than the capacity passes but delays the next one"""
+        bucket = self._bucket(600, capacity=100)
+
+        self.assertEqual(bucket.acquire(300), 0)
+        waited = bucket.acquire(100)
+
+        # 200 tokens of debt plus 100 requested at 10 tokens/second
+        self.assertAlmostEqual(waited, 30.0)
+
+    def test_adjust_refunds_overestimates(self):
+        """Refunding tokens lets the next request through sooner"""
+        bucket = self._bucket(60, capacity=10)
+        bucket.acquire(10)
+        bucket.adjust(-10)
+
+        self.assertEqual(bucket.acquire(10), 0)
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.TestCase):
+    """Test cases for AdaptiveConcurrencyLimiter"""
+
+    def setUp(self):
+        self.time = FakeTime()
+
+    def test_quota_error_halves_the_limit(self):
+        """A throttled request triggers a multiplicative decrease"""
+        limiter = AdaptiveConcurrencyLimiter(8, clock=self.time.clock)
+        limiter.acquire()
+        limiter.release(throttled=True)
+
+        self.assertEqual(limiter.limit, 4)
+
+    def test_burst_of_errors_within_cooldown_counts_once(self):
+        """Several 429s from in-flight requests only back off once"""
+        limiter = AdaptiveConcurrencyLimiter(8, cooldown=5, clock=self.time.clock)
+        for _ in range(3):
+            limiter.acquire()
+        for _ in range(3):
+            limiter.release(throttled=True)
+
+        self.assertEqual(limiter.limit, 4)
+
+    def test_successes_ramp_back_up_to_maximum(self):
+        """The limit grows by one per window of successes, up to the maximum"""
+        limiter = AdaptiveConcurrencyLimiter(4, clock=self.time.clock)
+        limiter.acquire()
+        limiter.release(throttled=True)
+        self.assertEqual(limiter.limit, 2)
+
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release()
+
+        self.assertEqual(limiter.limit, 4)
+
+    def test_limit_ramps_past_the_start_up_to_the_ceiling(self):
+        """Starting at the worker count does not cap the limit there"""
+        limiter = RateLimiter(
+            max_concurrency=6, initial_concurrency=2, clock=self.time.clock
+        )
+        self.assertEqual(limiter.concurrency_limit, 2)
+
+        for _ in range(50):
+            with limiter.request():
+                pass
+
+        self.assertEqual(limiter.concurrency_limit, 6)
+
+    def test_limit_never_drops_below_minimum(self):
+        """Repeated back-offs stop at the minimum"""
+        limiter = AdaptiveConcurrencyLimiter(2, cooldown=0, clock=self.time.clock)
+        for _ in range(5):
+            limiter.acquire()
+            limiter.release(throttled=True)
+
+        self.assertEqual(limiter.limit, 1)
+
+
+class TestQuotaErrorDetection(unittest.TestCase):
+    """Test cases for is_quota_error"""
+
+    def test_detects_wrapped_resource_exhausted(self):
+        """Quota errors are found through exception chaining"""
+
+        class ResourceExhausted(Exception):
+            pass
+
+        try:
+            try:
+                raise ResourceExhausted("rate limit")
+            except ResourceExhausted as e:
+                raise RuntimeError("Failed to generate analysis") from e
+        except RuntimeError as wrapped:
+            self.assertTrue(is_quota_error(wrapped))
+
+    def test_other_errors_are_not_quota_errors(self):
+        """Ordinary failures do not trigger back-off"""
+        self.assertFalse(is_quota_error(ValueError("bad audio format")))
+
+    def test_numbers_in_file_names_are_not_quota_errors(self):
+        """A date-stamped file name in a wrapper message is not a 429"""
+        try:
+            try:
+                raise FileNotFoundError("No such file: '20240429_1530.mp3'")
+            except FileNotFoundError as e:
+                raise RuntimeError(
+                    "Failed to upload file 20240429_1530.mp3: quota 429"
+                ) from e
+        except RuntimeError as wrapped:
+            self.assertFalse(is_quota_error(wrapped))
+
+    def test_api_message_is_a_last_resort(self):
+        """A 429 in the API error's own message still counts"""
+        try:
+            try:
+                raise Exception("429 Resource has been exhausted")
+            except Exception as e:
+                raise RuntimeError("Failed to generate analysis") from e
+        except RuntimeError as wrapped:
+            self.assertTrue(is_quota_error(wrapped))
+        self.assertFalse(is_quota_error(Exception("request id 94290")))
+
+
+class TestGeminiAnalyzerRateLimiting(unittest.TestCase):
+    """Test cases for GeminiAnalyzer with a rate limiter"""
+
+    @patch("src.services.gemini_analyzer.genai")
+    def setUp(self, mock_genai):
+        self.limiter = RateLimiter(
+            requests_per_minute=600, tokens_per_minute=100000, max_concurrency=4
+        )
+        self.analyzer = GeminiAnalyzer(
+            ConfigurationService(api_key="test_key", model_name="model"),
+            PersianPromptProvider(),
+            rate_limiter=self.limiter,
+        )
+        self.client = MagicMock()
+        self.model = self.client.GenerativeModel.return_value
+        self.analyzer._client = self.client
+        self.audio_file = AudioFile(
+            file_path="call.mp3", file_name="call.mp3", file_size=160000
+        )
+
+    def test_successful_requests_are_counted(self):
+        """Each generation passes through the limiter"""
+        response = MagicMock(text="analysis")
+        response.usage_metadata.total_token_count = 1500
+        self.model.generate_content.return_value = response
+
+        result = self.analyzer.analyze_audio(self.audio_file)
+
+        self.assertTrue(result.is_successful)
+        stats = self.analyzer.get_rate_limit_stats()
+        self.assertEqual((stats["requests"], stats["throttled"]), (1, 0))
+
+    def test_quota_error_backs_off_concurrency(self):
+        """A 429 from the API lowers the concurrency limit"""
+        self.model.generate_content.side_effect = Exception(
+            "429 Resource has been exhausted (e.g. check quota)."
+        )
+
+        result = self.analyzer.analyze_audio(self.audio_file)
+
+        self.assertFalse(result.is_successful)
+        self.assertEqual(self.analyzer.get_rate_limit_stats()["throttled"], 1)
+        self.assertEqual(self.limiter.concurrency_limit, 2)
+
+    def test_token_estimate_uses_duration_when_known(self):
+        """Audio duration drives the token estimate when available"""
+        with_duration = AudioFile(
+            file_path="a.mp3", file_name="a.mp3", file_size=1, duration=60
+        )
+
+        estimate = GeminiAnalyzer._estimate_tokens("", with_duration)
+
+        self.assertEqual(estimate, 60 * 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,282 @@
+"""
+Unit tests for streamed analysis reports
+تست‌های واحد برای گزارش‌های تحلیل جریانی
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+try:
+    from src.application import VoiceToTextApplication
+    from src.models import AnalysisResult, AudioFile, TimelineMap
+    from src.services.audio_file_service import AudioFileService
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.report_generator import MarkdownReportGenerator
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.application import VoiceToTextApplication
+    from src.models import AnalysisResult, AudioFile, TimelineMap
+    from src.services.audio_file_service import AudioFileService
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.report_generator import MarkdownReportGenerator
+
+
+class TestMarkdownReportStream(unittest.TestCase):
+    """Test cases for MarkdownReportStream"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.generator = MarkdownReportGenerator()
+        self.audio_file = AudioFile(
+            file_path="call.mp3", file_name="call.mp3", file_size=2048
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _read(self, path):
+        return Path(path).read_text(encoding="utf-8")
+
+    def test_text_is_visible_as_it_arrives(self):
+        """Each streamed chunk is flushed to the report immediately"""
+        stream = self.generator.open_analysis_stream(
+            self.audio_file, self.temp_dir.name
+        )
+        stream.begin()
+        stream.write("**[00:00-00:05] مشتری**: سل")
+
+        content = self._read(stream.live_file)
+        stream.close()
+
+        self.assertTrue(stream.output_file.endswith("call_analysis.md"))
+        self.assertIn("`call.mp3`", content)
+        self.assertIn("⏳", content)
+        self.assertTrue(content.endswith("مشتری**: سل"))
+
+    def test_begin_restarts_the_report(self):
+        """A retried request overwrites the text of the failed attempt"""
+        stream = self.generator.open_analysis_stream(
+            self.audio_file, self.temp_dir.name
+        )
+        stream.begin()
+        stream.write("first attempt")
+        stream.begin()
+        stream.write("second attempt")
+        stream.end()
+
+        content = self._read(stream.live_file)
+        self.assertNotIn("first attempt", content)
+        self.assertIn("second attempt", content)
+
+    def test_saved_result_replaces_the_live_report(self):
+        """The finished report has the final status and no leftovers"""
+        stream = self.generator.open_analysis_stream(
+            self.audio_file, self.temp_dir.name
+        )
+        stream.begin()
+        stream.write("full ")
+        stream.write("analysis")
+        stream.end()
+        result = AnalysisResult(self.audio_file, "full analysis", processing_time=1.5)
+
+        output_file = self.generator.save_analysis_result(result, self.temp_dir.name)
+
+        content = self._read(output_file)
+        self.assertEqual(output_file, stream.output_file)
+        self.assertIn("full analysis\n\n---", content)
+        self.assertIn("1.50", content)
+        self.assertNotIn("⏳", content)
+        self.assertEqual(os.listdir(self.temp_dir.name), ["call_analysis.md"])
+
+    def test_discard_keeps_an_earlier_report(self):
+        """A failed re-run does not delete the report of a previous run"""
+        result = AnalysisResult(self.audio_file, "earlier run", processing_time=1.0)
+        output_file = self.generator.save_analysis_result(result, self.temp_dir.name)
+
+        unused = self.generator.open_analysis_stream(
+            self.audio_file, self.temp_dir.name
+        )
+        unused.discard()
+        cut_off = self.generator.open_analysis_stream(
+            self.audio_file, self.temp_dir.name
+        )
+        cut_off.begin()
+        cut_off.write("half of the")
+        cut_off.discard()
+
+        self.assertIn("earlier run", self._read(output_file))
+        self.assertEqual(os.listdir(self.temp_dir.name), ["call_analysis.md"])
+
+    def test_saved_report_matches_generated_markdown(self):
+        """Writing the report in pieces produces the same document"""
+        result = AnalysisResult(self.audio_file, "analysis", processing_time=2.0)
+
+        with patch("src.services.report_generator.datetime") as mock_datetime:
+            mock_datetime.now.return_value.strftime.return_value = "2024-01-01"
+            output_file = self.generator.save_analysis_result(
+                result, self.temp_dir.name
+            )
+            expected = self.generator._generate_analysis_markdown(result)
+
+        self.assertEqual(self._read(output_file), expected)
+
+
+class TestStreamingAnalysis(unittest.TestCase):
+    """Test cases for streaming generation in GeminiAnalyzer"""
+
+    @patch("src.services.gemini_analyzer.genai")
+    def setUp(self, mock_genai):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.client = MagicMock()
+        self.model = self.client.GenerativeModel.return_value
+        self.audio_file = AudioFile(
+            file_path="call.mp3", file_name="call.mp3", file_size=1024
+        )
+        self.stream = MagicMock(
+            wraps=MarkdownReportGenerator().open_analysis_stream(
+                self.audio_file, self.temp_dir.name
+            )
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _analyzer(self, **options):
+        with patch("src.services.gemini_analyzer.genai"):
+            analyzer = GeminiAnalyzer(
+                ConfigurationService(api_key="test_key", model_name="model"),
+                PersianPromptProvider(),
+                **options,
+            )
+        analyzer._client = self.client
+        return analyzer
+
+    def _respond_with(self, *texts):
+        self.model.generate_content.return_value = [
+            MagicMock(text=text) for text in texts
+        ]
+
+    def test_chunks_are_forwarded_to_the_stream(self):
+        """The response is requested as a stream and written chunk by chunk"""
+        self._respond_with("**[00:00-00:05] مشتری**: ", "سلام")
+
+        result = self._analyzer().analyze_audio(self.audio_file, stream=self.stream)
+
+        self.assertTrue(result.is_successful)
+        self.assertEqual(result.analysis_text, "**[00:00-00:05] مشتری**: سلام")
+        self.assertTrue(self.model.generate_content.call_args.kwargs["stream"])
+        self.stream.begin.assert_called_once()
+        self.assertEqual(self.stream.write.call_count, 2)
+        self.stream.end.assert_called_once()
+
+    def test_streamed_timestamps_are_mapped_to_the_original(self):
+        """With silence trimming, streamed lines carry original timestamps"""
+        timeline = TimelineMap(segments=[(10, 40)], original_duration=45)
+        trimmer = MagicMock()
+        trimmer.trim.return_value = (self.audio_file, timeline)
+        trimmer.get_timeline.return_value = timeline
+        # The timestamp is split across two chunks
+        self._respond_with("**[00:0", "5-00:10] مشتری**: سلام\n", "پایان")
+
+        result = self._analyzer(silence_trimmer=trimmer).analyze_audio(
+            self.audio_file, stream=self.stream
+        )
+
+        written = "".join(call.args[0] for call in self.stream.write.call_args_list)
+        self.assertEqual(written, "**[00:15-00:20] مشتری**: سلام\nپایان")
+        self.assertEqual(result.analysis_text, written)
+
+    def test_structured_replies_are_not_streamed(self):
+        """JSON replies are only written once rendered as Markdown"""
+        self.model.generate_content.return_value = MagicMock(text="{}")
+
+        result = self._analyzer(structured_output=True).analyze_audio(
+            self.audio_file, stream=self.stream
+        )
+
+        self.assertTrue(result.is_successful)
+        self.assertNotIn("stream", self.model.generate_content.call_args.kwargs)
+        self.stream.begin.assert_not_called()
+
+    def test_without_stream_the_response_is_not_streamed(self):
+        """The default path still makes a single blocking request"""
+        self.model.generate_content.return_value = MagicMock(text="analysis")
+
+        result = self._analyzer().analyze_audio(self.audio_file)
+
+        self.assertEqual(result.analysis_text, "analysis")
+        self.assertNotIn("stream", self.model.generate_content.call_args.kwargs)
+
+
+class TestApplicationStreaming(unittest.TestCase):
+    """Test cases for streamed reports in VoiceToTextApplication"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        voice = Path(self.temp_dir.name, "voice")
+        voice.mkdir()
+        Path(voice, "call.mp3").write_bytes(b"fake audio")
+        self.output = os.path.join(self.temp_dir.name, "results")
+        self.config = ConfigurationService(api_key="test_key", model_name="test")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _run(self, analyze_audio):
+        analyzer = MagicMock()
+        analyzer.analyze_audio.side_effect = analyze_audio
+        app = VoiceToTextApplication(
+            audio_service=AudioFileService(self.config),
+            ai_analyzer=analyzer,
+            report_generator=MarkdownReportGenerator(),
+            config_service=self.config,
+            stream_reports=True,
+        )
+        return app.process_audio_files(self.temp_dir.name, self.output)
+
+    def test_streamed_report_is_finalized(self):
+        """The live report is replaced by the finished one"""
+
+        def analyze_audio(audio_file, stream):
+            stream.begin()
+            stream.write("streamed text")
+            stream.end()
+            return AnalysisResult(audio_file, "streamed text", processing_time=1.0)
+
+        results = self._run(analyze_audio)
+
+        content = Path(results[0].output_file_path).read_text(encoding="utf-8")
+        self.assertIn("streamed text", content)
+        self.assertNotIn("⏳", content)
+
+    def test_failed_analysis_removes_the_partial_report(self):
+        """A stream cut off by an error does not leave a report behind"""
+
+        def analyze_audio(audio_file, stream):
+            stream.begin()
+            stream.write("half of the")
+            return AnalysisResult(
+                audio_file,
+                "",
+                success=False,
+                error_message="connection reset",
+                processing_time=1.0,
+            )
+
+        results = self._run(analyze_audio)
+
+        self.assertFalse(results[0].is_successful)
+        self.assertEqual(os.listdir(self.output), ["summary_report.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+"""
+Unit tests for the analysis result cache
+تست‌های واحد برای حافظه نهان نتایج تحلیل
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+try:
+    from src.models import AnalysisResult, AudioFile
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.result_cache import ResultCache
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AnalysisResult, AudioFile
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.result_cache import ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    """Test cases for ResultCache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "results")
+        self.audio_file = AudioFile(file_path="a.mp3", file_name="a.mp3")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _result(self, text="transcript"):
+        return AnalysisResult(
+            audio_file=self.audio_file, analysis_text=text, processing_time=3.0
+        )
+
+    def test_key_depends_on_audio_prompt_and_model(self):
+        """Changing any key component produces a different key"""
+        base = ResultCache.make_key("hash", "prompt", "model")
+
+        self.assertEqual(base, ResultCache.make_key("hash", "prompt", "model"))
+        self.assertNotEqual(base, ResultCache.make_key("other", "prompt", "model"))
+        self.assertNotEqual(base, ResultCache.make_key("hash", "prompt 2", "model"))
+        self.assertNotEqual(base, ResultCache.make_key("hash", "prompt", "model 2"))
+
+    def test_put_then_get_counts_hits_and_misses(self):
+        """A stored result is returned and counted as a hit"""
+        cache = ResultCache(self.cache_dir)
+
+        self.assertIsNone(cache.get("k", self.audio_file))
+        cache.put("k", self._result())
+        cached = cache.get("k", self.audio_file)
+
+        self.assertEqual(cached.analysis_text, "transcript")
+        self.assertTrue(cached.from_cache)
+        self.assertIs(cached.audio_file, self.audio_file)
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stores"]), (1, 1, 1))
+
+    def test_failed_results_are_not_cached(self):
+        """Only successful analyses are stored"""
+        cache = ResultCache(self.cache_dir)
+        failed = AnalysisResult(
+            audio_file=self.audio_file, success=False, error_message="error"
+        )
+
+        cache.put("k", failed)
+
+        self.assertIsNone(cache.get("k", self.audio_file))
+
+    def test_entries_persist_across_instances(self):
+        """A new cache over the same folder sees earlier entries"""
+        ResultCache(self.cache_dir).put("k", self._result("persisted"))
+
+        cached = ResultCache(self.cache_dir).get("k", self.audio_file)
+
+        self.assertEqual(cached.analysis_text, "persisted")
+
+    def test_expired_entries_are_evicted(self):
+        """Entries older than max_age are misses and removed from disk"""
+        cache = ResultCache(self.cache_dir, max_age=60)
+        cache.put("k", self._result())
+        entry_path = Path(self.cache_dir, "k.json")
+        data = json.loads(entry_path.read_text(encoding="utf-8"))
+        data["cached_at"] = time.time() - 120
+        entry_path.write_text(json.dumps(data), encoding="utf-8")
+
+        self.assertIsNone(cache.get("k", self.audio_file))
+        self.assertFalse(entry_path.exists())
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """The cache keeps at most max_entries, dropping the oldest access"""
+        cache = ResultCache(self.cache_dir, max_entries=2)
+        cache.put("a", self._result("a"))
+        time.sleep(0.01)
+        cache.put("b", self._result("b"))
+        time.sleep(0.01)
+        cache.get("a", self.audio_file)
+        time.sleep(0.01)
+        cache.put("c", self._result("c"))
+
+        self.assertIsNotNone(cache.get("a", self.audio_file))
+        self.assertIsNone(cache.get("b", self.audio_file))
+        self.assertIsNotNone(cache.get("c", self.audio_file))
+        self.assertEqual(cache.get_stats()["entries"], 2)
+
+    def test_size_limit_is_enforced(self):
+        """The cache never grows past max_bytes"""
+        cache = ResultCache(self.cache_dir, max_bytes=1024)
+        for i in range(10):
+            cache.put(str(i), self._result("x" * 300))
+
+        self.assertLessEqual(cache.get_stats()["size_bytes"], 1024)
+
+
+class TestGeminiAnalyzerResultCache(unittest.TestCase):
+    """Test cases for GeminiAnalyzer with a result cache"""
+
+    @patch("src.services.gemini_analyzer.genai")
+    def setUp(self, mock_genai):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        audio_path = Path(self.temp_dir.name, "call.mp3")
+        audio_path.write_bytes(b"fake audio bytes")
+        self.audio_path = str(audio_path)
+
+        self.config = ConfigurationService(api_key="test_key", model_name="model-a")
+        self.cache = ResultCache(os.path.join(self.temp_dir.name, "cache"))
+        self.analyzer = GeminiAnalyzer(
+            self.config, PersianPromptProvider(), result_cache=self.cache
+        )
+        self.client = MagicMock()
+        self.client.GenerativeModel.return_value.generate_content.return_value = (
+            MagicMock(text="analysis")
+        )
+        self.analyzer._client = self.client
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _audio_file(self):
+        return AudioFile(file_path=self.audio_path, file_name="call.mp3")
+
+    def test_second_run_skips_the_api(self):
+        """An unchanged file is served from the cache without API calls"""
+        first = self.analyzer.analyze_audio(self._audio_file())
+        second = self.analyzer.analyze_audio(self._audio_file())
+
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.analysis_text, "analysis")
+        self.assertEqual(self.client.upload_file.call_count, 1)
+        self.assertEqual(self.analyzer.get_cache_stats()["hits"], 1)
+
+    def test_model_change_misses_the_cache(self):
+        """Switching models re-analyzes the file"""
+        self.analyzer.analyze_audio(self._audio_file())
+        self.config.set_model_name("model-b")
+
+        result = self.analyzer.analyze_audio(self._audio_file())
+
+        self.assertFalse(result.from_cache)
+        self.assertEqual(self.client.upload_file.call_count, 2)
+
+    def test_batch_pipeline_uses_the_cache(self):
+        """Cached files skip upload in the pipelined batch mode too"""
+        self.analyzer.analyze_audio(self._audio_file())
+
+        results = self.analyzer.analyze_audio_batch([self._audio_file()])
+
+        self.assertTrue(results[0].from_cache)
+        self.assertEqual(self.client.upload_file.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
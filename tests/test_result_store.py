@@ -0,0 +1,169 @@
+"""
+Unit tests for the SQLite results store
+تست‌های واحد برای پایگاه داده نتایج
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+try:
+    from src.models import AnalysisResult, AudioFile
+    from src.services.report_generator import MarkdownReportGenerator
+    from src.services.result_store import SQLiteResultStore
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AnalysisResult, AudioFile
+    from src.services.report_generator import MarkdownReportGenerator
+    from src.services.result_store import SQLiteResultStore
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_result(name: str, success: bool = True, **kwargs) -> AnalysisResult:
+    return AnalysisResult(
+        audio_file=AudioFile(
+            file_path=f"/calls/{name}.mp3",
+            file_name=f"{name}.mp3",
+            file_size=2048,
+            duration=90.0,
+        ),
+        analysis_text="## تحلیل" if success else "",
+        success=success,
+        error_message=None if success else "خطا",
+        processing_time=3.0,
+        timestamp=datetime(2025, 1, 1) + timedelta(minutes=len(name)),
+        **kwargs,
+    )
+
+
+class TestSQLiteResultStore(unittest.TestCase):
+    """Test cases for SQLiteResultStore"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_folder = os.path.join(self.temp_dir.name, "results")
+        self.db_path = os.path.join(self.output_folder, "results.sqlite")
+        self.clock = FakeClock()
+        self.store = SQLiteResultStore(
+            self.db_path,
+            MarkdownReportGenerator(),
+            batch_size=2,
+            max_delay=60,
+            clock=self.clock,
+        )
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def count_rows(self) -> int:
+        with sqlite3.connect(self.db_path) as db:
+            return db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def test_results_are_written_in_batches(self):
+        """Rows are held back until the batch is full"""
+        first = self.store.save_analysis_result(make_result("a"), self.output_folder)
+
+        self.assertTrue(os.path.exists(first))
+        self.assertEqual(self.count_rows(), 0)
+
+        self.store.save_analysis_result(make_result("bb"), self.output_folder)
+
+        self.assertEqual(self.count_rows(), 2)
+        with sqlite3.connect(self.db_path) as db:
+            row = db.execute(
+                "SELECT r.file_format, r.report_path, t.analysis_text "
+                "FROM results r JOIN result_texts t ON t.result_id = r.id "
+                "WHERE r.file_name = 'a.mp3'"
+            ).fetchone()
+        self.assertEqual(row, ("mp3", first, "## تحلیل"))
+
+    def test_old_rows_are_written_without_a_full_batch(self):
+        """A slow trickle of results still reaches the database"""
+        self.store.save_analysis_result(make_result("a"), self.output_folder)
+        self.clock.now = 61
+
+        self.store.save_analysis_result(make_result("a"), self.output_folder)
+
+        # The same result recorded twice is stored once
+        self.assertEqual(self.count_rows(), 1)
+
+    def test_close_writes_queued_rows(self):
+        """Rows queued when a long-running process stops are not lost"""
+        self.store.save_analysis_result(make_result("a"), self.output_folder)
+
+        self.store.close()
+
+        self.assertEqual(self.count_rows(), 1)
+
+    def test_timer_writes_a_result_no_other_follows(self):
+        """A lone result is written once it is max_delay seconds old"""
+        store = SQLiteResultStore(
+            self.db_path, MarkdownReportGenerator(), batch_size=10, max_delay=0.05
+        )
+        store.save_analysis_result(make_result("a"), self.output_folder)
+
+        deadline = time.monotonic() + 5
+        while self.count_rows() == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        self.assertEqual(self.count_rows(), 1)
+        store.close()
+
+    def test_summary_records_failures_once(self):
+        """Failed files are added with the summary, without repeating others"""
+        results = [
+            make_result("a", prompt_tokens=1000, output_tokens=200),
+            make_result("bb", prompt_tokens=500, output_tokens=100),
+            make_result("ccc", success=False),
+        ]
+        for result in results[:2]:
+            self.store.save_analysis_result(result, self.output_folder)
+
+        summary = self.store.create_summary_report(results, self.output_folder)
+
+        self.assertTrue(summary.endswith("summary_report.md"))
+        self.assertEqual(
+            self.store.get_totals(),
+            {
+                "files": 3,
+                "succeeded": 2,
+                "failed": 1,
+                "processing_time": 9.0,
+                "audio_duration": 270.0,
+                "prompt_tokens": 1500,
+                "output_tokens": 300,
+            },
+        )
+        self.assertEqual(self.store.get_totals(since="2025-01-01T00:02")["files"], 2)
+
+    def test_rows_are_kept_when_the_database_cannot_be_written(self):
+        """A failed write leaves the batch queued for the next flush"""
+        with sqlite3.connect(self.db_path) as db:
+            db.execute("ALTER TABLE result_texts RENAME TO moved")
+        self.store.record(make_result("a"))
+
+        self.assertEqual(self.store.flush(), 0)
+
+        with sqlite3.connect(self.db_path) as db:
+            db.execute("ALTER TABLE moved RENAME TO result_texts")
+        self.assertEqual(self.store.flush(), 1)
+        self.assertEqual(self.count_rows(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
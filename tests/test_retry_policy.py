@@ -0,0 +1,219 @@
+"""
+Unit tests for the retry policy
+تست‌های واحد برای سیاست تلاش مجدد
+"""
+
+import os
+import random
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+try:
+    from src.models import AudioFile
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.retry_policy import (
+        PERMANENT,
+        RETRYABLE,
+        RetryPolicy,
+        RetryStats,
+        classify_error,
+    )
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AudioFile
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.retry_policy import (
+        PERMANENT,
+        RETRYABLE,
+        RetryPolicy,
+        RetryStats,
+        classify_error,
+    )
+
+
+class ServiceUnavailable(Exception):
+    """Stand-in for google.api_core.exceptions.ServiceUnavailable"""
+
+
+class PermissionDenied(Exception):
+    """Stand-in for google.api_core.exceptions.PermissionDenied"""
+
+
+class TestClassifyError(unittest.TestCase):
+    """Test cases for classify_error"""
+
+    def test_transient_errors_are_retryable(self):
+        """Timeouts, dropped connections, 429 and 5xx errors are retried"""
+        for error in (
+            TimeoutError("read timed out"),
+            ConnectionResetError("reset by peer"),
+            ServiceUnavailable("backend down"),
+            Exception("429 Resource has been exhausted"),
+            Exception("503 The service is currently unavailable"),
+        ):
+            with self.subTest(error=error):
+                self.assertEqual(classify_error(error), RETRYABLE)
+
+    def test_client_errors_are_permanent(self):
+        """Auth, bad-request and missing-file errors are not retried"""
+        for error in (
+            PermissionDenied("caller does not have permission"),
+            FileNotFoundError("missing.mp3"),
+            Exception("400 Unsupported MIME type"),
+            Exception("API key not valid"),
+            Exception("something unexpected"),
+        ):
+            with self.subTest(error=error):
+                self.assertEqual(classify_error(error), PERMANENT)
+
+    def test_wrapped_errors_are_classified_by_cause(self):
+        """A RuntimeError raised from a transient error is retryable"""
+        try:
+            try:
+                raise ServiceUnavailable("backend down")
+            except ServiceUnavailable as e:
+                raise RuntimeError("Failed to generate analysis") from e
+        except RuntimeError as wrapped:
+            self.assertEqual(classify_error(wrapped), RETRYABLE)
+
+    def test_numeric_file_names_do_not_make_errors_retryable(self):
+        """A missing date-stamped file is permanent despite the 429 in its name"""
+        try:
+            try:
+                raise FileNotFoundError("No such file: '20240429_1530.mp3'")
+            except FileNotFoundError as e:
+                raise RuntimeError(
+                    "Failed to upload file 20240429_1530.mp3: 429 quota"
+                ) from e
+        except RuntimeError as wrapped:
+            self.assertEqual(classify_error(wrapped), PERMANENT)
+
+    def test_http_status_code_attribute(self):
+        """A numeric ``code`` attribute decides the class"""
+        server_error = Exception("boom")
+        server_error.code = 502
+        client_error = Exception("boom")
+        client_error.code = 401
+
+        self.assertEqual(classify_error(server_error), RETRYABLE)
+        self.assertEqual(classify_error(client_error), PERMANENT)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test cases for RetryPolicy"""
+
+    def setUp(self):
+        self.slept = []
+        self.policy = RetryPolicy(
+            max_attempts=4,
+            base_delay=1.0,
+            max_delay=3.0,
+            sleep=self.slept.append,
+            rng=random.Random(7),
+        )
+
+    def test_retries_until_success(self):
+        """Transient failures are retried and the backoff is recorded"""
+        operation = MagicMock(side_effect=[TimeoutError(), TimeoutError(), "done"])
+        stats = RetryStats()
+
+        self.assertEqual(self.policy.call(operation, stats, "arg"), "done")
+
+        self.assertEqual(operation.call_count, 3)
+        operation.assert_called_with("arg")
+        self.assertEqual(stats.retries, 2)
+        self.assertAlmostEqual(stats.retry_time, sum(self.slept))
+
+    def test_permanent_error_is_not_retried(self):
+        """A permanent error is raised after the first attempt"""
+        operation = MagicMock(side_effect=PermissionDenied("denied"))
+
+        with self.assertRaises(PermissionDenied):
+            self.policy.call(operation)
+
+        self.assertEqual(operation.call_count, 1)
+        self.assertEqual(self.slept, [])
+
+    def test_gives_up_after_max_attempts(self):
+        """The last error is raised once attempts are exhausted"""
+        operation = MagicMock(side_effect=TimeoutError("timed out"))
+
+        with self.assertRaises(TimeoutError):
+            self.policy.call(operation)
+
+        self.assertEqual(operation.call_count, 4)
+        self.assertEqual(len(self.slept), 3)
+
+    def test_backoff_is_jittered_and_capped(self):
+        """Delays stay within the exponential ceiling and max_delay"""
+        for attempt, ceiling in ((1, 1.0), (2, 2.0), (3, 3.0), (10, 3.0)):
+            delays = [self.policy.backoff_delay(attempt) for _ in range(50)]
+            self.assertTrue(all(0 <= delay <= ceiling for delay in delays))
+            self.assertGreater(len(set(delays)), 1)
+
+
+class TestGeminiAnalyzerRetries(unittest.TestCase):
+    """Test cases for GeminiAnalyzer with a retry policy"""
+
+    @patch("src.services.gemini_analyzer.genai")
+    def setUp(self, mock_genai):
+        self.slept = []
+        self.analyzer = GeminiAnalyzer(
+            ConfigurationService(api_key="test_key", model_name="model"),
+            PersianPromptProvider(),
+            retry_policy=RetryPolicy(
+                max_attempts=3, sleep=self.slept.append, rng=random.Random(1)
+            ),
+        )
+        self.client = MagicMock()
+        self.model = self.client.GenerativeModel.return_value
+        self.analyzer._client = self.client
+        self.audio_file = AudioFile(
+            file_path="call.mp3", file_name="call.mp3", file_size=1024
+        )
+
+    def test_transient_generate_error_is_retried(self):
+        """The result records the attempts and backoff time it needed"""
+        self.model.generate_content.side_effect = [
+            ServiceUnavailable("backend down"),
+            MagicMock(text="analysis"),
+        ]
+
+        result = self.analyzer.analyze_audio(self.audio_file)
+
+        self.assertTrue(result.is_successful)
+        self.assertEqual(result.analysis_text, "analysis")
+        self.assertEqual(result.attempts, 2)
+        self.assertAlmostEqual(result.retry_time, sum(self.slept))
+        self.client.upload_file.assert_called_once()
+
+    def test_permanent_upload_error_fails_immediately(self):
+        """Bad input is reported without retrying"""
+        self.client.upload_file.side_effect = Exception("400 Unsupported MIME type")
+
+        result = self.analyzer.analyze_audio(self.audio_file)
+
+        self.assertFalse(result.is_successful)
+        self.assertEqual(result.attempts, 1)
+        self.assertEqual(result.retry_time, 0.0)
+        self.client.upload_file.assert_called_once()
+
+    def test_exhausted_retries_are_recorded_on_failed_result(self):
+        """A pipelined file that keeps timing out reports every attempt"""
+        self.client.upload_file.side_effect = TimeoutError("timed out")
+
+        results = self.analyzer.analyze_audio_batch([self.audio_file])
+
+        self.assertFalse(results[0].is_successful)
+        self.assertEqual(results[0].attempts, 3)
+        self.assertEqual(self.client.upload_file.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Unit tests for scheduling policies
+تست‌های واحد برای سیاست‌های زمان‌بندی
+"""
+
+import os
+import sys
+import unittest
+
+try:
+    from src.models import AudioFile
+    from src.services.scheduling_policy import (
+        FifoPolicy,
+        LongestFirstPolicy,
+        ShortestFirstPolicy,
+        create_scheduling_policy,
+        estimate_seconds,
+    )
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AudioFile
+    from src.services.scheduling_policy import (
+        FifoPolicy,
+        LongestFirstPolicy,
+        ShortestFirstPolicy,
+        create_scheduling_policy,
+        estimate_seconds,
+    )
+
+
+class TestSchedulingPolicies(unittest.TestCase):
+    """Test cases for the scheduling policies"""
+
+    def setUp(self):
+        self.files = [
+            AudioFile(file_path="a.mp3", file_name="a.mp3", duration=60),
+            AudioFile(file_path="b.mp3", file_name="b.mp3", file_size=16000 * 600),
+            AudioFile(file_path="c.mp3", file_name="c.mp3", duration=5),
+            AudioFile(file_path="d.mp3", file_name="d.mp3", duration=60),
+        ]
+
+    def _names(self, audio_files):
+        return [audio_file.file_name for audio_file in audio_files]
+
+    def test_unknown_duration_is_estimated_from_size(self):
+        """Files without a duration are compared by their size"""
+        self.assertEqual(estimate_seconds(self.files[1]), 600)
+        self.assertEqual(estimate_seconds(AudioFile("e.mp3", "e.mp3")), 0)
+
+    def test_fifo_keeps_discovery_order(self):
+        """FIFO leaves the order unchanged"""
+        self.assertEqual(
+            self._names(FifoPolicy().order(self.files)), self._names(self.files)
+        )
+
+    def test_longest_first(self):
+        """Longest files come first and ties keep discovery order"""
+        ordered = LongestFirstPolicy().order(self.files)
+
+        self.assertEqual(self._names(ordered), ["b.mp3", "a.mp3", "d.mp3", "c.mp3"])
+
+    def test_shortest_first(self):
+        """Shortest files come first and ties keep discovery order"""
+        ordered = ShortestFirstPolicy().order(self.files)
+
+        self.assertEqual(self._names(ordered), ["c.mp3", "a.mp3", "d.mp3", "b.mp3"])
+
+    def test_create_by_name(self):
+        """Policies are created from their configuration names"""
+        self.assertIsInstance(
+            create_scheduling_policy("longest-first"), LongestFirstPolicy
+        )
+        self.assertIsInstance(
+            create_scheduling_policy("Shortest_First"), ShortestFirstPolicy
+        )
+        self.assertIsInstance(create_scheduling_policy(""), FifoPolicy)
+        with self.assertRaises(ValueError):
+            create_scheduling_policy("random")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -70,6 +70,49 @@ class TestAudioFileServiceComprehensive(unittest.TestCase):
             self.assertIn("wav", extensions)
             self.assertIn("m4a", extensions)
 
+    def test_find_audio_files_case_insensitive_and_nested(self):
+        """Upper-case extensions and nested folders are found in one walk"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            nested = Path(temp_dir, "2024", "january")
+            nested.mkdir(parents=True)
+            Path(temp_dir, "a.MP3").touch()
+            Path(temp_dir, "b.Wav").touch()
+            Path(nested, "c.flac").touch()
+            Path(nested, "notes.txt").touch()
+
+            audio_files = self.service.find_audio_files(temp_dir)
+
+            names = [af.file_name for af in audio_files]
+            self.assertEqual(names, ["a.MP3", "b.Wav", "c.flac"])
+            self.assertEqual(audio_files[0].format, "mp3")
+
+    def test_iter_audio_files_is_lazy_and_reuses_stat(self):
+        """Files are yielded lazily with sizes taken from directory entries"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            Path(temp_dir, "one.mp3").write_bytes(b"12345")
+            Path(temp_dir, "two.mp3").write_bytes(b"1")
+
+            with patch("os.path.getsize") as mock_getsize:
+                iterator = self.service.iter_audio_files(temp_dir)
+                first = next(iterator)
+                rest = list(iterator)
+
+            mock_getsize.assert_not_called()
+            self.assertEqual((first.file_name, first.file_size), ("one.mp3", 5))
+            self.assertEqual([af.file_name for af in rest], ["two.mp3"])
+
+    def test_find_audio_files_skips_hidden_entries(self):
+        """Hidden files and folders are ignored like the previous glob search"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            Path(temp_dir, ".trash").mkdir()
+            Path(temp_dir, ".trash", "old.mp3").touch()
+            Path(temp_dir, ".partial.mp3").touch()
+            Path(temp_dir, "call.mp3").touch()
+
+            audio_files = self.service.find_audio_files(temp_dir)
+
+            self.assertEqual([af.file_name for af in audio_files], ["call.mp3"])
+
     def test_get_files_empty_directory(self):
         """Test getting files from empty directory"""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -238,6 +281,59 @@ class TestGeminiAnalyzerComprehensive(unittest.TestCase):
         self.assertIsNotNone(context.exception.__cause__)
         self.assertIsInstance(context.exception.__cause__, ValueError)
 
+    def test_model_objects_are_reused(self):
+        """One model object per configuration serves every request and thread"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.analyzer._client = MagicMock()
+        model = self.analyzer._client.GenerativeModel.return_value
+        model.generate_content.return_value = MagicMock(text="transcript")
+        test_files = [
+            AudioFile(file_path=f"{i}.mp3", file_name=f"{i}.mp3") for i in range(8)
+        ]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(self.analyzer.analyze_audio, test_files))
+
+        self.assertTrue(all(result.success for result in results))
+        self.analyzer._client.GenerativeModel.assert_called_once_with(
+            "test_model",
+            system_instruction=self.analyzer._prompt_provider.get_analysis_prompt(),
+        )
+        # The prompt travels as the system instruction, not with every file
+        contents = model.generate_content.call_args.args[0]
+        self.assertEqual(contents, [self.analyzer._client.upload_file.return_value])
+
+    def test_token_counts_are_recorded(self):
+        """Usage metadata of the response ends up on the result"""
+        self.analyzer._client = MagicMock()
+        model = self.analyzer._client.GenerativeModel.return_value
+        model.generate_content.return_value = MagicMock(
+            text="transcript",
+            usage_metadata=MagicMock(
+                prompt_token_count=1200, candidates_token_count=300
+            ),
+        )
+        test_file = AudioFile(file_path="test.mp3", file_name="test.mp3")
+
+        result = self.analyzer.analyze_audio(test_file)
+
+        self.assertEqual(result.prompt_tokens, 1200)
+        self.assertEqual(result.output_tokens, 300)
+        self.assertEqual(result.to_dict()["output_tokens"], 300)
+
+    def test_model_objects_differ_per_generation_config(self):
+        """Changing the model name or generation config builds a new model"""
+        self.analyzer._client = MagicMock()
+
+        first = self.analyzer._get_model("model-a", generation_config={"t": 0})
+        again = self.analyzer._get_model("model-a", generation_config={"t": 0})
+        self.analyzer._get_model("model-a", generation_config={"t": 1})
+        self.analyzer._get_model("model-b", generation_config={"t": 0})
+
+        self.assertIs(first, again)
+        self.assertEqual(self.analyzer._client.GenerativeModel.call_count, 3)
+
 
 class TestPromptProviderComprehensive(unittest.TestCase):
     """Comprehensive tests for PromptProvider"""
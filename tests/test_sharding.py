@@ -0,0 +1,161 @@
+"""
+Unit tests for multi-node sharding
+تست‌های واحد برای تقسیم فایل‌ها بین چند گره
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+try:
+    from src.application import VoiceToTextApplication
+    from src.models import AnalysisResult, AudioFile
+    from src.services.audio_file_service import AudioFileService
+    from src.services.configuration_service import ConfigurationService
+    from src.services.report_generator import MarkdownReportGenerator
+    from src.services.sharding import ShardResultStore, ShardSelector, parse_shard
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.application import VoiceToTextApplication
+    from src.models import AnalysisResult, AudioFile
+    from src.services.audio_file_service import AudioFileService
+    from src.services.configuration_service import ConfigurationService
+    from src.services.report_generator import MarkdownReportGenerator
+    from src.services.sharding import ShardResultStore, ShardSelector, parse_shard
+
+
+def audio_files(root, count=60):
+    return [
+        AudioFile(file_path=os.path.join(root, f"day{i % 3}", f"{i}.mp3"), file_name="")
+        for i in range(count)
+    ]
+
+
+class TestShardSelector(unittest.TestCase):
+    """Test cases for ShardSelector"""
+
+    def test_parse_shard(self):
+        """Specs are 1-based i/N"""
+        self.assertEqual(parse_shard("2/3"), (2, 3))
+        self.assertEqual(parse_shard(" 1 / 1 "), (1, 1))
+        for spec in ("0/3", "4/3", "3", "a/b", ""):
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    parse_shard(spec)
+
+    def test_shards_are_disjoint_and_complete(self):
+        """Every file is taken by exactly one node"""
+        files = audio_files("/mnt/voice")
+
+        shares = [ShardSelector(i, 3).select(files, "/mnt/voice") for i in range(1, 4)]
+
+        taken = [f.file_path for share in shares for f in share]
+        self.assertEqual(sorted(taken), sorted(f.file_path for f in files))
+        self.assertTrue(all(share for share in shares))
+
+    def test_assignment_does_not_depend_on_mount_point(self):
+        """Nodes mounting the share at different paths agree"""
+        first = ShardSelector(1, 3).select(audio_files("/mnt/a"), "/mnt/a")
+        second = ShardSelector(1, 3).select(audio_files("/data/b"), "/data/b")
+
+        self.assertEqual(
+            [os.path.relpath(f.file_path, "/mnt/a") for f in first],
+            [os.path.relpath(f.file_path, "/data/b") for f in second],
+        )
+
+    def test_adding_a_node_only_moves_files_to_it(self):
+        """Growing from 3 to 4 nodes keeps every other assignment"""
+        files = audio_files("/voice")
+        keys = [os.path.relpath(f.file_path, "/voice") for f in files]
+
+        before = [ShardSelector(1, 3).owner(key) for key in keys]
+        after = [ShardSelector(1, 4).owner(key) for key in keys]
+
+        moved = [(b, a) for b, a in zip(before, after) if b != a]
+        self.assertTrue(moved)
+        self.assertTrue(all(a == 4 for _, a in moved))
+
+
+class TestShardResultStore(unittest.TestCase):
+    """Test cases for ShardResultStore"""
+
+    def test_results_of_all_nodes_are_merged(self):
+        """Each node's saved results are combined and missing nodes reported"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = ShardResultStore(temp_dir)
+            first = AnalysisResult(
+                AudioFile(file_path="/v/b.mp3", file_name="b.mp3", file_size=10),
+                "text",
+                processing_time=2.0,
+                output_file_path="/r/b_analysis.md",
+            )
+            second = AnalysisResult(
+                AudioFile(file_path="/v/a.mp3", file_name="a.mp3", file_size=20),
+                "",
+                success=False,
+                error_message="failed",
+            )
+            store.save(ShardSelector(1, 3), [first])
+            store.save(ShardSelector(2, 3), [second])
+
+            results, missing = store.load(3)
+
+            self.assertEqual([r.file_name for r in results], ["a.mp3", "b.mp3"])
+            self.assertEqual(missing, [3])
+            self.assertFalse(results[0].is_successful)
+            self.assertEqual(results[1].analysis_text, "text")
+            self.assertEqual(results[1].output_file_path, "/r/b_analysis.md")
+            self.assertEqual(results[1].audio_file.file_size, 10)
+
+
+class TestShardedApplication(unittest.TestCase):
+    """Test cases for sharded runs of VoiceToTextApplication"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.assets = self.temp_dir.name
+        voice = Path(self.assets, "voice")
+        voice.mkdir()
+        self.file_names = [f"{i}.mp3" for i in range(12)]
+        for name in self.file_names:
+            Path(voice, name).write_bytes(b"fake audio")
+        self.output = os.path.join(self.assets, "results")
+        self.config = ConfigurationService(api_key="test_key", model_name="test")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _run_node(self, index, count):
+        analyzer = MagicMock()
+        analyzer.analyze_audio.side_effect = lambda audio_file: AnalysisResult(
+            audio_file, f"analysis of {audio_file.file_name}", processing_time=1.0
+        )
+        app = VoiceToTextApplication(
+            audio_service=AudioFileService(self.config),
+            ai_analyzer=analyzer,
+            report_generator=MarkdownReportGenerator(),
+            config_service=self.config,
+            shard_selector=ShardSelector(index, count),
+        )
+        return app.process_audio_files(self.assets, self.output)
+
+    def test_nodes_split_the_folder_and_merge_the_summary(self):
+        """Two nodes analyze disjoint files and the summary covers both"""
+        first = self._run_node(1, 2)
+        second = self._run_node(2, 2)
+
+        names = sorted(r.file_name for r in first + second)
+        self.assertEqual(names, sorted(self.file_names))
+        self.assertFalse({r.file_name for r in first} & {r.file_name for r in second})
+
+        summary = Path(self.output, "summary_report.md").read_text(encoding="utf-8")
+        for name in self.file_names:
+            self.assertIn(f"`{name}`", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,265 @@
+"""
+Unit tests for voice activity detection and silence trimming
+تست‌های واحد برای تشخیص فعالیت صوتی و حذف سکوت
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+try:
+    from src.models import AudioFile, TimelineMap
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.silence_trimmer import (
+        SilenceTrimmer,
+        detect_speech,
+        plan_segments,
+        read_wav,
+        write_wav,
+    )
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AudioFile, TimelineMap
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.silence_trimmer import (
+        SilenceTrimmer,
+        detect_speech,
+        plan_segments,
+        read_wav,
+        write_wav,
+    )
+
+SAMPLE_RATE = 16000
+
+
+def synthesize(layout):
+    """Build a signal from (seconds, is_speech) parts with faint background noise"""
+    rng = np.random.default_rng(0)
+    parts = []
+    for seconds, is_speech in layout:
+        count = int(seconds * SAMPLE_RATE)
+        noise = rng.normal(0, 0.001, count)
+        if is_speech:
+            t = np.arange(count) / SAMPLE_RATE
+            noise += 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 3 * t))
+        parts.append(noise)
+    return np.concatenate(parts).astype(np.float32)
+
+
+# 3 s silence, 4 s speech, 5 s pause, 3 s speech, 4 s silence
+CALL_LAYOUT = [(3, False), (4, True), (5, False), (3, True), (4, False)]
+
+
+class TestVoiceActivityDetection(unittest.TestCase):
+    """Test cases for detect_speech and plan_segments"""
+
+    def test_detects_speech_regions(self):
+        """Speech is found where it is and nowhere else"""
+        regions = detect_speech(synthesize(CALL_LAYOUT), SAMPLE_RATE)
+
+        self.assertEqual(len(regions), 2)
+        for (start, end), (expected_start, expected_end) in zip(
+            regions, [(3, 7), (12, 15)]
+        ):
+            self.assertAlmostEqual(start, expected_start, delta=0.4)
+            self.assertAlmostEqual(end, expected_end, delta=0.4)
+
+    def test_continuous_speech_is_one_region(self):
+        """A recording without silence is kept whole"""
+        regions = detect_speech(synthesize([(5, True)]), SAMPLE_RATE)
+
+        self.assertEqual(len(regions), 1)
+        self.assertAlmostEqual(regions[0][1] - regions[0][0], 5, delta=0.1)
+
+    def test_edges_only_keeps_internal_pauses(self):
+        """Without pause compression one segment spans all speech"""
+        segments = plan_segments([(3, 7), (12, 15)], 19, padding=0.3)
+
+        self.assertEqual(segments, [(2.7, 15.3)])
+
+    def test_long_pauses_are_compressed(self):
+        """Pauses longer than max_pause shrink to max_pause"""
+        segments = plan_segments([(3, 7), (12, 15)], 19, padding=0.5, max_pause=2)
+
+        self.assertEqual(segments, [(2.5, 8.5), (10.5, 15.5)])
+
+
+class TestTimelineMap(unittest.TestCase):
+    """Test cases for TimelineMap"""
+
+    def setUp(self):
+        self.timeline = TimelineMap(segments=[(10, 20), (30, 40)], original_duration=45)
+
+    def test_times_map_back_to_original(self):
+        """Times inside each kept segment are shifted by the removed audio"""
+        self.assertEqual(self.timeline.to_original(5), 15)
+        self.assertEqual(self.timeline.to_original(12), 32)
+        self.assertEqual(self.timeline.to_original(10, is_end=True), 20)
+        self.assertEqual(self.timeline.to_original(10), 30)
+
+    def test_remaps_transcript_timestamps(self):
+        """[mm:ss-mm:ss] ranges in the analysis are rewritten"""
+        text = "**[00:05-00:10] مشتری**: سلام\n**[00:12-00:15] اپراتور**: بفرمایید"
+
+        remapped = self.timeline.remap_timestamps(text)
+
+        self.assertIn("**[00:15-00:20] مشتری**", remapped)
+        self.assertIn("**[00:32-00:35] اپراتور**", remapped)
+
+    def test_round_trips_through_dict(self):
+        """Serialized maps are restored unchanged"""
+        self.assertEqual(TimelineMap.from_dict(self.timeline.to_dict()), self.timeline)
+
+
+class TestSilenceTrimmer(unittest.TestCase):
+    """Test cases for SilenceTrimmer"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "trimmed")
+        self.audio_file = self._write("call.wav", synthesize(CALL_LAYOUT))
+        self.which = patch(
+            "src.services.silence_trimmer.shutil.which", return_value=None
+        )
+        self.which.start()
+
+    def tearDown(self):
+        self.which.stop()
+        self.temp_dir.cleanup()
+
+    def _write(self, name, samples):
+        path = os.path.join(self.temp_dir.name, name)
+        write_wav(path, samples, SAMPLE_RATE)
+        return AudioFile(
+            file_path=path, file_name=name, file_size=os.path.getsize(path)
+        )
+
+    def test_trims_leading_and_trailing_silence(self):
+        """The trimmed WAV is shorter and the timeline records what was kept"""
+        trimmed, timeline = SilenceTrimmer(self.cache_dir).trim(self.audio_file)
+
+        samples, _ = read_wav(trimmed.file_path)
+        self.assertEqual(trimmed.file_name, "call.wav")
+        self.assertLess(trimmed.file_size, self.audio_file.file_size)
+        self.assertEqual(len(timeline.segments), 1)
+        self.assertAlmostEqual(timeline.segments[0][0], 2.7, delta=0.4)
+        self.assertAlmostEqual(len(samples) / SAMPLE_RATE, 12.6, delta=0.8)
+
+    def test_compress_pauses_cuts_internal_silence(self):
+        """Long internal pauses are shortened as well"""
+        _, edges = SilenceTrimmer(self.cache_dir).trim(self.audio_file)
+        _, timeline = SilenceTrimmer(self.cache_dir, compress_pauses=True).trim(
+            self.audio_file
+        )
+
+        self.assertEqual(len(timeline.segments), 2)
+        self.assertLess(timeline.trimmed_duration, edges.trimmed_duration - 1.5)
+
+    def test_result_is_cached_across_instances(self):
+        """A second trimmer reuses the cached WAV without decoding"""
+        first, _ = SilenceTrimmer(self.cache_dir).trim(self.audio_file)
+
+        trimmer = SilenceTrimmer(self.cache_dir)
+        with patch.object(trimmer, "_decode") as decode:
+            second, timeline = trimmer.trim(self.audio_file)
+
+        decode.assert_not_called()
+        self.assertEqual(first.file_path, second.file_path)
+        self.assertIsNotNone(timeline)
+
+    def test_little_silence_keeps_the_original(self):
+        """Recordings with almost no dead air are uploaded unchanged"""
+        audio_file = self._write("speech.wav", synthesize([(6, True)]))
+
+        trimmed, timeline = SilenceTrimmer(self.cache_dir).trim(audio_file)
+
+        self.assertIs(trimmed, audio_file)
+        self.assertIsNone(timeline)
+
+    def test_compressed_source_keeps_the_original(self):
+        """Trimmed audio that is not smaller than the source is not uploaded"""
+        compressed = AudioFile(
+            file_path=self.audio_file.file_path,
+            file_name="call.mp3",
+            file_size=self.audio_file.file_size // 4,
+        )
+
+        trimmed, timeline = SilenceTrimmer(self.cache_dir).trim(compressed)
+
+        self.assertIs(trimmed, compressed)
+        self.assertIsNone(timeline)
+        self.assertEqual(
+            [name for name in os.listdir(self.cache_dir) if name.endswith(".wav")],
+            [],
+        )
+
+    def test_kept_audio_is_encoded_with_ffmpeg(self):
+        """With ffmpeg the kept ranges are uploaded as compact Opus"""
+        commands = []
+
+        def fake_run(command, check=True, capture_output=True):
+            commands.append(command)
+            with open(command[-1], "wb") as f:
+                f.write(b"o" * 100)
+
+        trimmer = SilenceTrimmer(self.cache_dir, ffmpeg_path="ffmpeg")
+        with patch.object(
+            trimmer, "_decode", return_value=read_wav(self.audio_file.file_path)
+        ), patch("src.services.audio_preprocessor.subprocess.run", fake_run):
+            trimmed, timeline = trimmer.trim(self.audio_file)
+
+        self.assertTrue(trimmed.file_path.endswith(".ogg"))
+        self.assertEqual(trimmed.file_size, 100)
+        self.assertIsNotNone(timeline)
+        self.assertEqual(commands[0][commands[0].index("-c:a") + 1], "libopus")
+        self.assertFalse(
+            any(name.endswith(".tmp.wav") for name in os.listdir(self.cache_dir))
+        )
+
+    def test_undecodable_file_keeps_the_original(self):
+        """Formats that need ffmpeg are skipped when it is missing"""
+        path = os.path.join(self.temp_dir.name, "call.mp3")
+        with open(path, "wb") as f:
+            f.write(b"not really mp3")
+        audio_file = AudioFile(file_path=path, file_name="call.mp3", file_size=14)
+
+        trimmed, timeline = SilenceTrimmer(self.cache_dir).trim(audio_file)
+
+        self.assertIs(trimmed, audio_file)
+        self.assertIsNone(timeline)
+
+    @patch("src.services.gemini_analyzer.genai")
+    def test_analyzer_maps_timestamps_back(self, mock_genai):
+        """Timestamps of the trimmed upload are reported on the original timeline"""
+        analyzer = GeminiAnalyzer(
+            ConfigurationService(api_key="test_key", model_name="model"),
+            PersianPromptProvider(),
+            silence_trimmer=SilenceTrimmer(self.cache_dir),
+        )
+        analyzer._client = MagicMock()
+        model = analyzer._client.GenerativeModel.return_value
+        model.generate_content.return_value = MagicMock(
+            text="**[00:00-00:04] مشتری**: سلام"
+        )
+
+        result = analyzer.analyze_audio(self.audio_file)
+
+        uploaded_path = analyzer._client.upload_file.call_args[0][0]
+        self.assertTrue(uploaded_path.startswith(self.cache_dir))
+        self.assertTrue(result.is_successful)
+        self.assertIsNotNone(result.timeline)
+        # The kept audio starts about 2.4 s into the original recording
+        self.assertIn("[00:02-00:06]", result.analysis_text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,306 @@
+"""
+Unit tests for structured (JSON) analysis output
+تست‌های واحد برای خروجی تحلیل ساختاریافته
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from google.generativeai.types import generation_types
+
+try:
+    from src.models import AnalysisResult, AudioChunk, AudioFile, StructuredAnalysis
+    from src.models.timeline_map import TimelineMap
+    from src.services.audio_chunker import merge_structured_analyses
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import (
+        ANALYSIS_RESPONSE_SCHEMA,
+        EnglishPromptProvider,
+        PersianPromptProvider,
+    )
+    from src.services.report_generator import MarkdownReportGenerator
+    from src.services.result_cache import ResultCache
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AnalysisResult, AudioChunk, AudioFile, StructuredAnalysis
+    from src.models.timeline_map import TimelineMap
+    from src.services.audio_chunker import merge_structured_analyses
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import (
+        ANALYSIS_RESPONSE_SCHEMA,
+        EnglishPromptProvider,
+        PersianPromptProvider,
+    )
+    from src.services.report_generator import MarkdownReportGenerator
+    from src.services.result_cache import ResultCache
+
+REPLY = {
+    "summary": "Customer asks about a late delivery",
+    "segments": [
+        {"start": "00:05", "end": "00:18", "speaker": "مشتری", "text": "سلام"},
+        {"start": "00:18", "end": "01:02", "speaker": "اپراتور", "text": "بفرمایید"},
+    ],
+    "topics": [
+        {"topic": "delivery", "category": "logistics", "start": "00:10", "end": "00:50"}
+    ],
+    "sentiment": {
+        "primary_emotion": "frustrated",
+        "emotion_intensity": 4,
+        "conversation_satisfaction": 2,
+        "outcome_satisfaction": 3,
+        "stress_level": 4,
+    },
+    "quality": {"audio_quality": 5, "speech_clarity": 4, "comprehensibility": 4},
+    "tags": ["delivery", "complaint"],
+}
+
+
+class TestStructuredAnalysis(unittest.TestCase):
+    """Test cases for StructuredAnalysis"""
+
+    def test_reply_is_parsed_into_typed_fields(self):
+        """Times become seconds and ratings integers"""
+        analysis = StructuredAnalysis.from_json(json.dumps(REPLY))
+
+        self.assertEqual(len(analysis.segments), 2)
+        self.assertEqual(analysis.segments[1].start, 18.0)
+        self.assertEqual(analysis.segments[1].end, 62.0)
+        self.assertEqual(analysis.segments[0].speaker, "مشتری")
+        self.assertEqual(analysis.topics[0].duration, 40.0)
+        self.assertEqual(analysis.sentiment.conversation_satisfaction, 2)
+        self.assertEqual(analysis.quality.audio_quality, 5)
+        self.assertEqual(analysis.tags, ["delivery", "complaint"])
+
+    def test_malformed_entries_are_tolerated(self):
+        """Bad entries are skipped and ratings clamped to 1-5"""
+        reply = {
+            "segments": [
+                {"start": "soon", "end": "00:03", "speaker": "a", "text": "x"},
+                {"start": 1.5, "end": "[00:04]", "speaker": "b", "text": "y"},
+                "not an object",
+            ],
+            "sentiment": {
+                "emotion_intensity": 9,
+                "conversation_satisfaction": float("inf"),
+                "outcome_satisfaction": "nan",
+                "stress_level": "high",
+            },
+            "quality": None,
+        }
+
+        analysis = StructuredAnalysis.from_json(
+            "```json\n" + json.dumps(reply) + "\n```"
+        )
+
+        self.assertEqual([s.speaker for s in analysis.segments], ["b"])
+        self.assertEqual(analysis.segments[0].end, 4.0)
+        self.assertEqual(analysis.sentiment.emotion_intensity, 5)
+        self.assertIsNone(analysis.sentiment.conversation_satisfaction)
+        self.assertIsNone(analysis.sentiment.outcome_satisfaction)
+        self.assertIsNone(analysis.sentiment.stress_level)
+        self.assertIsNone(analysis.quality.audio_quality)
+
+    def test_invalid_reply_raises(self):
+        """A reply that is not a JSON object is rejected"""
+        for text in ("## Markdown", "[1, 2]"):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    StructuredAnalysis.from_json(text)
+
+    def test_round_trip_and_markdown(self):
+        """Serialized analyses restore equal and render report sections"""
+        analysis = StructuredAnalysis.from_dict(REPLY)
+
+        self.assertEqual(StructuredAnalysis.from_json(analysis.to_json()), analysis)
+        markdown = analysis.to_markdown()
+        self.assertIn("**[00:18-01:02] اپراتور**: بفرمایید", markdown)
+        self.assertIn("**[00:10-00:50]** delivery (logistics)", markdown)
+        self.assertIn("⭐⭐ (2/5)", markdown)
+
+    def test_markdown_uses_the_given_labels(self):
+        """English labels replace the default Persian headings"""
+        markdown = StructuredAnalysis.from_dict(REPLY).to_markdown(
+            EnglishPromptProvider().get_report_labels()
+        )
+
+        self.assertIn("## 1. Complete Transcript with Timestamps", markdown)
+        self.assertIn("- **Stress level:**", markdown)
+        self.assertNotIn("خلاصه", markdown)
+
+    def test_times_are_remapped_to_the_original_recording(self):
+        """Trimmed-audio times move back like Markdown timestamps do"""
+        timeline = TimelineMap(segments=[(0.0, 10.0), (30.0, 100.0)])
+
+        analysis = StructuredAnalysis.from_dict(REPLY).remapped(timeline)
+
+        self.assertEqual(analysis.segments[0].start, 5.0)
+        self.assertEqual(analysis.segments[0].end, 38.0)
+        self.assertEqual(analysis.topics[0].start, 30.0)
+
+    def test_chunks_are_merged_without_overlap_repeats(self):
+        """Segment times are shifted, repeats dropped and ratings averaged"""
+        source = AudioFile(file_path="long.wav", file_name="long.wav")
+        chunks = [
+            AudioChunk(audio_file=source, index=0, start=0.0, end=65.0),
+            AudioChunk(audio_file=source, index=1, start=60.0, end=120.0),
+        ]
+        second = dict(
+            REPLY,
+            segments=[
+                {
+                    "start": "00:00",
+                    "end": "00:02",
+                    "speaker": "اپراتور",
+                    "text": "بفرمایید",
+                },
+                {"start": "00:10", "end": "00:20", "speaker": "مشتری", "text": "ممنون"},
+            ],
+            sentiment=dict(REPLY["sentiment"], conversation_satisfaction=4),
+        )
+
+        merged = merge_structured_analyses(
+            chunks,
+            [StructuredAnalysis.from_dict(REPLY), StructuredAnalysis.from_dict(second)],
+        )
+
+        self.assertEqual(
+            [(s.start, s.text) for s in merged.segments],
+            [(5.0, "سلام"), (18.0, "بفرمایید"), (70.0, "ممنون")],
+        )
+        self.assertEqual([t.start for t in merged.topics], [10.0, 70.0])
+        self.assertEqual(merged.sentiment.conversation_satisfaction, 3)
+        self.assertEqual(merged.tags, ["delivery", "complaint"])
+
+
+class TestResponseSchema(unittest.TestCase):
+    """Test cases for the prompt providers' response schema"""
+
+    def test_schema_is_accepted_by_the_sdk(self):
+        """The schema converts to a Gemini generation config"""
+        config = generation_types.to_generation_config_dict(
+            {
+                "response_mime_type": "application/json",
+                "response_schema": ANALYSIS_RESPONSE_SCHEMA,
+            }
+        )
+
+        self.assertIn("response_schema", config)
+
+    def test_providers_ship_the_schema(self):
+        """Both languages offer a structured prompt and the schema"""
+        for provider in (PersianPromptProvider(), EnglishPromptProvider()):
+            with self.subTest(provider=type(provider).__name__):
+                self.assertIs(provider.get_response_schema(), ANALYSIS_RESPONSE_SCHEMA)
+                self.assertIn("JSON", provider.get_structured_prompt())
+
+
+class TestGeminiAnalyzerStructuredOutput(unittest.TestCase):
+    """Test cases for GeminiAnalyzer in structured output mode"""
+
+    @patch("src.services.gemini_analyzer.genai")
+    def setUp(self, mock_genai):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        audio_path = Path(self.temp_dir.name, "call.mp3")
+        audio_path.write_bytes(b"fake audio bytes")
+        self.audio_file = AudioFile(file_path=str(audio_path), file_name="call.mp3")
+
+        self.provider = PersianPromptProvider()
+        self.cache = ResultCache(os.path.join(self.temp_dir.name, "cache"))
+        self.analyzer = GeminiAnalyzer(
+            ConfigurationService(api_key="test_key", model_name="model-a"),
+            self.provider,
+            result_cache=self.cache,
+            structured_output=True,
+        )
+        self.client = MagicMock()
+        self.model = self.client.GenerativeModel.return_value
+        self.model.generate_content.return_value = MagicMock(text=json.dumps(REPLY))
+        self.analyzer._client = self.client
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_json_is_requested_and_parsed(self):
+        """The model is asked for JSON and the reply fills typed fields"""
+        result = self.analyzer.analyze_audio(self.audio_file)
+
+        self.assertTrue(result.is_successful)
+        options = self.client.GenerativeModel.call_args.kwargs
+        self.assertEqual(
+            options["generation_config"],
+            {
+                "response_mime_type": "application/json",
+                "response_schema": ANALYSIS_RESPONSE_SCHEMA,
+            },
+        )
+        self.assertEqual(
+            options["system_instruction"], self.provider.get_structured_prompt()
+        )
+        self.assertEqual(result.structured.sentiment.stress_level, 4)
+        self.assertIn("**[00:05-00:18] مشتری**: سلام", result.analysis_text)
+        self.assertEqual(result.to_dict()["structured"]["tags"], REPLY["tags"])
+
+    @patch("src.services.gemini_analyzer.genai")
+    def test_report_follows_the_prompt_language(self, mock_genai):
+        """English prompts render the parsed reply with English headings"""
+        analyzer = GeminiAnalyzer(
+            ConfigurationService(api_key="test_key", model_name="model-a"),
+            EnglishPromptProvider(),
+            structured_output=True,
+        )
+        analyzer._client = self.client
+
+        result = analyzer.analyze_audio(self.audio_file)
+
+        self.assertIn("## 2. Summary", result.analysis_text)
+        self.assertNotIn("خلاصه", result.analysis_text)
+
+    def test_cached_result_keeps_the_typed_fields(self):
+        """A result served from the result cache is still structured"""
+        self.analyzer.analyze_audio(self.audio_file)
+
+        cached = self.analyzer.analyze_audio(self.audio_file)
+
+        self.assertTrue(cached.from_cache)
+        self.assertEqual(cached.structured, StructuredAnalysis.from_dict(REPLY))
+
+    def test_invalid_json_fails_the_file(self):
+        """A reply that cannot be parsed is reported as a failure"""
+        self.model.generate_content.return_value = MagicMock(text="not json")
+
+        result = self.analyzer.analyze_audio(self.audio_file)
+
+        self.assertFalse(result.is_successful)
+        self.assertIn("JSON", result.error_message)
+
+
+class TestStructuredReport(unittest.TestCase):
+    """Test cases for saving structured results"""
+
+    def test_json_is_saved_next_to_the_report(self):
+        """A structured result also gets an _analysis.json file"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result = AnalysisResult(
+                AudioFile(file_path="call.mp3", file_name="call.mp3"),
+                "report text",
+                structured=StructuredAnalysis.from_dict(REPLY),
+            )
+
+            report = MarkdownReportGenerator().save_analysis_result(result, temp_dir)
+
+            json_path = os.path.join(temp_dir, "call_analysis.json")
+            self.assertTrue(report.endswith("call_analysis.md"))
+            with open(json_path, encoding="utf-8") as f:
+                self.assertEqual(f.read().count('"speaker"'), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+"""
+Unit tests for the uploaded file registry
+تست‌های واحد برای دفتر ثبت فایل‌های آپلود شده
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+try:
+    from src.models import AudioFile
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.upload_registry import UploadRegistry
+except ImportError:
+    # Fallback for different import paths
+    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from src.models import AudioFile
+    from src.services.configuration_service import ConfigurationService
+    from src.services.gemini_analyzer import GeminiAnalyzer
+    from src.services.prompt_provider import PersianPromptProvider
+    from src.services.upload_registry import UploadRegistry
+
+
+def make_uploaded_file(name, expires_in):
+    uploaded = MagicMock()
+    uploaded.name = name
+    uploaded.expiration_time = datetime.now(timezone.utc) + timedelta(
+        seconds=expires_in
+    )
+    return uploaded
+
+
+class TestUploadRegistry(unittest.TestCase):
+    """Test cases for UploadRegistry"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "uploads.sqlite")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_registered_upload_is_reusable(self):
+        """A fresh upload is returned by name"""
+        registry = UploadRegistry(self.path)
+
+        registry.register("hash", make_uploaded_file("files/abc", 7200 * 10))
+
+        self.assertEqual(registry.get("hash"), "files/abc")
+
+    def test_upload_close_to_expiry_is_not_reused(self):
+        """Handles inside the safety margin are dropped"""
+        registry = UploadRegistry(self.path, safety_margin=3600)
+
+        registry.register("hash", make_uploaded_file("files/abc", 600))
+
+        self.assertIsNone(registry.get("hash"))
+        self.assertEqual(len(registry), 0)
+
+    def test_processes_sharing_the_registry_keep_each_others_entries(self):
+        """Registering through one instance does not drop another's entries"""
+        first, second = UploadRegistry(self.path), UploadRegistry(self.path)
+        first.get("a")
+        second.get("b")
+
+        first.register("a", make_uploaded_file("files/a", 7200 * 10))
+        second.register("b", make_uploaded_file("files/b", 7200 * 10))
+
+        self.assertEqual(first.get("b"), "files/b")
+        self.assertEqual(second.get("a"), "files/a")
+        self.assertEqual(len(UploadRegistry(self.path)), 2)
+
+    def test_unusable_registry_only_disables_reuse(self):
+        """A registry that cannot be written never raises"""
+        blocker = os.path.join(self.temp_dir.name, "file")
+        Path(blocker).write_text("not a folder")
+        registry = UploadRegistry(os.path.join(blocker, "uploads.sqlite"))
+
+        registry.register("hash", make_uploaded_file("files/abc", 7200 * 10))
+        registry.forget("hash")
+
+        self.assertIsNone(registry.get("hash"))
+        self.assertEqual(len(registry), 0)
+
+    def test_missing_expiry_uses_default_ttl(self):
+        """Handles without an expiration time get the Gemini default TTL"""
+        registry = UploadRegistry(self.path)
+        uploaded = MagicMock()
+        uploaded.name = "files/abc"
+        uploaded.expiration_time = None
+
+        registry.register("hash", uploaded)
+
+        self.assertEqual(registry.get("hash"), "files/abc")
+
+    def test_registry_persists_across_instances(self):
+        """Entries are written to disk and reloaded"""
+        UploadRegistry(self.path).register(
+            "hash", make_uploaded_file("files/abc", 7200 * 10)
+        )
+
+        self.assertEqual(UploadRegistry(self.path).get("hash"), "files/abc")
+
+    def test_forget_removes_entry(self):
+        """Forgotten entries are no longer returned"""
+        registry = UploadRegistry(self.path)
+        registry.register("hash", make_uploaded_file("files/abc", 7200 * 10))
+
+        registry.forget("hash")
+
+        self.assertIsNone(UploadRegistry(self.path).get("hash"))
+
+
+class TestGeminiAnalyzerUploadReuse(unittest.TestCase):
+    """Test cases for GeminiAnalyzer with an upload registry"""
+
+    @patch("src.services.gemini_analyzer.genai")
+    def setUp(self, mock_genai):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        audio_path = Path(self.temp_dir.name, "call.mp3")
+        audio_path.write_bytes(b"fake audio bytes")
+        self.audio_path = str(audio_path)
+
+        self.registry = UploadRegistry(os.path.join(self.temp_dir.name, "up.sqlite"))
+        self.analyzer = GeminiAnalyzer(
+            ConfigurationService(api_key="test_key", model_name="model"),
+            PersianPromptProvider(),
+            upload_registry=self.registry,
+        )
+        self.client = MagicMock()
+        self.client.upload_file.return_value = make_uploaded_file(
+            "files/abc", 7200 * 10
+        )
+        self.client.GenerativeModel.return_value.generate_content.return_value = (
+            MagicMock(text="analysis")
+        )
+        self.analyzer._client = self.client
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _audio_file(self):
+        return AudioFile(file_path=self.audio_path, file_name="call.mp3")
+
+    def test_second_analysis_reuses_remote_file(self):
+        """Identical audio is fetched by name instead of re-uploaded"""
+        self.analyzer.analyze_audio(self._audio_file())
+        result = self.analyzer.analyze_audio(self._audio_file())
+
+        self.assertTrue(result.is_successful)
+        self.assertEqual(self.client.upload_file.call_count, 1)
+        self.client.get_file.assert_called_once_with("files/abc")
+
+    def test_other_preprocessing_settings_upload_again(self):
+        """Audio shaped by different settings is not taken for an earlier upload"""
+        self.analyzer.analyze_audio(self._audio_file())
+        self.analyzer._preprocessor = MagicMock(settings="8000hz-1ch-16k")
+        self.analyzer._preprocessor.prepare.return_value = self.audio_path
+
+        self.analyzer.analyze_audio(self._audio_file())
+
+        self.assertEqual(self.client.upload_file.call_count, 2)
+        self.client.get_file.assert_not_called()
+
+    def test_unusable_registry_does_not_fail_the_analysis(self):
+        """Without a working registry the file is simply uploaded"""
+        blocker = os.path.join(self.temp_dir.name, "file")
+        Path(blocker).write_text("not a folder")
+        self.analyzer._upload_registry = UploadRegistry(
+            os.path.join(blocker, "up.sqlite")
+        )
+
+        result = self.analyzer.analyze_audio(self._audio_file())
+
+        self.assertTrue(result.is_successful)
+        self.assertEqual(self.client.upload_file.call_count, 1)
+
+    def test_missing_remote_file_triggers_upload(self):
+        """A handle the server no longer knows is replaced by a new upload"""
+        self.analyzer.analyze_audio(self._audio_file())
+        self.client.get_file.side_effect = Exception("404 not found")
+
+        result = self.analyzer.analyze_audio(self._audio_file())
+
+        self.assertTrue(result.is_successful)
+        self.assertEqual(self.client.upload_file.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()